@@ -1,39 +1,185 @@
+import importlib
 import os
 import logging
+import sys
+import threading
 
 from flask import Flask
 from flask_cors import CORS
 
 from config import config_by_name
 from routes.health import health_bp
-from routes.migrations import migrations_bp
-from routes.resources import resources_bp
-from routes.analytics import analytics_bp
+from routes.metrics import register_request_metrics
+from routes.profiling import register_profiling
+from services.instrumentation import configure_instrumentation
+from services.response_cache import configure_response_cache
+
+# API blueprints: (module, attribute, URL prefix). Route and service modules
+# are imported through here only, so LAZY_LOADING can leave them (and numpy,
+# marshmallow) unimported until first use.
+API_BLUEPRINTS = (
+    ("routes.migrations", "migrations_bp", "/api/v1/migrations"),
+    ("routes.resources", "resources_bp", "/api/v1/resources"),
+    ("routes.analytics", "analytics_bp", "/api/v1/analytics"),
+)
+
+
+def _setup_store(config):
+    from services.migration_service import configure_change_feed, configure_store
+    os.makedirs(config["MIGRATION_STATE_DIR"], exist_ok=True)
+    configure_store(config["MIGRATION_STORE_BACKEND"])
+    configure_change_feed(config["SSE_BUFFER_SIZE"])
+
+
+def _setup_discovery(config):
+    from services.resource_service import configure_discovery
+    engine = None
+    if config["DISCOVERY_ENABLED"]:
+        from services.discovery import engine_from_config
+        engine = engine_from_config(config)
+    configure_discovery(engine, config["DISCOVERY_INTERVAL_SECONDS"])
+
+
+def _setup_pricing(config):
+    from services.analytics_service import configure_pricing
+    configure_pricing(config["PRICING_CATALOG_PATH"])
+
+
+def _setup_metrics(config):
+    from services.analytics_service import configure_metrics
+    configure_metrics(config["METRICS_STORE_DIR"])
+
+
+def _setup_dependencies(config):
+    from services.dependency_service import configure_dependency_sources
+    configure_dependency_sources(config["DEPENDENCY_EDGE_FILES"],
+                                 config["DEPENDENCY_SECURITY_GROUPS_FILE"])
+
+
+def _setup_executor(config):
+    from services.executor import configure_executor, parse_type_limits
+    configure_executor(config["EXECUTOR_MAX_WORKERS"],
+                       config["EXECUTOR_ACCOUNT_LIMIT"],
+                       parse_type_limits(config["EXECUTOR_TYPE_LIMITS"]),
+                       max_attempts=config["EXECUTOR_MAX_ATTEMPTS"])
+
+
+# step -> (module it configures, setup), in the order an eager start runs them.
+# A step runs once its module is loaded, before any request can use it.
+SERVICE_SETUP = {
+    "store": ("services.migration_service", _setup_store),
+    "discovery": ("services.resource_service", _setup_discovery),
+    "pricing": ("services.analytics_service", _setup_pricing),
+    "metrics": ("services.analytics_service", _setup_metrics),
+    "dependencies": ("services.dependency_service", _setup_dependencies),
+    "executor": ("services.executor", _setup_executor),
+}
+
+
+def _load_blueprint(module, attribute):
+    return getattr(importlib.import_module(module), attribute)
+
+
+def _run_setup(config, done, lazy=True):
+    """Run the steps not in ``done`` (only those whose module is loaded if ``lazy``)."""
+    for step, (module, setup) in SERVICE_SETUP.items():
+        if step not in done and (not lazy or module in sys.modules):
+            setup(config)
+            done.add(step)
+
+
+class LazyBlueprints:
+    """WSGI middleware importing each API blueprint on its first request.
+
+    A request under a blueprint's URL prefix builds (once) a small Flask
+    app holding that blueprint, with the root app's config and request
+    hooks, after configuring the services the import loaded. Everything
+    else (health checks, ``/metrics``, unknown paths) goes to the root app.
+    """
+
+    def __init__(self, root, blueprints=API_BLUEPRINTS, setup_done=()):
+        self.root = root
+        self.wsgi_app = root.wsgi_app
+        self.blueprints = {prefix: (module, attribute) for module, attribute, prefix in blueprints}
+        self._apps = {}
+        self._setup_done = set(setup_done)
+        self._lock = threading.Lock()
+
+    def _build(self, prefix):
+        blueprint = _load_blueprint(*self.blueprints[prefix])
+        _run_setup(self.root.config, self._setup_done)
+        app = Flask(self.root.import_name)
+        app.config.update(self.root.config)
+        _install_request_hooks(app, sub_app=True)
+        app.register_blueprint(blueprint, url_prefix=prefix)
+        return app
+
+    def mount(self, prefix):
+        app = self._apps.get(prefix)
+        if app is None:
+            with self._lock:
+                app = self._apps.get(prefix)
+                if app is None:
+                    app = self._apps[prefix] = self._build(prefix)
+        return app
+
+    def load_all(self):
+        """Import every blueprint now (warm-up)."""
+        for prefix in self.blueprints:
+            self.mount(prefix)
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        for prefix in self.blueprints:
+            if path == prefix or path.startswith(prefix + "/"):
+                return self.mount(prefix)(environ, start_response)
+        return self.wsgi_app(environ, start_response)
+
+
+def _install_request_hooks(app, sub_app=False):
+    CORS(app, resources={r"/api/*": {"origins": "*"}})
+    register_request_metrics(app, endpoint=not sub_app)
+    register_profiling(app, admin=not sub_app)
 
 
 def create_app(config_name=None):
-    """Application factory for the CloudMigrate Pro backend."""
+    """Application factory for the CloudMigrate Pro backend.
+
+    With ``LAZY_LOADING`` the API blueprints and their services are
+    imported on the first request under their prefix (see
+    ``LazyBlueprints``), which keeps cold starts short on Lambda. Modules
+    this process has already imported cost nothing more, so those are
+    registered and configured right away either way; later
+    reconfiguration (``configure_store`` etc.) is never overridden.
+    """
     if config_name is None:
         config_name = os.environ.get("FLASK_ENV", "development")
 
     app = Flask(__name__)
     app.config.from_object(config_by_name[config_name])
 
-    CORS(app, resources={r"/api/*": {"origins": "*"}})
-
     logging.basicConfig(
         level=getattr(logging, app.config["LOG_LEVEL"]),
         format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
     )
 
-    app.register_blueprint(health_bp)
-    app.register_blueprint(migrations_bp, url_prefix="/api/v1/migrations")
-    app.register_blueprint(resources_bp, url_prefix="/api/v1/resources")
-    app.register_blueprint(analytics_bp, url_prefix="/api/v1/analytics")
-
-    state_dir = app.config["MIGRATION_STATE_DIR"]
-    os.makedirs(state_dir, exist_ok=True)
+    configure_instrumentation(app.config["INSTRUMENTATION_ENABLED"])
+    _install_request_hooks(app)
+    configure_response_cache(app.config["RESPONSE_CACHE_SIZE"],
+                             app.config["RESPONSE_CACHE_TTL"])
 
+    app.register_blueprint(health_bp)
+    lazy = app.config["LAZY_LOADING"]
+    deferred = []
+    for module, attribute, prefix in API_BLUEPRINTS:
+        if lazy and module not in sys.modules:
+            deferred.append((module, attribute, prefix))
+        else:
+            app.register_blueprint(_load_blueprint(module, attribute), url_prefix=prefix)
+    done = set()
+    _run_setup(app.config, done, lazy=lazy)
+    if deferred:
+        app.wsgi_app = LazyBlueprints(app, deferred, setup_done=done)
     return app
 
 
@@ -0,0 +1,4 @@
+"""Scale benchmarks for the hot paths of the migration and resource APIs.
+
+See ``benchmarks/suite.py``; run with ``python -m benchmarks``.
+"""
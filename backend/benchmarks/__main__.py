@@ -0,0 +1,138 @@
+"""Command line for the benchmark suite.
+
+    python -m benchmarks run --migrations 1000,100000 --output benchmarks/baselines/local.json
+    python -m benchmarks compare benchmarks/baselines/local.json [current.json] --threshold 0.25
+    python -m benchmarks load benchmarks/scenarios/stores.yaml --only sqlite-sync
+    python -m benchmarks startup --repeat 5
+
+``compare`` without a second file re-runs the suite with the baseline's
+sizes, backends and seed first. It exits with status 1 when any case
+regressed past the threshold.
+
+``load`` runs the scenarios of a file against gunicorn (see
+``benchmarks.load``). It exits with status 1 when a scenario lost writes.
+
+``startup`` compares cold starts of the eager and ``LAZY_LOADING`` app
+factory, with an ``-X importtime`` breakdown (see ``benchmarks.startup``).
+"""
+import argparse
+import json
+import sys
+
+from benchmarks.load import format_comparison, format_report, load_scenarios, run_scenario
+from benchmarks.startup import DEFAULT_REPEAT as STARTUP_REPEAT, format_startup, run_startup
+from benchmarks.suite import (
+    DEFAULT_BACKENDS,
+    DEFAULT_MIGRATION_SIZES,
+    DEFAULT_REPEAT,
+    DEFAULT_RESOURCE_SIZES,
+    DEFAULT_THRESHOLD,
+    compare,
+    run_suite,
+)
+
+
+def _sizes(value):
+    return [int(v) for v in value.split(",") if v]
+
+
+def _print_group(group):
+    for case, timing in group.items():
+        print(f"{case:<60} {timing['median_ms']:>10.3f} ms  (p95 {timing['p95_ms']:.3f})",
+              flush=True)
+
+
+def _load(args):
+    scenarios = load_scenarios(args.scenarios)
+    if args.only:
+        scenarios = [s for s in scenarios if s["name"] in args.only]
+    reports = []
+    for scenario in scenarios:
+        if args.duration is not None:
+            scenario["load"]["duration"] = args.duration
+        report = run_scenario(scenario, progress=lambda line: print(line, flush=True))
+        print(format_report(report), end="\n\n", flush=True)
+        reports.append(report)
+    if len(reports) > 1:
+        print(format_comparison(reports))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"scenarios": reports}, f, indent=2, sort_keys=True)
+            f.write("\n")
+    integrity = [r["integrity"] for r in reports]
+    return 1 if any(i["lost_updates"] or i["lost_creates"] or i["resurrected_deletes"]
+                    for i in integrity) else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the suite and print (or save) the timings")
+    run.add_argument("--migrations", type=_sizes, default=list(DEFAULT_MIGRATION_SIZES))
+    run.add_argument("--resources", type=_sizes, default=list(DEFAULT_RESOURCE_SIZES))
+    run.add_argument("--backends", type=lambda v: v.split(","), default=list(DEFAULT_BACKENDS))
+    run.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--output", help="write the results as JSON (a baseline)")
+
+    cmp = commands.add_parser("compare", help="fail if a case regressed against a baseline")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current", nargs="?", help="results to check (default: run the suite now)")
+    cmp.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                     help="allowed median slowdown as a fraction (default %(default)s)")
+    load = commands.add_parser("load", help="drive gunicorn with concurrent clients")
+    load.add_argument("scenarios", help="scenario file (YAML)")
+    load.add_argument("--only", type=lambda v: v.split(","), help="scenario names to run")
+    load.add_argument("--duration", type=float, help="override every scenario's duration")
+    load.add_argument("--output", help="write the reports as JSON")
+    startup = commands.add_parser("startup", help="cold-start time, memory and import breakdown")
+    startup.add_argument("--repeat", type=int, default=STARTUP_REPEAT)
+    startup.add_argument("--top", type=int, default=12, help="packages shown per breakdown")
+    startup.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.command == "load":
+        return _load(args)
+    if args.command == "startup":
+        report = run_startup(args.repeat)
+        print(format_startup(report, top=args.top))
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+                f.write("\n")
+        return 0
+
+    if args.command == "run":
+        results = run_suite(args.migrations, args.resources, args.backends, args.repeat,
+                            args.seed, progress=_print_group)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+                f.write("\n")
+            print(f"Wrote {len(results['results'])} timings to {args.output}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if args.current:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        meta = baseline["meta"]
+        current = run_suite(meta["migration_sizes"], meta["resource_sizes"], meta["backends"],
+                            meta["repeat"], meta["seed"], progress=_print_group)
+
+    regressions = compare(baseline, current, threshold=args.threshold)
+    for r in regressions:
+        print(f"REGRESSION {r['case']}: {r['baseline_ms']:.3f} -> {r['current_ms']:.3f} ms "
+              f"(+{r['change']:.0%})")
+    compared = len(set(baseline["results"]) & set(current["results"]))
+    print(f"{compared} cases compared, {len(regressions)} regressed "
+          f"(threshold {args.threshold:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
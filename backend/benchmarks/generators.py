@@ -0,0 +1,143 @@
+"""Seeded synthetic data at production-like scale.
+
+Resources follow the shape discovery produces (``services/discovery.py``):
+a skewed mix of types over a handful of regions and accounts, specs per
+type, and tags with realistic cardinality -- a few environments, teams
+and applications following a Zipf-like distribution, and a cost-center
+tag with a value per few dozen resources. Migrations carry nested
+``ResourceSchema`` entries drawn from such an inventory.
+
+The same ``seed`` always produces the same data.
+"""
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from models.migration import VALID_STRATEGIES
+
+REGIONS = ("us-east-1", "us-east-1", "us-east-1", "us-west-2", "us-west-2", "eu-west-1",
+           "eu-central-1", "ap-southeast-2")
+ENVIRONMENTS = ("production", "staging", "development", "sandbox")
+
+# Relative frequency of each type in a typical estate.
+TYPE_WEIGHTS = {
+    "ec2_instance": 40,
+    "s3_bucket": 15,
+    "lambda_function": 15,
+    "ecs_service": 8,
+    "rds_database": 7,
+    "load_balancer": 6,
+    "elasticache_cluster": 5,
+    "api_gateway": 4,
+}
+
+STATUS_WEIGHTS = {
+    "pending": 30, "analyzing": 5, "ready": 10, "in_progress": 10, "validating": 5,
+    "completed": 30, "failed": 7, "rolled_back": 3,
+}
+
+_INSTANCE_TYPES = ("t3.micro", "t3.medium", "m5.large", "m5.xlarge", "c5.2xlarge", "r5.large")
+_DB_CLASSES = ("db.t3.medium", "db.m5.large", "db.r5.xlarge")
+_CACHE_NODES = ("cache.t3.medium", "cache.r6g.large")
+_EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _zipf_names(prefix, count):
+    names = [f"{prefix}-{i:03d}" for i in range(count)]
+    return names, [1.0 / (i + 1) for i in range(count)]
+
+
+def _specs(rng, rtype):
+    if rtype == "ec2_instance":
+        return {"instance_type": rng.choice(_INSTANCE_TYPES),
+                "state": "running" if rng.random() < 0.9 else "stopped"}
+    if rtype == "rds_database":
+        return {"engine": rng.choice(("postgres", "mysql", "aurora-postgresql")),
+                "instance_class": rng.choice(_DB_CLASSES), "multi_az": rng.random() < 0.4,
+                "size_gb": rng.choice((20, 100, 500, 2000))}
+    if rtype == "s3_bucket":
+        return {"versioning": rng.random() < 0.5, "size_gb": round(rng.lognormvariate(4, 2), 1)}
+    if rtype == "lambda_function":
+        return {"runtime": rng.choice(("python3.12", "nodejs20.x", "java21")),
+                "memory_mb": rng.choice((128, 256, 512, 1024)), "timeout_s": 30}
+    if rtype == "ecs_service":
+        return {"launch_type": "FARGATE", "desired_count": rng.randint(1, 12)}
+    if rtype == "elasticache_cluster":
+        return {"engine": "redis", "node_type": rng.choice(_CACHE_NODES),
+                "num_nodes": rng.randint(1, 6)}
+    if rtype == "load_balancer":
+        return {"type": rng.choice(("application", "network")), "scheme": "internet-facing"}
+    return {"endpoint_type": "REGIONAL"}
+
+
+def generate_resources(count, seed=0, accounts=4):
+    """``count`` inventory resources (discovery format), sorted by ``resource_id``."""
+    rng = random.Random(seed)
+    types = list(TYPE_WEIGHTS)
+    type_weights = list(TYPE_WEIGHTS.values())
+    teams, team_weights = _zipf_names("team", max(4, int(count ** 0.5) // 4))
+    apps, app_weights = _zipf_names("app", max(8, int(count ** 0.5)))
+    account_ids = [f"{100000000000 + i * 111111111:012d}" for i in range(accounts)]
+
+    resources = []
+    for i in range(count):
+        rtype = rng.choices(types, type_weights)[0]
+        tags = {"environment": rng.choice(ENVIRONMENTS),
+                "team": rng.choices(teams, team_weights)[0]}
+        if rng.random() < 0.8:
+            tags["app"] = rng.choices(apps, app_weights)[0]
+        if rng.random() < 0.6:
+            tags["cost-center"] = f"cc-{rng.randrange(max(1, count // 40)):05d}"
+        resources.append({
+            "resource_id": f"{rtype.split('_')[0]}-{i:08d}",
+            "resource_type": rtype,
+            "name": f"{tags.get('app', 'shared')}-{rtype}-{i}",
+            "region": rng.choice(REGIONS),
+            "account_id": rng.choice(account_ids),
+            "tags": tags,
+            "specs": _specs(rng, rtype),
+        })
+    resources.sort(key=lambda r: r["resource_id"])
+    return resources
+
+
+def migration_resource(resource):
+    """The ``ResourceSchema`` entry a migration keeps for an inventory resource."""
+    return {key: resource[key] for key in ("resource_id", "resource_type", "name", "region",
+                                           "tags")}
+
+
+def generate_migrations(count, seed=0, resources=None, max_resources=8):
+    """Yield ``count`` migration records with up to ``max_resources`` nested resources.
+
+    ``resources`` is the inventory to draw from (a small generated one by
+    default). Records are yielded lazily so a million of them can be
+    streamed into a store.
+    """
+    rng = random.Random(seed)
+    resources = resources or generate_resources(2000, seed=seed)
+    entries = [migration_resource(r) for r in resources]
+    statuses = list(STATUS_WEIGHTS)
+    status_weights = list(STATUS_WEIGHTS.values())
+    for i in range(count):
+        status = rng.choices(statuses, status_weights)[0]
+        created = _EPOCH + timedelta(seconds=rng.randrange(365 * 86400))
+        updated = created + timedelta(seconds=rng.randrange(7 * 86400))
+        started = updated.isoformat() if status not in ("pending", "analyzing", "ready") else None
+        yield {
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "name": f"wave-{i // 100:05d}-{i % 100:02d}",
+            "source_environment": rng.choice(("on-prem-dc1", "on-prem-dc2", "colo-east")),
+            "target_environment": f"aws-{rng.choice(REGIONS)}",
+            "strategy": rng.choice(VALID_STRATEGIES),
+            "status": status,
+            "resources": rng.sample(entries, rng.randint(0, min(max_resources, len(entries)))),
+            "created_at": created.isoformat(),
+            "updated_at": updated.isoformat(),
+            "started_at": started,
+            "completed_at": updated.isoformat() if status == "completed" else None,
+            "error_log": ([{"timestamp": updated.isoformat(), "message": "Synthetic failure"}]
+                          if status == "failed" else []),
+            "rollback_available": status == "completed",
+        }
+
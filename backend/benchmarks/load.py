@@ -0,0 +1,483 @@
+"""End-to-end load harness: the app under gunicorn, driven by client processes.
+
+A scenario file (YAML) lists scenarios, each merged over ``defaults``::
+
+    defaults:
+      server: {workers: 4, threads: 1}
+      preload: {migrations: 2000}
+      load: {clients: 8, duration: 20}
+      mix: {"GET /migrations": 20, "PATCH /migrations/:id": 10, ...}
+    scenarios:
+      - name: jsonlog-sync
+        server: {env: {MIGRATION_STORE_BACKEND: jsonlog}}
+      - name: sqlite-gthread
+        server: {threads: 8, env: {MIGRATION_STORE_BACKEND: sqlite}}
+
+For each scenario gunicorn is started on a free local port with a fresh
+state directory, preloaded through ``POST /migrations/bulk``, and driven
+by ``clients`` processes, each running a closed loop over operations
+picked by the ``mix`` weights (see ``OPERATIONS``) on a keep-alive
+connection. Requests during ``warmup`` are not counted.
+
+Every client PATCHes only migrations it owns, with a unique name per
+write, and remembers what it created and deleted; afterwards the harness
+reads them back and counts lost updates, lost creates, resurrected
+deletes and stats drift (``/migrations/stats`` total versus the listing
+total). The report has throughput, p50/p95/p99 latency and errors per
+endpoint.
+"""
+import bisect
+import copy
+import http.client
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+from benchmarks.generators import generate_migrations
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API = "/api/v1"
+
+DEFAULTS = {
+    "server": {"workers": 2, "threads": 1, "worker_class": None, "timeout": 120, "env": {}},
+    "preload": {"migrations": 1000, "seed": 0},
+    "load": {"clients": 4, "duration": 10.0, "warmup": 1.0, "owned": 10, "seed": 0},
+    "mix": {
+        "GET /migrations": 15,
+        "GET /migrations?status": 5,
+        "GET /migrations/:id": 15,
+        "POST /migrations": 5,
+        "PATCH /migrations/:id": 15,
+        "DELETE /migrations/:id": 2,
+        "GET /migrations/stats": 8,
+        "POST /migrations/bulk": 1,
+        "POST /migrations/:id/simulate": 1,
+        "GET /resources": 8,
+        "GET /resources/:id": 5,
+        "GET /resources/summary": 4,
+        "GET /resources/changes": 2,
+        "GET /resources?sort=risk": 2,
+        "GET /analytics/dashboard": 5,
+        "GET /analytics/cost-estimate/all": 2,
+        "POST /analytics/cost-estimate": 2,
+        "GET /analytics/cost-estimate/matrix": 1,
+        "GET /analytics/dependency-plan": 1,
+        "GET /analytics/recommendations": 1,
+    },
+}
+
+PRELOAD_BATCH = 2000
+_CREATE_FIELDS = ("name", "source_environment", "target_environment", "strategy", "resources")
+_STATUSES = ("pending", "analyzing", "ready", "in_progress", "validating")
+
+
+def _merge(base, override):
+    merged = copy.deepcopy(base)
+    for key, value in (override or {}).items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict) and key != "mix":
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def load_scenarios(path):
+    """Scenarios from a YAML file, each merged over ``DEFAULTS`` and the file's defaults."""
+    with open(path) as f:
+        config = yaml.safe_load(f) or {}
+    defaults = _merge(DEFAULTS, config.get("defaults"))
+    scenarios = []
+    for i, scenario in enumerate(config.get("scenarios") or [{}]):
+        merged = _merge(defaults, scenario)
+        merged.setdefault("name", f"scenario-{i + 1}")
+        unknown = set(merged["mix"]) - set(OPERATIONS)
+        if unknown:
+            raise ValueError(f"{merged['name']}: unknown operations {sorted(unknown)}")
+        scenarios.append(merged)
+    return scenarios
+
+
+# -- client side -----------------------------------------------------------------
+
+class _Session:
+    """One client process: a keep-alive connection plus what it has written."""
+
+    def __init__(self, port, index, seed, migration_ids, resource_ids):
+        self.port = port
+        self.index = index
+        self.rng = random.Random(f"{seed}-{index}")
+        self.migration_ids = migration_ids
+        self.resource_ids = resource_ids
+        self.owned = {}          # id -> name last written (None: outcome unknown)
+        self.created = []        # ids created and not deleted by this client
+        self.deleted = []
+        self.writes = itertools.count()
+        self.conn = None
+
+    def request(self, method, path, body=None):
+        """``(status, body bytes)``; raises on connection errors (after reconnecting)."""
+        headers = {}
+        if body is not None:
+            body = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+        try:
+            self.conn.request(method, API + path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            return response.status, response.read()
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = None
+            raise
+
+    def any_migration(self):
+        pool = self.created if self.created and self.rng.random() < 0.3 else self.migration_ids
+        return self.rng.choice(pool)
+
+    def new_migration(self):
+        return {"name": f"load-{self.index}-{next(self.writes)}",
+                "source_environment": "on-prem-dc1", "target_environment": "aws-us-east-1",
+                "strategy": self.rng.choice(("rehost", "replatform", "refactor"))}
+
+
+def _create(session):
+    status, body = session.request("POST", "/migrations", session.new_migration())
+    if status == 201:
+        session.created.append(json.loads(body)["id"])
+    return status, body
+
+
+def _patch(session):
+    mid = session.rng.choice(list(session.owned))
+    name = f"owned-{session.index}-{next(session.writes)}"
+    session.owned[mid] = None
+    status, body = session.request("PATCH", f"/migrations/{mid}",
+                                   {"name": name, "status": session.rng.choice(_STATUSES)})
+    if status == 200:
+        session.owned[mid] = name
+    return status, body
+
+
+def _delete(session):
+    if not session.created:
+        return _create(session)
+    mid = session.created.pop(session.rng.randrange(len(session.created)))
+    status, body = session.request("DELETE", f"/migrations/{mid}")
+    if status == 200:
+        session.deleted.append(mid)
+    else:
+        session.created.append(mid)
+    return status, body
+
+
+def _bulk_create(session):
+    items = [session.new_migration() for _ in range(10)]
+    status, body = session.request("POST", "/migrations/bulk", items)
+    if status == 201:
+        session.created.extend(r["id"] for r in json.loads(body)["results"] if "id" in r)
+    return status, body
+
+
+def _cost_estimate(session):
+    ids = session.rng.sample(session.resource_ids, min(5, len(session.resource_ids)))
+    resources = [{"resource_id": rid, "resource_type": "ec2_instance"} for rid in ids]
+    return session.request("POST", "/analytics/cost-estimate",
+                           {"resources": resources, "strategy": "replatform"})
+
+
+# operation name -> callable(session) returning (status, body)
+OPERATIONS = {
+    "GET /migrations": lambda s: s.request("GET", "/migrations?limit=50"),
+    "GET /migrations?status": lambda s: s.request(
+        "GET", f"/migrations?limit=50&status={s.rng.choice(_STATUSES)}"),
+    "GET /migrations/:id": lambda s: s.request("GET", f"/migrations/{s.any_migration()}"),
+    "POST /migrations": _create,
+    "PATCH /migrations/:id": _patch,
+    "DELETE /migrations/:id": _delete,
+    "GET /migrations/stats": lambda s: s.request("GET", "/migrations/stats"),
+    "GET /migrations/export": lambda s: s.request("GET", "/migrations/export?status=failed"),
+    "POST /migrations/bulk": _bulk_create,
+    "POST /migrations/:id/simulate": lambda s: s.request(
+        "POST", f"/migrations/{s.any_migration()}/simulate", {"iterations": 100}),
+    "GET /resources": lambda s: s.request("GET", "/resources?limit=50"),
+    "GET /resources/:id": lambda s: s.request("GET", f"/resources/{s.rng.choice(s.resource_ids)}"),
+    "GET /resources/summary": lambda s: s.request("GET", "/resources/summary"),
+    "GET /resources/changes": lambda s: s.request("GET", "/resources/changes?since=1"),
+    "GET /resources/export": lambda s: s.request("GET", "/resources/export"),
+    "GET /resources?sort=risk": lambda s: s.request("GET", "/resources?sort=risk&limit=50"),
+    "GET /analytics/dashboard": lambda s: s.request("GET", "/analytics/dashboard"),
+    "GET /analytics/cost-estimate/all": lambda s: s.request("GET", "/analytics/cost-estimate/all"),
+    "POST /analytics/cost-estimate": _cost_estimate,
+    "GET /analytics/cost-estimate/matrix": lambda s: s.request(
+        "GET", "/analytics/cost-estimate/matrix"),
+    "GET /analytics/dependency-plan": lambda s: s.request(
+        "GET", f"/analytics/dependency-plan?migration_id={s.any_migration()}"),
+    "GET /analytics/recommendations": lambda s: s.request(
+        "GET", "/analytics/recommendations?limit=20"),
+}
+
+# Status codes that are a correct answer, not an error, per operation.
+_EXPECTED = {
+    "GET /migrations/:id": (200, 404),       # may race with a delete
+    "POST /migrations/:id/simulate": (200, 404),
+    "GET /analytics/dependency-plan": (200, 404),
+}
+
+
+def _drive(port, index, scenario, migration_ids, resource_ids, start_at):
+    """Client process body; returns its samples and write bookkeeping."""
+    load = scenario["load"]
+    session = _Session(port, index, load["seed"], migration_ids, resource_ids)
+    for _ in range(load["owned"]):
+        status, body = _create(session)
+        if status == 201:
+            mid = session.created.pop()
+            session.owned[mid] = json.loads(body)["name"]
+
+    names = [op for op, weight in scenario["mix"].items() if weight > 0]
+    cumulative = list(itertools.accumulate(scenario["mix"][op] for op in names))
+    if not session.owned:
+        names = [op for op in names if op != "PATCH /migrations/:id"]
+        cumulative = list(itertools.accumulate(scenario["mix"][op] for op in names))
+
+    samples = {op: [] for op in names}
+    errors = {op: 0 for op in names}
+    error_examples = {}
+    time.sleep(max(0.0, start_at - time.time()))
+    measure_from = time.time() + load["warmup"]
+    stop_at = measure_from + load["duration"]
+
+    while True:
+        now = time.time()
+        if now >= stop_at:
+            break
+        op = names[bisect.bisect_right(cumulative, session.rng.random() * cumulative[-1])]
+        started = time.perf_counter()
+        try:
+            status, body = OPERATIONS[op](session)
+            failed = status not in _EXPECTED.get(op, (200, 201, 202))
+        except (OSError, http.client.HTTPException, ValueError) as exc:
+            status, body, failed = None, str(exc).encode(), True
+        elapsed = (time.perf_counter() - started) * 1000
+        if now < measure_from:
+            continue
+        samples[op].append(elapsed)
+        if failed:
+            errors[op] += 1
+            error_examples.setdefault(op, f"{status}: {body[:200].decode(errors='replace')}")
+
+    return {"samples": samples, "errors": errors, "error_examples": error_examples,
+            "owned": session.owned, "created": session.created, "deleted": session.deleted}
+
+
+def _drive_star(args):
+    return _drive(*args)
+
+
+# -- server side -----------------------------------------------------------------
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class _Server:
+    """gunicorn serving ``app:create_app()`` from a fresh state directory."""
+
+    def __init__(self, server):
+        self.port = _free_port()
+        self.state_dir = tempfile.mkdtemp(prefix="load-migrations-")
+        cmd = [sys.executable, "-m", "gunicorn", "--bind", f"127.0.0.1:{self.port}",
+               "--workers", str(server["workers"]), "--threads", str(server["threads"]),
+               "--timeout", str(server["timeout"]), "--log-level", "warning"]
+        if server.get("worker_class"):
+            cmd += ["--worker-class", server["worker_class"]]
+        env = dict(os.environ, MIGRATION_STATE_DIR=self.state_dir, LOG_LEVEL="WARNING",
+                   FLASK_ENV="production")
+        env.update({k: str(v) for k, v in (server.get("env") or {}).items()})
+        self.process = subprocess.Popen(cmd + ["app:create_app()"], cwd=BACKEND_DIR, env=env)
+
+    def request(self, method, path, body=None, content_type="application/json"):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=120)
+        try:
+            conn.request(method, path, body=body, headers={"Content-Type": content_type})
+            response = conn.getresponse()
+            return response.status, response.read()
+        finally:
+            conn.close()
+
+    def wait_ready(self, timeout=30.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with status {self.process.returncode}")
+            try:
+                if self.request("GET", "/healthz")[0] == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.1)
+        raise RuntimeError("gunicorn did not become ready")
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+
+
+def _preload(server, count, seed):
+    """Create ``count`` migrations through the bulk endpoint; returns their ids."""
+    ids = []
+    records = generate_migrations(count, seed=seed)
+    while True:
+        batch = list(itertools.islice(records, PRELOAD_BATCH))
+        if not batch:
+            return ids
+        body = "\n".join(json.dumps({k: r[k] for k in _CREATE_FIELDS}) for r in batch)
+        status, response = server.request("POST", f"{API}/migrations/bulk", body,
+                                          content_type="application/x-ndjson")
+        if status != 201:
+            raise RuntimeError(f"preload failed with {status}: {response[:200]!r}")
+        ids.extend(r["id"] for r in json.loads(response)["results"] if "id" in r)
+
+
+def _verify(server, clients):
+    """Read back every client's writes; returns ``{check: count}``."""
+    def exists(mid):
+        status, body = server.request("GET", f"{API}/migrations/{mid}")
+        return json.loads(body) if status == 200 else None
+
+    lost_updates = lost_creates = resurrected = 0
+    for result in clients:
+        for mid, name in result["owned"].items():
+            record = exists(mid)
+            if name is not None and (record is None or record["name"] != name):
+                lost_updates += 1
+        lost_creates += sum(1 for mid in result["created"] if exists(mid) is None)
+        resurrected += sum(1 for mid in result["deleted"] if exists(mid) is not None)
+
+    stats = json.loads(server.request("GET", f"{API}/migrations/stats")[1])
+    listed = json.loads(server.request("GET", f"{API}/migrations?limit=1")[1])
+    return {"lost_updates": lost_updates, "lost_creates": lost_creates,
+            "resurrected_deletes": resurrected,
+            "stats_drift": abs(stats["total"] - listed["total"])}
+
+
+def _percentile(ordered, q):
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+
+def summarize(clients, duration):
+    """Per-endpoint and total throughput, latency percentiles and errors."""
+    endpoints = {}
+    everything = []
+    total_errors = 0
+    for op in sorted({op for c in clients for op in c["samples"]}):
+        latencies = sorted(itertools.chain.from_iterable(c["samples"].get(op, ())
+                                                         for c in clients))
+        errors = sum(c["errors"].get(op, 0) for c in clients)
+        example = next((c["error_examples"][op] for c in clients
+                        if op in c["error_examples"]), None)
+        everything.extend(latencies)
+        total_errors += errors
+        endpoints[op] = {
+            "requests": len(latencies),
+            "errors": errors,
+            "rps": round(len(latencies) / duration, 1),
+            "p50_ms": _percentile(latencies, 0.50),
+            "p95_ms": _percentile(latencies, 0.95),
+            "p99_ms": _percentile(latencies, 0.99),
+            "max_ms": round(latencies[-1], 2) if latencies else None,
+        }
+        if example:
+            endpoints[op]["error_example"] = example
+    everything.sort()
+    total = {
+        "requests": len(everything),
+        "errors": total_errors,
+        "rps": round(len(everything) / duration, 1),
+        "p50_ms": _percentile(everything, 0.50),
+        "p95_ms": _percentile(everything, 0.95),
+        "p99_ms": _percentile(everything, 0.99),
+    }
+    return total, endpoints
+
+
+def run_scenario(scenario, progress=None):
+    """Start gunicorn, preload, drive the load, verify; returns the report."""
+    server = _Server(scenario["server"])
+    try:
+        server.wait_ready()
+        if progress:
+            progress(f"[{scenario['name']}] gunicorn on port {server.port}, preloading "
+                     f"{scenario['preload']['migrations']} migrations")
+        migration_ids = _preload(server, scenario["preload"]["migrations"],
+                                 scenario["preload"]["seed"])
+        status, body = server.request("GET", f"{API}/resources?limit=200")
+        resource_ids = [r["resource_id"] for r in json.loads(body)["items"]]
+        if not migration_ids:
+            migration_ids = ["missing"]
+
+        load = scenario["load"]
+        start_at = time.time() + 1.0 + 0.05 * load["clients"]
+        args = [(server.port, i, scenario, migration_ids, resource_ids, start_at)
+                for i in range(load["clients"])]
+        if progress:
+            progress(f"[{scenario['name']}] {load['clients']} clients for {load['duration']}s")
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(load["clients"]) as pool:
+            clients = pool.map(_drive_star, args)
+
+        total, endpoints = summarize(clients, load["duration"])
+        integrity = _verify(server, clients)
+    finally:
+        server.stop()
+
+    return {"name": scenario["name"], "server": scenario["server"], "load": load,
+            "total": total, "integrity": integrity, "endpoints": endpoints}
+
+
+def format_report(report):
+    lines = [f"== {report['name']} (workers={report['server']['workers']}, "
+             f"threads={report['server']['threads']}, clients={report['load']['clients']})",
+             f"{'endpoint':<38} {'req':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} "
+             f"{'p99':>8}"]
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["total"])]
+    for name, row in rows:
+        lines.append(f"{name:<38} {row['requests']:>7} {row['errors']:>5} {row['rps']:>8.1f} "
+                     + " ".join(f"{row[k] if row[k] is not None else '-':>8}"
+                                for k in ("p50_ms", "p95_ms", "p99_ms")))
+    lines.append("integrity: " + ", ".join(f"{k}={v}" for k, v in report["integrity"].items()))
+    for name, row in report["endpoints"].items():
+        if "error_example" in row:
+            lines.append(f"  {name} error: {row['error_example']}")
+    return "\n".join(lines)
+
+
+def format_comparison(reports):
+    lines = [f"{'scenario':<28} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>7} "
+             f"{'lost':>5}"]
+    for report in reports:
+        total, integrity = report["total"], report["integrity"]
+        lost = integrity["lost_updates"] + integrity["lost_creates"]
+        lines.append(f"{report['name']:<28} {total['rps']:>8.1f} {total['p50_ms']:>8} "
+                     f"{total['p95_ms']:>8} {total['p99_ms']:>8} {total['errors']:>7} {lost:>5}")
+    return "\n".join(lines)
@@ -0,0 +1,131 @@
+"""Cold-start cost of the app factory, eager versus ``LAZY_LOADING``.
+
+Each run is a fresh interpreter that imports ``app``, calls
+``create_app("production")`` and then sends its first requests through
+the test client, the way a Lambda cold start meets its first event.
+Reported per mode (medians over ``repeat`` runs): time to a ready app,
+peak RSS, the latency of each first request, and how many modules were
+loaded. One extra run under ``python -X importtime`` gives the import
+breakdown up to the ready app: self time summed per top-level package,
+largest first.
+"""
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ("eager", "lazy")
+DEFAULT_REPEAT = 5
+DEFAULT_PROBES = ("/healthz", "/api/v1/resources?limit=10", "/api/v1/migrations?limit=10",
+                  "/api/v1/analytics/dashboard")
+
+READY_MARKER = "-- app ready --"
+_CHILD = """
+import json, resource, sys, time
+started = time.perf_counter()
+from app import create_app
+app = create_app("production")
+ready = time.perf_counter()
+modules_ready = len(sys.modules)
+print(sys.argv[2], file=sys.stderr, flush=True)
+rss_ready = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+client = app.test_client()
+first = {}
+for path in json.loads(sys.argv[1]):
+    t = time.perf_counter()
+    status = client.get(path).status_code
+    first[path] = {"ms": (time.perf_counter() - t) * 1000, "status": status}
+print(json.dumps({
+    "create_app_ms": (ready - started) * 1000,
+    "rss_ready_kb": rss_ready,
+    "rss_after_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "modules_ready": modules_ready,
+    "first_request": first,
+}))
+"""
+
+
+def _child(mode, probes, state_dir, importtime=False):
+    env = dict(os.environ, LAZY_LOADING="true" if mode == "lazy" else "false",
+               MIGRATION_STATE_DIR=state_dir, LOG_LEVEL="WARNING", FLASK_ENV="production")
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else [])
+    started = time.perf_counter()
+    proc = subprocess.run(cmd + ["-c", _CHILD, json.dumps(list(probes)), READY_MARKER], cwd=BACKEND_DIR,
+                          env=env, capture_output=True, text=True, check=True)
+    wall = (time.perf_counter() - started) * 1000
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["process_ms"] = wall
+    return result, proc.stderr
+
+
+def parse_importtime(stderr):
+    """``{top-level package: self µs}`` from ``-X importtime`` output, up to the app being ready."""
+    totals = defaultdict(int)
+    for line in stderr.splitlines():
+        if line == READY_MARKER:
+            break
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _cumulative, name = line[len("import time:"):].split("|")
+        totals[name.strip().split(".")[0]] += int(self_us)
+    return dict(totals)
+
+
+def run_startup(repeat=DEFAULT_REPEAT, probes=DEFAULT_PROBES, modes=MODES):
+    """Medians per mode plus each mode's import breakdown."""
+    state_dir = tempfile.mkdtemp(prefix="bench-startup-")
+    report = {}
+    try:
+        for mode in modes:
+            runs = [_child(mode, probes, state_dir)[0] for _ in range(repeat)]
+            _, stderr = _child(mode, probes, state_dir, importtime=True)
+
+            def median(key, runs=runs):
+                return round(statistics.median(r[key] for r in runs), 1)
+            report[mode] = {
+                "process_ms": median("process_ms"),
+                "create_app_ms": median("create_app_ms"),
+                "rss_ready_mb": round(median("rss_ready_kb") / 1024, 1),
+                "rss_after_mb": round(median("rss_after_kb") / 1024, 1),
+                "modules_ready": runs[0]["modules_ready"],
+                "first_request_ms": {
+                    path: round(statistics.median(r["first_request"][path]["ms"] for r in runs),
+                                1)
+                    for path in probes
+                },
+                "statuses": {path: runs[0]["first_request"][path]["status"] for path in probes},
+                "imports_ms": {name: round(us / 1000, 1) for name, us in sorted(
+                    parse_importtime(stderr).items(), key=lambda item: -item[1])},
+            }
+    finally:
+        shutil.rmtree(state_dir, ignore_errors=True)
+    return {"repeat": repeat, "python": sys.version.split()[0], "modes": report}
+
+
+def format_startup(report, top=12):
+    modes = report["modes"]
+    names = list(modes)
+    lines = [f"{'':<46}" + "".join(f"{name:>10}" for name in names)]
+
+    def row(label, values):
+        lines.append(f"{label:<46}" + "".join(f"{v:>10}" for v in values))
+    row("process start to exit (ms)", [modes[n]["process_ms"] for n in names])
+    row("import + create_app (ms)", [modes[n]["create_app_ms"] for n in names])
+    row("peak RSS when ready (MB)", [modes[n]["rss_ready_mb"] for n in names])
+    row("peak RSS after probes (MB)", [modes[n]["rss_after_mb"] for n in names])
+    row("modules loaded when ready", [modes[n]["modules_ready"] for n in names])
+    for path in modes[names[0]]["first_request_ms"]:
+        row(f"first GET {path[:30]} (ms)", [modes[n]["first_request_ms"][path] for n in names])
+
+    for name in names:
+        lines.append("")
+        lines.append(f"import self time by package, {name} (-X importtime, ms):")
+        for package, ms in list(modes[name]["imports_ms"].items())[:top]:
+            lines.append(f"  {package:<44}{ms:>10}")
+    return "\n".join(lines)
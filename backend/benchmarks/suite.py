@@ -0,0 +1,221 @@
+"""Timed runs of the API's hot paths over synthetic data, and baseline comparison.
+
+For every migration count and store backend a fresh store is filled with
+generated migrations; for every resource count the inventory is swapped
+for a generated one. Each case is timed directly (service call) and
+through the Flask test client (routing, validation and JSON included),
+with the response cache disabled so the work itself is measured.
+
+Results map a case key such as ``list_migrations[sqlite,n=10000]`` or
+``GET /api/v1/migrations[sqlite,n=10000]`` to its median, p95 and
+minimum in milliseconds. ``compare`` flags cases whose median grew past
+a threshold relative to a saved baseline.
+"""
+import itertools
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from benchmarks.generators import generate_migrations, generate_resources
+from models.resource import build_resource_summary
+from services.analytics_service import estimate_costs
+from services.migration_service import (
+    bulk_create_migrations,
+    configure_store,
+    get_migration_stats,
+    list_migrations,
+    update_migration,
+)
+from services.resource_service import discover_resources, get_all_resources, refresh_inventory
+from services.response_cache import configure_response_cache
+
+DEFAULT_MIGRATION_SIZES = (1000, 10000)
+DEFAULT_RESOURCE_SIZES = (1000, 10000)
+DEFAULT_BACKENDS = ("jsonlog", "sqlite")
+DEFAULT_REPEAT = 7
+DEFAULT_THRESHOLD = 0.25
+# Changes smaller than this are noise, whatever their ratio.
+NOISE_FLOOR_MS = 0.5
+LOAD_BATCH = 50000
+UPDATE_TARGETS = 1000
+ESTIMATE_BODY_RESOURCES = 1000
+
+
+def timeit(fn, repeat=DEFAULT_REPEAT, warmup=1):
+    """Run ``fn`` ``warmup + repeat`` times; timings of the last ``repeat`` in ms."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 3),
+        "min_ms": round(samples[0], 3),
+        "runs": repeat,
+    }
+
+
+@contextmanager
+def _migration_store(backend, count, seed):
+    """A temporary store of ``backend`` holding ``count`` generated migrations."""
+    previous_dir = os.environ.get("MIGRATION_STATE_DIR")
+    state_dir = tempfile.mkdtemp(prefix="bench-migrations-")
+    os.environ["MIGRATION_STATE_DIR"] = state_dir
+    configure_store(backend)
+    try:
+        ids = []
+        records = generate_migrations(count, seed=seed)
+        while True:
+            batch = list(itertools.islice(records, LOAD_BATCH))
+            if not batch:
+                break
+            bulk_create_migrations(batch)
+            if len(ids) < UPDATE_TARGETS:
+                ids.extend(r["id"] for r in batch[:UPDATE_TARGETS - len(ids)])
+        yield ids
+    finally:
+        if previous_dir is None:
+            os.environ.pop("MIGRATION_STATE_DIR", None)
+        else:
+            os.environ["MIGRATION_STATE_DIR"] = previous_dir
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+
+@contextmanager
+def _inventory(count, seed):
+    """Swap the inventory for ``count`` generated resources, restoring it afterwards."""
+    previous = list(get_all_resources())
+    resources = generate_resources(count, seed=seed)
+    refresh_inventory(resources)
+    try:
+        yield resources
+    finally:
+        refresh_inventory(previous)
+
+
+def _bench_migrations(client, backend, count, repeat, seed):
+    results = {}
+    with _migration_store(backend, count, seed) as ids:
+        targets = itertools.cycle(ids)
+        statuses = itertools.cycle(("ready", "in_progress"))
+        body = lambda: json.dumps({"status": next(statuses)})  # noqa: E731
+
+        cases = {
+            "list_migrations": lambda: list_migrations(limit=50),
+            "list_migrations?status": lambda: list_migrations(status_filter="in_progress",
+                                                              limit=50),
+            "update_migration": lambda: update_migration(next(targets),
+                                                         {"status": next(statuses)}),
+            "get_migration_stats": get_migration_stats,
+            "GET /api/v1/migrations": lambda: client.get("/api/v1/migrations"),
+            "GET /api/v1/migrations?status": lambda: client.get(
+                "/api/v1/migrations?status=in_progress"),
+            "PATCH /api/v1/migrations/:id": lambda: client.patch(
+                f"/api/v1/migrations/{next(targets)}", data=body(),
+                content_type="application/json"),
+            "GET /api/v1/migrations/stats": lambda: client.get("/api/v1/migrations/stats"),
+        }
+        for name, fn in cases.items():
+            results[f"{name}[{backend},n={count}]"] = timeit(fn, repeat)
+    return results
+
+
+def _bench_resources(client, count, repeat, seed):
+    results = {}
+    with _inventory(count, seed) as resources:
+        sample = json.dumps({"resources": resources[:ESTIMATE_BODY_RESOURCES],
+                             "strategy": "replatform"})
+        cases = {
+            "discover_resources": lambda: discover_resources(limit=50),
+            "discover_resources?tag": lambda: discover_resources(
+                tag_key="team", tag_value="team-001", limit=50),
+            "build_resource_summary": lambda: build_resource_summary(resources),
+            "estimate_costs": lambda: estimate_costs(resources),
+            "GET /api/v1/resources": lambda: client.get("/api/v1/resources"),
+            "GET /api/v1/resources?tag": lambda: client.get(
+                "/api/v1/resources?tag_key=team&tag_value=team-001"),
+            "GET /api/v1/resources/summary": lambda: client.get("/api/v1/resources/summary"),
+            "POST /api/v1/analytics/cost-estimate": lambda: client.post(
+                "/api/v1/analytics/cost-estimate", data=sample,
+                content_type="application/json"),
+        }
+        for name, fn in cases.items():
+            results[f"{name}[n={count}]"] = timeit(fn, repeat)
+    return results
+
+
+def run_suite(migration_sizes=DEFAULT_MIGRATION_SIZES, resource_sizes=DEFAULT_RESOURCE_SIZES,
+              backends=DEFAULT_BACKENDS, repeat=DEFAULT_REPEAT, seed=0, progress=None):
+    """Run every case at every size; returns ``{"meta": ..., "results": ...}``.
+
+    ``progress`` is called with each finished group's results.
+    """
+    # deferred: importing the app wires up every blueprint and service
+    from app import create_app
+
+    app = create_app("testing")
+    logging.getLogger().setLevel(logging.WARNING)
+    configure_response_cache(0, 0)
+    results = {}
+    try:
+        with app.test_client() as client:
+            for backend in backends:
+                for count in migration_sizes:
+                    group = _bench_migrations(client, backend, count, repeat, seed)
+                    results.update(group)
+                    if progress:
+                        progress(group)
+            for count in resource_sizes:
+                group = _bench_resources(client, count, repeat, seed)
+                results.update(group)
+                if progress:
+                    progress(group)
+    finally:
+        configure_store(app.config["MIGRATION_STORE_BACKEND"])
+        configure_response_cache(app.config["RESPONSE_CACHE_SIZE"],
+                                 app.config["RESPONSE_CACHE_TTL"])
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "migration_sizes": list(migration_sizes),
+            "resource_sizes": list(resource_sizes),
+            "backends": list(backends),
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD, floor_ms=NOISE_FLOOR_MS):
+    """Cases whose median regressed by more than ``threshold`` (a fraction).
+
+    Only cases present in both runs are compared. Returns a list of
+    ``{"case", "baseline_ms", "current_ms", "change"}``, worst first.
+    """
+    regressions = []
+    for case, before in baseline["results"].items():
+        after = current["results"].get(case)
+        if after is None:
+            continue
+        old, new = before["median_ms"], after["median_ms"]
+        if new - old > floor_ms and new > old * (1 + threshold):
+            regressions.append({"case": case, "baseline_ms": old, "current_ms": new,
+                                "change": round(new / old - 1 if old else float("inf"), 3)})
+    regressions.sort(key=lambda r: -r["change"])
+    return regressions
@@ -8,6 +8,55 @@ class Config:
     AWS_ACCOUNT_ID = os.environ.get("AWS_ACCOUNT_ID", "")
     LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
     MIGRATION_STATE_DIR = os.environ.get("MIGRATION_STATE_DIR", "/tmp/migrations")
+    # "jsonlog" (snapshot + append-only log) or "sqlite"
+    MIGRATION_STORE_BACKEND = os.environ.get("MIGRATION_STORE_BACKEND", "jsonlog")
+    # Live discovery (services/discovery.py): with DISCOVERY_ENABLED each worker
+    # replaces the demo inventory with a sweep at startup, repeated every
+    # DISCOVERY_INTERVAL_SECONDS (0 = once). Empty lists mean "defaults".
+    DISCOVERY_ENABLED = os.environ.get("DISCOVERY_ENABLED", "false").lower() == "true"
+    DISCOVERY_INTERVAL_SECONDS = float(os.environ.get("DISCOVERY_INTERVAL_SECONDS", "3600"))
+    DISCOVERY_REGIONS = [r for r in os.environ.get("DISCOVERY_REGIONS", "").split(",") if r]
+    DISCOVERY_ACCOUNTS = [a for a in os.environ.get("DISCOVERY_ACCOUNTS", "").split(",") if a]
+    DISCOVERY_ROLE_NAME = os.environ.get("DISCOVERY_ROLE_NAME", "")
+    DISCOVERY_MAX_WORKERS = int(os.environ.get("DISCOVERY_MAX_WORKERS", "16"))
+    # Compiled price table (python -m services.pricing compile); empty = flat rates.
+    PRICING_CATALOG_PATH = os.environ.get("PRICING_CATALOG_PATH", "")
+    # Dependency sources for /analytics/dependency-plan (services/dependency_service.py)
+    DEPENDENCY_EDGE_FILES = [p for p in os.environ.get("DEPENDENCY_EDGE_FILES", "").split(",") if p]
+    DEPENDENCY_SECURITY_GROUPS_FILE = os.environ.get("DEPENDENCY_SECURITY_GROUPS_FILE", "")
+    # Utilization metric store (python -m services.metrics_store ingest); empty = disabled
+    METRICS_STORE_DIR = os.environ.get("METRICS_STORE_DIR", "")
+    # Migration execution engine (services/executor.py); account limit 0 = no cap,
+    # type limits as "rds_database=2,ec2_instance=8". Caps apply per process:
+    # each gunicorn worker runs its own engine with the full caps.
+    EXECUTOR_MAX_WORKERS = int(os.environ.get("EXECUTOR_MAX_WORKERS", "8"))
+    EXECUTOR_ACCOUNT_LIMIT = int(os.environ.get("EXECUTOR_ACCOUNT_LIMIT", "0"))
+    EXECUTOR_TYPE_LIMITS = os.environ.get("EXECUTOR_TYPE_LIMITS", "")
+    EXECUTOR_MAX_ATTEMPTS = int(os.environ.get("EXECUTOR_MAX_ATTEMPTS", "3"))
+    # /api/v1/migrations/events: replay buffer size, keep-alive interval and
+    # how long one stream stays open before the client reconnects (0 = forever).
+    SSE_BUFFER_SIZE = int(os.environ.get("SSE_BUFFER_SIZE", "1024"))
+    SSE_HEARTBEAT_SECONDS = float(os.environ.get("SSE_HEARTBEAT_SECONDS", "15"))
+    SSE_MAX_STREAM_SECONDS = float(os.environ.get("SSE_MAX_STREAM_SECONDS", "300"))
+    # Import API blueprints and their services on first request instead of at
+    # startup (app.LazyBlueprints); shortens Lambda cold starts.
+    LAZY_LOADING = os.environ.get("LAZY_LOADING", "false").lower() == "true"
+    # Request and service timings served on /metrics (Prometheus text format).
+    INSTRUMENTATION_ENABLED = os.environ.get("INSTRUMENTATION_ENABLED", "true").lower() == "true"
+    # Opt-in request profiling (routes/profiling.py): "sample" writes collapsed
+    # stacks, "cprofile" pstats dumps. Requests sending X-Profile equal to
+    # PROFILING_TOKEN are profiled, plus a PROFILING_SAMPLE_RATE share; without
+    # a token X-Profile and /admin/profiles are refused.
+    PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false").lower() == "true"
+    PROFILING_DIR = os.environ.get("PROFILING_DIR", "/tmp/profiles")
+    PROFILING_MODE = os.environ.get("PROFILING_MODE", "sample")
+    PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", "0"))
+    PROFILING_INTERVAL_MS = float(os.environ.get("PROFILING_INTERVAL_MS", "5"))
+    PROFILING_MAX_PROFILES = int(os.environ.get("PROFILING_MAX_PROFILES", "200"))
+    PROFILING_TOKEN = os.environ.get("PROFILING_TOKEN", "")
+    # Response cache for summary/analytics endpoints; size 0 disables it.
+    RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "256"))
+    RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "30"))
 
 
 class DevelopmentConfig(Config):
@@ -19,6 +68,7 @@ class TestingConfig(Config):
     DEBUG = False
     TESTING = True
     MIGRATION_STATE_DIR = "/tmp/test_migrations"
+    DISCOVERY_ENABLED = False
 
 
 class ProductionConfig(Config):
@@ -81,3 +81,32 @@ class MigrationUpdateSchema(Schema):
     status = fields.String(validate=validate.OneOf(VALID_STATUSES))
     strategy = fields.String(validate=validate.OneOf(VALID_STRATEGIES))
     resources = fields.List(fields.Nested(ResourceSchema))
+
+
+class MigrationBulkUpdateSchema(MigrationUpdateSchema):
+    """One item of a bulk update: the target ``id`` plus the fields to change."""
+    id = fields.String(required=True, validate=validate.Length(min=1))
+
+
+class DurationSchema(Schema):
+    """Log-normal migration time of one resource type."""
+    median_minutes = fields.Float(required=True, validate=validate.Range(min=0, min_inclusive=False))
+    sigma = fields.Float(load_default=0.5, validate=validate.Range(min=0, max=3))
+
+
+class MigrationSimulateSchema(Schema):
+    """Options of a dry run; omitted caps default to the executor's configuration."""
+    iterations = fields.Integer(load_default=1000, validate=validate.Range(min=1, max=10000))
+    seed = fields.Integer(load_default=None, allow_none=True, validate=validate.Range(min=0))
+    max_workers = fields.Integer(validate=validate.Range(min=1, max=1024))
+    account_limit = fields.Integer(validate=validate.Range(min=0, max=1024))
+    type_limits = fields.Dict(
+        keys=fields.String(validate=validate.OneOf(VALID_RESOURCE_TYPES)),
+        values=fields.Integer(validate=validate.Range(min=1, max=1024)),
+    )
+    durations = fields.Dict(
+        keys=fields.String(validate=validate.OneOf(VALID_RESOURCE_TYPES)),
+        values=fields.Nested(DurationSchema),
+        load_default={},
+    )
+    dependencies = fields.Boolean(load_default=True)
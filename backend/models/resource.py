@@ -16,8 +16,11 @@ def categorize_resource(resource_type):
     return "other"
 
 
-def build_resource_summary(resources):
-    """Build a summary of resources grouped by category."""
+def build_resource_summary(resources, risk=None):
+    """Build a summary of resources grouped by category.
+
+    ``risk`` (a ``services.risk.RiskScores``) adds a risk-level breakdown.
+    """
     summary = {cat: [] for cat in RESOURCE_CATEGORIES}
     summary["other"] = []
 
@@ -25,11 +28,14 @@ def build_resource_summary(resources):
         cat = categorize_resource(resource.get("resource_type", ""))
         summary[cat].append(resource)
 
-    return {
+    result = {
         "total": len(resources),
         "by_category": {k: len(v) for k, v in summary.items()},
         "details": summary,
     }
+    if risk is not None:
+        result["risk"] = risk.summary()
+    return result
 
 
 class ResourceQuerySchema(Schema):
@@ -39,3 +45,10 @@ class ResourceQuerySchema(Schema):
     tag_value = fields.String()
     limit = fields.Integer(load_default=50, validate=validate.Range(min=1, max=200))
     offset = fields.Integer(load_default=0, validate=validate.Range(min=0))
+
+
+class DependencyPlanSchema(Schema):
+    migration_id = fields.String(load_default=None, allow_none=True)
+    resource_ids = fields.List(fields.String(), load_default=None, allow_none=True)
+    edges = fields.List(fields.List(fields.String(), validate=validate.Length(equal=2)),
+                        load_default=[])
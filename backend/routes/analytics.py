@@ -1,12 +1,31 @@
 from flask import Blueprint, request, jsonify
+from marshmallow import ValidationError
 
-from services.analytics_service import estimate_costs, get_dashboard_analytics
-from services.resource_service import discover_resources
+from models.resource import DependencyPlanSchema
+from routes.caching import cached_view
+from services.analytics_service import (
+    estimate_cost_matrix,
+    estimate_costs,
+    get_dashboard_analytics,
+    get_dependency_plan,
+    get_metrics_version,
+    get_pricing_version,
+    get_recommendations,
+    get_workload_profile,
+)
+from services.dependency_service import get_dependency_version
+from services.migration_service import get_data_version
+from services.resource_service import discover_resources, get_inventory_version
+from services.response_cache import get_response_cache
 
 analytics_bp = Blueprint("analytics", __name__)
 
+_dependency_plan_schema = DependencyPlanSchema()
+
 
 @analytics_bp.route("/dashboard", methods=["GET"])
+@cached_view(get_data_version, get_inventory_version, get_dependency_version,
+             get_pricing_version, get_metrics_version)
 def dashboard():
     return jsonify(get_dashboard_analytics()), 200
 
@@ -23,9 +42,112 @@ def cost_estimate():
 
 
 @analytics_bp.route("/cost-estimate/all", methods=["GET"])
+@cached_view(get_inventory_version, get_pricing_version)
 def cost_estimate_all():
     """Quick estimate using every discovered resource."""
     strategy = request.args.get("strategy", "replatform")
     all_resources = discover_resources(limit=200)["items"]
     estimate = estimate_costs(all_resources, strategy=strategy)
     return jsonify(estimate), 200
+
+
+@analytics_bp.route("/cost-estimate/matrix", methods=["GET", "POST"])
+def cost_estimate_matrix():
+    """Every strategy in one pass: whole inventory (GET) or a posted list (POST)."""
+    if request.method == "POST":
+        body = request.get_json()
+        if not body or "resources" not in body:
+            return jsonify({"error": "Request body must include 'resources' list"}), 400
+        matrix = estimate_cost_matrix(body["resources"], tag_key=body.get("tag_key"))
+    else:
+        matrix = estimate_cost_matrix(tag_key=request.args.get("tag_key"))
+    return jsonify(matrix), 200
+
+
+@analytics_bp.route("/dependency-plan", methods=["GET", "POST"])
+def dependency_plan():
+    """Migration waves for a migration (``migration_id``) or posted resource ids.
+
+    POST bodies may add ``edges`` (``[source, target]`` pairs) on top of
+    the configured dependency sources.
+    """
+    if request.method == "POST":
+        body = request.get_json(silent=True) or {}
+    else:
+        body = {"migration_id": request.args.get("migration_id")}
+    try:
+        data = _dependency_plan_schema.load(body)
+    except ValidationError as err:
+        return jsonify({"errors": err.messages}), 400
+
+    migration_id = data["migration_id"]
+    resource_ids = data["resource_ids"]
+    edges = data["edges"]
+    if migration_id is None and resource_ids is None:
+        return jsonify({"error": "Provide 'migration_id' or a 'resource_ids' list"}), 400
+
+    plan = get_dependency_plan(migration_id=migration_id, resource_ids=resource_ids,
+                               edges=edges)
+    if plan is None:
+        return jsonify({"error": "Migration not found"}), 404
+    return jsonify(plan), 200
+
+
+@analytics_bp.route("/recommendations", methods=["GET"])
+@cached_view(get_inventory_version, get_dependency_version, get_pricing_version,
+             get_metrics_version)
+def recommendations():
+    """Recommended strategy per resource plus the portfolio-level assignment.
+
+    ``risk_budget`` caps the portfolio's mean risk score (default: the mean
+    risk of the per-resource recommendations); ``resource_id`` returns one
+    resource, otherwise ``limit``/``offset`` page through the inventory.
+    """
+    days = request.args.get("days", 30, type=int)
+    if days < 1 or days > 366:
+        return jsonify({"error": "Query parameter 'days' must be between 1 and 366"}), 400
+    result = get_recommendations(days)
+    risk_budget = request.args.get("risk_budget", type=float)
+    if risk_budget is not None:
+        result = result.with_budget(risk_budget)
+
+    resource_id = request.args.get("resource_id")
+    if resource_id:
+        entry = result.get(resource_id)
+        if entry is None:
+            return jsonify({"error": "Resource not found"}), 404
+        return jsonify(entry), 200
+
+    limit = max(1, min(request.args.get("limit", 50, type=int), 200))
+    offset = max(0, request.args.get("offset", 0, type=int))
+    body = result.summary()
+    body["items"] = [result.entry(i) for i in range(offset, min(offset + limit, len(result)))]
+    body["limit"] = limit
+    body["offset"] = offset
+    return jsonify(body), 200
+
+
+@analytics_bp.route("/workloads", methods=["GET"])
+@cached_view(get_metrics_version)
+def workloads():
+    """Workload classes over the last ``days`` days; ``resource_id`` for one resource."""
+    days = request.args.get("days", 30, type=int)
+    if days < 1 or days > 366:
+        return jsonify({"error": "Query parameter 'days' must be between 1 and 366"}), 400
+    profile = get_workload_profile(days)
+    if profile is None:
+        return jsonify({"error": "No metrics store configured"}), 404
+
+    resource_id = request.args.get("resource_id")
+    if resource_id:
+        entry = profile.get(resource_id)
+        if entry is None:
+            return jsonify({"error": "No metrics for resource"}), 404
+        return jsonify(entry), 200
+    return jsonify(profile.summary()), 200
+
+
+@analytics_bp.route("/cache", methods=["GET"])
+def cache_stats():
+    """Response cache hit/miss counters."""
+    return jsonify(get_response_cache().stats()), 200
@@ -0,0 +1,54 @@
+import functools
+import hashlib
+
+from flask import Response, make_response, request
+
+from services.response_cache import get_response_cache
+
+
+class _CachedBody:
+    __slots__ = ("body", "mimetype", "etag")
+
+    def __init__(self, body, mimetype):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def cached_view(*version_sources):
+    """Serve a GET view from the response cache.
+
+    ``version_sources`` are zero-argument callables returning the version
+    of each piece of data the view reads; the cache key is the endpoint,
+    view arguments and query string. Responses carry a content ETag, so
+    ``If-None-Match`` gets a 304 whether or not this worker had the entry
+    cached. Only 200 responses are cached.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = get_response_cache()
+            key = (
+                request.endpoint,
+                tuple(sorted(kwargs.items())),
+                tuple(sorted(request.args.items(multi=True))),
+            )
+            version = tuple(source() for source in version_sources)
+
+            entry = cache.get(key, version)
+            status = "HIT"
+            if entry is None:
+                status = "MISS"
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                entry = _CachedBody(response.get_data(), response.mimetype)
+                cache.set(key, version, entry)
+
+            response = Response(entry.body, mimetype=entry.mimetype)
+            response.set_etag(entry.etag)
+            response.cache_control.no_cache = True
+            response.headers["X-Cache"] = status
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
@@ -0,0 +1,66 @@
+import time
+
+from flask import Blueprint, Response, g, request
+
+from services.instrumentation import is_enabled, registry
+
+metrics_bp = Blueprint("metrics", __name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+registry.define("http_requests_total", "counter",
+                "HTTP requests by blueprint, route, method and status.")
+registry.define("http_request_duration_seconds", "histogram",
+                "Time to produce the response (streamed bodies excluded).")
+registry.define("http_requests_in_flight", "gauge",
+                "HTTP requests being handled.")
+
+
+@metrics_bp.route("/metrics")
+def metrics():
+    return Response(registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def _route_labels():
+    rule = request.url_rule
+    # Unmatched paths share one series so scanners cannot blow up cardinality.
+    route = rule.rule if rule is not None else "unmatched"
+    return (("blueprint", request.blueprint or ""), ("route", route),
+            ("method", request.method))
+
+
+def _before():
+    if not is_enabled():
+        return
+    g.metrics_labels = labels = _route_labels()
+    g.metrics_started = time.perf_counter()
+    registry.inc("http_requests_in_flight", labels[:2])
+
+
+def _after(response):
+    if "metrics_labels" in g:
+        g.metrics_status = response.status_code
+    return response
+
+
+def _teardown(_exc):
+    labels = g.pop("metrics_labels", None)
+    if labels is None:
+        return
+    registry.inc("http_requests_in_flight", labels[:2], -1)
+    registry.observe("http_request_duration_seconds", labels,
+                     time.perf_counter() - g.pop("metrics_started"))
+    status = g.pop("metrics_status", 500)
+    registry.inc("http_requests_total", labels + (("status", str(status)),))
+
+
+def register_request_metrics(app, endpoint=True):
+    """Record latency, status and in-flight counts for every request to ``app``.
+
+    ``endpoint=False`` installs only the hooks (lazily loaded sub-apps).
+    """
+    app.before_request(_before)
+    app.after_request(_after)
+    app.teardown_request(_teardown)
+    if endpoint:
+        app.register_blueprint(metrics_bp)
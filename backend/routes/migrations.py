@@ -1,11 +1,19 @@
-from flask import Blueprint, request, jsonify
+import json
+
+from flask import Blueprint, current_app, request, jsonify
 from marshmallow import ValidationError
 
 from models.migration import (
+    MigrationBulkUpdateSchema,
     MigrationCreateSchema,
+    MigrationSimulateSchema,
     MigrationUpdateSchema,
     new_migration,
 )
+from routes.caching import cached_view
+from routes.streaming import event_stream_response, export_response
+from services.executor import get_executor, parse_type_limits
+from services.export import MIGRATION_EXPORT_FIELDS
 from services.migration_service import (
     list_migrations,
     get_migration,
@@ -13,12 +21,28 @@ from services.migration_service import (
     update_migration,
     delete_migration,
     get_migration_stats,
+    get_data_version,
+    bulk_create_migrations,
+    bulk_update_migrations,
+    bulk_delete_migrations,
+    iter_migrations,
+    get_change_feed,
 )
+from services.simulator import MAX_SIMULATION_CELLS, simulate_migration
 
 migrations_bp = Blueprint("migrations", __name__)
 
 _create_schema = MigrationCreateSchema()
 _update_schema = MigrationUpdateSchema()
+_create_many_schema = MigrationCreateSchema(many=True)
+_bulk_update_schema = MigrationBulkUpdateSchema()
+_bulk_update_many_schema = MigrationBulkUpdateSchema(many=True)
+_simulate_schema = MigrationSimulateSchema()
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+_BULK_BODY_ERROR = "Request body must be a JSON array or NDJSON (one item per line)"
+_INVALID_LINE = object()
 
 
 @migrations_bp.route("", methods=["GET"])
@@ -26,10 +50,37 @@ def index():
     status = request.args.get("status")
     limit = request.args.get("limit", 50, type=int)
     offset = request.args.get("offset", 0, type=int)
-    result = list_migrations(status_filter=status, limit=limit, offset=offset)
+    cursor = request.args.get("cursor")
+    try:
+        result = list_migrations(
+            status_filter=status, limit=limit, offset=offset, cursor=cursor
+        )
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
     return jsonify(result), 200
 
 
+@migrations_bp.route("/export", methods=["GET"])
+def export():
+    """Stream every migration (optionally ``?status=``) as NDJSON or CSV."""
+    records = iter_migrations(status_filter=request.args.get("status"))
+    return export_response(records, MIGRATION_EXPORT_FIELDS, "migrations")
+
+
+@migrations_bp.route("/events", methods=["GET"])
+def events():
+    """Server-Sent Events for every migration change (see ``event_stream_response``).
+
+    Resumes after the ``Last-Event-ID`` header (or ``?last_event_id=``).
+    """
+    config = current_app.config
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    return event_stream_response(get_change_feed(), last_event_id,
+                                 heartbeat=config["SSE_HEARTBEAT_SECONDS"],
+                                 max_seconds=config["SSE_MAX_STREAM_SECONDS"],
+                                 version=get_data_version)
+
+
 @migrations_bp.route("/<migration_id>", methods=["GET"])
 def show(migration_id):
     migration = get_migration(migration_id)
@@ -76,6 +127,197 @@ def destroy(migration_id):
     return jsonify({"error": "Migration not found"}), 404
 
 
+@migrations_bp.route("/<migration_id>/execute", methods=["POST"])
+def execute(migration_id):
+    """Queue the migration for execution by the engine (services/executor.py)."""
+    migration = get_migration(migration_id)
+    if migration is None:
+        return jsonify({"error": "Migration not found"}), 404
+    if migration["status"] == "completed":
+        return jsonify({"error": "Migration already completed"}), 409
+    executor = get_executor()
+    if not executor.submit(migration_id):
+        return jsonify({"error": "Migration is already executing"}), 409
+    return jsonify(executor.queue.get(migration_id)), 202
+
+
+@migrations_bp.route("/<migration_id>/execution", methods=["GET"])
+def execution(migration_id):
+    job = get_executor().queue.get(migration_id)
+    if job is None:
+        return jsonify({"error": "Migration has not been executed"}), 404
+    return jsonify(job), 200
+
+
+@migrations_bp.route("/<migration_id>/execution/cancel", methods=["POST"])
+def cancel_execution(migration_id):
+    executor = get_executor()
+    if not executor.cancel(migration_id):
+        return jsonify({"error": "Migration is not executing"}), 409
+    return jsonify(executor.queue.get(migration_id)), 202
+
+
+@migrations_bp.route("/<migration_id>/simulate", methods=["POST"])
+def simulate(migration_id):
+    """Monte Carlo dry run of the migration under the given (or configured) caps."""
+    try:
+        options = _simulate_schema.load(request.get_json(silent=True) or {})
+    except ValidationError as err:
+        return jsonify({"errors": err.messages}), 400
+
+    migration = get_migration(migration_id)
+    if migration is None:
+        return jsonify({"error": "Migration not found"}), 404
+    resources = len({r["resource_id"] for r in migration.get("resources", [])})
+    if options["iterations"] * resources > MAX_SIMULATION_CELLS:
+        return jsonify({"error": f"iterations x resources must not exceed {MAX_SIMULATION_CELLS} "
+                                 f"(this migration has {resources} resources)"}), 400
+
+    config = current_app.config
+    options.setdefault("max_workers", config["EXECUTOR_MAX_WORKERS"])
+    options.setdefault("account_limit", config["EXECUTOR_ACCOUNT_LIMIT"])
+    options.setdefault("type_limits", parse_type_limits(config["EXECUTOR_TYPE_LIMITS"]))
+    return jsonify(simulate_migration(migration, **options)), 200
+
+
 @migrations_bp.route("/stats", methods=["GET"])
+@cached_view(get_data_version)
 def stats():
     return jsonify(get_migration_stats()), 200
+
+
+def _ndjson_lines():
+    # Parsed one line at a time as the body streams in.
+    for raw in request.stream:
+        if raw.strip():
+            try:
+                yield json.loads(raw)
+            except ValueError:
+                yield _INVALID_LINE
+
+
+def _bulk_body():
+    """Return ``(items, streamed)`` for a bulk request, or ``(None, False)``."""
+    if request.mimetype == NDJSON_MIMETYPE:
+        return _ndjson_lines(), True
+    items = request.get_json(silent=True)
+    if not isinstance(items, list):
+        return None, False
+    return items, False
+
+
+def _validated(items, streamed, schema, many_schema):
+    """Yield ``(position, data, errors)`` for every item of a bulk body.
+
+    A JSON array is validated with one ``many=True`` load; NDJSON items are
+    validated one by one so the body never has to be held in memory.
+    """
+    if streamed:
+        for position, item in enumerate(items):
+            if item is _INVALID_LINE:
+                yield position, None, {"_schema": ["Invalid JSON."]}
+                continue
+            try:
+                yield position, schema.load(item), None
+            except ValidationError as err:
+                yield position, None, err.messages
+        return
+
+    try:
+        loaded, errors = many_schema.load(items), {}
+    except ValidationError as err:
+        loaded, errors = err.valid_data, err.messages
+    for position in range(len(items)):
+        if position in errors:
+            yield position, None, errors[position]
+        else:
+            yield position, loaded[position], None
+
+
+@migrations_bp.route("/bulk", methods=["POST"])
+def bulk_create():
+    """Create many migrations, one store write per batch of items."""
+    items, streamed = _bulk_body()
+    if items is None:
+        return jsonify({"error": _BULK_BODY_ERROR}), 400
+
+    results = []
+
+    def records():
+        for position, data, errors in _validated(items, streamed, _create_schema,
+                                              _create_many_schema):
+            if errors:
+                results.append({"index": position, "result": "invalid", "errors": errors})
+                continue
+            record = new_migration(
+                name=data["name"],
+                source_env=data["source_environment"],
+                target_env=data["target_environment"],
+                strategy=data["strategy"],
+                resources=data.get("resources", []),
+            )
+            results.append({"index": position, "id": record["id"], "result": "created"})
+            yield record
+
+    created = bulk_create_migrations(records())
+    body = {"created": created, "failed": len(results) - created, "results": results}
+    return jsonify(body), 201 if created else 400
+
+
+@migrations_bp.route("/bulk", methods=["PATCH"])
+def bulk_update():
+    """Apply per-item updates (each item carries its ``id``), one store write per batch."""
+    items, streamed = _bulk_body()
+    if items is None:
+        return jsonify({"error": _BULK_BODY_ERROR}), 400
+
+    results, targets = [], []
+
+    def updates():
+        for position, data, errors in _validated(items, streamed, _bulk_update_schema,
+                                              _bulk_update_many_schema):
+            if errors:
+                results.append({"index": position, "result": "invalid", "errors": errors})
+                continue
+            mid = data.pop("id")
+            targets.append((position, mid))
+            yield mid, data
+
+    updated = bulk_update_migrations(updates())
+    for (position, mid), record in zip(targets, updated):
+        results.append({"index": position, "id": mid,
+                        "result": "updated" if record is not None else "not_found"})
+    results.sort(key=lambda r: r["index"])
+
+    count = sum(1 for record in updated if record is not None)
+    body = {"updated": count, "failed": len(results) - count, "results": results}
+    return jsonify(body), 200 if count else 400
+
+
+@migrations_bp.route("/bulk", methods=["DELETE"])
+def bulk_destroy():
+    """Delete the migrations whose ids are listed in the body."""
+    items, _ = _bulk_body()
+    if items is None:
+        return jsonify({"error": _BULK_BODY_ERROR}), 400
+
+    results, targets = [], []
+
+    def ids():
+        for position, item in enumerate(items):
+            if not isinstance(item, str) or not item:
+                results.append({"index": position, "result": "invalid",
+                                "errors": {"_schema": ["Expected a migration id."]}})
+                continue
+            targets.append((position, item))
+            yield item
+
+    deleted = bulk_delete_migrations(ids())
+    for (position, mid), found in zip(targets, deleted):
+        results.append({"index": position, "id": mid,
+                        "result": "deleted" if found else "not_found"})
+    results.sort(key=lambda r: r["index"])
+
+    count = sum(deleted)
+    body = {"deleted": count, "failed": len(results) - count, "results": results}
+    return jsonify(body), 200 if count else 400
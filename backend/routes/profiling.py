@@ -0,0 +1,111 @@
+import hmac
+import logging
+import random
+
+from flask import Blueprint, current_app, g, jsonify, request, send_file
+
+from services.profiler import configure_profiler, get_profiler
+
+logger = logging.getLogger(__name__)
+
+profiling_bp = Blueprint("profiling", __name__)
+
+PROFILE_HEADER = "X-Profile"
+
+
+def _authorized():
+    """``X-Profile`` carries ``PROFILING_TOKEN``; never true without a token."""
+    token = current_app.config["PROFILING_TOKEN"]
+    if not token:
+        return False
+    return hmac.compare_digest(request.headers.get(PROFILE_HEADER, "").encode(), token.encode())
+
+
+@profiling_bp.route("")
+def list_profiles():
+    """Newest profiles first (``?limit=``, default 50)."""
+    if not _authorized():
+        return jsonify({"error": f"Missing or wrong {PROFILE_HEADER} token"}), 403
+    try:
+        limit = int(request.args.get("limit", 50))
+    except ValueError:
+        return jsonify({"error": "Query parameter 'limit' must be an integer"}), 400
+    profiles = get_profiler().recent(limit=max(1, min(limit, 500)))
+    return jsonify({"items": profiles, "mode": get_profiler().mode}), 200
+
+
+@profiling_bp.route("/<profile_id>")
+def download_profile(profile_id):
+    """The profile data: collapsed stacks (text) or a cProfile dump."""
+    if not _authorized():
+        return jsonify({"error": f"Missing or wrong {PROFILE_HEADER} token"}), 403
+    path = get_profiler().path(profile_id)
+    if path is None:
+        return jsonify({"error": "Profile not found"}), 404
+    if path.endswith(".prof"):
+        return send_file(path, mimetype="application/octet-stream", as_attachment=True)
+    return send_file(path, mimetype="text/plain")
+
+
+def _selected():
+    header = request.headers.get(PROFILE_HEADER)
+    if header:
+        return _authorized()
+    rate = current_app.config["PROFILING_SAMPLE_RATE"]
+    return rate > 0 and random.random() < rate
+
+
+def _before():
+    if request.blueprint == profiling_bp.name or not _selected():
+        return
+    g.profile = get_profiler().start()
+
+
+def _after(response):
+    active = g.pop("profile", None)
+    if active is None:
+        return response
+    active.stop()
+    rule = request.url_rule
+    profile_id = get_profiler().save(
+        active, method=request.method, path=request.full_path.rstrip("?"),
+        route=rule.rule if rule is not None else None, status=response.status_code)
+    response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+def _teardown(_exc):
+    # after_request did not run (the response failed); never leave a
+    # sampler thread or cProfile running.
+    active = g.pop("profile", None)
+    if active is not None:
+        active.stop()
+
+
+def register_profiling(app, admin=True):
+    """Profile selected requests and serve ``/admin/profiles``.
+
+    Nothing is registered unless ``PROFILING_ENABLED``, so requests pay
+    nothing while it is off. A request is profiled when it sends an
+    ``X-Profile`` header equal to ``PROFILING_TOKEN`` or is picked at
+    ``PROFILING_SAMPLE_RATE``. Without a token, clients can neither
+    trigger profiles nor read ``/admin/profiles`` (403); only the sample
+    rate writes profiles. ``admin=False`` installs only the hooks, for
+    lazily loaded sub-apps sharing the root app's profiler.
+    """
+    enabled = app.config["PROFILING_ENABLED"]
+    if admin:
+        if enabled and not app.config["PROFILING_TOKEN"]:
+            logger.warning("PROFILING_TOKEN is not set: X-Profile and /admin/profiles "
+                           "are refused, only PROFILING_SAMPLE_RATE profiles requests")
+        configure_profiler(app.config["PROFILING_DIR"] if enabled else None,
+                           app.config["PROFILING_MODE"],
+                           app.config["PROFILING_INTERVAL_MS"] / 1000,
+                           app.config["PROFILING_MAX_PROFILES"])
+    if not enabled:
+        return
+    app.before_request(_before)
+    app.after_request(_after)
+    app.teardown_request(_teardown)
+    if admin:
+        app.register_blueprint(profiling_bp, url_prefix="/admin/profiles")
@@ -1,9 +1,16 @@
 from flask import Blueprint, request, jsonify
 
+from routes.caching import cached_view
+from routes.streaming import export_response
+from services.dependency_service import get_dependency_version
+from services.export import RESOURCE_EXPORT_FIELDS
 from services.resource_service import (
     discover_resources,
+    get_inventory_version,
     get_resource,
+    get_resource_changes,
     get_resource_summary,
+    iter_resources,
 )
 
 resources_bp = Blueprint("resources", __name__)
@@ -11,22 +18,61 @@ resources_bp = Blueprint("resources", __name__)
 
 @resources_bp.route("", methods=["GET"])
 def index():
-    result = discover_resources(
+    """List resources by ``resource_id`` or, with ``?sort=risk``, riskiest first."""
+    sort = request.args.get("sort", "resource_id")
+    kwargs = dict(
         resource_type=request.args.get("resource_type"),
         region=request.args.get("region"),
         tag_key=request.args.get("tag_key"),
         tag_value=request.args.get("tag_value"),
         limit=request.args.get("limit", 50, type=int),
         offset=request.args.get("offset", 0, type=int),
+        cursor=request.args.get("cursor"),
     )
+    try:
+        if sort == "risk":
+            # deferred: risk scoring needs numpy, plain listing does not
+            from services.risk import DEFAULT_STRATEGY
+            from services.risk_service import rank_resources
+
+            result = rank_resources(
+                strategy=request.args.get("strategy", DEFAULT_STRATEGY), **kwargs
+            )
+        elif sort == "resource_id":
+            result = discover_resources(**kwargs)
+        else:
+            return jsonify({"error": "Query parameter 'sort' must be 'resource_id' or 'risk'"}), 400
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
     return jsonify(result), 200
 
 
 @resources_bp.route("/summary", methods=["GET"])
+@cached_view(get_inventory_version, get_dependency_version)
 def summary():
     return jsonify(get_resource_summary()), 200
 
 
+@resources_bp.route("/changes", methods=["GET"])
+def changes():
+    since = request.args.get("since", type=int)
+    if since is None or since < 0:
+        return jsonify({"error": "Query parameter 'since' must be a non-negative integer"}), 400
+    return jsonify(get_resource_changes(since)), 200
+
+
+@resources_bp.route("/export", methods=["GET"])
+def export():
+    """Stream the (filtered) inventory as NDJSON or CSV."""
+    records = iter_resources(
+        resource_type=request.args.get("resource_type"),
+        region=request.args.get("region"),
+        tag_key=request.args.get("tag_key"),
+        tag_value=request.args.get("tag_value"),
+    )
+    return export_response(records, RESOURCE_EXPORT_FIELDS, "resources")
+
+
 @resources_bp.route("/<resource_id>", methods=["GET"])
 def show(resource_id):
     resource = get_resource(resource_id)
@@ -0,0 +1,100 @@
+import json
+import time
+
+from flask import Response, jsonify, request
+
+from services.export import EXPORT_FORMATS, export_stream
+
+
+def export_response(records, fields, basename):
+    """Stream ``records`` as NDJSON or CSV (``?format=``), gzipped on the fly.
+
+    Compression is applied when the client sends ``Accept-Encoding: gzip``
+    or asks for it with ``?gzip=1``.
+    """
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of {sorted(EXPORT_FORMATS)}"}), 400
+    mimetype, extension = EXPORT_FORMATS[fmt]
+
+    compress = ("gzip" in request.accept_encodings
+                or request.args.get("gzip", type=int) == 1)
+    response = Response(export_stream(records, fmt, fields, compress=compress),
+                        mimetype=mimetype)
+    response.headers["Content-Disposition"] = (
+        f"attachment; filename={basename}.{extension}"
+    )
+    response.vary.add("Accept-Encoding")
+    if compress:
+        response.headers["Content-Encoding"] = "gzip"
+    return response
+
+
+SSE_RETRY_MS = 3000
+# How often a quiet stream checks ``version`` for writes made elsewhere.
+SSE_VERSION_POLL_SECONDS = 2.0
+
+
+def _sse(event, data, event_id):
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def event_stream_response(feed, last_event_id=None, heartbeat=15.0, max_seconds=0,
+                          version=None):
+    """Stream a ``ChangeFeed`` as Server-Sent Events.
+
+    Events after ``last_event_id`` are replayed from the feed's buffer. A
+    ``resync`` event tells the client to refetch instead: when the id
+    cannot be resumed, when it fell behind the buffer, or when
+    ``version()`` (e.g. the store generation) changed without an event in
+    this process, i.e. another worker wrote. The stream ends after
+    ``max_seconds`` (0 = never) and the client reconnects with its
+    ``Last-Event-ID``, so long-lived connections do not pin a worker.
+    """
+    after, resumable = feed.position(last_event_id)
+    poll = min(heartbeat, SSE_VERSION_POLL_SECONDS) if version is not None else heartbeat
+
+    def stream():
+        position = after
+        seen = version() if version is not None else None
+        started = quiet_since = time.monotonic()
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        if not resumable:
+            yield _sse("resync", {"reason": "unknown_event_id"}, feed.event_id(position))
+
+        while True:
+            now = time.monotonic()
+            timeout = poll
+            if max_seconds:
+                remaining = started + max_seconds - now
+                if remaining <= 0:
+                    return
+                timeout = min(timeout, remaining)
+
+            events, complete = feed.read(position, timeout)
+            if events:
+                quiet_since = time.monotonic()
+                if complete:
+                    for seq, event, data in events:
+                        yield _sse(event, data, feed.event_id(seq))
+                position = events[-1][0]
+                if not complete:
+                    yield _sse("resync", {"reason": "behind"}, feed.event_id(position))
+                if version is not None:
+                    seen = version()
+                continue
+
+            if version is not None:
+                current = version()
+                if current != seen:
+                    seen = current
+                    yield _sse("resync", {"reason": "external"}, feed.event_id(position))
+                    continue
+            if time.monotonic() - quiet_since >= heartbeat:
+                quiet_since = time.monotonic()
+                yield ": keep-alive\n\n"
+
+    response = Response(stream(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
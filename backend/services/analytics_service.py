@@ -1,18 +1,32 @@
 import logging
-from services.migration_service import get_migration_stats
-from services.resource_service import get_resource_summary
+import os
+
+import numpy as np
+
+from models.resource import categorize_resource
+from services.cost_matrix import CATEGORIES, HOURS_PER_MONTH, cost_matrix, encode_portfolio
+from services.dependency_service import get_dependency_graph, plan_dependencies
+from services.instrumentation import instrumented
+from services.metrics_store import MetricsStore
+from services.migration_service import get_migration, get_migration_stats
+from services.pricing import load_catalog
+from services.recommendations import STRATEGIES, recommend
+from services.resource_service import get_inventory_derived, get_resource_summary
+from services.risk import encode_risk_features, risk_matrix
+from services.risk_service import get_risk_version
+from services.workload import DEFAULT_DAYS, classify_workloads
 
 logger = logging.getLogger(__name__)
 
-# Rough cost model for estimation purposes.
-# In production, pull real pricing from the AWS Price List API.
+# Fallback cost model, used when no compiled pricing catalog is configured
+# or a resource's specs don't identify a SKU (see services/pricing.py).
 _HOURLY_COST = {
     "ec2_instance": 0.0416,     # t3.medium on-demand
     "rds_database": 0.096,      # db.t3.medium postgres
-    "s3_bucket": 0.023,         # per GB/month, simplified
+    "s3_bucket": 0.023,         # per GB/month (flat hourly if size unknown)
     "lambda_function": 0.0,     # pay-per-invoke, negligible idle
-    "ecs_service": 0.05,        # fargate vCPU-hour estimate
-    "elasticache_cluster": 0.068,
+    "ecs_service": 0.05,        # fargate estimate per task
+    "elasticache_cluster": 0.068,  # per node
     "load_balancer": 0.0225,
     "api_gateway": 0.0,         # pay-per-request
 }
@@ -27,13 +41,76 @@ _SERVERLESS_SAVINGS_FACTOR = {
 }
 
 
+_catalog = None
+
+
+def configure_pricing(path=None):
+    """Load the compiled pricing catalog at ``path`` (or ``PRICING_CATALOG_PATH``).
+
+    The table is memory-mapped, so this is cheap enough to run at startup.
+    """
+    global _catalog
+    if path is None:
+        path = os.environ.get("PRICING_CATALOG_PATH", "")
+    _catalog = load_catalog(path, _HOURLY_COST)
+    return _catalog
+
+
+def _pricing():
+    return _catalog if _catalog is not None else configure_pricing()
+
+
+def get_pricing_version():
+    """Identifies the pricing catalog in use, for cache keys."""
+    return _pricing().source
+
+
+_metrics_store = None
+_workload_profiles = {}
+
+
+def configure_metrics(path=None):
+    """Open the utilization metric store at ``path`` (or ``METRICS_STORE_DIR``).
+
+    An empty path disables workload classification.
+    """
+    global _metrics_store
+    if path is None:
+        path = os.environ.get("METRICS_STORE_DIR", "")
+    _metrics_store = MetricsStore(path) if path else None
+    _workload_profiles.clear()
+    return _metrics_store
+
+
+def get_metrics_version():
+    """Identifies the metric store contents, for cache keys."""
+    if _metrics_store is None:
+        return None
+    _metrics_store.reload()
+    return (_metrics_store.root, _metrics_store.generation)
+
+
+def get_workload_profile(days=DEFAULT_DAYS):
+    """``WorkloadProfile`` over the last ``days`` stored days, or None without a store.
+
+    Memoized per store generation.
+    """
+    version = get_metrics_version()
+    if version is None:
+        return None
+    cached = _workload_profiles.get(days)
+    if cached is None or cached.generation != version[1]:
+        cached = _workload_profiles[days] = classify_workloads(_metrics_store, days=days)
+        logger.info("Classified %d workloads over %d days: %s",
+                    len(cached), days, cached.counts())
+    return cached
+
+
+@instrumented("estimate_costs")
 def estimate_costs(resources, strategy="replatform"):
     """Produce a cost estimate for migrating the given resources."""
-    current_monthly = 0.0
-    for r in resources:
-        rtype = r.get("resource_type", "")
-        hourly = _HOURLY_COST.get(rtype, 0.0)
-        current_monthly += hourly * 730  # avg hours/month
+    resources = resources if isinstance(resources, list) else list(resources)
+    current_monthly = float(_pricing().hourly_rates(resources).sum()) * HOURS_PER_MONTH
 
     savings_pct = _SERVERLESS_SAVINGS_FACTOR.get(strategy, 0.0)
     projected_monthly = current_monthly * (1 - savings_pct)
@@ -48,6 +125,82 @@ def estimate_costs(resources, strategy="replatform"):
     }
 
 
+def estimate_cost_matrix(resources=None, tag_key=None):
+    """Cost estimate for every strategy, per category and per tag group.
+
+    With ``resources=None`` the whole inventory is used and its array
+    encoding is reused until the inventory changes.
+    """
+    if resources is None:
+        portfolio = _inventory_portfolio(tag_key)
+    else:
+        portfolio = _encode(resources, tag_key)
+    return cost_matrix(portfolio, _SERVERLESS_SAVINGS_FACTOR)
+
+
+def _encode(resources, tag_key=None):
+    resources = resources if isinstance(resources, list) else list(resources)
+    return encode_portfolio(resources, _HOURLY_COST, tag_key=tag_key,
+                            hourly=_pricing().hourly_rates(resources))
+
+
+def _inventory_portfolio(tag_key=None):
+    """Cost ``Portfolio`` of the inventory, memoized per version and pricing catalog."""
+    return get_inventory_derived(("cost_portfolio", tag_key, _pricing().source),
+                                 lambda resources: _encode(resources, tag_key))
+
+
+def get_recommendations(days=DEFAULT_DAYS):
+    """Strategy ``Recommendations`` for the whole inventory.
+
+    Combines the cost portfolio, the per-strategy risk matrix and the
+    workload classes over the last ``days`` days of metrics (all
+    ``unknown`` without a metrics store). Memoized per inventory version,
+    pricing catalog, dependency sources and metric store generation.
+    """
+    profile = get_workload_profile(days)
+    key = ("recommendations", _pricing().source, get_risk_version(),
+           get_metrics_version(), days)
+
+    def build(resources):
+        # Both from ``resources``, the inventory version the result is cached under.
+        portfolio = _encode(resources)
+        features = encode_risk_features(resources, get_dependency_graph())
+        ids = features.ids
+        type_category = np.array(
+            [CATEGORIES.index(categorize_resource(t)) for t in portfolio.types]
+            + [CATEGORIES.index("other")],
+        )
+        workload_codes = np.zeros(len(ids), dtype=np.int64)
+        if profile is not None:
+            position = profile.positions()
+            at = np.fromiter((position.get(rid, -1) for rid in ids), dtype=np.int64,
+                             count=len(ids))
+            known = at >= 0
+            workload_codes[known] = profile.labels[at[known]]
+        return recommend(
+            ids, portfolio.hourly, type_category[portfolio.type_codes],
+            risk_matrix(features, STRATEGIES), workload_codes, _SERVERLESS_SAVINGS_FACTOR,
+        )
+
+    return get_inventory_derived(key, build)
+
+
+def get_dependency_plan(migration_id=None, resource_ids=None, edges=()):
+    """Dependency waves for a migration's resources (or an explicit id list).
+
+    Returns None if ``migration_id`` does not exist.
+    """
+    if migration_id is not None:
+        migration = get_migration(migration_id)
+        if migration is None:
+            return None
+        resource_ids = [r["resource_id"] for r in migration.get("resources", [])]
+    plan = plan_dependencies(resource_ids or [], extra_edges=edges)
+    plan["migration_id"] = migration_id
+    return plan
+
+
 def get_dashboard_analytics():
     """Aggregate data for the main dashboard view."""
     migration_stats = get_migration_stats()
@@ -56,4 +209,5 @@ def get_dashboard_analytics():
     return {
         "migrations": migration_stats,
         "resources": resource_summary,
+        "recommendations": get_recommendations().summary(),
     }
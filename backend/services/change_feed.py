@@ -0,0 +1,75 @@
+"""In-process change feed with a bounded replay buffer.
+
+Writers ``publish`` events; readers block in ``read`` until something
+newer than the last event they saw arrives. The last ``capacity`` events
+are kept so a reconnecting reader (SSE ``Last-Event-ID``) can resume
+without a gap; a reader that fell further behind, or holds an id from
+another process or an earlier run (the ``epoch`` differs), is told to
+resync from scratch instead.
+
+Event ids are ``<epoch>-<sequence>``.
+"""
+import threading
+import uuid
+from collections import deque
+
+DEFAULT_CAPACITY = 1024
+
+
+class ChangeFeed:
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.epoch = uuid.uuid4().hex[:8]
+        self._events = deque(maxlen=capacity)
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    @property
+    def capacity(self):
+        return self._events.maxlen
+
+    def resize(self, capacity):
+        with self._cond:
+            self._events = deque(self._events, maxlen=capacity)
+
+    def event_id(self, seq):
+        return f"{self.epoch}-{seq}"
+
+    def position(self, event_id=None):
+        """Sequence number to read after for ``event_id``.
+
+        Returns ``(seq, resumable)``: with no id, or one this feed cannot
+        resume from, reading starts at the current position and
+        ``resumable`` is False when an id was given.
+        """
+        with self._cond:
+            current = self._seq
+        if not event_id:
+            return current, True
+        epoch, _, seq = event_id.rpartition("-")
+        if epoch != self.epoch or not seq.isdigit() or int(seq) > current:
+            return current, False
+        return int(seq), True
+
+    def publish(self, event, data):
+        """Append an event; returns its id."""
+        with self._cond:
+            self._seq += 1
+            self._events.append((self._seq, event, data))
+            self._cond.notify_all()
+            return self.event_id(self._seq)
+
+    def read(self, after, timeout=None):
+        """Events newer than sequence ``after``, waiting up to ``timeout`` for one.
+
+        Returns ``(events, complete)`` where ``events`` is a list of
+        ``(seq, event, data)``; ``complete`` is False when events after
+        ``after`` were already evicted from the buffer.
+        """
+        with self._cond:
+            if self._seq <= after:
+                self._cond.wait_for(lambda: self._seq > after, timeout)
+            if self._seq <= after:
+                return [], True
+            oldest = self._events[0][0] if self._events else self._seq + 1
+            complete = oldest <= after + 1
+            return [e for e in self._events if e[0] > after], complete
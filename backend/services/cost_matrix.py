@@ -0,0 +1,133 @@
+import numpy as np
+
+from models.resource import RESOURCE_CATEGORIES, categorize_resource
+
+HOURS_PER_MONTH = 730
+UNTAGGED = "(untagged)"
+
+CATEGORIES = list(RESOURCE_CATEGORIES) + ["other"]
+
+
+class Portfolio:
+    """Column-oriented encoding of a resource set.
+
+    ``type_codes`` index into ``types`` (the last code means "unknown
+    type"), ``hourly`` holds each resource's on-demand hourly rate and
+    ``tag_codes`` index into ``tag_values`` for the ``tag_key`` grouping.
+    Encoding is the only per-resource Python loop; everything after it is
+    array arithmetic.
+    """
+
+    __slots__ = ("types", "type_codes", "hourly", "tag_key", "tag_values", "tag_codes")
+
+    def __init__(self, types, type_codes, hourly, tag_key=None, tag_values=None,
+                 tag_codes=None):
+        self.types = types
+        self.type_codes = type_codes
+        self.hourly = hourly
+        self.tag_key = tag_key
+        self.tag_values = tag_values or []
+        self.tag_codes = tag_codes
+
+    def __len__(self):
+        return len(self.type_codes)
+
+
+def encode_portfolio(resources, hourly_rates, tag_key=None, hourly=None):
+    """Encode resource dicts into a ``Portfolio``.
+
+    ``hourly_rates`` maps resource type to an hourly rate. ``hourly`` may
+    supply per-resource rates instead (e.g. from a pricing catalog).
+    """
+    resources = resources if isinstance(resources, list) else list(resources)
+    n = len(resources)
+    types = list(hourly_rates)
+    codes = {t: i for i, t in enumerate(types)}
+    unknown = len(types)
+
+    type_codes = np.fromiter(
+        (codes.get(r.get("resource_type"), unknown) for r in resources),
+        dtype=np.int16, count=n,
+    )
+    if hourly is None:
+        rate_table = np.array([hourly_rates[t] for t in types] + [0.0])
+        hourly = rate_table[type_codes]
+
+    tag_values, tag_codes = None, None
+    if tag_key:
+        values = {}
+        tag_codes = np.fromiter(
+            (values.setdefault(r.get("tags", {}).get(tag_key, UNTAGGED), len(values))
+             for r in resources),
+            dtype=np.int32, count=n,
+        )
+        tag_values = list(values)
+
+    return Portfolio(types, type_codes, np.asarray(hourly, dtype=np.float64),
+                     tag_key, tag_values, tag_codes)
+
+
+def _group_rows(labels, counts, current, projected, strategies):
+    rows = {}
+    for i, label in enumerate(labels):
+        rows[label] = {
+            "resource_count": int(counts[i]),
+            "current_monthly_estimate_usd": current[i],
+            "projected_monthly_estimate_usd": dict(zip(strategies, projected[i])),
+        }
+    return rows
+
+
+def cost_matrix(portfolio, savings_factors):
+    """Current and projected monthly cost for every strategy at once.
+
+    Returns totals per strategy plus per-category and (if the portfolio
+    was encoded with a ``tag_key``) per-tag-group breakdowns.
+    """
+    strategies = list(savings_factors)
+    keep = 1.0 - np.array([savings_factors[s] for s in strategies])
+
+    monthly = portfolio.hourly * HOURS_PER_MONTH
+    current = float(monthly.sum())
+    projected = current * keep
+
+    type_category = np.array(
+        [CATEGORIES.index(categorize_resource(t)) for t in portfolio.types]
+        + [CATEGORIES.index("other")],
+        dtype=np.int16,
+    )
+    category_codes = type_category[portfolio.type_codes]
+    cat_counts = np.bincount(category_codes, minlength=len(CATEGORIES))
+    cat_current = np.bincount(category_codes, weights=monthly, minlength=len(CATEGORIES))
+    cat_projected = np.outer(cat_current, keep)
+
+    result = {
+        "resource_count": len(portfolio),
+        "current_monthly_estimate_usd": round(current, 2),
+        "strategies": {
+            s: {
+                "projected_monthly_estimate_usd": round(float(p), 2),
+                "estimated_monthly_savings_usd": round(current - float(p), 2),
+                "estimated_savings_pct": round(savings_factors[s] * 100, 1),
+            }
+            for s, p in zip(strategies, projected)
+        },
+        "by_category": _group_rows(
+            CATEGORIES, cat_counts, np.round(cat_current, 2).tolist(),
+            np.round(cat_projected, 2).tolist(), strategies,
+        ),
+    }
+
+    if portfolio.tag_codes is not None:
+        n_groups = len(portfolio.tag_values)
+        tag_counts = np.bincount(portfolio.tag_codes, minlength=n_groups)
+        tag_current = np.bincount(portfolio.tag_codes, weights=monthly, minlength=n_groups)
+        result["by_tag"] = {
+            "tag_key": portfolio.tag_key,
+            "groups": _group_rows(
+                portfolio.tag_values, tag_counts, np.round(tag_current, 2).tolist(),
+                np.round(np.outer(tag_current, keep), 2).tolist(), strategies,
+            ),
+        }
+
+    return result
@@ -0,0 +1,280 @@
+"""Resource dependency graph: cycles, migration waves, fan-in/fan-out.
+
+An edge ``(a, b)`` means "``a`` depends on ``b``" (``a`` talks to ``b``), so
+``b`` has to be migrated no later than ``a``. Wave 0 holds resources with
+no dependencies; every other resource lands one wave after the latest of
+its dependencies. Resources in a dependency cycle share a wave.
+"""
+import numpy as np
+
+
+def _expand(indptr, nodes):
+    """Positions in ``indices`` of every edge leaving ``nodes`` (vectorized)."""
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    total = int(counts.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64)
+    shift = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return shift + np.arange(total)
+
+
+def _unique(values, counts=False):
+    """Sorted unique values (optionally with counts).
+
+    A plain sort plus a boundary mask; much faster than ``np.unique`` on
+    millions of integer keys.
+    """
+    values = np.sort(values)
+    if not values.size:
+        return (values, values.astype(np.int64)) if counts else values
+    first = np.empty(values.size, dtype=bool)
+    first[0] = True
+    np.not_equal(values[1:], values[:-1], out=first[1:])
+    uniq = values[first]
+    if not counts:
+        return uniq
+    starts = np.flatnonzero(first)
+    return uniq, np.diff(np.append(starts, values.size))
+
+
+def _csr(n, src, dst):
+    """Adjacency of ``src -> dst`` as ``(indptr, indices)``."""
+    keys = np.sort(np.asarray(src, dtype=np.int64) * max(n, 1) + dst)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return indptr, (keys % max(n, 1)).astype(np.int32)
+
+
+def _peel(indptr, indices, degree):
+    """Kahn-style layering, one vectorized step per layer.
+
+    ``degree[v]`` counts the edges that must be removed before ``v`` is
+    free; removing ``u`` decrements every node listed for ``u`` in
+    ``(indptr, indices)``. Returns each node's layer, -1 if never freed
+    (the node sits on or behind a cycle).
+    """
+    degree = degree.copy()
+    layer = np.full(len(degree), -1, dtype=np.int32)
+    frontier = np.flatnonzero(degree == 0)
+    depth = 0
+    while frontier.size:
+        layer[frontier] = depth
+        touched = indices[_expand(indptr, frontier)]
+        if not touched.size:
+            break
+        nodes, counts = _unique(touched, counts=True)
+        degree[nodes] -= counts
+        frontier = nodes[degree[nodes] == 0]
+        depth += 1
+    return layer
+
+
+def _tarjan(indptr, indices):
+    """Iterative Tarjan SCC over a CSR graph of plain Python lists."""
+    n = len(indptr) - 1
+    index = [-1] * n
+    low = [0] * n
+    on_stack = [False] * n
+    comp = [-1] * n
+    stack = []
+    counter = 0
+    ncomp = 0
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, indptr[root])]
+        while work:
+            v, i = work[-1]
+            end = indptr[v + 1]
+            descended = False
+            while i < end:
+                w = indices[i]
+                i += 1
+                if index[w] == -1:
+                    work[-1] = (v, i)
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, indptr[w]))
+                    descended = True
+                    break
+                if on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+            if descended:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if low[v] < low[parent]:
+                    low[parent] = low[v]
+            if low[v] == index[v]:
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    comp[w] = ncomp
+                    if w == v:
+                        break
+                ncomp += 1
+    return comp, ncomp
+
+
+class DependencyGraph:
+    """Deduplicated dependency edges over ``ids``, stored as CSR arrays.
+
+    ``indptr``/``indices`` list each node's dependencies and
+    ``rev_indptr``/``rev_indices`` its dependents. Self-loops are dropped.
+    Analysis results are computed on first use and kept.
+    """
+
+    def __init__(self, ids, src, dst):
+        self.ids = list(ids)
+        n = len(self.ids)
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        keep = src != dst
+        keys = _unique(src[keep] * n + dst[keep])
+        self.src = (keys // max(n, 1)).astype(np.int32)
+        self.dst = (keys % max(n, 1)).astype(np.int32)
+        self.indptr, self.indices = _csr(n, self.src, self.dst)
+        self.rev_indptr, self.rev_indices = _csr(n, self.dst, self.src)
+        self._components = None
+        self._waves = None
+        self._positions = None
+
+    @classmethod
+    def from_edges(cls, ids, edges):
+        """Build from ``(source_id, target_id)`` pairs; unknown ids are skipped."""
+        ids = list(ids)
+        position = {rid: i for i, rid in enumerate(ids)}
+        src, dst = [], []
+        for source, target in edges:
+            s, t = position.get(source), position.get(target)
+            if s is not None and t is not None:
+                src.append(s)
+                dst.append(t)
+        return cls(ids, src, dst)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def positions(self):
+        """``{id: node index}``, built on first use."""
+        if self._positions is None:
+            self._positions = {rid: i for i, rid in enumerate(self.ids)}
+        return self._positions
+
+    @property
+    def edge_count(self):
+        return len(self.indices)
+
+    def fan_out(self):
+        """Number of dependencies per node."""
+        return np.diff(self.indptr)
+
+    def fan_in(self):
+        """Number of dependents per node."""
+        return np.diff(self.rev_indptr)
+
+    def components(self):
+        """Strongly connected component label per node, and the label count.
+
+        Nodes that Kahn peeling (from either end) can remove are not on a
+        cycle and get singleton components without any Python-level
+        traversal; Tarjan only runs on the residual cyclic core.
+        """
+        if self._components is not None:
+            return self._components
+        n = len(self.ids)
+        sink_layer = _peel(self.rev_indptr, self.rev_indices, self.fan_out())
+        source_layer = _peel(self.indptr, self.indices, self.fan_in())
+        core = (sink_layer < 0) & (source_layer < 0)
+
+        labels = np.full(n, -1, dtype=np.int64)
+        core_nodes = np.flatnonzero(core)
+        count = 0
+        if core_nodes.size:
+            local = np.full(n, -1, dtype=np.int64)
+            local[core_nodes] = np.arange(core_nodes.size)
+            inside = core[self.src] & core[self.dst]
+            indptr, indices = _csr(core_nodes.size, local[self.src[inside]],
+                                   local[self.dst[inside]])
+            comp, count = _tarjan(indptr.tolist(), indices.tolist())
+            labels[core_nodes] = comp
+        rest = np.flatnonzero(~core)
+        labels[rest] = count + np.arange(rest.size)
+        self._components = (labels, count + rest.size)
+        return self._components
+
+    def cycles(self):
+        """Node index arrays of every component with more than one node."""
+        labels, count = self.components()
+        sizes = np.bincount(labels, minlength=count)
+        cyclic = np.flatnonzero(sizes > 1)
+        if not cyclic.size:
+            return []
+        order = np.argsort(labels, kind="stable")
+        bounds = np.concatenate(([0], np.cumsum(sizes)))
+        return [order[bounds[c]:bounds[c + 1]] for c in cyclic]
+
+    def waves(self):
+        """Migration wave per node (dependencies first; cycles share a wave)."""
+        if self._waves is not None:
+            return self._waves
+        labels, count = self.components()
+        csrc, cdst = labels[self.src], labels[self.dst]
+        cross = csrc != cdst
+        keys = _unique(csrc[cross] * count + cdst[cross])
+        csrc, cdst = keys // count, keys % count
+        rev_indptr, rev_indices = _csr(count, cdst, csrc)
+        comp_wave = _peel(rev_indptr, rev_indices, np.bincount(csrc, minlength=count))
+        self._waves = comp_wave[labels]
+        return self._waves
+
+    def subgraph(self, ids):
+        """Induced subgraph over the given ids (unknown ids become isolated nodes)."""
+        ids = list(ids)
+        position = self.positions()
+        local = np.full(len(self.ids), -1, dtype=np.int64)
+        for i, rid in enumerate(ids):
+            p = position.get(rid)
+            if p is not None:
+                local[p] = i
+        inside = (local[self.src] >= 0) & (local[self.dst] >= 0)
+        return DependencyGraph(ids, local[self.src[inside]], local[self.dst[inside]])
+
+    def plan(self):
+        """JSON-ready migration plan: waves, cycles and per-node degrees."""
+        waves = self.waves()
+        fan_in, fan_out = self.fan_in(), self.fan_out()
+        cycles = self.cycles()
+        in_cycle = np.zeros(len(self.ids), dtype=bool)
+        for members in cycles:
+            in_cycle[members] = True
+
+        wave_count = int(waves.max()) + 1 if len(self.ids) else 0
+        order = np.argsort(waves, kind="stable")
+        bounds = np.searchsorted(waves[order], np.arange(wave_count + 1))
+        return {
+            "node_count": len(self.ids),
+            "edge_count": self.edge_count,
+            "wave_count": wave_count,
+            "waves": [[self.ids[i] for i in order[bounds[w]:bounds[w + 1]]]
+                      for w in range(wave_count)],
+            "cycles": [[self.ids[i] for i in members] for members in cycles],
+            "nodes": [
+                {
+                    "resource_id": rid,
+                    "wave": int(waves[i]),
+                    "fan_in": int(fan_in[i]),
+                    "fan_out": int(fan_out[i]),
+                    "in_cycle": bool(in_cycle[i]),
+                }
+                for i, rid in enumerate(self.ids)
+            ],
+        }
@@ -0,0 +1,152 @@
+"""Dependency edges for the resource inventory.
+
+Edges come from local files:
+
+* edge files (CSV with ``source,target`` columns, or a JSON list of
+  ``{"source": ..., "target": ...}`` objects / ``[source, target]`` pairs),
+  e.g. aggregated VPC flow-log connections;
+* a security-group dump (``aws ec2 describe-security-groups`` output): a
+  resource in group B depends on every resource in group A when A admits
+  ingress from B. Group membership is read from ``specs.security_groups``.
+
+The graph over the whole inventory is rebuilt only when the inventory
+version or one of the source files changes.
+"""
+import csv
+import json
+import logging
+import os
+from collections import defaultdict
+
+from services.resource_service import get_inventory_derived
+
+logger = logging.getLogger(__name__)
+
+_edge_files = []
+_security_groups_file = ""
+
+
+def configure_dependency_sources(edge_files=(), security_groups_file=""):
+    """Set the local files dependency edges are read from."""
+    global _edge_files, _security_groups_file
+    _edge_files = [path for path in edge_files if path]
+    _security_groups_file = security_groups_file or ""
+
+
+def read_edge_file(path):
+    """Yield ``(source_id, target_id)`` pairs from a CSV or JSON edge file."""
+    if path.endswith(".json"):
+        with open(path, "r") as f:
+            for edge in json.load(f):
+                if isinstance(edge, dict):
+                    yield edge["source"], edge["target"]
+                else:
+                    yield edge[0], edge[1]
+        return
+    with open(path, "r", newline="") as f:
+        for row in csv.DictReader(f):
+            yield row["source"], row["target"]
+
+
+def security_group_edges(groups, resources):
+    """Yield dependency edges implied by security-group ingress rules.
+
+    ``groups`` is the parsed ``describe-security-groups`` response (or its
+    ``SecurityGroups`` list).
+    """
+    if isinstance(groups, dict):
+        groups = groups.get("SecurityGroups", [])
+    members = defaultdict(list)
+    for resource in resources:
+        for group_id in (resource.get("specs") or {}).get("security_groups") or ():
+            members[group_id].append(resource["resource_id"])
+
+    for group in groups:
+        targets = members.get(group["GroupId"])
+        if not targets:
+            continue
+        for permission in group.get("IpPermissions", []):
+            for pair in permission.get("UserIdGroupPairs", []):
+                for source in members.get(pair.get("GroupId"), ()):
+                    for target in targets:
+                        yield source, target
+
+
+def _signature():
+    paths = list(_edge_files) + ([_security_groups_file] if _security_groups_file else [])
+    signature = []
+    for path in paths:
+        try:
+            signature.append((path, os.stat(path).st_mtime_ns))
+        except FileNotFoundError:
+            signature.append((path, None))
+    return tuple(signature)
+
+
+def get_dependency_version():
+    """Identifies the configured edge sources and their mtimes, for cache keys."""
+    return _signature()
+
+
+def _edges(resources):
+    for path in _edge_files:
+        if os.path.exists(path):
+            yield from read_edge_file(path)
+        else:
+            logger.warning("Dependency edge file %s not found", path)
+    if _security_groups_file:
+        if os.path.exists(_security_groups_file):
+            with open(_security_groups_file, "r") as f:
+                yield from security_group_edges(json.load(f), resources)
+        else:
+            logger.warning("Security group file %s not found", _security_groups_file)
+
+
+def get_dependency_graph():
+    """``DependencyGraph`` over the whole inventory, memoized per version."""
+    # deferred: routes that only need get_dependency_version must not pull
+    # in numpy when the app loads lazily (LAZY_LOADING)
+    from services.dependency_graph import DependencyGraph
+
+    def build(resources):
+        graph = DependencyGraph.from_edges(
+            [r["resource_id"] for r in resources], _edges(resources)
+        )
+        logger.info("Built dependency graph: %d resources, %d edges",
+                    len(graph), graph.edge_count)
+        return graph
+
+    return get_inventory_derived(("dependency_graph", _signature()), build)
+
+
+def plan_dependencies(resource_ids, extra_edges=()):
+    """Migration plan (waves, cycles, fan-in/out) for a set of resources.
+
+    Uses the inventory's edges between the given resources plus any
+    ``extra_edges``; ``external_dependencies`` lists inventory edges from
+    the set to resources outside it, which must already be migrated (or
+    reachable) before the set can move.
+    """
+    import numpy as np  # deferred, see get_dependency_graph
+    from services.dependency_graph import DependencyGraph
+
+    resource_ids = list(dict.fromkeys(resource_ids))
+    graph = get_dependency_graph()
+    sub = graph.subgraph(resource_ids)
+
+    extra = DependencyGraph.from_edges(resource_ids, extra_edges)
+    if extra.edge_count:
+        sub = DependencyGraph(resource_ids, np.concatenate([sub.src, extra.src]),
+                              np.concatenate([sub.dst, extra.dst]))
+
+    in_set = np.zeros(len(graph), dtype=bool)
+    position = graph.positions()
+    in_set[[position[rid] for rid in resource_ids if rid in position]] = True
+    outward = in_set[graph.src] & ~in_set[graph.dst]
+
+    plan = sub.plan()
+    plan["external_dependencies"] = [
+        {"resource_id": graph.ids[s], "depends_on": graph.ids[t]}
+        for s, t in zip(graph.src[outward].tolist(), graph.dst[outward].tolist())
+    ]
+    return plan
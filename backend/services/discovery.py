@@ -0,0 +1,574 @@
+"""Live AWS resource discovery.
+
+Fans out one scan task per (resource type, region, account) over a bounded
+thread pool. Every API call goes through a token bucket per (service,
+region, account), the scope AWS throttles at, and is retried with exponential backoff and full jitter when AWS throttles. Pages
+are fetched lazily with each API's own continuation token, so a task can
+stream records as they arrive and retry a single page instead of the
+whole scan.
+
+The API keeps its inventory current with it when ``DISCOVERY_ENABLED``
+is set (``resource_service.configure_discovery``). The CLI runs one
+sweep and prints the per-task report (``--output`` saves the records)::
+
+    python -m services.discovery --regions us-east-1 eu-west-1 \\
+        --accounts 111111111111 222222222222 --role-name CloudMigrateDiscovery
+"""
+import argparse
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGIONS = [
+    "us-east-1", "us-east-2", "us-west-1", "us-west-2",
+    "ca-central-1", "sa-east-1",
+    "eu-west-1", "eu-west-2", "eu-west-3", "eu-central-1", "eu-north-1",
+    "ap-south-1", "ap-northeast-1", "ap-northeast-2", "ap-northeast-3",
+    "ap-southeast-1", "ap-southeast-2",
+]
+
+# Sustained requests/second allowed per AWS service, in each region and account.
+DEFAULT_RATE_LIMITS = {
+    "ec2": 20.0,
+    "rds": 10.0,
+    "s3": 10.0,
+    "lambda": 10.0,
+    "ecs": 10.0,
+    "elasticache": 10.0,
+    "elbv2": 10.0,
+    "apigateway": 5.0,
+}
+
+RETRYABLE_ERROR_CODES = {
+    "Throttling",
+    "ThrottlingException",
+    "ThrottledException",
+    "RequestLimitExceeded",
+    "TooManyRequestsException",
+    "RequestThrottled",
+    "SlowDown",
+    "ServiceUnavailable",
+    "InternalError",
+}
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``acquire`` blocks until a token is free."""
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+def _is_retryable(exc):
+    code = getattr(exc, "response", {}).get("Error", {}).get("Code")
+    if code in RETRYABLE_ERROR_CODES:
+        return True
+    # botocore's EndpointConnectionError / ReadTimeoutError etc.
+    return type(exc).__name__ in {
+        "EndpointConnectionError", "ConnectTimeoutError", "ReadTimeoutError",
+    }
+
+
+class _Caller:
+    """Rate-limited, retrying wrapper around one client's API methods."""
+
+    def __init__(self, client, bucket, max_attempts, base_delay, max_delay, sleep):
+        self.client = client
+        self.bucket = bucket
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.calls = 0
+        self.retries = 0
+
+    def __call__(self, method, **kwargs):
+        attempt = 1
+        while True:
+            self.bucket.acquire()
+            self.calls += 1
+            try:
+                return getattr(self.client, method)(**kwargs)
+            except Exception as exc:  # noqa: BLE001 - filtered below
+                if attempt >= self.max_attempts or not _is_retryable(exc):
+                    raise
+            self.retries += 1
+            delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+            self.sleep(random.uniform(0, delay))
+            attempt += 1
+
+    def paginate(self, method, request_token, response_token, **kwargs):
+        """Yield response pages, following the API's continuation token."""
+        while True:
+            page = self(method, **kwargs)
+            yield page
+            token = page.get(response_token)
+            if not token:
+                return
+            kwargs[request_token] = token
+
+
+# -- scanners ----------------------------------------------------------------
+#
+# Each scanner takes a _Caller and the region being scanned and yields
+# resource dicts in the same shape as the demo inventory.
+
+def _tag_dict(tags, key="Key", value="Value"):
+    return {t[key]: t[value] for t in tags or []}
+
+
+def _record(resource_id, resource_type, name, region, tags, specs):
+    return {
+        "resource_id": resource_id,
+        "resource_type": resource_type,
+        "name": name,
+        "region": region,
+        "tags": tags,
+        "specs": specs,
+    }
+
+
+def _private_ips(inst):
+    ips = [inst["PrivateIpAddress"]] if inst.get("PrivateIpAddress") else []
+    for eni in inst.get("NetworkInterfaces", []):
+        for address in eni.get("PrivateIpAddresses", []):
+            if address.get("PrivateIpAddress"):
+                ips.append(address["PrivateIpAddress"])
+    return list(dict.fromkeys(ips))
+
+
+def _scan_ec2(call, region):
+    for page in call.paginate("describe_instances", "NextToken", "NextToken"):
+        for reservation in page.get("Reservations", []):
+            for inst in reservation.get("Instances", []):
+                tags = _tag_dict(inst.get("Tags"))
+                yield _record(
+                    inst["InstanceId"], "ec2_instance",
+                    tags.get("Name", inst["InstanceId"]), region, tags,
+                    {
+                        "instance_type": inst.get("InstanceType"),
+                        "state": inst.get("State", {}).get("Name"),
+                        "security_groups": [g["GroupId"] for g in inst.get("SecurityGroups", [])],
+                        "private_ips": _private_ips(inst),
+                    },
+                )
+
+
+def _scan_rds(call, region):
+    for page in call.paginate("describe_db_instances", "Marker", "Marker"):
+        for db in page.get("DBInstances", []):
+            yield _record(
+                db.get("DBInstanceArn", db["DBInstanceIdentifier"]), "rds_database",
+                db["DBInstanceIdentifier"], region, _tag_dict(db.get("TagList")),
+                {
+                    "engine": db.get("Engine"),
+                    "version": db.get("EngineVersion"),
+                    "instance_class": db.get("DBInstanceClass"),
+                    "multi_az": db.get("MultiAZ", False),
+                    "size_gb": db.get("AllocatedStorage"),
+                    "security_groups": [g["VpcSecurityGroupId"]
+                                        for g in db.get("VpcSecurityGroups", [])],
+                },
+            )
+
+
+def _bucket_region(call, bucket):
+    region = bucket.get("BucketRegion")  # only in newer ListBuckets responses
+    if region:
+        return region
+    location = call("get_bucket_location", Bucket=bucket["Name"]).get("LocationConstraint")
+    # No constraint means us-east-1; "EU" is the legacy name of eu-west-1.
+    return {None: "us-east-1", "": "us-east-1", "EU": "eu-west-1"}.get(location, location)
+
+
+def _scan_s3(call, region):
+    # S3 lists every bucket from one region; each record carries the
+    # bucket's own region.
+    for page in call.paginate("list_buckets", "ContinuationToken", "ContinuationToken"):
+        for bucket in page.get("Buckets", []):
+            yield _record(
+                f"s3-{bucket['Name']}", "s3_bucket", bucket["Name"],
+                _bucket_region(call, bucket), {}, {},
+            )
+
+
+def _scan_lambda(call, region):
+    for page in call.paginate("list_functions", "Marker", "NextMarker"):
+        for fn in page.get("Functions", []):
+            yield _record(
+                fn.get("FunctionArn", fn["FunctionName"]), "lambda_function",
+                fn["FunctionName"], region, {},
+                {
+                    "runtime": fn.get("Runtime"),
+                    "memory_mb": fn.get("MemorySize"),
+                    "timeout_s": fn.get("Timeout"),
+                },
+            )
+
+
+def _scan_ecs(call, region):
+    for cluster_page in call.paginate("list_clusters", "nextToken", "nextToken"):
+        for cluster in cluster_page.get("clusterArns", []):
+            for page in call.paginate("list_services", "nextToken", "nextToken",
+                                      cluster=cluster):
+                arns = page.get("serviceArns", [])
+                # DescribeServices accepts at most 10 services per call.
+                for i in range(0, len(arns), 10):
+                    described = call("describe_services", cluster=cluster,
+                                     services=arns[i:i + 10], include=["TAGS"])
+                    for svc in described.get("services", []):
+                        yield _record(
+                            svc["serviceArn"], "ecs_service", svc["serviceName"],
+                            region, _tag_dict(svc.get("tags"), "key", "value"),
+                            {
+                                "launch_type": svc.get("launchType"),
+                                "desired_count": svc.get("desiredCount"),
+                            },
+                        )
+
+
+def _scan_elasticache(call, region):
+    for page in call.paginate("describe_cache_clusters", "Marker", "Marker"):
+        for cluster in page.get("CacheClusters", []):
+            yield _record(
+                cluster.get("ARN", cluster["CacheClusterId"]), "elasticache_cluster",
+                cluster["CacheClusterId"], region, {},
+                {
+                    "engine": cluster.get("Engine"),
+                    "node_type": cluster.get("CacheNodeType"),
+                    "num_nodes": cluster.get("NumCacheNodes"),
+                    "security_groups": [g["SecurityGroupId"]
+                                        for g in cluster.get("SecurityGroups", [])],
+                },
+            )
+
+
+def _scan_elbv2(call, region):
+    for page in call.paginate("describe_load_balancers", "Marker", "NextMarker"):
+        for lb in page.get("LoadBalancers", []):
+            yield _record(
+                lb["LoadBalancerArn"], "load_balancer", lb["LoadBalancerName"],
+                region, {},
+                {
+                    "type": lb.get("Type"),
+                    "scheme": lb.get("Scheme"),
+                    "security_groups": lb.get("SecurityGroups", []),
+                },
+            )
+
+
+def _scan_apigateway(call, region):
+    for page in call.paginate("get_rest_apis", "position", "position"):
+        for api in page.get("items", []):
+            yield _record(
+                f"apigw-{api['id']}", "api_gateway", api.get("name", api["id"]),
+                region, dict(api.get("tags", {})),
+                {"endpoint_types": api.get("endpointConfiguration", {}).get("types", [])},
+            )
+
+
+# resource_type -> (AWS service name, global service?, scanner)
+SCANNERS = {
+    "ec2_instance": ("ec2", False, _scan_ec2),
+    "rds_database": ("rds", False, _scan_rds),
+    "s3_bucket": ("s3", True, _scan_s3),
+    "lambda_function": ("lambda", False, _scan_lambda),
+    "ecs_service": ("ecs", False, _scan_ecs),
+    "elasticache_cluster": ("elasticache", False, _scan_elasticache),
+    "load_balancer": ("elbv2", False, _scan_elbv2),
+    "api_gateway": ("apigateway", False, _scan_apigateway),
+}
+
+
+def task_key(resource_type, region, account):
+    """What identifies the scan task covering a resource, for matching failed tasks.
+
+    A global service is scanned once per account, from the first region,
+    whatever region its resources live in.
+    """
+    _, is_global, _ = SCANNERS.get(resource_type, (None, False, None))
+    return resource_type, None if is_global else region, account
+
+
+class Boto3ClientFactory:
+    """Create boto3 clients, assuming ``role_name`` in each target account.
+
+    With no ``role_name`` (or for the ``None`` account) the default
+    credential chain is used.
+    """
+
+    def __init__(self, role_name=None, session_name="cloudmigrate-discovery"):
+        import boto3  # deferred: only live discovery needs it
+
+        self._boto3 = boto3
+        self.role_name = role_name
+        self.session_name = session_name
+        self._sessions = {}
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def _session(self, account):
+        if account is None or not self.role_name:
+            return self._boto3.session.Session()
+        session = self._sessions.get(account)
+        if session is None:
+            creds = self._boto3.client("sts").assume_role(
+                RoleArn=f"arn:aws:iam::{account}:role/{self.role_name}",
+                RoleSessionName=self.session_name,
+            )["Credentials"]
+            session = self._sessions[account] = self._boto3.session.Session(
+                aws_access_key_id=creds["AccessKeyId"],
+                aws_secret_access_key=creds["SecretAccessKey"],
+                aws_session_token=creds["SessionToken"],
+            )
+        return session
+
+    def __call__(self, service, region, account):
+        key = (service, region, account)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = self._session(account).client(
+                    service, region_name=region
+                )
+        return client
+
+
+class TaskReport:
+    __slots__ = ("resource_type", "region", "account", "count", "seconds",
+                 "calls", "retries", "error")
+
+    def __init__(self, resource_type, region, account):
+        self.resource_type = resource_type
+        self.region = region
+        self.account = account
+        self.count = 0
+        self.seconds = 0.0
+        self.calls = 0
+        self.retries = 0
+        self.error = None
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class DiscoveryResult:
+    def __init__(self, resources, tasks, seconds):
+        self.resources = resources
+        self.tasks = tasks
+        self.seconds = seconds
+
+    @property
+    def errors(self):
+        return [t for t in self.tasks if t.error]
+
+    def report(self):
+        return {
+            "resources": len(self.resources),
+            "seconds": round(self.seconds, 3),
+            "tasks": [t.as_dict() for t in self.tasks],
+        }
+
+
+_DONE = object()
+
+
+class _Cancelled(Exception):
+    """Raised inside a scan task when the consumer stopped reading."""
+
+
+class DiscoveryEngine:
+    """Scan (resource type, region, account) combinations concurrently.
+
+    ``client_factory(service, region, account)`` returns an object exposing
+    the boto3 client methods the scanners call; tests pass a fake.
+    Failed tasks are recorded in their ``TaskReport`` rather than aborting
+    the sweep.
+    """
+
+    def __init__(self, client_factory, resource_types=None, regions=None,
+                 accounts=(None,), max_workers=16, rate_limits=None,
+                 max_attempts=5, base_delay=0.25, max_delay=10.0,
+                 sleep=time.sleep, queue_size=10000):
+        self.client_factory = client_factory
+        self.resource_types = list(resource_types or SCANNERS)
+        self.regions = list(regions or DEFAULT_REGIONS)
+        self.accounts = list(accounts)
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.queue_size = queue_size
+        self.rate_limits = dict(DEFAULT_RATE_LIMITS, **(rate_limits or {}))
+        self._buckets = {}
+        self._buckets_lock = threading.Lock()
+
+    def tasks(self):
+        """Return the ``(resource_type, region, account)`` combinations to scan."""
+        combos = []
+        for account in self.accounts:
+            for rtype in self.resource_types:
+                _, is_global, _ = SCANNERS[rtype]
+                regions = self.regions[:1] if is_global else self.regions
+                combos.extend((rtype, region, account) for region in regions)
+        return combos
+
+    def _bucket(self, service, region, account):
+        """The token bucket shared by every task calling ``service`` in one region and account."""
+        key = (service, region, account)
+        with self._buckets_lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate_limits.get(service, 10.0),
+                                                          sleep=self.sleep)
+        return bucket
+
+    def _run_task(self, report, sink):
+        service, _, scanner = SCANNERS[report.resource_type]
+        bucket = self._bucket(service, report.region, report.account)
+        started = time.perf_counter()
+        caller = None
+        try:
+            client = self.client_factory(service, report.region, report.account)
+            caller = _Caller(client, bucket, self.max_attempts, self.base_delay,
+                             self.max_delay, self.sleep)
+            for record in scanner(caller, report.region):
+                if report.account is not None:
+                    record["account_id"] = report.account
+                sink(record)
+                report.count += 1
+        except Exception as exc:  # noqa: BLE001 - reported per task
+            report.error = f"{type(exc).__name__}: {exc}"
+            logger.warning("Discovery of %s in %s/%s failed: %s",
+                           report.resource_type, report.account, report.region,
+                           report.error)
+        finally:
+            report.seconds = time.perf_counter() - started
+            if caller is not None:
+                report.calls = caller.calls
+                report.retries = caller.retries
+
+    def stream(self, reports=None):
+        """Yield resource records as tasks produce them.
+
+        Records pass through a bounded queue, so a slow consumer applies
+        back-pressure to the scanners instead of buffering everything.
+        Task reports are appended to ``reports`` if a list is given.
+        """
+        pending = [TaskReport(*combo) for combo in self.tasks()]
+        if reports is not None:
+            reports.extend(pending)
+        if not pending:
+            return
+
+        records = queue.Queue(maxsize=self.queue_size)
+        cancelled = threading.Event()
+
+        def put(item):
+            # Give up once the consumer has stopped reading, so workers
+            # never block forever on a full queue.
+            while not cancelled.is_set():
+                try:
+                    records.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            raise _Cancelled()
+
+        def work(report):
+            try:
+                self._run_task(report, put)
+            finally:
+                try:
+                    put(_DONE)
+                except _Cancelled:
+                    pass
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                  thread_name_prefix="discovery")
+        try:
+            for report in pending:
+                pool.submit(work, report)
+            remaining = len(pending)
+            while remaining:
+                item = records.get()
+                if item is _DONE:
+                    remaining -= 1
+                else:
+                    yield item
+        finally:
+            cancelled.set()
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def run(self):
+        started = time.perf_counter()
+        reports = []
+        resources = list(self.stream(reports))
+        return DiscoveryResult(resources, reports, time.perf_counter() - started)
+
+
+def engine_from_config(config, client_factory=None):
+    """Build a DiscoveryEngine from the ``DISCOVERY_*`` config settings."""
+    if client_factory is None:
+        client_factory = Boto3ClientFactory(role_name=config.get("DISCOVERY_ROLE_NAME") or None)
+    return DiscoveryEngine(
+        client_factory,
+        regions=config.get("DISCOVERY_REGIONS") or None,
+        accounts=config.get("DISCOVERY_ACCOUNTS") or (None,),
+        max_workers=config.get("DISCOVERY_MAX_WORKERS", 16),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run live AWS resource discovery")
+    parser.add_argument("--regions", nargs="+", default=DEFAULT_REGIONS)
+    parser.add_argument("--accounts", nargs="+", default=[None])
+    parser.add_argument("--role-name")
+    parser.add_argument("--types", nargs="+", choices=sorted(SCANNERS))
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--output", help="write discovered resources to this JSON file")
+    args = parser.parse_args(argv)
+
+    engine = DiscoveryEngine(
+        Boto3ClientFactory(role_name=args.role_name),
+        resource_types=args.types,
+        regions=args.regions,
+        accounts=args.accounts,
+        max_workers=args.workers,
+    )
+    result = engine.run()
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result.resources, f)
+    print(json.dumps(result.report(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
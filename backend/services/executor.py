@@ -0,0 +1,716 @@
+"""Migration execution engine.
+
+A migration is executed as three phases over its resources, each phase
+moving the migration's status along ``VALID_STATUSES``:
+
+    analyze  -> "analyzing"
+    migrate  -> "in_progress"   (dependencies first)
+    validate -> "validating"
+
+and then to "completed", or "failed" as soon as a step exhausts its
+retries (running steps are allowed to finish; nothing new starts).
+
+Jobs live in a SQLite queue (``jobs.db`` in the migration state
+directory) together with every finished step, so a job interrupted by a
+restart resumes where it stopped: a running job holds a lease that its
+engine renews, and an expired lease makes the job claimable again.
+
+One dispatcher thread owns all scheduling state and hands steps to a
+thread pool, never exceeding the engine's total, per-account and
+per-resource-type concurrency caps. The caps are per engine, i.e. per
+process: every gunicorn worker (and every standalone worker) running
+jobs may use the full caps, so size them for the number of processes. During ``migrate`` a resource only
+starts once everything it depends on (per the dependency graph; cycle
+members move together) has migrated. Step actions are pluggable per
+phase and resource type, see ``ActionRegistry``.
+
+The API runs an engine in-process (it stops when idle and restarts on
+the next submission). A standalone worker sharing the state directory
+can take over queued and orphaned jobs::
+
+    python -m services.executor --max-workers 16 --account-limit 4 \\
+        --type-limit rds_database=2 --type-limit ec2_instance=8
+"""
+import argparse
+import logging
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+
+from services.dependency_service import get_dependency_graph
+from services.migration_service import STATE_DIR, get_migration, update_migration
+from services.resource_service import get_resource
+
+logger = logging.getLogger(__name__)
+
+PHASES = (
+    ("analyze", "analyzing"),
+    ("migrate", "in_progress"),
+    ("validate", "validating"),
+)
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_LEASE_SECONDS = 30.0
+DEFAULT_PROGRESS_INTERVAL = 1.0
+DEFAULT_IDLE_TIMEOUT = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id           TEXT PRIMARY KEY,
+    status       TEXT NOT NULL,
+    enqueued_at  TEXT NOT NULL,
+    started_at   TEXT,
+    finished_at  TEXT,
+    owner        TEXT,
+    lease_until  REAL NOT NULL DEFAULT 0,
+    cancel       INTEGER NOT NULL DEFAULT 0,
+    error        TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_status ON jobs (status, enqueued_at);
+CREATE TABLE IF NOT EXISTS steps (
+    job_id       TEXT NOT NULL,
+    phase        TEXT NOT NULL,
+    resource_id  TEXT NOT NULL,
+    status       TEXT NOT NULL,
+    attempts     INTEGER NOT NULL,
+    error        TEXT,
+    PRIMARY KEY (job_id, phase, resource_id)
+);
+"""
+
+ACTIVE_JOB_STATUSES = ("queued", "running")
+
+
+class StepError(Exception):
+    """Raised by a step action to fail the step (it may be retried)."""
+
+
+class StepContext:
+    """What an action gets to work with for one step."""
+
+    __slots__ = ("migration", "resource", "phase", "attempt")
+
+    def __init__(self, migration, resource, phase, attempt):
+        self.migration = migration
+        self.resource = resource
+        self.phase = phase
+        self.attempt = attempt
+
+
+def noop_action(ctx):
+    """Default action: nothing to execute yet, the step succeeds."""
+
+
+class FakeAction:
+    """Simulated step: sleeps for a random latency and fails at ``failure_rate``.
+
+    For tests and demos of the engine without touching AWS.
+    """
+
+    def __init__(self, latency=(0.0, 0.0), failure_rate=0.0, seed=None, sleep=time.sleep):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._sleep = sleep
+
+    def __call__(self, ctx):
+        with self._lock:
+            delay = self._random.uniform(*self.latency)
+            fail = self._random.random() < self.failure_rate
+        self._sleep(delay)
+        if fail:
+            raise StepError(f"Simulated {ctx.phase} failure for {ctx.resource['resource_id']}")
+
+
+class ActionRegistry:
+    """Step actions by phase, optionally specialised per resource type."""
+
+    def __init__(self, default=noop_action):
+        self.default = default
+        self._actions = {}
+
+    def register(self, phase, action, resource_type=None):
+        if phase not in dict(PHASES):
+            raise ValueError(f"Unknown phase: {phase}")
+        self._actions[(phase, resource_type)] = action
+
+    def resolve(self, phase, resource_type):
+        return (self._actions.get((phase, resource_type))
+                or self._actions.get((phase, None))
+                or self.default)
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobQueue:
+    """Persistent queue of execution jobs and their finished steps (SQLite, WAL)."""
+
+    DB_NAME = "jobs.db"
+
+    def __init__(self, state_dir, clock=time.time):
+        self.db_path = os.path.join(state_dir, self.DB_NAME)
+        os.makedirs(state_dir, exist_ok=True)
+        self._clock = clock
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def enqueue(self, job_id):
+        """Queue a job; returns False if it is already queued or running."""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is not None and row[0] in ACTIVE_JOB_STATUSES:
+                return False
+            conn.execute("DELETE FROM steps WHERE job_id = ?", (job_id,))
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, status, enqueued_at) VALUES (?, 'queued', ?)",
+                (job_id, _now()),
+            )
+        return True
+
+    def claim(self, owner, lease_seconds, limit=16):
+        """Take queued jobs, and running jobs whose lease expired, for ``owner``."""
+        now = self._clock()
+        with self._transaction() as conn:
+            ids = [row[0] for row in conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' "
+                "OR (status = 'running' AND lease_until < ?) "
+                "ORDER BY enqueued_at LIMIT ?", (now, limit))]
+            for job_id in ids:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', owner = ?, lease_until = ?, "
+                    "started_at = COALESCE(started_at, ?) WHERE id = ?",
+                    (owner, now + lease_seconds, _now(), job_id),
+                )
+        return ids
+
+    def renew(self, owner, job_ids, lease_seconds):
+        """Extend ``owner``'s leases; returns the ids whose cancellation was requested."""
+        if not job_ids:
+            return set()
+        until = self._clock() + lease_seconds
+        marks = ",".join("?" * len(job_ids))
+        with self._transaction() as conn:
+            conn.execute(
+                f"UPDATE jobs SET lease_until = ? WHERE owner = ? AND id IN ({marks})",
+                [until, owner, *job_ids],
+            )
+            rows = conn.execute(
+                f"SELECT id FROM jobs WHERE cancel = 1 AND id IN ({marks})", list(job_ids))
+            return {row[0] for row in rows}
+
+    def record_steps(self, job_id, steps):
+        """Persist finished steps: ``(phase, resource_id, status, attempts, error)``."""
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO steps VALUES (?, ?, ?, ?, ?, ?)",
+                [(job_id, *step) for step in steps],
+            )
+
+    def done_steps(self, job_id):
+        """``{(phase, resource_id)}`` of steps that already succeeded."""
+        rows = self._conn().execute(
+            "SELECT phase, resource_id FROM steps WHERE job_id = ? AND status = 'done'",
+            (job_id,))
+        return set(rows)
+
+    def finish(self, job_id, status, error=None):
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, error = ?, lease_until = 0 "
+                "WHERE id = ?", (status, _now(), error, job_id))
+
+    def request_cancel(self, job_id):
+        """Flag an active job for cancellation; returns False if it is not active."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET cancel = 1 WHERE id = ? AND status IN ('queued', 'running')",
+                (job_id,))
+            return cursor.rowcount > 0
+
+    def has_work(self):
+        row = self._conn().execute(
+            "SELECT 1 FROM jobs WHERE status = 'queued' "
+            "OR (status = 'running' AND lease_until < ?) LIMIT 1", (self._clock(),)
+        ).fetchone()
+        return row is not None
+
+    def get(self, job_id):
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT status, enqueued_at, started_at, finished_at, cancel, error "
+            "FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        counts = defaultdict(dict)
+        for phase, status, count in conn.execute(
+                "SELECT phase, status, COUNT(*) FROM steps WHERE job_id = ? "
+                "GROUP BY phase, status", (job_id,)):
+            counts[phase][status] = count
+        status, enqueued_at, started_at, finished_at, cancel, error = row
+        return {
+            "migration_id": job_id,
+            "status": status,
+            "enqueued_at": enqueued_at,
+            "started_at": started_at,
+            "finished_at": finished_at,
+            "cancel_requested": bool(cancel),
+            "error": error,
+            "steps": {phase: counts.get(phase, {}) for phase, _ in PHASES},
+        }
+
+
+class _Step:
+    __slots__ = ("job", "phase", "resource", "key", "attempts")
+
+    def __init__(self, job, phase, resource, key):
+        self.job = job
+        self.phase = phase
+        self.resource = resource
+        self.key = key  # (account, resource_type), what the caps count
+        self.attempts = 0
+
+
+class _Job:
+    """Scheduling state of one running job (owned by the dispatcher thread)."""
+
+    def __init__(self, migration, resources, done):
+        self.id = migration["id"]
+        self.migration = migration
+        self.resources = resources
+        self.positions = {r["resource_id"]: i for i, r in enumerate(resources)}
+        self.done = done
+        self.phase_index = -1
+        self.ready = defaultdict(deque)
+        self.running = 0
+        self.finished = 0
+        self.total = 0
+        self.error = None
+        self.finished_steps = []
+        self.progress_at = 0.0
+        # migrate-phase dependency state, per strongly connected component
+        self.component = None
+        self.waiting = None
+        self.dependents = None
+        self.members_left = None
+        self.blocked = None
+
+    @property
+    def phase(self):
+        return PHASES[self.phase_index][0]
+
+
+def resource_key(resource):
+    """``(account, resource_type)`` a step on ``resource`` counts against for the caps."""
+    account = resource.get("account_id")
+    if account is None:
+        known = get_resource(resource["resource_id"])
+        account = (known or {}).get("account_id")
+    return account or "default", resource.get("resource_type", "unknown")
+
+
+class ExecutionEngine:
+    """Concurrency-limited scheduler running migration jobs from a ``JobQueue``.
+
+    The caps bound this engine only; engines in other processes sharing the
+    queue each apply their own.
+    """
+
+    def __init__(self, job_queue, actions=None, max_workers=DEFAULT_MAX_WORKERS,
+                 account_limit=None, type_limits=None, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 lease_seconds=DEFAULT_LEASE_SECONDS,
+                 progress_interval=DEFAULT_PROGRESS_INTERVAL,
+                 idle_timeout=DEFAULT_IDLE_TIMEOUT, clock=time.monotonic):
+        self.queue = job_queue
+        self.actions = actions or ActionRegistry()
+        self.max_workers = max_workers
+        self.account_limit = account_limit
+        self.type_limits = dict(type_limits or {})
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.progress_interval = progress_interval
+        self.idle_timeout = idle_timeout
+        self._clock = clock
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._jobs = {}
+        self._results = queue.Queue()
+        self._wake = threading.Event()
+        self._cancel_requested = False
+        self._stop = threading.Event()
+        self._thread = None
+        self._stopping = False  # the dispatcher decided to exit; start() replaces it
+        self._lock = threading.Lock()
+        self._running_total = 0
+        self._running_account = defaultdict(int)
+        self._running_type = defaultdict(int)
+
+    # -- public API ----------------------------------------------------------
+
+    def submit(self, migration_id):
+        """Queue a migration for execution and make sure the dispatcher runs.
+
+        Returns False if it is already queued or running.
+        """
+        if not self.queue.enqueue(migration_id):
+            return False
+        self.start()
+        self._wake.set()
+        return True
+
+    def cancel(self, migration_id):
+        """Request cancellation; the job fails once its running steps return."""
+        if not self.queue.request_cancel(migration_id):
+            return False
+        self._cancel_requested = True
+        self._wake.set()
+        return True
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive() or self._stopping:
+                self._stopping = False
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="migration-executor",
+                                                daemon=True)
+                self._thread.start()
+
+    def stop(self, wait=True):
+        self._stop.set()
+        self._wake.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    def run_until_idle(self, timeout=None):
+        """Start (if needed) and block until there is no work left. Returns False on timeout."""
+        self.start()
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    # -- dispatcher ----------------------------------------------------------
+
+    def _run(self):
+        pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                  thread_name_prefix="migration-step")
+        idle_since = self._clock()
+        renewed = 0.0
+        try:
+            while not self._stop.is_set():
+                self._claim()
+                self._drain_results()
+                if self._cancel_requested or self._clock() - renewed >= self.lease_seconds / 3:
+                    self._cancel_requested = False
+                    for job_id in self.queue.renew(self.owner, list(self._jobs),
+                                                   self.lease_seconds):
+                        self._fail(self._jobs[job_id], "Execution cancelled")
+                    renewed = self._clock()
+                self._dispatch(pool)
+                self._finish_jobs()
+
+                if self._jobs or self._running_total:
+                    idle_since = self._clock()
+                elif self._clock() - idle_since >= self.idle_timeout:
+                    # Decided under the lock ``start`` takes: a job enqueued
+                    # after this check finds the dispatcher stopping and
+                    # starts a new one rather than waiting on this one.
+                    with self._lock:
+                        if not self.queue.has_work():
+                            self._stopping = True
+                            break
+                self._wake.wait(min(0.5, self.lease_seconds / 3))
+                self._wake.clear()
+        finally:
+            pool.shutdown(wait=True)
+            self._drain_results()
+
+    def _claim(self):
+        for job_id in self.queue.claim(self.owner, self.lease_seconds):
+            migration = get_migration(job_id)
+            if migration is None:
+                self.queue.finish(job_id, "failed", "Migration not found")
+                continue
+            resources = list({r["resource_id"]: r
+                              for r in migration.get("resources", [])}.values())
+            job = _Job(migration, resources, self.queue.done_steps(job_id))
+            self._jobs[job_id] = job
+            logger.info("Executing migration %s (%d resources)", job_id, len(resources))
+            self._advance(job)
+
+    def _advance(self, job):
+        """Move ``job`` to its next phase (or complete it)."""
+        while True:
+            job.phase_index += 1
+            if job.phase_index >= len(PHASES):
+                job.phase_index = len(PHASES)
+                return
+            phase, status = PHASES[job.phase_index]
+            steps = [_Step(job, phase, r, resource_key(r)) for r in job.resources
+                     if (phase, r["resource_id"]) not in job.done]
+            job.ready.clear()
+            job.total = len(job.resources)
+            job.finished = job.total - len(steps)
+            update_migration(job.id, {"status": status, "progress": self._progress(job)})
+            if phase == "migrate":
+                self._plan_dependencies(job, steps)
+            else:
+                for step in steps:
+                    job.ready[step.key].append(step)
+            if steps:
+                self._wake.set()
+                return
+
+    def _plan_dependencies(self, job, steps):
+        ids = [r["resource_id"] for r in job.resources]
+        sub = get_dependency_graph().subgraph(ids)
+        labels, count = sub.components()
+        src, dst = labels[sub.src], labels[sub.dst]
+        cross = src != dst
+        pairs = np.unique(np.stack([src[cross], dst[cross]], axis=1), axis=0)
+        job.component = labels
+        job.waiting = np.bincount(pairs[:, 0], minlength=count) if len(pairs) else \
+            np.zeros(count, dtype=np.int64)
+        job.dependents = defaultdict(list)
+        for dependent, dependency in pairs.tolist():
+            job.dependents[dependency].append(dependent)
+        job.members_left = np.bincount(labels, minlength=count)
+
+        position = job.positions
+        job.blocked = defaultdict(list)
+        pending = {step.resource["resource_id"] for step in steps}
+        for rid in ids:
+            if rid not in pending:
+                self._component_member_done(job, labels[position[rid]], release=False)
+        for step in steps:
+            c = labels[position[step.resource["resource_id"]]]
+            if job.waiting[c]:
+                job.blocked[c].append(step)
+            else:
+                job.ready[step.key].append(step)
+
+    def _component_member_done(self, job, component, release=True):
+        job.members_left[component] -= 1
+        if job.members_left[component]:
+            return
+        for dependent in job.dependents.get(component, ()):
+            job.waiting[dependent] -= 1
+            if release and not job.waiting[dependent]:
+                for step in job.blocked.pop(dependent, ()):
+                    job.ready[step.key].append(step)
+
+    def _fits(self, key):
+        account, rtype = key
+        if self._running_total >= self.max_workers:
+            return False
+        if self.account_limit is not None and self._running_account[account] >= self.account_limit:
+            return False
+        limit = self.type_limits.get(rtype)
+        return limit is None or self._running_type[rtype] < limit
+
+    def _dispatch(self, pool):
+        for job in list(self._jobs.values()):
+            if job.error is not None:
+                continue
+            for key in list(job.ready):
+                steps = job.ready[key]
+                while steps and self._fits(key):
+                    step = steps.popleft()
+                    step.attempts += 1
+                    self._running_total += 1
+                    self._running_account[key[0]] += 1
+                    self._running_type[key[1]] += 1
+                    job.running += 1
+                    pool.submit(self._execute, step)
+                if not steps:
+                    del job.ready[key]
+                if self._running_total >= self.max_workers:
+                    return
+
+    def _execute(self, step):
+        action = self.actions.resolve(step.phase, step.key[1])
+        ctx = StepContext(step.job.migration, step.resource, step.phase, step.attempts)
+        error = None
+        try:
+            action(ctx)
+        except Exception as exc:  # noqa: BLE001 - any action failure fails the step
+            error = str(exc) or type(exc).__name__
+        self._results.put((step, error))
+        self._wake.set()
+
+    def _drain_results(self):
+        while True:
+            try:
+                step, error = self._results.get_nowait()
+            except queue.Empty:
+                return
+            job = step.job
+            self._running_total -= 1
+            self._running_account[step.key[0]] -= 1
+            self._running_type[step.key[1]] -= 1
+            job.running -= 1
+            rid = step.resource["resource_id"]
+            if error is None:
+                job.finished += 1
+                job.finished_steps.append((step.phase, rid, "done", step.attempts, None))
+                if step.phase == "migrate":
+                    self._component_member_done(job, job.component[job.positions[rid]])
+            elif step.attempts < self.max_attempts and job.error is None:
+                logger.warning("Step %s/%s of %s failed (attempt %d): %s",
+                               step.phase, rid, job.id, step.attempts, error)
+                job.ready[step.key].append(step)
+            else:
+                job.finished_steps.append((step.phase, rid, "failed", step.attempts, error))
+                self._fail(job, f"{step.phase} failed for {rid}: {error}")
+
+    def _fail(self, job, message):
+        if job.error is None:
+            job.error = message
+            job.ready.clear()
+
+    def _progress(self, job):
+        return {
+            "phase": job.phase if job.phase_index < len(PHASES) else "done",
+            "completed_steps": job.finished,
+            "total_steps": job.total,
+        }
+
+    def _finish_jobs(self):
+        now = self._clock()
+        for job in list(self._jobs.values()):
+            if job.finished_steps:
+                self.queue.record_steps(job.id, job.finished_steps)
+                for phase, rid, status, _, _ in job.finished_steps:
+                    if status == "done":
+                        job.done.add((phase, rid))
+                job.finished_steps = []
+
+            if job.error is not None:
+                if job.running:
+                    continue
+                update_migration(job.id, {"status": "failed", "error_message": job.error,
+                                          "progress": self._progress(job)})
+                self.queue.finish(job.id, "failed", job.error)
+                logger.warning("Migration %s failed: %s", job.id, job.error)
+                del self._jobs[job.id]
+                continue
+
+            if not job.running and not job.ready and job.finished >= job.total:
+                self._advance(job)
+                if job.phase_index >= len(PHASES):
+                    update_migration(job.id, {"status": "completed",
+                                              "progress": self._progress(job)})
+                    self.queue.finish(job.id, "completed")
+                    logger.info("Migration %s completed", job.id)
+                    del self._jobs[job.id]
+                    continue
+                job.progress_at = now
+            elif now - job.progress_at >= self.progress_interval:
+                update_migration(job.id, {"progress": self._progress(job)})
+                job.progress_at = now
+
+
+# -- process-wide engine -------------------------------------------------------
+
+_settings = {}
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def configure_executor(max_workers=DEFAULT_MAX_WORKERS, account_limit=None,
+                       type_limits=None, actions=None, **options):
+    """Set the caps (and optionally the actions) used by engines created from now on.
+
+    An ``account_limit`` of 0 or None means no per-account cap.
+    """
+    _settings.clear()
+    account_limit = account_limit or None
+    _settings.update(max_workers=max_workers, account_limit=account_limit,
+                     type_limits=type_limits or {}, actions=actions, **options)
+
+
+def get_executor(state_dir=None):
+    """The engine for ``state_dir`` (default: the migration state directory)."""
+    if state_dir is None:
+        state_dir = os.environ.get("MIGRATION_STATE_DIR", STATE_DIR)
+    with _engines_lock:
+        engine = _engines.get(state_dir)
+        if engine is None:
+            engine = _engines[state_dir] = ExecutionEngine(JobQueue(state_dir), **_settings)
+        return engine
+
+
+def parse_type_limits(specs):
+    """``["rds_database=2", ...]`` (or one comma-separated string) -> ``{type: cap}``."""
+    if isinstance(specs, str):
+        specs = specs.split(",")
+    limits = {}
+    for spec in specs:
+        if not spec:
+            continue
+        rtype, _, value = spec.partition("=")
+        limits[rtype.strip()] = int(value)
+    return limits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run queued migration executions")
+    parser.add_argument("--max-workers", type=int, default=None)
+    parser.add_argument("--account-limit", type=int, default=None)
+    parser.add_argument("--type-limit", action="append", default=[],
+                        help="resource_type=N, repeatable")
+    args = parser.parse_args(argv)
+
+    # The app factory configures the store, inventory and dependency
+    # sources (and the EXECUTOR_* caps) exactly as the API process does.
+    from app import create_app
+    create_app()
+    overrides = {"idle_timeout": float("inf")}
+    if args.max_workers is not None:
+        overrides["max_workers"] = args.max_workers
+    if args.account_limit is not None:
+        overrides["account_limit"] = args.account_limit
+    if args.type_limit:
+        overrides["type_limits"] = parse_type_limits(args.type_limit)
+    configure_executor(**{**_settings, **overrides})
+
+    engine = get_executor()
+    logger.info("Executor %s polling %s", engine.owner, engine.queue.db_path)
+    try:
+        engine.run_until_idle()
+    except KeyboardInterrupt:
+        engine.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+import zlib
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+}
+
+MIGRATION_EXPORT_FIELDS = (
+    "id", "name", "source_environment", "target_environment", "strategy",
+    "status", "created_at", "updated_at", "started_at", "completed_at",
+    "rollback_available", "resources", "error_log",
+)
+
+RESOURCE_EXPORT_FIELDS = (
+    "resource_id", "resource_type", "name", "region", "account_id", "tags", "specs",
+)
+
+# Records per yielded chunk; keeps writes to the socket reasonably sized.
+_RECORDS_PER_CHUNK = 100
+
+
+def _chunked(lines):
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= _RECORDS_PER_CHUNK:
+            yield "".join(buffer).encode()
+            buffer = []
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def _ndjson_lines(records):
+    for record in records:
+        yield json.dumps(record, separators=(",", ":"), default=str) + "\n"
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(",", ":"), default=str)
+    return value
+
+
+def _csv_lines(records, fields):
+    out = io.StringIO()
+    writer = csv.writer(out)
+
+    def take():
+        line = out.getvalue()
+        out.seek(0)
+        out.truncate()
+        return line
+
+    writer.writerow(fields)
+    yield take()
+    for record in records:
+        writer.writerow([_cell(record.get(field)) for field in fields])
+        yield take()
+
+
+def gzip_chunks(chunks):
+    """Gzip a stream of byte chunks incrementally."""
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(records, fmt, fields, compress=False):
+    """Serialize an iterable of records as a stream of byte chunks.
+
+    ``records`` is consumed lazily, so memory use is bounded by one chunk
+    regardless of how many records are exported. Nested values become
+    JSON strings in CSV output.
+    """
+    if fmt == "csv":
+        lines = _csv_lines(records, fields)
+    elif fmt == "ndjson":
+        lines = _ndjson_lines(records)
+    else:
+        raise ValueError(f"Unknown export format: {fmt}")
+    chunks = _chunked(lines)
+    return gzip_chunks(chunks) if compress else chunks
@@ -0,0 +1,443 @@
+"""VPC flow-log ingestion: aggregate resource-to-resource dependency edges.
+
+Reads flow-log v2 files (default format, plain or gzipped), maps source
+and destination addresses to inventory resources by private IP, and
+aggregates accepted traffic into ``client -> server`` edges with byte,
+packet and flow counts. The result is written as an edge CSV
+(``source,target,bytes,packets,flows``) that ``DEPENDENCY_EDGE_FILES`` can
+point at.
+
+Usage::
+
+    python -m services.flow_logs edges.csv logs/*.log.gz [--resources inventory.ndjson]
+"""
+import argparse
+import csv
+import gzip
+import json
+import logging
+import mmap
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# version account-id interface-id srcaddr dstaddr srcport dstport protocol
+# packets bytes start end action log-status
+FIELDS = 14
+_SRCADDR, _DSTADDR, _SRCPORT, _DSTPORT = 3, 4, 5, 6
+_PACKETS, _BYTES, _ACTION = 8, 9, 12
+
+DEFAULT_CHUNK_SIZE = 16 << 20
+# Uncompressed files larger than this are split across workers; gzip
+# streams cannot be split and are always one task.
+DEFAULT_SPLIT_SIZE = 128 << 20
+DEFAULT_MAX_EDGES = 1_000_000
+
+
+# -- reading -------------------------------------------------------------------
+
+def _cut_lines(blocks):
+    """Re-chunk a stream of byte blocks so every chunk ends on a newline."""
+    tail = b""
+    for block in blocks:
+        block = tail + block
+        cut = block.rfind(b"\n") + 1
+        tail = block[cut:]
+        if cut:
+            yield block[:cut]
+    if tail:
+        yield tail
+
+
+def iter_chunks(path, start=0, end=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield newline-aligned chunks of a flow-log file.
+
+    Gzipped files are decompressed incrementally. Plain files are
+    memory-mapped; with ``start``/``end`` only the lines beginning inside
+    that byte range are yielded, so ranges can be processed independently.
+    """
+    if path.endswith(".gz"):
+        with gzip.open(path, "rb") as f:
+            yield from _cut_lines(iter(lambda: f.read(chunk_size), b""))
+        return
+
+    size = os.path.getsize(path)
+    end = size if end is None else min(end, size)
+    if start >= end:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if start:
+            newline = mm.find(b"\n", start - 1)
+            if newline == -1:
+                return
+            start = newline + 1
+        stop = mm.find(b"\n", end - 1) if end < size else -1
+        stop = size if stop == -1 else stop + 1
+        blocks = (mm[pos:min(pos + chunk_size, stop)]
+                  for pos in range(start, stop, chunk_size))
+        yield from _cut_lines(blocks)
+
+
+def _read_tasks(paths, split_size=DEFAULT_SPLIT_SIZE):
+    tasks = []
+    for path in paths:
+        if path.endswith(".gz"):
+            tasks.append((path, 0, None))
+            continue
+        size = os.path.getsize(path)
+        for start in range(0, max(size, 1), split_size):
+            tasks.append((path, start, start + split_size))
+    return tasks
+
+
+# -- parsing -------------------------------------------------------------------
+
+# Zero bytes around a chunk so fixed-width windows never run off either end.
+_PAD = 32
+
+
+def _padded(data):
+    """``data`` as a uint8 array with ``_PAD`` zero bytes on both sides."""
+    buf = np.zeros(len(data) + 2 * _PAD, dtype=np.uint8)
+    buf[_PAD:_PAD + len(data)] = np.frombuffer(data, dtype=np.uint8)
+    return buf
+
+
+def _windows(buf, offsets, width):
+    """``(len(offsets), width)`` copy of the bytes starting at each offset."""
+    return np.lib.stride_tricks.sliding_window_view(buf, width)[offsets]
+
+
+def _ip_keys(buf, starts, ends):
+    """Exact uint64 key for every IPv4 address field (0 where not IPv4).
+
+    A dotted quad is at most 15 characters from ``0-9.``; packing each
+    character into a nibble (padding = 0xF) fits the text in 64 bits, so
+    addresses are compared without decoding them.
+    """
+    chars = _windows(buf, starts, 16)
+    chars[np.arange(16) >= (ends - starts)[:, None]] = 0xFF
+    nibbles = chars & 0x0F
+    keys = ((nibbles[:, 0::2] << 4) | nibbles[:, 1::2]).view("<u8").ravel()
+    ok = (ends - starts <= 15) & ((chars == 0xFF) | (chars == 46)
+                                   | ((chars >= 48) & (chars <= 57))).all(axis=1)
+    return np.where(ok, keys, 0)
+
+
+class IpIndex:
+    """Private IPv4 address -> inventory resource, for vectorized lookup."""
+
+    def __init__(self, resources):
+        self.ids = []
+        addresses, positions = [], []
+        for resource in resources:
+            specs = resource.get("specs") or {}
+            ips = list(specs.get("private_ips") or [])
+            if specs.get("private_ip"):
+                ips.append(specs["private_ip"])
+            ips = [ip for ip in ips if ip.count(".") == 3]
+            if not ips:
+                continue
+            addresses.extend(ips)
+            positions.extend([len(self.ids)] * len(ips))
+            self.ids.append(resource["resource_id"])
+        lengths = np.array([len(ip) for ip in addresses], dtype=np.int64)
+        starts = _PAD + np.cumsum(lengths + 1) - lengths - 1
+        keys = (_ip_keys(_padded(" ".join(addresses).encode()), starts, starts + lengths)
+                if addresses else np.empty(0, dtype="<u8"))
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.positions = np.asarray(positions, dtype=np.int64)[order]
+
+    def lookup(self, keys):
+        """Resource position per address key, -1 where unknown."""
+        if not self.keys.size:
+            return np.full(len(keys), -1, dtype=np.int64)
+        at = np.minimum(np.searchsorted(self.keys, keys), self.keys.size - 1)
+        return np.where((self.keys[at] == keys) & (keys != 0), self.positions[at], -1)
+
+
+def _normalize(chunk):
+    """Rewrite a chunk as single-space separated, newline-terminated lines.
+
+    Returns ``(chunk, malformed)``; lines without exactly ``FIELDS``
+    fields are dropped and counted.
+    """
+    lines = [line.split() for line in chunk.splitlines()]
+    good = [b" ".join(fields) for fields in lines if len(fields) == FIELDS]
+    malformed = sum(1 for fields in lines if fields) - len(good)
+    return (b"\n".join(good) + b"\n") if good else b"", malformed
+
+
+def _field_bounds(buf):
+    """``(starts, ends)`` of every field, shape ``(lines, FIELDS)``, or None.
+
+    Offsets are into the padded buffer. Only succeeds when every line has
+    exactly ``FIELDS`` single-space separated fields and ends with a
+    newline (any other whitespace or control byte fails the check).
+    """
+    body = buf[_PAD:-_PAD]
+    seps = np.flatnonzero(body <= 32) + _PAD
+    if not seps.size or seps.size % FIELDS or body[-1] != 10:
+        return None
+    ends = seps.reshape(-1, FIELDS)
+    if not ((buf[ends[:, -1]] == 10).all() and (buf[ends[:, :-1]] == 32).all()):
+        return None
+    starts = np.empty_like(ends)
+    starts[:, 1:] = ends[:, :-1] + 1
+    starts[0, 0] = _PAD
+    starts[1:, 0] = ends[:-1, -1] + 1
+    return starts, ends
+
+
+def _parse_uint(buf, starts, ends):
+    """Vectorized unsigned integer parse; ``ok`` is False for ``-`` and junk.
+
+    Digits are right-aligned into a ``(rows, width)`` matrix and reduced
+    with one dot product against powers of ten.
+    """
+    lengths = ends - starts
+    width = min(int(lengths.max()), 19) if lengths.size else 1
+    digits = _windows(buf, ends - width, width).astype(np.int64) - 48
+    digits[np.arange(width, 0, -1) > lengths[:, None]] = 0
+    value = digits @ (10 ** np.arange(width - 1, -1, -1, dtype=np.int64))
+    ok = (lengths > 0) & (lengths <= width) & ((digits >= 0) & (digits <= 9)).all(axis=1)
+    return value, ok
+
+
+def parse_chunk(chunk, ip_index):
+    """Vectorized parse of one chunk of flow-log v2 records.
+
+    Fields are located and decoded directly from the byte buffer with
+    NumPy (no per-record Python work). Returns ``(src, dst, bytes,
+    packets, stats)`` for accepted IPv4 records whose both ends map to a
+    resource, oriented client -> server: a record whose source port is the
+    lower one is a response and is flipped. ``stats`` counts records seen,
+    matched and malformed.
+    """
+    malformed = 0
+    if chunk and not chunk.endswith(b"\n"):
+        chunk += b"\n"
+    buf = _padded(chunk)
+    bounds = _field_bounds(buf) if chunk else None
+    if bounds is None and chunk:
+        chunk, malformed = _normalize(chunk)
+        buf = _padded(chunk)
+        bounds = _field_bounds(buf) if chunk else None
+    if bounds is None:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty, empty, {"records": 0, "matched": 0,
+                                            "malformed": malformed}
+    starts, ends = bounds
+    records = len(starts)
+
+    src = ip_index.lookup(_ip_keys(buf, starts[:, _SRCADDR], ends[:, _SRCADDR]))
+    dst = ip_index.lookup(_ip_keys(buf, starts[:, _DSTADDR], ends[:, _DSTADDR]))
+    # ACTION is ACCEPT, REJECT or "-": the first byte decides.
+    accepted = buf[starts[:, _ACTION]] == ord("A")
+    keep = (src >= 0) & (dst >= 0) & (src != dst) & accepted
+
+    rows = np.flatnonzero(keep)
+    starts, ends = starts[rows], ends[rows]
+    nbytes, ok_b = _parse_uint(buf, starts[:, _BYTES], ends[:, _BYTES])
+    packets, ok_p = _parse_uint(buf, starts[:, _PACKETS], ends[:, _PACKETS])
+    srcport, ok_s = _parse_uint(buf, starts[:, _SRCPORT], ends[:, _SRCPORT])
+    dstport, ok_d = _parse_uint(buf, starts[:, _DSTPORT], ends[:, _DSTPORT])
+    ok = ok_b & ok_p
+    src, dst = src[rows][ok], dst[rows][ok]
+    nbytes, packets = nbytes[ok], packets[ok]
+    response = (ok_s & ok_d)[ok] & (srcport[ok] < dstport[ok])
+    src, dst = np.where(response, dst, src), np.where(response, src, dst)
+    stats = {"records": records, "matched": int(src.size), "malformed": malformed}
+    return src, dst, nbytes, packets, stats
+
+
+# -- aggregation ----------------------------------------------------------------
+
+class EdgeAggregator:
+    """Bounded table of ``src -> dst`` edges with byte, packet and flow sums.
+
+    Edges are kept as parallel NumPy arrays sorted by key (``src << 32 |
+    dst``). Incoming batches are buffered and folded in with one sort and
+    ``reduceat`` once the buffer reaches ``max_edges`` rows. If the table
+    then exceeds ``max_edges`` the lightest edges (by bytes) are dropped
+    and counted in ``dropped``, so memory stays bounded (about twice
+    ``max_edges`` rows) however many distinct pairs the logs contain.
+    """
+
+    def __init__(self, max_edges=DEFAULT_MAX_EDGES):
+        self.max_edges = max_edges
+        self.dropped = 0
+        self._table = _empty_columns()
+        self._pending = []
+        self._pending_rows = 0
+
+    def add(self, keys, nbytes, packets, flows=None):
+        if not len(keys):
+            return
+        if flows is None:
+            flows = np.ones(len(keys), dtype=np.int64)
+        self._pending.append((keys, nbytes, packets, flows))
+        self._pending_rows += len(keys)
+        if self._pending_rows >= self.max_edges:
+            self._fold()
+
+    def add_flows(self, src, dst, nbytes, packets):
+        self.add(src * (1 << 32) + dst, nbytes, packets)
+
+    def _fold(self):
+        if not self._pending:
+            return
+        columns = [np.concatenate(parts) for parts in zip(self._table, *self._pending)]
+        self._pending, self._pending_rows = [], 0
+        keys, nbytes, packets, flows = columns
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        first = np.empty(len(keys), dtype=bool)
+        first[:1] = True
+        np.not_equal(keys[1:], keys[:-1], out=first[1:])
+        starts = np.flatnonzero(first)
+        table = [keys[starts]] + [np.add.reduceat(col[order], starts)
+                                  for col in (nbytes, packets, flows)]
+        if len(starts) > self.max_edges:
+            heaviest = np.argpartition(-table[1], self.max_edges)[:self.max_edges]
+            heaviest.sort()
+            self.dropped += len(starts) - self.max_edges
+            table = [col[heaviest] for col in table]
+        self._table = tuple(table)
+
+    def columns(self):
+        """``(keys, bytes, packets, flows)`` arrays, one row per edge."""
+        self._fold()
+        return self._table
+
+    def __len__(self):
+        return len(self.columns()[0])
+
+
+def _empty_columns():
+    return tuple(np.empty(0, dtype=np.int64) for _ in range(4))
+
+
+_worker_ip_index = None
+
+
+def _init_worker(ip_index):
+    global _worker_ip_index
+    _worker_ip_index = ip_index
+
+
+def _ingest_task(task, ip_index=None, max_edges=DEFAULT_MAX_EDGES,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+    path, start, end = task
+    ip_index = _worker_ip_index if ip_index is None else ip_index
+    aggregator = EdgeAggregator(max_edges)
+    totals = {"records": 0, "matched": 0, "malformed": 0, "bytes_read": 0}
+    for chunk in iter_chunks(path, start, end, chunk_size):
+        src, dst, nbytes, packets, stats = parse_chunk(chunk, ip_index)
+        aggregator.add_flows(src, dst, nbytes, packets)
+        for key, value in stats.items():
+            totals[key] += value
+        totals["bytes_read"] += len(chunk)
+    columns = aggregator.columns()
+    totals["dropped_edges"] = aggregator.dropped
+    return columns, totals
+
+
+def ingest_flow_logs(paths, resources, workers=None, max_edges=DEFAULT_MAX_EDGES,
+                     split_size=DEFAULT_SPLIT_SIZE, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Aggregate dependency edges from flow-log files.
+
+    Files (and byte ranges of large plain files) are processed in a
+    process pool of ``workers`` (default: CPU count; 1 runs inline).
+    Returns ``(edges, stats)`` where each edge is a dict with ``source``,
+    ``target``, ``bytes``, ``packets`` and ``flows``, heaviest first.
+    """
+    started = time.perf_counter()
+    ip_index = IpIndex(resources)
+    ids = ip_index.ids
+    tasks = _read_tasks(paths, split_size)
+    workers = workers or os.cpu_count() or 1
+
+    aggregator = EdgeAggregator(max_edges)
+    stats = {"records": 0, "matched": 0, "malformed": 0, "bytes_read": 0,
+             "dropped_edges": 0}
+
+    def merge(result):
+        columns, totals = result
+        aggregator.add(*columns)
+        for key, value in totals.items():
+            stats[key] += value
+
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            merge(_ingest_task(task, ip_index, max_edges, chunk_size))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks)),
+                                 initializer=_init_worker, initargs=(ip_index,)) as pool:
+            for result in pool.map(_ingest_task, tasks,
+                                   [None] * len(tasks), [max_edges] * len(tasks),
+                                   [chunk_size] * len(tasks)):
+                merge(result)
+
+    keys, nbytes, packets, flows = aggregator.columns()
+    stats["dropped_edges"] += aggregator.dropped
+    order = np.argsort(-nbytes, kind="stable")
+    edges = [
+        {"source": ids[key >> 32], "target": ids[key & 0xFFFFFFFF],
+         "bytes": b, "packets": p, "flows": n}
+        for key, b, p, n in zip(keys[order].tolist(), nbytes[order].tolist(),
+                                packets[order].tolist(), flows[order].tolist())
+    ]
+    stats["edges"] = len(edges)
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return edges, stats
+
+
+def write_edges_csv(edges, path):
+    """Write edges in the CSV format ``dependency_service.read_edge_file`` reads."""
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["source", "target", "bytes", "packets", "flows"])
+        writer.writeheader()
+        writer.writerows(edges)
+
+
+def _load_resources(path):
+    with open(path, "r") as f:
+        if path.endswith(".ndjson"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate dependency edges from VPC flow logs")
+    parser.add_argument("output", help="edge CSV to write")
+    parser.add_argument("logs", nargs="+", help="flow-log files (.gz or plain)")
+    parser.add_argument("--resources",
+                        help="inventory as JSON or NDJSON (e.g. /api/v1/resources/export); "
+                             "defaults to the in-process inventory")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-edges", type=int, default=DEFAULT_MAX_EDGES)
+    args = parser.parse_args(argv)
+
+    if args.resources:
+        resources = _load_resources(args.resources)
+    else:
+        from services.resource_service import get_all_resources
+        resources = get_all_resources()
+
+    edges, stats = ingest_flow_logs(args.logs, resources, workers=args.workers,
+                                    max_edges=args.max_edges)
+    write_edges_csv(edges, args.output)
+    mb = stats["bytes_read"] / 1e6
+    print(f"{stats['records']} records ({mb:.0f} MB) in {stats['seconds']}s "
+          f"({mb / max(stats['seconds'], 1e-9):.0f} MB/s): "
+          f"{stats['matched']} matched, {stats['edges']} edges -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
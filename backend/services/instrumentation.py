@@ -0,0 +1,235 @@
+"""In-process metrics: counters, gauges and histograms in Prometheus text format.
+
+Every thread updates its own shard (a plain dict it alone writes to), so
+recording takes no lock; ``render`` merges the shards on scrape. A
+scrape may see an observation half-recorded (bucket counted, sum not
+yet), which Prometheus tolerates. Shards of threads that have exited
+are folded into one retired shard, so thread-per-request servers and
+worker pools do not grow the registry.
+
+``instrumented`` wraps a service function with call counts, durations
+and, through ``add_bytes`` calls made while it runs, bytes read and
+written. The request middleware lives in ``routes/metrics.py``.
+Recording is skipped entirely while disabled (``configure_instrumentation``).
+
+Metrics are per process: under several gunicorn workers each scrape
+sees the worker that served it.
+"""
+import bisect
+import functools
+import threading
+import time
+
+# Seconds; wide enough for a snapshot compaction or a full cost estimate.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0)
+
+_TYPES = ("counter", "gauge", "histogram")
+
+
+class _Local(threading.local):
+    # Class-level defaults: reading an unset attribute must not raise,
+    # exceptions cost more than the recording itself.
+    values = None
+    operation = None
+
+
+class Registry:
+    """Metric definitions plus one value shard per recording thread."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._shards = []  # (owning thread, shard)
+        self._retired = {}
+        self._lock = threading.Lock()
+        self.local = _Local()
+
+    def define(self, name, kind, help_text, buckets=DEFAULT_BUCKETS):
+        if kind not in _TYPES:
+            raise ValueError(f"Unknown metric type: {kind}")
+        self._metrics[name] = (kind, help_text, tuple(buckets) if kind == "histogram" else None)
+
+    def buckets(self, name):
+        return self._metrics[name][2]
+
+    def shard(self):
+        """Create this thread's shard; callers try ``self.local.values`` first."""
+        values = self.local.values = {}
+        with self._lock:
+            self._prune()
+            self._shards.append((threading.current_thread(), values))
+        return values
+
+    def _prune(self):
+        # Under ``_lock``. A dead thread never writes again, so its shard
+        # can be summed into ``_retired`` (new lists: scrapes read it unlocked).
+        live = []
+        for thread, values in self._shards:
+            if thread.is_alive():
+                live.append((thread, values))
+            else:
+                _merge(self._retired, values)
+        self._shards = live
+
+    def inc(self, name, labels=(), amount=1):
+        """Add ``amount`` to a counter or gauge; ``labels`` is a tuple of pairs."""
+        shard = self.local.values
+        if shard is None:
+            shard = self.shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        shard = self.local.values
+        if shard is None:
+            shard = self.shard()
+        key = (name, labels)
+        slots = shard.get(key)
+        buckets = self._metrics[name][2]
+        if slots is None:
+            # one count per bucket, one for +Inf, then the sum
+            slots = shard[key] = [0] * (len(buckets) + 2)
+        slots[bisect.bisect_left(buckets, value)] += 1
+        slots[-1] += value
+
+    def collect(self):
+        """``{name: {labels: value}}`` summed over all shards.
+
+        Histogram values are ``[per-bucket counts..., +Inf count, sum]``.
+        """
+        with self._lock:
+            self._prune()
+            shards = [self._retired.copy()] + [values for _, values in self._shards]
+        totals = {}
+        for shard in shards:
+            _merge(totals, shard.copy())
+        merged = {}
+        for (name, labels), value in totals.items():
+            merged.setdefault(name, {})[labels] = value
+        return merged
+
+    def render(self):
+        """Everything in the Prometheus text exposition format (0.0.4)."""
+        collected = self.collect()
+        lines = []
+        for name, (kind, help_text, buckets) in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(collected.get(name, {}).items()):
+                if kind != "histogram":
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + (float("inf"),), value):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _number(bound)
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(value[-1])}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Drop all recorded values (definitions stay)."""
+        with self._lock:
+            self._retired = {}
+            for _, shard in self._shards:
+                shard.clear()
+
+
+def _merge(into, shard):
+    """Add a shard's values into ``into``, never mutating lists in place."""
+    for key, value in shard.items():
+        total = into.get(key)
+        if isinstance(value, list):
+            into[key] = [a + b for a, b in zip(total, value)] if total else list(value)
+        else:
+            into[key] = (total or 0) + value
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = Registry()
+registry.define("service_calls_total", "counter",
+                "Instrumented service calls by operation and outcome.")
+registry.define("service_call_duration_seconds", "histogram",
+                "Duration of instrumented service calls.")
+registry.define("service_bytes_read_total", "counter",
+                "Bytes read by instrumented service calls.")
+registry.define("service_bytes_written_total", "counter",
+                "Bytes written by instrumented service calls.")
+
+_enabled = True
+_current = _Local()
+
+
+def configure_instrumentation(enabled=True):
+    """Turn recording on or off for the request middleware and ``instrumented``."""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def is_enabled():
+    return _enabled
+
+
+def add_bytes(read=0, written=0):
+    """Count I/O against the innermost ``instrumented`` call on this thread."""
+    operation = _current.operation
+    if operation is None or not _enabled:
+        return
+    labels = (("operation", operation),)
+    if read:
+        registry.inc("service_bytes_read_total", labels, read)
+    if written:
+        registry.inc("service_bytes_written_total", labels, written)
+
+
+def instrumented(operation):
+    """Decorator recording calls, errors and duration of ``operation``."""
+    labels = (("operation", operation),)
+    duration_key = ("service_call_duration_seconds", labels)
+    ok_key = ("service_calls_total", labels + (("outcome", "ok"),))
+    error_key = ("service_calls_total", labels + (("outcome", "error"),))
+    buckets = registry.buckets("service_call_duration_seconds")
+    local = registry.local
+
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            outer = _current.operation
+            _current.operation = operation
+            started = time.perf_counter()
+            outcome = error_key
+            try:
+                result = fn(*args, **kwargs)
+                outcome = ok_key
+                return result
+            finally:
+                elapsed = time.perf_counter() - started
+                _current.operation = outer
+                # inlined registry.observe/inc: this runs on every store call
+                shard = local.values
+                if shard is None:
+                    shard = registry.shard()
+                slots = shard.get(duration_key)
+                if slots is None:
+                    slots = shard[duration_key] = [0] * (len(buckets) + 2)
+                slots[bisect.bisect_left(buckets, elapsed)] += 1
+                slots[-1] += elapsed
+                shard[outcome] = shard.get(outcome, 0) + 1
+        return wrapper
+    return decorate
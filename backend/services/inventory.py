@@ -0,0 +1,188 @@
+import bisect
+import hashlib
+import json
+import threading
+
+from services.resource_index import ResourceIndex
+
+# Fields that define a resource's content for change detection.
+HASHED_FIELDS = ("resource_type", "name", "region", "tags", "specs")
+
+# Change-journal entries retained for /changes; clients further behind
+# than this are told to resync from a full listing.
+DEFAULT_JOURNAL_SIZE = 100_000
+
+
+def content_hash(resource):
+    """Stable digest of a resource's type, name, region, tags and specs."""
+    body = {field: resource.get(field) for field in HASHED_FIELDS}
+    raw = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+class InventoryDelta:
+    __slots__ = ("version", "added", "changed", "removed")
+
+    def __init__(self, version, added, changed, removed):
+        self.version = version
+        self.added = added
+        self.changed = changed
+        self.removed = removed
+
+    def __bool__(self):
+        return bool(self.added or self.changed or self.removed)
+
+    def as_dict(self):
+        return {
+            "version": self.version,
+            "added": len(self.added),
+            "changed": len(self.changed),
+            "removed": len(self.removed),
+        }
+
+
+class Inventory:
+    """Versioned resource inventory refreshed by delta.
+
+    ``refresh`` hashes the incoming resources, compares them with the
+    stored hashes and applies only the added, changed and removed ones to
+    the ``ResourceIndex``. Each non-empty refresh bumps ``version`` and
+    records the touched ids in a bounded journal that ``changes_since``
+    coalesces into a diff.
+    """
+
+    def __init__(self, resources=(), journal_size=DEFAULT_JOURNAL_SIZE):
+        resources = list(resources)
+        self.version = 1
+        self.journal_size = journal_size
+        self._index = ResourceIndex(resources)
+        self._hashes = {r["resource_id"]: content_hash(r) for r in resources}
+        # Parallel lists: the version of each journal entry, and the entry.
+        self._journal_versions = []
+        self._journal = []
+        self._journal_floor = self.version
+        self._derived = {}
+        self._lock = threading.RLock()
+
+    # -- reads -------------------------------------------------------------
+
+    def query(self, **kwargs):
+        with self._lock:
+            return self._index.query(**kwargs)
+
+    def match(self, **kwargs):
+        """Copy of the ids matching the filters, or None if there are none."""
+        with self._lock:
+            matches = self._index.match(**kwargs)
+            return None if matches is None else set(matches)
+
+    def get(self, resource_id):
+        with self._lock:
+            return self._index.get(resource_id)
+
+    def values(self):
+        with self._lock:
+            return self._index.values()
+
+    def __len__(self):
+        return len(self._index)
+
+    def derived(self, key, compute):
+        """Return ``compute(resources)``, cached until the inventory changes.
+
+        For summaries, cost arrays and other values derived from the whole
+        inventory; ``key`` distinguishes them (and their parameters).
+        """
+        with self._lock:
+            version = self.version
+            cached = self._derived.get(key)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            resources = self._index.values()
+        value = compute(resources)
+        with self._lock:
+            if self.version == version:
+                self._derived[key] = (version, value)
+        return value
+
+    # -- writes ------------------------------------------------------------
+
+    def refresh(self, resources, keep=None):
+        """Reconcile the inventory with a full set of freshly discovered resources.
+
+        ``keep(resource)`` marks existing resources that must not be removed
+        even though they are missing from ``resources`` (e.g. because the
+        scan covering them failed). Returns an ``InventoryDelta``.
+        """
+        incoming = {}
+        for resource in resources:
+            incoming[resource["resource_id"]] = resource
+
+        with self._lock:
+            added, changed = [], []
+            for rid, resource in incoming.items():
+                digest = content_hash(resource)
+                previous = self._hashes.get(rid)
+                if previous == digest:
+                    continue
+                (added if previous is None else changed).append(rid)
+                self._hashes[rid] = digest
+                self._index.add(resource)
+
+            removed = []
+            for rid in [rid for rid in self._hashes if rid not in incoming]:
+                if keep is not None and keep(self._index.get(rid)):
+                    continue
+                removed.append(rid)
+                del self._hashes[rid]
+                self._index.remove(rid)
+
+            if added or changed or removed:
+                self.version += 1
+                self._derived.clear()
+                self._record(added, "added")
+                self._record(changed, "changed")
+                self._record(removed, "removed")
+            return InventoryDelta(self.version, added, changed, removed)
+
+    def _record(self, ids, kind):
+        for rid in ids:
+            self._journal_versions.append(self.version)
+            self._journal.append((rid, kind))
+        overflow = len(self._journal) - self.journal_size
+        if overflow > 0:
+            # Drop whole versions so a partially trimmed version is never served.
+            cut = bisect.bisect_right(self._journal_versions,
+                                      self._journal_versions[overflow - 1])
+            self._journal_floor = self._journal_versions[cut - 1]
+            del self._journal_versions[:cut]
+            del self._journal[:cut]
+
+    def changes_since(self, since):
+        """Return the net diff between version ``since`` and now.
+
+        Resources added and removed within the window are dropped; anything
+        added within the window is reported as added even if it later
+        changed. If ``since`` predates the journal, ``resync`` is True and
+        the client should reload the full listing.
+        """
+        with self._lock:
+            if since < self._journal_floor or since > self.version:
+                return {"since": since, "version": self.version, "resync": True,
+                        "added": [], "changed": [], "removed": []}
+
+            start = bisect.bisect_right(self._journal_versions, since)
+            first_kind = {}
+            for rid, kind in self._journal[start:]:
+                first_kind.setdefault(rid, kind)
+
+            added, changed, removed = [], [], []
+            for rid, kind in first_kind.items():
+                resource = self._index.get(rid)
+                if resource is not None:
+                    (added if kind == "added" else changed).append(resource)
+                elif kind != "added":
+                    removed.append(rid)
+
+            return {"since": since, "version": self.version, "resync": False,
+                    "added": added, "changed": changed, "removed": removed}
@@ -0,0 +1,399 @@
+"""Local utilization time-series store (a stand-in for CloudWatch).
+
+Samples are kept in 5-minute slots in one float32 chunk per UTC day,
+laid out ``[resource row, metric, slot]`` and memory-mapped, with NaN for
+missing samples. Resource rows come from an append-only registry, so a
+row means the same resource in every chunk; chunks written before a
+resource was registered are simply shorter. Each raw chunk has two
+rollups, rewritten whenever the day is ingested:
+
+* ``1h`` -- ``[row, metric, hour, (mean, max)]``
+* ``1d`` -- ``[row, metric, (mean, max, p95)]``
+
+Usage::
+
+    python -m services.metrics_store ingest /var/lib/cloudmigrate/metrics dumps/*.csv.gz
+
+Dump files are CSV with ``timestamp,resource_id,metric,value`` columns
+(timestamps as epoch seconds or ISO 8601); CloudWatch metric names are
+accepted as aliases.
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("cpu", "memory", "network_in", "network_out")
+METRIC_ALIASES = {
+    "CPUUtilization": "cpu",
+    "MemoryUtilization": "memory",
+    "mem_used_percent": "memory",
+    "NetworkIn": "network_in",
+    "NetworkOut": "network_out",
+}
+
+SLOT_SECONDS = 300
+SLOTS_PER_DAY = 86400 // SLOT_SECONDS
+SLOTS_PER_HOUR = 3600 // SLOT_SECONDS
+HOURS_PER_DAY = 24
+
+# Trailing shape of each chunk kind, after ``[row, metric]``.
+RESOLUTIONS = {
+    "5m": (SLOTS_PER_DAY,),
+    "1h": (HOURS_PER_DAY, 2),
+    "1d": (3,),
+}
+
+DEFAULT_BATCH_ROWS = 1_000_000
+# Raw day chunks held in memory while ingesting (~4.6 MB per 1k resources each).
+DEFAULT_OPEN_DAYS = 4
+
+
+def nan_quantile(values, q):
+    """Quantile ``q`` (0-1) along the last axis, ignoring NaN.
+
+    Sort-based and fully vectorized (``np.nanpercentile`` falls back to a
+    per-row Python loop when rows hold different numbers of NaNs). Rows
+    with no values give NaN.
+    """
+    ordered = np.sort(values, axis=-1)  # NaN sorts last
+    count = np.sum(~np.isnan(ordered), axis=-1)
+    pos = q * np.maximum(count - 1, 0)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, np.maximum(count - 1, 0))
+    low = np.take_along_axis(ordered, lo[..., None], axis=-1)[..., 0]
+    high = np.take_along_axis(ordered, hi[..., None], axis=-1)[..., 0]
+    result = low + (high - low) * (pos - lo)
+    return np.where(count > 0, result, np.nan)
+
+
+def nan_mean(values, axis=-1):
+    """Mean ignoring NaN, NaN where a slice is empty (without warnings)."""
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=axis)
+    total = np.where(valid, values, 0.0).sum(axis=axis)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+
+def _parse_timestamp(value):
+    try:
+        return int(float(value))
+    except ValueError:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp())
+
+
+def _open_dump(path):
+    if path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, "rb"), newline="")
+    return open(path, "r", newline="")
+
+
+def iter_dump_batches(path, batch_rows=DEFAULT_BATCH_ROWS, counters=None):
+    """Yield ``(timestamps, resource_ids, metric_codes, values)`` batches from a dump file.
+
+    Rows with an unknown metric or an unparseable value are skipped and
+    counted in ``counters["skipped"]``.
+    """
+    codes = {name: i for i, name in enumerate(METRICS)}
+    codes.update({alias: codes[name] for alias, name in METRIC_ALIASES.items()})
+    if counters is None:
+        counters = {}
+    counters.setdefault("skipped", 0)
+    with _open_dump(path) as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        col = {name: i for i, name in enumerate(header)}
+        t_col, r_col, m_col, v_col = (col["timestamp"], col["resource_id"],
+                                      col["metric"], col["value"])
+        batch = ([], [], [], [])
+        for row in reader:
+            code = codes.get(row[m_col])
+            try:
+                ts, value = _parse_timestamp(row[t_col]), float(row[v_col])
+            except (ValueError, IndexError):
+                code = None
+            if code is None:
+                counters["skipped"] += 1
+                continue
+            batch[0].append(ts)
+            batch[1].append(row[r_col])
+            batch[2].append(code)
+            batch[3].append(value)
+            if len(batch[0]) >= batch_rows:
+                yield _arrays(batch)
+                batch = ([], [], [], [])
+        if batch[0]:
+            yield _arrays(batch)
+
+
+def _arrays(batch):
+    timestamps, ids, metrics, values = batch
+    return (np.array(timestamps, dtype=np.int64), ids,
+            np.array(metrics, dtype=np.int8), np.array(values, dtype=np.float32))
+
+
+class MetricsStore:
+    """Day-chunked, memory-mapped utilization series under ``root``.
+
+    Single writer (ingestion), any number of readers: chunks are replaced
+    atomically, and a reader keeps the mapping it opened.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._days_dir = os.path.join(root, "days")
+        os.makedirs(self._days_dir, exist_ok=True)
+        self._registry_path = os.path.join(root, "resources.txt")
+        self._manifest_path = os.path.join(root, "manifest.json")
+        self._maps = {}
+        self.ids = []
+        self.rows = {}
+        self.generation = -1
+        self.days = []
+        self._manifest_signature = None
+        self.reload()
+
+    def reload(self):
+        """Pick up ingestion done by another process. Returns True if anything changed.
+
+        Costs a single ``stat`` while the manifest is unchanged (it is
+        replaced atomically, so every write gives it a new inode).
+        """
+        try:
+            stat = os.stat(self._manifest_path)
+            signature = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            signature = None
+        if signature is not None and signature == self._manifest_signature:
+            return False
+        self._manifest_signature = signature
+        generation, days = 0, []
+        if signature is not None:
+            with open(self._manifest_path, "r") as f:
+                manifest = json.load(f)
+            generation = manifest["generation"]
+            days = [date.fromisoformat(d) for d in manifest["days"]]
+        if generation == self.generation:
+            return False
+        ids = []
+        if os.path.exists(self._registry_path):
+            with open(self._registry_path, "r") as f:
+                ids = f.read().split()
+        self.ids = ids
+        self.rows = {rid: i for i, rid in enumerate(ids)}
+        self.generation = generation
+        self.days = days
+        return True
+
+    def __len__(self):
+        return len(self.ids)
+
+    # -- chunks --------------------------------------------------------------
+
+    def _path(self, day, resolution):
+        return os.path.join(self._days_dir, f"{day.isoformat()}.{resolution}.f32")
+
+    def chunk(self, day, resolution="1h"):
+        """Read-only array for one day, ``[row, metric, *RESOLUTIONS[resolution]]``.
+
+        Rows registered after the day was written are not present; None if
+        the day has no data.
+        """
+        path = self._path(day, resolution)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        key = (day, resolution)
+        signature = (stat.st_ino, stat.st_mtime_ns)
+        cached = self._maps.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        tail = (len(METRICS),) + RESOLUTIONS[resolution]
+        rows = stat.st_size // (4 * int(np.prod(tail)))
+        if not rows:
+            return None
+        array = np.memmap(path, dtype=np.float32, mode="r", shape=(rows,) + tail)
+        self._maps[key] = (signature, array)
+        return array
+
+    def _write(self, day, resolution, array):
+        path = self._path(day, resolution)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(np.ascontiguousarray(array, dtype=np.float32).tobytes())
+        os.replace(tmp_path, path)
+
+    # -- writes --------------------------------------------------------------
+
+    def _register(self, resource_ids):
+        new = [rid for rid in dict.fromkeys(resource_ids) if rid not in self.rows]
+        if not new:
+            return
+        for rid in new:
+            self.rows[rid] = len(self.ids)
+            self.ids.append(rid)
+        with open(self._registry_path, "a") as f:
+            f.write("".join(rid + "\n" for rid in new))
+
+    def ingest(self, paths, batch_rows=DEFAULT_BATCH_ROWS, max_open_days=DEFAULT_OPEN_DAYS):
+        """Load dump files into the store and rebuild the touched rollups.
+
+        Samples land in their 5-minute slot; a later sample for the same
+        slot overwrites an earlier one. At most ``max_open_days`` raw day
+        chunks are held in memory; the least recently touched is flushed
+        when another is needed. Returns ingestion counters.
+        """
+        open_days = OrderedDict()
+        touched = set()
+        counters = {"points": 0, "skipped": 0}
+        for path in paths:
+            for timestamps, ids, metrics, values in iter_dump_batches(path, batch_rows,
+                                                                      counters):
+                self._register(ids)
+                rows = np.fromiter((self.rows[rid] for rid in ids), dtype=np.int64,
+                                   count=len(ids))
+                day_numbers = timestamps // 86400
+                slots = (timestamps % 86400) // SLOT_SECONDS
+                for number in np.unique(day_numbers).tolist():
+                    at = day_numbers == number
+                    day = date(1970, 1, 1) + timedelta(days=number)
+                    raw = open_days.pop(day, None)
+                    if raw is None:
+                        raw = self._load_raw(day)
+                    elif raw.shape[0] < len(self.ids):
+                        grown = np.full((len(self.ids),) + raw.shape[1:], np.nan,
+                                        dtype=np.float32)
+                        grown[:raw.shape[0]] = raw
+                        raw = grown
+                    raw[rows[at], metrics[at], slots[at]] = values[at]
+                    open_days[day] = raw
+                    touched.add(day)
+                    while len(open_days) > max_open_days:
+                        self._flush(*open_days.popitem(last=False))
+                counters["points"] += len(timestamps)
+            logger.info("Read %s", path)
+
+        while open_days:
+            self._flush(*open_days.popitem(last=False))
+        self.days = sorted(set(self.days) | touched)
+        self.generation += 1
+        self._save_manifest()
+        return dict(counters, days=len(touched), resources=len(self.ids))
+
+    def _flush(self, day, raw):
+        self._write(day, "5m", raw)
+        self._write_rollups(day, raw)
+
+    def _load_raw(self, day):
+        existing = self.chunk(day, "5m")
+        raw = np.full((len(self.ids), len(METRICS), SLOTS_PER_DAY), np.nan, dtype=np.float32)
+        if existing is not None:
+            raw[:existing.shape[0]] = existing
+        return raw
+
+    def _write_rollups(self, day, raw):
+        hourly = raw.reshape(raw.shape[0], len(METRICS), HOURS_PER_DAY, SLOTS_PER_HOUR)
+        rollup = np.empty(hourly.shape[:3] + (2,), dtype=np.float32)
+        rollup[..., 0] = nan_mean(hourly)
+        rollup[..., 1] = np.fmax.reduce(hourly, axis=-1)
+        self._write(day, "1h", rollup)
+
+        daily = np.empty(raw.shape[:2] + (3,), dtype=np.float32)
+        daily[..., 0] = nan_mean(raw)
+        daily[..., 1] = np.fmax.reduce(raw, axis=-1)
+        daily[..., 2] = nan_quantile(raw, 0.95)
+        self._write(day, "1d", daily)
+
+    def _save_manifest(self):
+        tmp_path = self._manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"generation": self.generation,
+                       "metrics": list(METRICS),
+                       "days": [d.isoformat() for d in self.days]}, f)
+        os.replace(tmp_path, self._manifest_path)
+
+    # -- reads ---------------------------------------------------------------
+
+    def window(self, days, end=None):
+        """The ``days`` UTC days ending at ``end`` (default: the latest stored day)."""
+        if end is None:
+            if not self.days:
+                return []
+            end = self.days[-1]
+        return [end - timedelta(days=days - 1 - i) for i in range(days)]
+
+    def block(self, metric, start_row, stop_row, days, field=0):
+        """Hourly values ``[row, hour]`` of one metric for a row range.
+
+        ``field`` picks the hourly mean (0) or max (1). Missing days and
+        rows come back as NaN.
+        """
+        m = METRICS.index(metric)
+        out = np.full((stop_row - start_row, len(days) * HOURS_PER_DAY), np.nan,
+                      dtype=np.float32)
+        for i, day in enumerate(days):
+            chunk = self.chunk(day, "1h")
+            if chunk is None:
+                continue
+            stop = min(stop_row, chunk.shape[0])
+            if stop > start_row:
+                out[:stop - start_row, i * HOURS_PER_DAY:(i + 1) * HOURS_PER_DAY] = \
+                    chunk[start_row:stop, m, :, field]
+        return out
+
+    def series(self, resource_id, metric, days=1, end=None, resolution="1h"):
+        """``(timestamps, values)`` of one resource's metric over a window.
+
+        ``1h`` and ``1d`` give means; None if the resource is unknown.
+        """
+        row = self.rows.get(resource_id)
+        if row is None:
+            return None
+        m = METRICS.index(metric)
+        step = {"5m": SLOT_SECONDS, "1h": 3600, "1d": 86400}[resolution]
+        per_day = 86400 // step
+        window = self.window(days, end)
+        values = np.full(len(window) * per_day, np.nan, dtype=np.float32)
+        for i, day in enumerate(window):
+            chunk = self.chunk(day, resolution)
+            if chunk is None or row >= chunk.shape[0]:
+                continue
+            sample = chunk[row, m] if resolution == "5m" else chunk[row, m, ..., 0]
+            values[i * per_day:(i + 1) * per_day] = sample
+        start = int(datetime.combine(window[0], datetime.min.time(),
+                                     tzinfo=timezone.utc).timestamp()) if window else 0
+        return start + step * np.arange(len(values), dtype=np.int64), values
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local utilization metric store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    ing = sub.add_parser("ingest", help="load metric dump files (CSV, optionally gzipped)")
+    ing.add_argument("store")
+    ing.add_argument("dumps", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        stats = MetricsStore(args.store).ingest(args.dumps)
+        print(f"Ingested {stats['points']} points ({stats['skipped']} skipped) "
+              f"into {stats['days']} days for {stats['resources']} resources")
+
+
+if __name__ == "__main__":
+    main()
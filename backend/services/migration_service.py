@@ -1,69 +1,124 @@
-import json
 import os
 import logging
 from datetime import datetime, timezone
+from itertools import islice
+
+from services.change_feed import ChangeFeed
+from services.migration_store import JsonLogStore, sort_key
+from services.migration_store_sqlite import SqliteStore
+from services.pagination import check_limit, decode_cursor, encode_cursor
 
 logger = logging.getLogger(__name__)
 
 STATE_DIR = os.environ.get("MIGRATION_STATE_DIR", "/tmp/migrations")
 
+STORE_BACKENDS = {
+    "jsonlog": JsonLogStore,
+    "sqlite": SqliteStore,
+}
+
+# Bulk writes are committed in transactions of at most this many items.
+BULK_BATCH_SIZE = 1000
+
+_backend = os.environ.get("MIGRATION_STORE_BACKEND", "jsonlog")
+_stores = {}
+_feed = ChangeFeed()
+
+
+def configure_store(backend):
+    """Select the storage backend used for migration records."""
+    global _backend
+    if backend not in STORE_BACKENDS:
+        raise ValueError(f"Unknown migration store backend: {backend}")
+    _backend = backend
+
+
+def configure_change_feed(capacity):
+    """Set how many recent change events are kept for resuming clients."""
+    _feed.resize(capacity)
+
+
+def get_change_feed():
+    """The ``ChangeFeed`` every write in this process publishes to."""
+    return _feed
+
+
+def _publish(changes):
+    """Publish ``(kind, migration_id, record)`` changes with the new stats."""
+    stats = None
+    for kind, mid, record in changes:
+        if stats is None:
+            stats = _store().stats()
+        _feed.publish("migration", {"type": kind, "id": mid, "migration": record,
+                                    "stats": stats})
+
+
+def _state_dir():
+    # Resolved per call so the state directory can be switched at runtime
+    # (the test-suite points each test at its own temp dir).
+    return os.environ.get("MIGRATION_STATE_DIR", STATE_DIR)
+
+
+def _store():
+    key = (_backend, _state_dir())
+    store = _stores.get(key)
+    if store is None:
+        store = _stores[key] = STORE_BACKENDS[_backend](key[1])
+    return store
+
+
+def list_migrations(status_filter=None, limit=50, offset=0, cursor=None):
+    """Return all migrations, optionally filtered by status.
+
+    Pass the previous response's ``next_cursor`` as ``cursor`` to seek
+    straight to the following page instead of counting ``offset`` records.
+    Raises ValueError for a malformed cursor or a non-positive ``limit``.
+    """
+    check_limit(limit)
+    after = None
+    if cursor:
+        after = decode_cursor(cursor)
+        if not (isinstance(after, list) and len(after) == 2
+                and all(isinstance(part, str) for part in after)):
+            raise ValueError("Invalid cursor")
+    page, total = _store().list_page(
+        status=status_filter, limit=limit + 1, offset=offset, after=after
+    )
+
+    next_cursor = None
+    if len(page) > limit > 0:
+        page = page[:limit]
+        next_cursor = encode_cursor(sort_key(page[-1]))
+
+    return {
+        "items": page,
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "next_cursor": next_cursor,
+    }
 
-def _state_file():
-    return os.path.join(STATE_DIR, "migrations.json")
-
-
-def _load_state():
-    path = _state_file()
-    if not os.path.exists(path):
-        return {}
-    with open(path, "r") as f:
-        return json.load(f)
-
-
-def _save_state(state):
-    os.makedirs(STATE_DIR, exist_ok=True)
-    with open(_state_file(), "w") as f:
-        json.dump(state, f, indent=2)
-
-
-def list_migrations(status_filter=None, limit=50, offset=0):
-    """Return all migrations, optionally filtered by status."""
-    state = _load_state()
-    migrations = list(state.values())
-
-    if status_filter:
-        migrations = [m for m in migrations if m["status"] == status_filter]
-
-    migrations.sort(key=lambda m: m["created_at"], reverse=True)
-    total = len(migrations)
-    page = migrations[offset: offset + limit]
 
-    return {"items": page, "total": total, "limit": limit, "offset": offset}
+def iter_migrations(status_filter=None):
+    """Lazily yield every migration, newest first, optionally by status."""
+    return _store().iter_records(status=status_filter)
 
 
 def get_migration(migration_id):
     """Fetch a single migration by ID."""
-    state = _load_state()
-    return state.get(migration_id)
+    return _store().get(migration_id)
 
 
 def create_migration(migration_data):
     """Persist a new migration."""
-    state = _load_state()
     mid = migration_data["id"]
-    state[mid] = migration_data
-    _save_state(state)
+    _store().put(migration_data)
+    _publish([("created", mid, migration_data)])
     logger.info("Created migration %s (%s)", mid, migration_data["name"])
     return migration_data
 
 
-def update_migration(migration_id, updates):
-    """Apply partial updates to an existing migration."""
-    state = _load_state()
-    migration = state.get(migration_id)
-    if migration is None:
-        return None
-
+def _apply_updates(migration, updates):
     now = datetime.now(timezone.utc).isoformat()
 
     for key, value in updates.items():
@@ -84,40 +139,106 @@ def update_migration(migration_id, updates):
             "message": updates.get("error_message", "Migration failed"),
         })
 
-    state[migration_id] = migration
-    _save_state(state)
+    return migration
+
+
+def update_migration(migration_id, updates):
+    """Apply partial updates to an existing migration."""
+    migration = _store().update(
+        migration_id, lambda m: _apply_updates(m, updates)
+    )
+    if migration is None:
+        return None
+    _publish([("updated", migration_id, migration)])
     logger.info("Updated migration %s -> %s", migration_id, updates)
     return migration
 
 
 def delete_migration(migration_id):
     """Remove a migration record."""
-    state = _load_state()
-    if migration_id not in state:
+    if not _store().delete(migration_id):
         return False
-    del state[migration_id]
-    _save_state(state)
+    _publish([("deleted", migration_id, None)])
     logger.info("Deleted migration %s", migration_id)
     return True
 
 
+def _batches(items, size):
+    """Lists of up to ``size`` items, each drawn before any store lock is taken.
+
+    So a slow streamed body is read and validated outside the store's
+    write lock, and only one batch is held in memory at a time.
+    """
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def bulk_create_migrations(records, batch_size=BULK_BATCH_SIZE):
+    """Persist many new migrations, one store transaction per batch.
+
+    ``records`` may be any iterable (e.g. a generator over a streamed
+    request body). Returns the number persisted.
+    """
+    count = 0
+    for batch in _batches(records, batch_size):
+        created = _store().apply_batch([("put", record) for record in batch])
+        count += len(created)
+        _publish(("created", record["id"], record) for record in created)
+    logger.info("Bulk created %d migrations", count)
+    return count
+
+
+def bulk_update_migrations(updates, batch_size=BULK_BATCH_SIZE):
+    """Apply ``(migration_id, updates)`` pairs, one store transaction per batch.
+
+    Returns the updated records in order, with None for unknown ids.
+    """
+    results = []
+    for batch in _batches(updates, batch_size):
+        updated = _store().apply_batch([
+            ("update", mid, lambda m, u=changes: _apply_updates(m, u))
+            for mid, changes in batch
+        ])
+        _publish(("updated", record["id"], record) for record in updated if record is not None)
+        results.extend(updated)
+    logger.info("Bulk updated %d migrations",
+                sum(1 for r in results if r is not None))
+    return results
+
+
+def bulk_delete_migrations(migration_ids, batch_size=BULK_BATCH_SIZE):
+    """Delete many migrations, one store transaction per batch; a bool per id."""
+    results = []
+    for batch in _batches(migration_ids, batch_size):
+        found = _store().apply_batch([("delete", mid) for mid in batch])
+        _publish(("deleted", mid, None) for mid, hit in zip(batch, found) if hit)
+        results.extend(found)
+    logger.info("Bulk deleted %d migrations", sum(results))
+    return results
+
+
+def get_data_version():
+    """Token that changes whenever migration data changes, in any worker."""
+    return (_backend, _state_dir(), _store().generation())
+
+
 def get_migration_stats():
-    """Return aggregate statistics across all migrations."""
-    state = _load_state()
-    migrations = list(state.values())
-
-    stats = {
-        "total": len(migrations),
-        "by_status": {},
-        "by_strategy": {},
-        "total_resources": 0,
-    }
+    """Return aggregate statistics across all migrations.
+
+    The store maintains these incrementally on every write, so this does
+    not touch the individual records.
+    """
+    return _store().stats()
 
-    for m in migrations:
-        status = m.get("status", "unknown")
-        strategy = m.get("strategy", "unknown")
-        stats["by_status"][status] = stats["by_status"].get(status, 0) + 1
-        stats["by_strategy"][strategy] = stats["by_strategy"].get(strategy, 0) + 1
-        stats["total_resources"] += len(m.get("resources", []))
 
-    return stats
+def verify_migration_stats(repair=False):
+    """Recount stats from the records; return the drift, optionally fixing it."""
+    drift = _store().verify_stats(repair=repair)
+    if drift:
+        logger.warning("Migration stats drift detected%s: %s",
+                       " (repaired)" if repair else "", drift)
+    return drift
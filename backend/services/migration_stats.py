@@ -0,0 +1,126 @@
+"""Incrementally maintained migration statistics.
+
+Usage (check or repair the persisted aggregate)::
+
+    python -m services.migration_stats verify [--state-dir DIR] [--backend NAME]
+    python -m services.migration_stats rebuild [--state-dir DIR] [--backend NAME]
+"""
+import argparse
+import json
+import os
+import sys
+
+
+def contributions(record):
+    """Return the ``(dimension, key, amount)`` rows a record adds to the stats."""
+    return [
+        ("total", "", 1),
+        ("by_status", record.get("status", "unknown"), 1),
+        ("by_strategy", record.get("strategy", "unknown"), 1),
+        ("total_resources", "", len(record.get("resources", []))),
+    ]
+
+
+def deltas(old, new):
+    """Rows to add when ``old`` is replaced by ``new`` (either may be None)."""
+    rows = []
+    if old is not None:
+        rows.extend((dim, key, -n) for dim, key, n in contributions(old))
+    if new is not None:
+        rows.extend(contributions(new))
+    return rows
+
+
+class MigrationStats:
+    """Running totals behind ``get_migration_stats``.
+
+    Stores call ``apply(old, new)`` on every write so reads never touch the
+    records themselves.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.total_resources = 0
+        self.by_status = {}
+        self.by_strategy = {}
+
+    @classmethod
+    def from_records(cls, records):
+        stats = cls()
+        for record in records:
+            stats.apply(None, record)
+        return stats
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.total = data["total"]
+        stats.total_resources = data["total_resources"]
+        stats.by_status = dict(data["by_status"])
+        stats.by_strategy = dict(data["by_strategy"])
+        return stats
+
+    def add_rows(self, rows):
+        for dim, key, n in rows:
+            if dim == "total":
+                self.total += n
+            elif dim == "total_resources":
+                self.total_resources += n
+            else:
+                bucket = getattr(self, dim)
+                value = bucket.get(key, 0) + n
+                if value:
+                    bucket[key] = value
+                else:
+                    bucket.pop(key, None)
+
+    def apply(self, old, new):
+        self.add_rows(deltas(old, new))
+
+    def as_dict(self):
+        return {
+            "total": self.total,
+            "by_status": dict(self.by_status),
+            "by_strategy": dict(self.by_strategy),
+            "total_resources": self.total_resources,
+        }
+
+
+def diff_stats(expected, actual):
+    """Return ``{field: {"expected": ..., "actual": ...}}`` for every mismatch."""
+    drift = {}
+    for field in ("total", "total_resources"):
+        if expected[field] != actual[field]:
+            drift[field] = {"expected": expected[field], "actual": actual[field]}
+    for field in ("by_status", "by_strategy"):
+        for key in set(expected[field]) | set(actual[field]):
+            want = expected[field].get(key, 0)
+            have = actual[field].get(key, 0)
+            if want != have:
+                drift[f"{field}.{key}"] = {"expected": want, "actual": have}
+    return drift
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument("--state-dir", help="defaults to $MIGRATION_STATE_DIR")
+    parser.add_argument("--backend", help="defaults to $MIGRATION_STORE_BACKEND")
+    args = parser.parse_args(argv)
+
+    if args.state_dir:
+        os.environ["MIGRATION_STATE_DIR"] = args.state_dir
+
+    from services.migration_service import configure_store, verify_migration_stats
+
+    if args.backend:
+        configure_store(args.backend)
+
+    drift = verify_migration_stats(repair=args.command == "rebuild")
+    print(json.dumps(drift, indent=2, sort_keys=True))
+    if drift and args.command == "verify":
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,436 @@
+import bisect
+import copy
+import fcntl
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+from services.instrumentation import add_bytes, instrumented
+from services.migration_stats import MigrationStats, diff_stats
+
+logger = logging.getLogger(__name__)
+
+# Number of log entries tolerated before the log is folded back into the
+# snapshot. Small enough that a cold process replays the log quickly, large
+# enough that compaction (a full rewrite) stays rare.
+DEFAULT_COMPACT_THRESHOLD = 1000
+
+# Snapshot layout written by compaction. Older snapshots are a bare
+# ``{id: record}`` mapping and are still accepted on load.
+SNAPSHOT_FORMAT = 2
+
+
+def sort_key(record):
+    """Listing order key: newest ``created_at`` first, ``id`` as tie-break."""
+    return (record.get("created_at", ""), record["id"])
+
+
+class _OrderIndex:
+    """Ascending ``sort_key`` lists, one overall and one per status."""
+
+    def __init__(self, records=()):
+        self._keys = {None: []}
+        for record in records:
+            self._keys[None].append(sort_key(record))
+            self._keys.setdefault(record.get("status"), []).append(sort_key(record))
+        for keys in self._keys.values():
+            keys.sort()
+
+    def add(self, record):
+        key = sort_key(record)
+        bisect.insort(self._keys[None], key)
+        bisect.insort(self._keys.setdefault(record.get("status"), []), key)
+
+    def remove(self, record):
+        key = sort_key(record)
+        for keys in (self._keys[None], self._keys.get(record.get("status"), [])):
+            i = bisect.bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                del keys[i]
+
+    def page(self, status, limit, offset, after):
+        """Return ``(ids, total)`` for one page in descending order."""
+        keys = self._keys.get(status or None, [])
+        if after is not None:
+            end = bisect.bisect_left(keys, tuple(after))
+        else:
+            end = max(len(keys) - offset, 0)
+        start = max(end - limit, 0)
+        return [key[1] for key in reversed(keys[start:end])], len(keys)
+
+
+class MigrationStore:
+    """Storage backend interface for migration records.
+
+    Records are plain dicts keyed by their ``id``. Implementations must make
+    ``update`` atomic with respect to other writers, including writers in
+    other processes sharing the same state directory.
+    """
+
+    def get(self, migration_id):
+        raise NotImplementedError
+
+    def values(self):
+        raise NotImplementedError
+
+    def list_page(self, status=None, limit=50, offset=0, after=None):
+        """Return ``(page, total)``, newest first, optionally filtered by status.
+
+        Records are ordered by ``(created_at, id)`` descending. When ``after``
+        is given (a ``(created_at, id)`` key) the page starts with the first
+        record strictly after it and ``offset`` is ignored.
+
+        Backends that can push filtering and ordering down override this;
+        the default sorts the full record set in Python.
+        """
+        migrations = self.values()
+        if status:
+            migrations = [m for m in migrations if m["status"] == status]
+        migrations.sort(key=sort_key, reverse=True)
+        total = len(migrations)
+        if after is not None:
+            after = tuple(after)
+            migrations = [m for m in migrations if sort_key(m) < after]
+            offset = 0
+        return migrations[offset: offset + limit], total
+
+    def iter_records(self, status=None, batch_size=500):
+        """Yield every record in listing order, ``batch_size`` at a time.
+
+        Walks the store by keyset (``list_page`` with ``after``), so only
+        one batch is held in memory and concurrent writes never cause a
+        record to be skipped or repeated.
+        """
+        after = None
+        while True:
+            page, _ = self.list_page(status=status, limit=batch_size, after=after)
+            yield from page
+            if len(page) < batch_size:
+                return
+            after = sort_key(page[-1])
+
+    def put(self, record):
+        raise NotImplementedError
+
+    def update(self, migration_id, apply):
+        """Atomically replace a record with ``apply(copy_of_record)``.
+
+        Returns the new record, or None if the id does not exist.
+        """
+        raise NotImplementedError
+
+    def delete(self, migration_id):
+        raise NotImplementedError
+
+    def apply_batch(self, ops):
+        """Apply a sequence of writes as one transaction with one durable write.
+
+        ``ops`` is an iterable of ``("put", record)``, ``("update", id,
+        apply)`` and ``("delete", id)`` tuples, applied in order (a later op
+        sees earlier ones). Returns one result per op, as the single-record
+        method would have returned it. Either every op is persisted or none.
+        """
+        raise NotImplementedError
+
+    def stats(self):
+        """Return the maintained aggregate (see ``MigrationStats.as_dict``)."""
+        raise NotImplementedError
+
+    def generation(self):
+        """Opaque token that changes whenever any record (or the stats) changes.
+
+        Must agree across processes sharing the same state, so it can key
+        caches of data derived from the store.
+        """
+        raise NotImplementedError
+
+    def verify_stats(self, repair=False):
+        """Recount the stats from the records and report any drift.
+
+        Returns a dict of mismatched fields (empty when consistent). With
+        ``repair=True`` the recounted aggregate replaces the stored one.
+        """
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class JsonLogStore(MigrationStore):
+    """Snapshot + append-only log store with an in-memory index.
+
+    ``migrations.json`` holds a snapshot in the same ``{id: record}`` shape the
+    service has always written, so existing state directories load as-is.
+    Every write appends a single JSON line to ``migrations.log``; each process
+    keeps a dict index current by tailing the log from its last offset.
+    Once the log grows past ``compact_threshold`` entries it is folded into a
+    new snapshot and truncated. Compacted snapshots also carry the
+    ``MigrationStats`` aggregate, which is then kept current from the log.
+
+    An ``flock`` on ``migrations.lock`` serializes writers across processes
+    (shared for readers tailing the log, exclusive for appends and
+    compaction), so concurrent gunicorn workers no longer overwrite each
+    other's changes.
+    """
+
+    SNAPSHOT_NAME = "migrations.json"
+    LOG_NAME = "migrations.log"
+    LOCK_NAME = "migrations.lock"
+
+    def __init__(self, state_dir, compact_threshold=DEFAULT_COMPACT_THRESHOLD):
+        self.state_dir = state_dir
+        self.compact_threshold = compact_threshold
+        self.snapshot_path = os.path.join(state_dir, self.SNAPSHOT_NAME)
+        self.log_path = os.path.join(state_dir, self.LOG_NAME)
+        self.lock_path = os.path.join(state_dir, self.LOCK_NAME)
+
+        os.makedirs(state_dir, exist_ok=True)
+        self._mutex = threading.RLock()
+        self._index = {}
+        self._order = _OrderIndex()
+        self._stats = MigrationStats()
+        self._snapshot_id = None
+        self._offset = 0
+        self._log_entries = 0
+
+    # -- locking ---------------------------------------------------------
+
+    @contextmanager
+    def _locked(self, exclusive):
+        with self._mutex:
+            # The state directory may be removed underneath us (e.g. /tmp
+            # cleanup); recreate it rather than failing every request.
+            os.makedirs(self.state_dir, exist_ok=True)
+            with open(self.lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # -- index maintenance -----------------------------------------------
+
+    @staticmethod
+    def _file_id(path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    @instrumented("jsonlog.load_snapshot")
+    def _load_snapshot(self):
+        self._snapshot_id = self._file_id(self.snapshot_path)
+        self._offset = 0
+        self._log_entries = 0
+        data = {}
+        if self._snapshot_id is not None:
+            with open(self.snapshot_path, "r") as f:
+                data = json.load(f)
+            add_bytes(read=self._snapshot_id[2])
+
+        if data.get("format") == SNAPSHOT_FORMAT:
+            self._index = data["migrations"]
+            self._stats = MigrationStats.from_dict(data["stats"])
+        else:
+            # Legacy snapshot: a bare {id: record} mapping.
+            self._index = data
+            self._stats = MigrationStats.from_records(data.values())
+        self._order = _OrderIndex(self._index.values())
+
+    def _apply_entry(self, entry):
+        if entry["op"] == "batch":
+            for sub_entry in entry["entries"]:
+                self._apply_entry(sub_entry)
+            return
+        if entry["op"] == "put":
+            record = entry["record"]
+            previous = self._index.get(record["id"])
+            if previous is not None:
+                self._order.remove(previous)
+            self._index[record["id"]] = record
+            self._order.add(record)
+            self._stats.apply(previous, record)
+        elif entry["op"] == "delete":
+            previous = self._index.pop(entry["id"], None)
+            if previous is not None:
+                self._order.remove(previous)
+                self._stats.apply(previous, None)
+        self._log_entries += 1
+
+    @instrumented("jsonlog.replay_log")
+    def _refresh(self):
+        """Bring the index up to date. Caller must hold the lock."""
+        if self._file_id(self.snapshot_path) != self._snapshot_id:
+            self._load_snapshot()
+
+        try:
+            size = os.path.getsize(self.log_path)
+        except FileNotFoundError:
+            size = 0
+        if size < self._offset:
+            # Another process compacted the log since we last looked.
+            self._load_snapshot()
+        if size == self._offset:
+            return
+
+        with open(self.log_path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read(size - self._offset)
+        add_bytes(read=len(chunk))
+
+        # Only consume whole lines; a torn tail is picked up next time.
+        end = chunk.rfind(b"\n") + 1
+        for line in chunk[:end].splitlines():
+            if line:
+                self._apply_entry(json.loads(line))
+        self._offset += end
+
+    @instrumented("jsonlog.append")
+    def _append(self, entry):
+        """Append one entry to the log. Caller must hold the exclusive lock."""
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with open(self.log_path, "a") as f:
+            f.write(line)
+            f.flush()
+        written = len(line.encode())
+        add_bytes(written=written)
+        self._offset += written
+        self._apply_entry(entry)
+
+        if self._log_entries >= self.compact_threshold:
+            self._compact()
+
+    @instrumented("jsonlog.compact")
+    def _compact(self):
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "format": SNAPSHOT_FORMAT,
+                "stats": self._stats.as_dict(),
+                "migrations": self._index,
+            }, f, separators=(",", ":"))
+        add_bytes(written=os.path.getsize(tmp_path))
+        os.replace(tmp_path, self.snapshot_path)
+        with open(self.log_path, "w"):
+            pass
+        self._snapshot_id = self._file_id(self.snapshot_path)
+        self._offset = 0
+        self._log_entries = 0
+        logger.info("Compacted migration log into %s (%d records)",
+                    self.snapshot_path, len(self._index))
+
+    # -- public API --------------------------------------------------------
+
+    def get(self, migration_id):
+        with self._locked(exclusive=False):
+            self._refresh()
+            return self._index.get(migration_id)
+
+    def values(self):
+        with self._locked(exclusive=False):
+            self._refresh()
+            return list(self._index.values())
+
+    def list_page(self, status=None, limit=50, offset=0, after=None):
+        with self._locked(exclusive=False):
+            self._refresh()
+            ids, total = self._order.page(status, limit, offset, after)
+            return [self._index[mid] for mid in ids], total
+
+    def put(self, record):
+        with self._locked(exclusive=True):
+            self._refresh()
+            self._append({"op": "put", "record": record})
+        return record
+
+    def update(self, migration_id, apply):
+        with self._locked(exclusive=True):
+            self._refresh()
+            current = self._index.get(migration_id)
+            if current is None:
+                return None
+            record = apply(copy.deepcopy(current))
+            self._append({"op": "put", "record": record})
+        return record
+
+    def delete(self, migration_id):
+        with self._locked(exclusive=True):
+            self._refresh()
+            if migration_id not in self._index:
+                return False
+            self._append({"op": "delete", "id": migration_id})
+        return True
+
+    def apply_batch(self, ops):
+        with self._locked(exclusive=True):
+            self._refresh()
+            # Later ops must see earlier ones; ``staged`` overlays the index
+            # (None marks a staged delete) until the batch is appended.
+            staged, entries, results = {}, [], []
+            for op, *args in ops:
+                if op == "put":
+                    record = args[0]
+                    staged[record["id"]] = record
+                    entries.append({"op": "put", "record": record})
+                    results.append(record)
+                    continue
+                mid = args[0]
+                current = staged[mid] if mid in staged else self._index.get(mid)
+                if op == "update":
+                    record = None
+                    if current is not None:
+                        record = args[1](copy.deepcopy(current))
+                        staged[mid] = record
+                        entries.append({"op": "put", "record": record})
+                    results.append(record)
+                elif op == "delete":
+                    if current is not None:
+                        staged[mid] = None
+                        entries.append({"op": "delete", "id": mid})
+                    results.append(current is not None)
+                else:
+                    raise ValueError(f"Unknown batch op: {op}")
+            if entries:
+                # One log line, so readers see all of the batch or none of it.
+                self._append({"op": "batch", "entries": entries})
+        return results
+
+    def compact(self):
+        """Fold the log into the snapshot regardless of its size."""
+        with self._locked(exclusive=True):
+            self._refresh()
+            self._compact()
+
+    def stats(self):
+        with self._locked(exclusive=False):
+            self._refresh()
+            return self._stats.as_dict()
+
+    def generation(self):
+        # The snapshot identity changes on compaction and the log offset on
+        # every append, so together they name the current state.
+        with self._locked(exclusive=False):
+            self._refresh()
+            ino, mtime_ns, _ = self._snapshot_id or (0, 0, 0)
+            return f"{ino}.{mtime_ns}.{self._offset}"
+
+    def verify_stats(self, repair=False):
+        with self._locked(exclusive=repair):
+            self._refresh()
+            recounted = MigrationStats.from_records(self._index.values())
+            drift = diff_stats(recounted.as_dict(), self._stats.as_dict())
+            if drift and repair:
+                self._stats = recounted
+                self._compact()
+        return drift
+
+    def __len__(self):
+        with self._locked(exclusive=False):
+            self._refresh()
+            return len(self._index)
@@ -0,0 +1,286 @@
+"""SQLite-backed migration store.
+
+Usage (one-shot import of an existing JSON state directory)::
+
+    python -m services.migration_store_sqlite import /tmp/migrations
+"""
+import argparse
+import copy
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from services.instrumentation import add_bytes, instrumented
+from services.migration_stats import MigrationStats, deltas, diff_stats
+from services.migration_store import JsonLogStore, MigrationStore
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS migrations (
+    id          TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,
+    strategy    TEXT NOT NULL,
+    created_at  TEXT NOT NULL,
+    body        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_migrations_status_created
+    ON migrations (status, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_migrations_created
+    ON migrations (created_at, id);
+CREATE INDEX IF NOT EXISTS ix_migrations_strategy
+    ON migrations (strategy);
+CREATE TABLE IF NOT EXISTS migration_stats (
+    dimension   TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    value       INTEGER NOT NULL,
+    PRIMARY KEY (dimension, key)
+);
+CREATE TABLE IF NOT EXISTS store_meta (
+    key         TEXT PRIMARY KEY,
+    value       INTEGER NOT NULL
+);
+"""
+
+_UPSERT = "INSERT OR REPLACE INTO migrations VALUES (?, ?, ?, ?, ?)"
+
+_ADD_STAT = (
+    "INSERT INTO migration_stats VALUES (?, ?, ?) "
+    "ON CONFLICT (dimension, key) DO UPDATE SET value = value + excluded.value"
+)
+
+_BUMP_GENERATION = (
+    "INSERT INTO store_meta VALUES ('generation', 1) "
+    "ON CONFLICT (key) DO UPDATE SET value = value + 1"
+)
+
+
+def _row(record):
+    return (
+        record["id"],
+        record.get("status", "pending"),
+        record.get("strategy", ""),
+        record.get("created_at", ""),
+        json.dumps(record, separators=(",", ":")),
+    )
+
+
+class SqliteStore(MigrationStore):
+    """Migration store on a single SQLite database in WAL mode.
+
+    Status filtering, ``created_at`` ordering and LIMIT/OFFSET run inside
+    SQLite against the ``(status, created_at, id)`` index, so a page of
+    results costs an index seek plus the page rather than a full scan and
+    sort. ``migration_stats`` holds the stats aggregate and is updated by
+    delta in the same transaction as each write, which also bumps the
+    ``generation`` counter in ``store_meta``. Each thread gets its own
+    connection.
+    """
+
+    DB_NAME = "migrations.db"
+
+    def __init__(self, state_dir):
+        self.state_dir = state_dir
+        self.db_path = os.path.join(state_dir, self.DB_NAME)
+        os.makedirs(state_dir, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+        if (conn.execute("SELECT COUNT(*) FROM migration_stats").fetchone()[0] == 0
+                and len(self)):
+            # Database created before the stats table existed.
+            self.verify_stats(repair=True)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction; every committed one advances the generation."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute(_BUMP_GENERATION)
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _fetch(conn, migration_id):
+        row = conn.execute(
+            "SELECT body FROM migrations WHERE id = ?", (migration_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        add_bytes(read=len(row[0]))
+        return json.loads(row[0])
+
+    @instrumented("sqlite.read")
+    def get(self, migration_id):
+        return self._fetch(self._conn(), migration_id)
+
+    def values(self):
+        rows = self._conn().execute("SELECT body FROM migrations")
+        return [json.loads(body) for (body,) in rows]
+
+    @instrumented("sqlite.read")
+    def list_page(self, status=None, limit=50, offset=0, after=None):
+        conn = self._conn()
+        where, params = ("WHERE status = ?", [status]) if status else ("", [])
+        # The maintained aggregate, not a COUNT(*) over every matching row.
+        row = conn.execute(
+            "SELECT value FROM migration_stats WHERE dimension = ? AND key = ?",
+            ("by_status", status) if status else ("total", ""),
+        ).fetchone()
+        total = row[0] if row else 0
+
+        if after is not None:
+            where = f"{where} AND" if where else "WHERE"
+            where += " (created_at, id) < (?, ?)"
+            params = params + list(after)
+            offset = 0
+        rows = conn.execute(
+            f"SELECT body FROM migrations {where} "
+            "ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        ).fetchall()
+        add_bytes(read=sum(len(body) for (body,) in rows))
+        return [json.loads(body) for (body,) in rows], total
+
+    def _put(self, conn, record):
+        previous = self._fetch(conn, record["id"])
+        row = _row(record)
+        conn.execute(_UPSERT, row)
+        add_bytes(written=len(row[-1]))
+        conn.executemany(_ADD_STAT, deltas(previous, record))
+        return record
+
+    def _update(self, conn, migration_id, apply):
+        previous = self._fetch(conn, migration_id)
+        if previous is None:
+            return None
+        record = apply(copy.deepcopy(previous))
+        row = _row(record)
+        conn.execute(_UPSERT, row)
+        add_bytes(written=len(row[-1]))
+        conn.executemany(_ADD_STAT, deltas(previous, record))
+        return record
+
+    def _delete(self, conn, migration_id):
+        previous = self._fetch(conn, migration_id)
+        if previous is None:
+            return False
+        conn.execute("DELETE FROM migrations WHERE id = ?", (migration_id,))
+        conn.executemany(_ADD_STAT, deltas(previous, None))
+        return True
+
+    @instrumented("sqlite.write")
+    def put(self, record):
+        with self._transaction() as conn:
+            return self._put(conn, record)
+
+    @instrumented("sqlite.write")
+    def update(self, migration_id, apply):
+        with self._transaction() as conn:
+            return self._update(conn, migration_id, apply)
+
+    @instrumented("sqlite.write")
+    def delete(self, migration_id):
+        with self._transaction() as conn:
+            return self._delete(conn, migration_id)
+
+    @instrumented("sqlite.write")
+    def apply_batch(self, ops):
+        # ``ops`` is consumed inside the transaction (under BEGIN IMMEDIATE),
+        # so callers should pass a list rather than a slow generator.
+        handlers = {"put": self._put, "update": self._update, "delete": self._delete}
+        results = []
+        with self._transaction() as conn:
+            for op, *args in ops:
+                if op not in handlers:
+                    raise ValueError(f"Unknown batch op: {op}")
+                results.append(handlers[op](conn, *args))
+        return results
+
+    def stats(self):
+        rows = self._conn().execute("SELECT dimension, key, value FROM migration_stats")
+        stats = MigrationStats()
+        stats.add_rows(rows)
+        return stats.as_dict()
+
+    def generation(self):
+        row = self._conn().execute(
+            "SELECT value FROM store_meta WHERE key = 'generation'"
+        ).fetchone()
+        return str(row[0] if row else 0)
+
+    def verify_stats(self, repair=False):
+        if not repair:
+            return diff_stats(MigrationStats.from_records(self.values()).as_dict(),
+                              self.stats())
+        # Recount inside the write transaction, so no concurrent write can
+        # land between the read and the rewrite and be lost from the stats.
+        with self._transaction() as conn:
+            records = [json.loads(body) for (body,) in conn.execute("SELECT body FROM migrations")]
+            stats = MigrationStats()
+            stats.add_rows(conn.execute("SELECT dimension, key, value FROM migration_stats"))
+            drift = diff_stats(MigrationStats.from_records(records).as_dict(), stats.as_dict())
+            if drift:
+                conn.execute("DELETE FROM migration_stats")
+                conn.executemany(_ADD_STAT, [row for record in records
+                                             for row in deltas(None, record)])
+        return drift
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM migrations").fetchone()[0]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def import_records(self, records):
+        """Bulk-load records in a single transaction. Returns the count."""
+        return len(self.apply_batch(("put", record) for record in records))
+
+
+def import_json_state(state_dir, target=None):
+    """Copy every migration from a JSON state directory into SQLite.
+
+    Reads the ``migrations.json`` snapshot plus any pending log entries, so
+    it works both for legacy state files and for the log-structured store.
+    """
+    if target is None:
+        target = SqliteStore(state_dir)
+    count = target.import_records(JsonLogStore(state_dir).values())
+    logger.info("Imported %d migrations into %s", count, target.db_path)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    imp = sub.add_parser("import", help="import migrations.json into migrations.db")
+    imp.add_argument("state_dir")
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        count = import_json_state(args.state_dir)
+        print(f"Imported {count} migrations into "
+              f"{os.path.join(args.state_dir, SqliteStore.DB_NAME)}")
+
+
+if __name__ == "__main__":
+    main()
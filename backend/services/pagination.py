@@ -0,0 +1,27 @@
+import base64
+import binascii
+import json
+
+
+def encode_cursor(key):
+    """Encode a sort key (any JSON-serializable value) as an opaque token."""
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Decode a token produced by ``encode_cursor``.
+
+    Raises ValueError if the token is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        return json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def check_limit(limit):
+    """Raise ValueError unless ``limit`` is a positive page size."""
+    if limit < 1:
+        raise ValueError("Query parameter 'limit' must be a positive integer")
@@ -0,0 +1,359 @@
+"""Spec-aware pricing from AWS Price List offer files.
+
+Raw offer files (JSON or CSV, as published by the AWS Price List bulk API)
+are compiled offline into a compact open-addressing hash table of
+``uint64 key hash -> float64 on-demand price``. At runtime the table is
+memory-mapped, so loading it costs an ``open`` and a header read, and a
+price lookup is an expected O(1) probe with no JSON parsing.
+
+Usage::
+
+    python -m services.pricing compile prices.bin AmazonEC2.csv AmazonRDS.json ...
+"""
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import struct
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+HOURS_PER_MONTH = 730
+
+_MAGIC = b"CMPRICE1"
+_HEADER = struct.Struct("<8sQQQ")  # magic, slots, entries, max probe length
+
+_RDS_ENGINES = {
+    "postgresql": "postgres",
+    "mysql": "mysql",
+    "mariadb": "mariadb",
+    "aurora postgresql": "aurora-postgresql",
+    "aurora mysql": "aurora-mysql",
+    "oracle": "oracle",
+    "sql server": "sqlserver",
+}
+
+_ELB_FAMILIES = {
+    "load balancer-application": "application",
+    "load balancer-network": "network",
+    "load balancer-gateway": "gateway",
+    "load balancer": "classic",
+}
+
+
+def key_hash(*parts):
+    """Hash a price key (service, region, attributes...) to a nonzero uint64."""
+    raw = "|".join(str(p).lower() for p in parts).encode()
+    value = int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "little")
+    return value or 1
+
+
+# -- offer file parsing --------------------------------------------------------
+
+def _norm(name):
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def _price_key(attrs, unit):
+    """Map one on-demand price row to a price key tuple, or None to skip it."""
+    service = attrs.get("servicecode", "")
+    region = attrs.get("regioncode")
+    family = attrs.get("productfamily", "").lower()
+    if not region:
+        return None
+
+    if service == "AmazonEC2" and family == "compute instance" and unit == "Hrs":
+        if (attrs.get("operatingsystem") == "Linux"
+                and attrs.get("tenancy") == "Shared"
+                and attrs.get("preinstalledsw", "NA") == "NA"
+                and attrs.get("capacitystatus", "Used") == "Used"):
+            return ("ec2", region, attrs.get("instancetype"))
+    elif service == "AmazonRDS" and family == "database instance" and unit == "Hrs":
+        engine = _RDS_ENGINES.get(attrs.get("databaseengine", "").lower())
+        deployment = attrs.get("deploymentoption", "").lower()
+        if engine and deployment in ("single-az", "multi-az"):
+            return ("rds", region, attrs.get("instancetype"), engine, deployment)
+    elif service == "AmazonElastiCache" and family == "cache instance" and unit == "Hrs":
+        return ("elasticache", region, attrs.get("instancetype"),
+                attrs.get("cacheengine", "").lower())
+    elif service == "AmazonS3" and family == "storage" and unit == "GB-Mo":
+        if attrs.get("volumetype") == "Standard":
+            return ("s3", region, "standard")
+    elif service == "AWSELB" and family in _ELB_FAMILIES and unit == "Hrs":
+        if "LoadBalancerUsage" in attrs.get("usagetype", ""):
+            return ("elb", region, _ELB_FAMILIES[family])
+    elif service == "AmazonECS" and unit == "hours":
+        usage = attrs.get("usagetype", "")
+        if usage.endswith("Fargate-vCPU-Hours:perCPU"):
+            return ("fargate", region, "vcpu")
+        if usage.endswith("Fargate-GB-Hours"):
+            return ("fargate", region, "memory_gb")
+    return None
+
+
+def _first_tier(begin_range):
+    return begin_range in (None, "", "0", "0.0")
+
+
+def _iter_json_offer(path):
+    with open(path, "r") as f:
+        offer = json.load(f)
+    service = offer.get("offerCode", "")
+    on_demand = offer.get("terms", {}).get("OnDemand", {})
+    for sku, product in offer.get("products", {}).items():
+        terms = on_demand.get(sku)
+        if not terms:
+            continue
+        attrs = {_norm(k): v for k, v in product.get("attributes", {}).items()}
+        attrs.setdefault("servicecode", service)
+        attrs["productfamily"] = product.get("productFamily", "")
+        for term in terms.values():
+            for dim in term.get("priceDimensions", {}).values():
+                if _first_tier(dim.get("beginRange")):
+                    yield attrs, dim.get("unit"), dim["pricePerUnit"].get("USD")
+
+
+def _iter_csv_offer(path):
+    with open(path, "r", newline="") as f:
+        reader = csv.reader(f)
+        for header in reader:
+            # Offer CSVs start with a few metadata lines before the header.
+            if header and header[0] == "SKU":
+                break
+        else:
+            return
+        columns = [_norm(c) for c in header]
+        for row in reader:
+            attrs = dict(zip(columns, row))
+            if attrs.get("termtype") != "OnDemand" or not _first_tier(attrs.get("startingrange")):
+                continue
+            yield attrs, attrs.get("unit"), attrs.get("priceperunit")
+
+
+def iter_offer_prices(path):
+    """Yield ``(key_tuple, usd_price)`` for every supported on-demand price.
+
+    CSV offer files are streamed row by row, so they can be arbitrarily
+    large; JSON offer files are loaded whole.
+    """
+    rows = _iter_csv_offer(path) if path.endswith(".csv") else _iter_json_offer(path)
+    for attrs, unit, price in rows:
+        key = _price_key(attrs, unit)
+        if key is None or price in (None, ""):
+            continue
+        yield key, float(price)
+
+
+# -- compiled table --------------------------------------------------------------
+
+def write_price_table(prices, dest_path):
+    """Write ``{key_tuple: price}`` as an open-addressing hash table file."""
+    slots = 1
+    while slots < max(2 * len(prices), 8):
+        slots *= 2
+    mask = slots - 1
+    hashes = np.zeros(slots, dtype=np.uint64)
+    values = np.full(slots, np.nan, dtype=np.float64)
+
+    max_probe = 0
+    for key, price in prices.items():
+        h = key_hash(*key)
+        slot, probe = h & mask, 1
+        while hashes[slot] and hashes[slot] != h:
+            slot, probe = (slot + 1) & mask, probe + 1
+        hashes[slot] = h
+        values[slot] = price
+        max_probe = max(max_probe, probe)
+
+    tmp_path = dest_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, slots, len(prices), max_probe))
+        f.write(hashes.tobytes())
+        f.write(values.tobytes())
+    os.replace(tmp_path, dest_path)
+    return len(prices)
+
+
+def compile_offer_files(src_paths, dest_path):
+    """Compile AWS Price List offer files into a price table. Returns the entry count."""
+    prices = {}
+    for path in src_paths:
+        before = len(prices)
+        for key, price in iter_offer_prices(path):
+            prices[key] = price
+        logger.info("Read %d prices from %s", len(prices) - before, path)
+    return write_price_table(prices, dest_path)
+
+
+class PriceTable:
+    """Read-only, memory-mapped view of a compiled price table."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, slots, entries, max_probe = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a compiled price table")
+        self.entries = entries
+        self.max_probe = max_probe
+        self._mask = np.uint64(slots - 1)
+        self._hashes = np.memmap(path, dtype=np.uint64, mode="r",
+                                 offset=_HEADER.size, shape=(slots,))
+        self._prices = np.memmap(path, dtype=np.float64, mode="r",
+                                 offset=_HEADER.size + 8 * slots, shape=(slots,))
+
+    def __len__(self):
+        return self.entries
+
+    def get(self, *key):
+        """Price for one key tuple, or None."""
+        price = self.lookup_many(np.array([key_hash(*key)], dtype=np.uint64))[0]
+        return None if np.isnan(price) else float(price)
+
+    def lookup_many(self, hashes):
+        """Vectorized probe: prices for an array of key hashes (NaN if absent)."""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        result = np.full(len(hashes), np.nan)
+        pending = np.arange(len(hashes))
+        slots = hashes & self._mask
+        for _ in range(self.max_probe):
+            if not len(pending):
+                break
+            found_hash = self._hashes[slots[pending]]
+            hit = found_hash == hashes[pending]
+            result[pending[hit]] = self._prices[slots[pending[hit]]]
+            pending = pending[~hit & (found_hash != 0)]
+            slots[pending] = (slots[pending] + np.uint64(1)) & self._mask
+        return result
+
+
+# -- resource pricing --------------------------------------------------------------
+
+def _components(resource):
+    """Return ``[(key_tuple, quantity)]`` whose prices sum to the hourly rate.
+
+    S3 quantities are GB-months divided into hours so every component
+    yields an hourly cost.
+    """
+    rtype = resource.get("resource_type")
+    region = resource.get("region", "us-east-1")
+    specs = resource.get("specs") or {}
+
+    if rtype == "ec2_instance" and specs.get("instance_type"):
+        return [(("ec2", region, specs["instance_type"]), 1.0)]
+    if rtype == "rds_database" and specs.get("instance_class"):
+        deployment = "multi-az" if specs.get("multi_az") else "single-az"
+        return [(("rds", region, specs["instance_class"],
+                  str(specs.get("engine", "")).lower(), deployment), 1.0)]
+    if rtype == "elasticache_cluster" and specs.get("node_type"):
+        return [(("elasticache", region, specs["node_type"],
+                  str(specs.get("engine", "")).lower()),
+                 float(specs.get("num_nodes") or 1))]
+    if rtype == "s3_bucket" and specs.get("size_gb") is not None:
+        return [(("s3", region, "standard"), float(specs["size_gb"]) / HOURS_PER_MONTH)]
+    if rtype == "load_balancer":
+        return [(("elb", region, specs.get("type") or "application"), 1.0)]
+    if rtype == "ecs_service":
+        tasks = float(specs.get("desired_count") or 1)
+        return [
+            (("fargate", region, "vcpu"), tasks * float(specs.get("cpu", 1))),
+            (("fargate", region, "memory_gb"), tasks * float(specs.get("memory_gb", 2))),
+        ]
+    return []
+
+
+def _fallback(resource, rates):
+    """Flat per-type rate, scaled by whatever counts the specs carry."""
+    rtype = resource.get("resource_type", "")
+    specs = resource.get("specs") or {}
+    rate = rates.get(rtype, 0.0)
+    if rtype == "s3_bucket" and specs.get("size_gb") is not None:
+        # The flat S3 rate is per GB-month.
+        return rate * float(specs["size_gb"]) / HOURS_PER_MONTH
+    if rtype == "elasticache_cluster":
+        return rate * float(specs.get("num_nodes") or 1)
+    if rtype == "ecs_service":
+        return rate * float(specs.get("desired_count") or 1)
+    return rate
+
+
+class PricingCatalog:
+    """Hourly on-demand rate per resource from its type, region and specs.
+
+    Uses the compiled ``PriceTable`` when one is loaded and the resource's
+    specs identify a SKU; otherwise falls back to ``fallback_rates`` (flat
+    per-type rates) scaled by node/task counts and storage size.
+    """
+
+    def __init__(self, table=None, fallback_rates=None):
+        self.table = table
+        self.fallback_rates = dict(fallback_rates or {})
+
+    @property
+    def source(self):
+        return self.table.path if self.table is not None else None
+
+    def hourly_rates(self, resources):
+        """Vectorized hourly rates for a list of resources (numpy array)."""
+        resources = resources if isinstance(resources, list) else list(resources)
+        fallback = np.fromiter(
+            (_fallback(r, self.fallback_rates) for r in resources),
+            dtype=np.float64, count=len(resources),
+        )
+        if self.table is None or not resources:
+            return fallback
+
+        owners, hashes, quantities = [], [], []
+        for i, resource in enumerate(resources):
+            for key, qty in _components(resource):
+                owners.append(i)
+                hashes.append(key_hash(*key))
+                quantities.append(qty)
+        if not owners:
+            return fallback
+
+        owners = np.array(owners)
+        prices = self.table.lookup_many(np.array(hashes, dtype=np.uint64))
+        missing = np.isnan(prices)
+        priced = np.bincount(owners, weights=np.where(missing, 0.0, prices) * quantities,
+                             minlength=len(resources))
+        has_missing = np.bincount(owners, weights=missing, minlength=len(resources)) > 0
+        has_components = np.bincount(owners, minlength=len(resources)) > 0
+        return np.where(has_components & ~has_missing, priced, fallback)
+
+    def hourly_rate(self, resource):
+        return float(self.hourly_rates([resource])[0])
+
+
+def load_catalog(path, fallback_rates):
+    """Build a PricingCatalog, memory-mapping ``path`` if it exists."""
+    table = None
+    if path:
+        if os.path.exists(path):
+            table = PriceTable(path)
+            logger.info("Loaded %d prices from %s", len(table), path)
+        else:
+            logger.warning("Pricing catalog %s not found; using flat rates", path)
+    return PricingCatalog(table, fallback_rates)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile AWS Price List offer files")
+    sub = parser.add_subparsers(dest="command", required=True)
+    comp = sub.add_parser("compile", help="compile offer files into a price table")
+    comp.add_argument("dest")
+    comp.add_argument("offers", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "compile":
+        count = compile_offer_files(args.offers, args.dest)
+        print(f"Compiled {count} prices into {args.dest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Per-request profiles written to a directory.
+
+Two modes:
+
+- ``sample``: a background thread snapshots the request thread's stack
+  every ``interval`` seconds (``sys._current_frames``) and the result is
+  written as collapsed stacks (``frame;frame;frame count`` per line), the
+  input format of ``flamegraph.pl`` and speedscope. The request thread
+  only pays for the sampler's share of the GIL.
+- ``cprofile``: deterministic ``cProfile`` of the request thread, written
+  as a ``.prof`` stats dump (``python -m pstats``, snakeviz). Exact call
+  counts, but slows the profiled request down noticeably.
+
+Every profile gets a ``<id>.json`` metadata file next to it; ids sort by
+creation time, and only the newest ``max_profiles`` are kept.
+Which requests get profiled is decided by ``routes/profiling.py``.
+"""
+import cProfile
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+MODES = ("sample", "cprofile")
+DEFAULT_INTERVAL = 0.005
+DEFAULT_MAX_PROFILES = 200
+_EXTENSIONS = {"sample": ".collapsed", "cprofile": ".prof"}
+
+
+def _frame_name(code):
+    name = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return name.replace(";", ":")
+
+
+def collapse(frame):
+    """The stack ending at ``frame`` as a ``root;...;leaf`` string."""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """Samples one thread's stack on a timer until stopped."""
+
+    def __init__(self, thread_id, interval=DEFAULT_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+
+class _Active:
+    """A running profile: the sampler or ``cProfile.Profile`` plus its start time."""
+
+    def __init__(self, mode, collector):
+        self.mode = mode
+        self.collector = collector
+        self.started = time.perf_counter()
+        self.duration = None
+
+    def stop(self):
+        self.duration = time.perf_counter() - self.started
+        if self.mode == "cprofile":
+            self.collector.disable()
+        else:
+            self.collector.stop()
+
+
+class Profiler:
+    def __init__(self, directory, mode="sample", interval=DEFAULT_INTERVAL,
+                 max_profiles=DEFAULT_MAX_PROFILES):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        self.directory = directory
+        self.mode = mode
+        self.interval = interval
+        self.max_profiles = max_profiles
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self):
+        """Start profiling the calling thread; returns a handle, or None if busy."""
+        if self.mode == "sample":
+            return _Active(self.mode, StackSampler(threading.get_ident(), self.interval).start())
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active on this interpreter (cProfile is
+            # process-wide from Python 3.12 on); skip this request.
+            return None
+        return _Active(self.mode, profile)
+
+    def save(self, active, **meta):
+        """Stop ``active`` if still running, write it out; returns the profile id."""
+        if active.duration is None:
+            active.stop()
+        profile_id = (datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+                      + "-" + uuid.uuid4().hex[:6])
+        filename = profile_id + _EXTENSIONS[active.mode]
+        path = os.path.join(self.directory, filename)
+        if active.mode == "cprofile":
+            active.collector.dump_stats(path)
+            samples = None
+        else:
+            stacks = active.collector.stacks
+            with open(path, "w") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            samples = sum(stacks.values())
+
+        meta.update({
+            "id": profile_id,
+            "mode": active.mode,
+            "file": filename,
+            "duration_ms": round(active.duration * 1000, 3),
+            "samples": samples,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        })
+        with open(os.path.join(self.directory, profile_id + ".json"), "w") as f:
+            json.dump(meta, f)
+        self._prune()
+        return profile_id
+
+    def _ids(self):
+        return sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith(".json"))
+
+    def _prune(self):
+        for profile_id in self._ids()[:-self.max_profiles]:
+            for extension in (".json",) + tuple(_EXTENSIONS.values()):
+                try:
+                    os.remove(os.path.join(self.directory, profile_id + extension))
+                except FileNotFoundError:
+                    pass
+
+    def recent(self, limit=50):
+        """Metadata of the newest ``limit`` profiles, newest first."""
+        profiles = []
+        for profile_id in reversed(self._ids()):
+            if len(profiles) >= limit:
+                break
+            try:
+                with open(os.path.join(self.directory, profile_id + ".json")) as f:
+                    profiles.append(json.load(f))
+            except (FileNotFoundError, ValueError):
+                continue  # pruned or half-written by another worker
+        return profiles
+
+    def path(self, profile_id):
+        """Path of a profile's data file, or None."""
+        try:
+            with open(os.path.join(self.directory, os.path.basename(profile_id) + ".json")) as f:
+                filename = json.load(f)["file"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+        return os.path.join(self.directory, filename)
+
+
+_profiler = None
+
+
+def configure_profiler(directory=None, mode="sample", interval=DEFAULT_INTERVAL,
+                       max_profiles=DEFAULT_MAX_PROFILES):
+    """Set the process-wide profiler; no ``directory`` turns profiling off."""
+    global _profiler
+    _profiler = Profiler(directory, mode, interval, max_profiles) if directory else None
+    if _profiler:
+        logger.info("Request profiling enabled (%s mode) into %s", mode, directory)
+    return _profiler
+
+
+def get_profiler():
+    return _profiler
@@ -0,0 +1,219 @@
+"""Per-resource migration strategy recommendations.
+
+Every strategy is scored for every resource in one pass over
+``[resource, strategy]`` matrices. A strategy's utility is its monthly
+savings (log-scaled against the largest in the portfolio), minus its
+migration risk, plus how well it suits the resource's category and
+workload class:
+
+    utility = W_SAVINGS * savings - W_RISK * risk / 100
+              + CATEGORY_AFFINITY[category, strategy]
+              + WORKLOAD_AFFINITY[workload, strategy]
+
+Retiring is only considered for idle workloads. The recommendation is the
+highest-utility strategy; its confidence is its softmax probability over
+all strategies, so a clear winner scores near 1 and a close call near
+``1 / len(strategies)``.
+
+The portfolio assignment instead maximises total monthly savings subject
+to a cap on the mean risk score, via a Lagrangian relaxation: for a
+price ``lam`` on risk each resource independently takes
+``argmax(savings - lam * risk)``, and ``lam`` is bisected until the mean
+risk fits the budget.
+"""
+import numpy as np
+
+from models.migration import VALID_STRATEGIES
+from services.cost_matrix import CATEGORIES, HOURS_PER_MONTH
+from services.workload import WORKLOAD_CLASSES
+
+W_SAVINGS = 1.0
+W_RISK = 0.6
+TEMPERATURE = 0.1
+LAMBDA_ITERATIONS = 40
+
+STRATEGIES = tuple(VALID_STRATEGIES)
+
+_CATEGORY_AFFINITY = {
+    "compute": {"replatform": 0.10, "refactor": 0.10},
+    "database": {"replatform": 0.15, "refactor": -0.10, "repurchase": -0.05},
+    "storage": {"rehost": 0.10, "refactor": -0.10},
+    "networking": {"rehost": 0.05, "replatform": 0.05},
+    "other": {"retain": 0.05},
+}
+
+_WORKLOAD_AFFINITY = {
+    "idle": {"retire": 0.40, "refactor": -0.10},
+    "batch": {"refactor": 0.20, "replatform": 0.05},
+    "bursty": {"refactor": 0.15, "replatform": 0.10},
+    "steady": {"rehost": 0.10, "replatform": 0.10, "refactor": -0.05},
+    "unknown": {},
+}
+
+
+def _affinity(table, rows):
+    """``[row, strategy]`` matrix from ``{row: {strategy: value}}``; missing entries are 0."""
+    matrix = np.zeros((len(rows), len(STRATEGIES)))
+    for i, row in enumerate(rows):
+        for strategy, value in table.get(row, {}).items():
+            matrix[i, STRATEGIES.index(strategy)] = value
+    return matrix
+
+
+CATEGORY_AFFINITY = _affinity(_CATEGORY_AFFINITY, CATEGORIES)
+WORKLOAD_AFFINITY = _affinity(_WORKLOAD_AFFINITY, WORKLOAD_CLASSES)
+
+
+class Recommendations:
+    """Strategy scores, recommendations and the portfolio assignment.
+
+    ``utility``, ``savings`` (monthly USD) and ``risk`` are
+    ``[resource, strategy]`` matrices over ``STRATEGIES``; ``best`` and
+    ``assigned`` are strategy codes per resource.
+    """
+
+    def __init__(self, ids, workload_codes, utility, savings, risk, best, confidence,
+                 assigned, risk_budget):
+        self.ids = ids
+        self.workload_codes = workload_codes
+        self.utility = utility
+        self.savings = savings
+        self.risk = risk
+        self.best = best
+        self.confidence = confidence
+        self.assigned = assigned
+        self.risk_budget = risk_budget
+        self._positions = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def positions(self):
+        if self._positions is None:
+            self._positions = {rid: i for i, rid in enumerate(self.ids)}
+        return self._positions
+
+    def entry(self, i):
+        """JSON-ready recommendation for the resource at position ``i``."""
+        best, assigned = int(self.best[i]), int(self.assigned[i])
+        return {
+            "resource_id": self.ids[i],
+            "strategy": STRATEGIES[best],
+            "confidence": round(float(self.confidence[i]), 3),
+            "monthly_savings_usd": round(float(self.savings[i, best]), 2),
+            "risk_score": float(self.risk[i, best]),
+            "workload_class": WORKLOAD_CLASSES[self.workload_codes[i]],
+            "portfolio_strategy": STRATEGIES[assigned],
+            "scores": {
+                s: (round(float(u), 3) if np.isfinite(u) else None)
+                for s, u in zip(STRATEGIES, self.utility[i])
+            },
+        }
+
+    def get(self, resource_id):
+        i = self.positions().get(resource_id)
+        return None if i is None else self.entry(i)
+
+    def with_budget(self, risk_budget):
+        """Copy with the portfolio assignment redone for another mean-risk cap."""
+        allowed_savings = np.where(np.isfinite(self.utility), self.savings, -np.inf)
+        assigned = portfolio_assignment(allowed_savings, self.risk, risk_budget)
+        return Recommendations(self.ids, self.workload_codes, self.utility, self.savings,
+                               self.risk, self.best, self.confidence, assigned, risk_budget)
+
+    def _totals(self, codes):
+        rows = np.arange(len(codes))
+        savings = self.savings[rows, codes]
+        risk = self.risk[rows, codes]
+        counts = np.bincount(codes, minlength=len(STRATEGIES))
+        by_savings = np.bincount(codes, weights=savings, minlength=len(STRATEGIES))
+        return {
+            "monthly_savings_usd": round(float(savings.sum()), 2),
+            "mean_risk_score": round(float(risk.mean()), 1) if len(codes) else 0.0,
+            "by_strategy": {
+                s: {"resource_count": int(c), "monthly_savings_usd": round(float(v), 2)}
+                for s, c, v in zip(STRATEGIES, counts, by_savings)
+            },
+        }
+
+    def summary(self):
+        recommended = self._totals(self.best)
+        recommended["mean_confidence"] = (
+            round(float(self.confidence.mean()), 3) if len(self.ids) else 0.0
+        )
+        portfolio = self._totals(self.assigned)
+        portfolio["risk_budget"] = round(float(self.risk_budget), 1)
+        portfolio["changed_from_recommended"] = int((self.assigned != self.best).sum())
+        return {
+            "resource_count": len(self.ids),
+            "recommended": recommended,
+            "portfolio": portfolio,
+        }
+
+
+def _softmax_top(utility):
+    scaled = utility / TEMPERATURE
+    scaled = scaled - scaled.max(axis=1, keepdims=True)
+    weights = np.exp(scaled)
+    return weights.max(axis=1) / weights.sum(axis=1)
+
+
+def portfolio_assignment(savings, risk, risk_budget):
+    """Strategy per resource maximising total savings with mean risk <= ``risk_budget``.
+
+    ``savings`` is ``-inf`` where a strategy is not allowed. If even the
+    least risky allowed strategies exceed the budget, those are returned.
+    """
+    rows = np.arange(len(savings))
+
+    def assign(lam):
+        return np.argmax(savings - lam * risk, axis=1)
+
+    def mean_risk(codes):
+        return risk[rows, codes].mean() if len(codes) else 0.0
+
+    codes = assign(0.0)
+    if mean_risk(codes) <= risk_budget:
+        return codes
+    low, high = 0.0, 1.0
+    while mean_risk(assign(high)) > risk_budget and high < 1e12:
+        low, high = high, high * 4
+    for _ in range(LAMBDA_ITERATIONS):
+        mid = (low + high) / 2
+        if mean_risk(assign(mid)) > risk_budget:
+            low = mid
+        else:
+            high = mid
+    return assign(high)
+
+
+def recommend(ids, hourly, category_codes, risk, workload_codes, savings_factors,
+              risk_budget=None):
+    """Score every strategy for every resource and pick recommendations.
+
+    ``hourly`` is each resource's current hourly cost, ``category_codes``
+    index ``CATEGORIES``, ``risk`` is the ``[resource, strategy]`` risk
+    score matrix, ``workload_codes`` index ``WORKLOAD_CLASSES`` and
+    ``savings_factors`` maps strategy to its savings fraction.
+    ``risk_budget`` caps the portfolio's mean risk (default: the mean risk
+    of the per-resource recommendations).
+    """
+    factors = np.array([savings_factors[s] for s in STRATEGIES])
+    monthly = np.asarray(hourly, dtype=np.float64) * HOURS_PER_MONTH
+    savings = np.outer(monthly, factors)
+
+    scale = np.log1p(savings.max()) if savings.size else 1.0
+    utility = W_SAVINGS * np.log1p(savings) / max(scale, 1e-9) - W_RISK * risk / 100.0
+    utility += CATEGORY_AFFINITY[category_codes] + WORKLOAD_AFFINITY[workload_codes]
+
+    retire = STRATEGIES.index("retire")
+    utility[workload_codes != WORKLOAD_CLASSES.index("idle"), retire] = -np.inf
+
+    best = np.argmax(utility, axis=1) if len(ids) else np.zeros(0, dtype=np.int64)
+    confidence = _softmax_top(utility) if len(ids) else np.zeros(0)
+    if risk_budget is None:
+        risk_budget = risk[np.arange(len(best)), best].mean() if len(ids) else 0.0
+    allowed_savings = np.where(np.isfinite(utility), savings, -np.inf)
+    assigned = portfolio_assignment(allowed_savings, risk, risk_budget)
+    return Recommendations(ids, workload_codes, utility, savings, risk, best, confidence,
+                           assigned, risk_budget)
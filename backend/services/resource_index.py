@@ -0,0 +1,135 @@
+import bisect
+import heapq
+import itertools
+
+
+class ResourceIndex:
+    """In-memory inverted index over the resource inventory.
+
+    Keeps a primary-key dict, a sorted list of ids (the listing order, and
+    what keyset cursors seek into) and posting sets of ids for each
+    resource type, region, tag key and ``(tag key, tag value)`` pair.
+    Filtered queries intersect the posting sets smallest-first and only
+    order the ids that land on the requested page.
+    """
+
+    def __init__(self, resources=()):
+        self._by_id = {}
+        self._sorted_ids = []
+        self._postings = {
+            "resource_type": {},
+            "region": {},
+            "tag_key": {},
+            "tag": {},
+        }
+        for resource in resources:
+            self._by_id[resource["resource_id"]] = resource
+            self._post(resource)
+        self._sorted_ids = sorted(self._by_id)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, resource_id):
+        return resource_id in self._by_id
+
+    @staticmethod
+    def _terms(resource):
+        tags = resource.get("tags", {})
+        yield "resource_type", resource.get("resource_type")
+        yield "region", resource.get("region")
+        for key, value in tags.items():
+            yield "tag_key", key
+            yield "tag", (key, value)
+
+    def _post(self, resource):
+        rid = resource["resource_id"]
+        for field, term in self._terms(resource):
+            self._postings[field].setdefault(term, set()).add(rid)
+
+    def _unpost(self, resource):
+        rid = resource["resource_id"]
+        for field, term in self._terms(resource):
+            ids = self._postings[field].get(term)
+            if ids is not None:
+                ids.discard(rid)
+                if not ids:
+                    del self._postings[field][term]
+
+    def add(self, resource):
+        """Insert or replace a resource."""
+        rid = resource["resource_id"]
+        previous = self._by_id.get(rid)
+        if previous is not None:
+            self._unpost(previous)
+        else:
+            bisect.insort(self._sorted_ids, rid)
+        self._by_id[rid] = resource
+        self._post(resource)
+
+    def remove(self, resource_id):
+        """Drop a resource; returns False if it was not indexed."""
+        resource = self._by_id.pop(resource_id, None)
+        if resource is None:
+            return False
+        self._unpost(resource)
+        i = bisect.bisect_left(self._sorted_ids, resource_id)
+        del self._sorted_ids[i]
+        return True
+
+    def get(self, resource_id):
+        return self._by_id.get(resource_id)
+
+    def values(self):
+        """All resources in ``resource_id`` order."""
+        return [self._by_id[rid] for rid in self._sorted_ids]
+
+    def count(self, field, term):
+        return len(self._postings[field].get(term, ()))
+
+    def terms(self, field):
+        """Return ``{term: count}`` for one posting field."""
+        return {term: len(ids) for term, ids in self._postings[field].items()}
+
+    def match(self, resource_type=None, region=None, tag_key=None, tag_value=None):
+        """Set of ids matching every given filter, or None if no filter is given.
+
+        The set may be a live posting set; copy it before mutating the index.
+        """
+        wanted = []
+        if resource_type:
+            wanted.append(("resource_type", resource_type))
+        if region:
+            wanted.append(("region", region))
+        if tag_key and tag_value:
+            wanted.append(("tag", (tag_key, tag_value)))
+        elif tag_key:
+            wanted.append(("tag_key", tag_key))
+
+        if not wanted:
+            return None
+        sets = sorted(
+            (self._postings[field].get(term, set()) for field, term in wanted),
+            key=len,
+        )
+        return sets[0].intersection(*sets[1:]) if len(sets) > 1 else sets[0]
+
+    def query(self, resource_type=None, region=None, tag_key=None,
+              tag_value=None, limit=50, offset=0, after=None):
+        """Return ``(page, total)`` in ``resource_id`` order.
+
+        ``after`` is a resource id; the page starts strictly after it and
+        ``offset`` is applied from there.
+        """
+        matches = self.match(resource_type, region, tag_key, tag_value)
+        if matches is None:
+            start = bisect.bisect_right(self._sorted_ids, after) if after else 0
+            ids = self._sorted_ids[start + offset: start + offset + limit]
+            return [self._by_id[rid] for rid in ids], len(self._sorted_ids)
+
+        candidates = matches
+        if after:
+            candidates = (rid for rid in matches if rid > after)
+        ids = heapq.nsmallest(offset + limit, candidates)
+        page = [self._by_id[rid] for rid in itertools.islice(ids, offset, None)]
+        return page, len(matches)
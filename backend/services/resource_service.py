@@ -1,12 +1,16 @@
 import logging
+import threading
 
 from models.resource import categorize_resource, build_resource_summary
+from services.discovery import task_key
+from services.pagination import check_limit, decode_cursor, encode_cursor
+from services.instrumentation import instrumented
+from services.inventory import Inventory
 
 logger = logging.getLogger(__name__)
 
-# In a real deployment this would call AWS APIs via boto3.
-# For the demo we use a static inventory that can be swapped
-# out for live discovery once credentials are configured.
+# Static demo inventory. Live discovery (services/discovery.py) replaces
+# it through refresh_from_discovery once credentials are configured.
 
 _DEMO_RESOURCES = [
     {
@@ -76,34 +80,174 @@ _DEMO_RESOURCES = [
 ]
 
 
+_inventory = Inventory(_DEMO_RESOURCES)
+_discovery_stop = None
+
+
+@instrumented("discover_resources")
 def discover_resources(resource_type=None, region=None, tag_key=None,
-                       tag_value=None, limit=50, offset=0):
-    """Return discovered cloud resources with optional filters."""
-    results = list(_DEMO_RESOURCES)
+                       tag_value=None, limit=50, offset=0, cursor=None):
+    """Return discovered cloud resources with optional filters.
+
+    Results are ordered by ``resource_id``. Pass the previous response's
+    ``next_cursor`` as ``cursor`` to resume right after the last item
+    instead of skipping ``offset`` matches. Raises ValueError for a
+    malformed cursor or a non-positive ``limit``.
+    """
+    check_limit(limit)
+    after = None
+    if cursor:
+        after = decode_cursor(cursor)
+        if not isinstance(after, str):
+            raise ValueError("Invalid cursor")
+        offset = 0
+
+    page, total = _inventory.query(
+        resource_type=resource_type,
+        region=region,
+        tag_key=tag_key,
+        tag_value=tag_value,
+        limit=limit + 1,
+        offset=offset,
+        after=after,
+    )
 
-    if resource_type:
-        results = [r for r in results if r["resource_type"] == resource_type]
-    if region:
-        results = [r for r in results if r["region"] == region]
-    if tag_key:
-        results = [r for r in results if tag_key in r.get("tags", {})]
-    if tag_key and tag_value:
-        results = [r for r in results if r.get("tags", {}).get(tag_key) == tag_value]
+    next_cursor = None
+    if len(page) > limit > 0:
+        page = page[:limit]
+        next_cursor = encode_cursor(page[-1]["resource_id"])
 
-    total = len(results)
-    page = results[offset: offset + limit]
+    return {
+        "items": page,
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "next_cursor": next_cursor,
+    }
 
-    return {"items": page, "total": total, "limit": limit, "offset": offset}
+
+def iter_resources(resource_type=None, region=None, tag_key=None, tag_value=None,
+                   batch_size=500):
+    """Lazily yield every matching resource in ``resource_id`` order.
+
+    Pages through the index by ``resource_id`` so each step holds the
+    inventory lock only briefly.
+    """
+    after = None
+    while True:
+        page, _ = _inventory.query(
+            resource_type=resource_type,
+            region=region,
+            tag_key=tag_key,
+            tag_value=tag_value,
+            limit=batch_size,
+            after=after,
+        )
+        yield from page
+        if len(page) < batch_size:
+            return
+        after = page[-1]["resource_id"]
 
 
 def get_resource(resource_id):
     """Look up a single resource by ID."""
-    for r in _DEMO_RESOURCES:
-        if r["resource_id"] == resource_id:
-            return r
-    return None
+    return _inventory.get(resource_id)
+
+
+def get_inventory_version():
+    """Monotonic version bumped whenever the inventory content changes."""
+    return _inventory.version
+
+
+def get_resource_changes(since):
+    """Return resources added/changed/removed since inventory ``since``."""
+    return _inventory.changes_since(since)
+
+
+def refresh_inventory(resources, keep=None):
+    """Apply a fresh full discovery result to the inventory by delta."""
+    delta = _inventory.refresh(resources, keep=keep)
+    if delta:
+        logger.info("Inventory refreshed to version %d: %s", delta.version, delta.as_dict())
+    return delta
+
+
+def refresh_from_discovery(engine):
+    """Run a live discovery sweep and apply it to the inventory by delta.
+
+    Resources covered by a failed scan task are kept rather than treated
+    as deleted. Returns ``(result, delta)``: the engine's
+    ``DiscoveryResult`` (per-task latency and errors) and the applied
+    ``InventoryDelta``.
+    """
+    result = engine.run()
+    failed = {task_key(t.resource_type, t.region, t.account) for t in result.errors}
+
+    def in_failed_task(resource):
+        key = task_key(resource["resource_type"], resource["region"], resource.get("account_id"))
+        return key in failed
+
+    delta = refresh_inventory(result.resources, keep=in_failed_task if failed else None)
+    logger.info("Discovered %d resources in %.1fs (%d failed tasks)",
+                len(result.resources), result.seconds, len(result.errors))
+    return result, delta
+
+
+def configure_discovery(engine=None, interval=0):
+    """Keep the inventory refreshed from live discovery; no ``engine`` stops it.
+
+    A background thread runs a sweep right away and then every
+    ``interval`` seconds (0 = only once). Until the first sweep lands the
+    inventory keeps its current content.
+    """
+    global _discovery_stop
+    if _discovery_stop is not None:
+        _discovery_stop.set()
+        _discovery_stop = None
+    if engine is None:
+        return None
+    stop = _discovery_stop = threading.Event()
+
+    def run():
+        while not stop.is_set():
+            try:
+                refresh_from_discovery(engine)
+            except Exception:  # noqa: BLE001 - keep serving the last inventory
+                logger.exception("Discovery sweep failed")
+            if not interval or stop.wait(interval):
+                return
+
+    threading.Thread(target=run, name="discovery-refresh", daemon=True).start()
+    return stop
+
+
+def get_all_resources():
+    """Every resource in the inventory, in ``resource_id`` order."""
+    return _inventory.values()
+
+
+def get_inventory_derived(key, compute):
+    """Memoize ``compute(all_resources)`` per inventory version."""
+    return _inventory.derived(key, compute)
+
+
+def match_resource_ids(resource_type=None, region=None, tag_key=None, tag_value=None):
+    """Ids of resources matching the filters, or None when no filter is given."""
+    return _inventory.match(resource_type=resource_type, region=region,
+                            tag_key=tag_key, tag_value=tag_value)
 
 
 def get_resource_summary():
-    """Return an aggregated summary of all discovered resources."""
-    return build_resource_summary(_DEMO_RESOURCES)
+    """Return an aggregated summary of all discovered resources.
+
+    Includes the migration risk breakdown. Recomputed only when the
+    inventory version or the dependency sources change.
+    """
+    # deferred: the risk service builds on this module
+    from services.risk_service import get_risk_scores, get_risk_version
+
+    risk = get_risk_scores()
+    return _inventory.derived(
+        ("summary", get_risk_version()),
+        lambda resources: build_resource_summary(resources, risk=risk),
+    )
@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = 256
+DEFAULT_TTL = 30.0
+
+
+class ResponseCache:
+    """Bounded LRU of computed responses, validated by data version and TTL.
+
+    Entries are keyed by ``(endpoint, args)`` and remember the data
+    ``version`` they were computed from (e.g. the migration store
+    generation and the inventory version). A lookup with a different
+    version drops the entry, so a write anywhere - including in another
+    worker process sharing the store - invalidates every response derived
+    from it without explicit purging. ``ttl`` bounds how long an entry is
+    served even if no version changed; ``maxsize=0`` disables caching.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(
+            ("hits", "misses", "invalidations", "expirations", "evictions"), 0
+        )
+
+    def get(self, key, version):
+        """Return the cached value for ``key`` at ``version``, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            cached_version, expires_at, value = entry
+            if cached_version != version:
+                del self._entries[key]
+                self._counters["invalidations"] += 1
+                self._counters["misses"] += 1
+                return None
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return value
+
+    def set(self, key, version, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (version, self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+        lookups = counters["hits"] + counters["misses"]
+        counters.update(
+            size=size,
+            maxsize=self.maxsize,
+            ttl_seconds=self.ttl,
+            hit_ratio=round(counters["hits"] / lookups, 4) if lookups else 0.0,
+        )
+        return counters
+
+
+_cache = ResponseCache()
+
+
+def configure_response_cache(maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+    """Replace the process-wide response cache (drops all entries and counters)."""
+    global _cache
+    _cache = ResponseCache(maxsize=maxsize, ttl=ttl)
+    return _cache
+
+
+def get_response_cache():
+    return _cache
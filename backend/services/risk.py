@@ -0,0 +1,258 @@
+"""Vectorized migration risk scoring.
+
+Each resource gets a 0-100 score from four normalised features:
+
+* ``dependencies`` -- fan-in (weighted double: dependents break when the
+  resource moves) plus fan-out in the dependency graph, log-scaled;
+* ``data_size`` -- ``specs.size_gb``, log-scaled up to 10 TB;
+* ``statefulness`` -- how much state moves with the resource type
+  (databases and caches high, Lambda and API Gateway none);
+* ``target_complexity`` -- how far the migration strategy takes the
+  resource type from what it is today.
+
+Scores are bucketed into low / medium / high / critical. Encoding the
+feature matrix is the only per-resource Python loop; scoring is a
+matrix-vector product.
+"""
+import bisect
+
+import numpy as np
+
+from models.resource import categorize_resource
+from services.cost_matrix import CATEGORIES
+
+FEATURES = ("dependencies", "data_size", "statefulness", "target_complexity")
+WEIGHTS = np.array([0.35, 0.20, 0.25, 0.20])
+
+LEVELS = ("low", "medium", "high", "critical")
+LEVEL_THRESHOLDS = np.array([25.0, 50.0, 75.0])
+
+DEFAULT_STRATEGY = "replatform"
+
+# Weighted degree (2 * fan_in + fan_out) and size at which the feature saturates.
+DEPENDENCY_SATURATION = 50
+SIZE_SATURATION_GB = 10240
+
+# Unknown types sit in the middle of both scales.
+_STATEFULNESS = {
+    "rds_database": 1.0,
+    "elasticache_cluster": 0.8,
+    "s3_bucket": 0.6,
+    "ec2_instance": 0.5,
+    "ecs_service": 0.2,
+    "load_balancer": 0.1,
+    "lambda_function": 0.0,
+    "api_gateway": 0.0,
+}
+_UNKNOWN_STATEFULNESS = 0.5
+
+# Effort to re-architect each type for a serverless target...
+_TYPE_EFFORT = {
+    "ec2_instance": 1.0,
+    "rds_database": 0.8,
+    "elasticache_cluster": 0.6,
+    "ecs_service": 0.5,
+    "load_balancer": 0.3,
+    "s3_bucket": 0.2,
+    "api_gateway": 0.2,
+    "lambda_function": 0.1,
+}
+_UNKNOWN_EFFORT = 0.5
+
+# ...and how much of that effort each strategy actually takes on.
+STRATEGY_COMPLEXITY = {
+    "rehost": 0.2,
+    "replatform": 0.5,
+    "refactor": 1.0,
+    "repurchase": 0.6,
+    "retain": 0.0,
+    "retire": 0.1,
+}
+
+
+def _degrees(graph, ids):
+    """Fan-in and fan-out of ``ids`` in ``graph`` (zero for unknown ids)."""
+    if graph is None:
+        zeros = np.zeros(len(ids), dtype=np.int64)
+        return zeros, zeros
+    if graph.ids == ids:
+        return graph.fan_in(), graph.fan_out()
+    position = graph.positions()
+    at = np.fromiter((position.get(rid, -1) for rid in ids), dtype=np.int64, count=len(ids))
+    known = at >= 0
+    fan_in = np.zeros(len(ids), dtype=np.int64)
+    fan_out = np.zeros(len(ids), dtype=np.int64)
+    fan_in[known] = graph.fan_in()[at[known]]
+    fan_out[known] = graph.fan_out()[at[known]]
+    return fan_in, fan_out
+
+
+def _size_gb(resource):
+    size = (resource.get("specs") or {}).get("size_gb")
+    try:
+        return float(size or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class RiskFeatures:
+    """Feature matrix for a resource set.
+
+    ``matrix`` has one row per resource and the first three ``FEATURES``
+    as columns, each in [0, 1]; ``effort`` is the per-type re-architecture
+    effort the strategy's complexity is applied to. ``type_codes`` index
+    into ``types`` (the last code means "unknown type").
+    """
+
+    __slots__ = ("ids", "types", "type_codes", "matrix", "effort")
+
+    def __init__(self, ids, types, type_codes, matrix, effort):
+        self.ids = ids
+        self.types = types
+        self.type_codes = type_codes
+        self.matrix = matrix
+        self.effort = effort
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def encode_risk_features(resources, graph=None):
+    """Encode resource dicts (and their degrees in ``graph``) into ``RiskFeatures``."""
+    resources = resources if isinstance(resources, list) else list(resources)
+    n = len(resources)
+    ids = [r["resource_id"] for r in resources]
+    types = list(_STATEFULNESS)
+    codes = {t: i for i, t in enumerate(types)}
+    unknown = len(types)
+
+    type_codes = np.fromiter(
+        (codes.get(r.get("resource_type"), unknown) for r in resources),
+        dtype=np.int16, count=n,
+    )
+    size_gb = np.fromiter((_size_gb(r) for r in resources), dtype=np.float64, count=n)
+    fan_in, fan_out = _degrees(graph, ids)
+
+    stateful = np.array([_STATEFULNESS[t] for t in types] + [_UNKNOWN_STATEFULNESS])
+    effort = np.array([_TYPE_EFFORT[t] for t in types] + [_UNKNOWN_EFFORT])
+
+    matrix = np.empty((n, 3), dtype=np.float64)
+    matrix[:, 0] = np.log1p(2 * fan_in + fan_out) / np.log1p(DEPENDENCY_SATURATION)
+    matrix[:, 1] = np.log1p(np.maximum(size_gb, 0.0)) / np.log1p(SIZE_SATURATION_GB)
+    matrix[:, 2] = stateful[type_codes]
+    np.minimum(matrix, 1.0, out=matrix)
+
+    return RiskFeatures(ids, types, type_codes, matrix, effort[type_codes])
+
+
+class RiskScores:
+    """Scores and levels for a resource set, plus their ranking.
+
+    ``order`` lists resource positions by descending score, ties broken by
+    ascending ``resource_id`` (``ids`` are in ``resource_id`` order, so a
+    stable sort gives that for free); ``rank`` is its inverse.
+    """
+
+    def __init__(self, features, strategy, scores, levels):
+        self.ids = features.ids
+        self.features = features
+        self.strategy = strategy
+        self.scores = scores
+        self.levels = levels
+        self.order = np.argsort(-scores, kind="stable")
+        self.rank = np.empty_like(self.order)
+        self.rank[self.order] = np.arange(len(self.order))
+        self._positions = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def positions(self):
+        """``{resource_id: position}``, built on first use."""
+        if self._positions is None:
+            self._positions = {rid: i for i, rid in enumerate(self.ids)}
+        return self._positions
+
+    def entry(self, i):
+        """JSON-ready score of the resource at position ``i``."""
+        return {"score": float(self.scores[i]), "level": LEVELS[self.levels[i]]}
+
+    def get(self, resource_id):
+        i = self.positions().get(resource_id)
+        return None if i is None else self.entry(i)
+
+    def sort_key(self, i):
+        """Keyset cursor value for the resource at position ``i``."""
+        return [float(self.scores[i]), self.ids[i]]
+
+    def _seek(self, after):
+        score, rid = after
+        order, scores, ids = self.order, self.scores, self.ids
+        return bisect.bisect_right(
+            range(len(order)), (-score, rid),
+            key=lambda k: (-scores[order[k]], ids[order[k]]),
+        )
+
+    def page(self, limit, offset=0, after=None, candidates=None):
+        """Positions of one page in risk order, and the number of matches.
+
+        ``after`` is a ``[score, resource_id]`` sort key; the page starts
+        strictly after it. ``candidates`` restricts the ranking to a set
+        of resource ids (unknown ids are ignored).
+        """
+        start = self._seek(after) if after is not None else 0
+        if candidates is None:
+            begin = start + offset
+            return self.order[begin:begin + limit], len(self.order)
+
+        position = self.positions()
+        at = np.fromiter((position[rid] for rid in candidates if rid in position),
+                         dtype=np.int64)
+        ranks = np.sort(self.rank[at])
+        begin = int(np.searchsorted(ranks, start)) + offset
+        return self.order[ranks[begin:begin + limit]], len(ranks)
+
+    def summary(self, top=5):
+        """Counts per level (overall and per category) and the riskiest resources."""
+        n_levels = len(LEVELS)
+        type_category = np.array(
+            [CATEGORIES.index(categorize_resource(t)) for t in self.features.types]
+            + [CATEGORIES.index("other")],
+            dtype=np.int64,
+        )
+        category_codes = type_category[self.features.type_codes]
+        counts = np.bincount(category_codes * n_levels + self.levels,
+                             minlength=len(CATEGORIES) * n_levels)
+        counts = counts.reshape(len(CATEGORIES), n_levels)
+        return {
+            "strategy": self.strategy,
+            "by_level": dict(zip(LEVELS, counts.sum(axis=0).tolist())),
+            "by_category": {
+                category: dict(zip(LEVELS, row))
+                for category, row in zip(CATEGORIES, counts.tolist())
+            },
+            "highest": [dict(self.entry(i), resource_id=self.ids[i])
+                        for i in self.order[:top].tolist()],
+        }
+
+
+def risk_matrix(features, strategies):
+    """Scores ``[resource, strategy]`` for several strategies in one pass."""
+    unknown = [s for s in strategies if s not in STRATEGY_COMPLEXITY]
+    if unknown:
+        raise ValueError(f"Unknown strategy: {unknown[0]}")
+    complexity = np.array([STRATEGY_COMPLEXITY[s] for s in strategies])
+    base = features.matrix @ WEIGHTS[:3]
+    scores = 100.0 * (base[:, None] + np.outer(features.effort, complexity) * WEIGHTS[3])
+    return np.round(scores, 1)
+
+
+def risk_levels(scores):
+    """Level code (index into ``LEVELS``) for each score."""
+    return np.searchsorted(LEVEL_THRESHOLDS, scores, side="right").astype(np.int8)
+
+
+def score_risk(features, strategy=DEFAULT_STRATEGY):
+    """Score every resource in ``features`` for a migration ``strategy``."""
+    scores = risk_matrix(features, [strategy])[:, 0]
+    return RiskScores(features, strategy, scores, risk_levels(scores))
@@ -0,0 +1,92 @@
+"""Migration risk scores for the resource inventory.
+
+The feature matrix is encoded once per inventory version and dependency
+source state; scores per strategy are derived from it and cached the
+same way (see services/risk.py for the model).
+"""
+import logging
+import time
+
+from services.dependency_service import get_dependency_graph, get_dependency_version
+from services.pagination import check_limit, decode_cursor, encode_cursor
+from services.resource_service import (
+    get_inventory_derived,
+    get_resource,
+    match_resource_ids,
+)
+from services.risk import DEFAULT_STRATEGY, encode_risk_features, score_risk
+
+logger = logging.getLogger(__name__)
+
+
+def get_risk_version():
+    """Identifies the dependency sources the scores were built from, for cache keys."""
+    return get_dependency_version()
+
+
+def get_risk_features():
+    """``RiskFeatures`` for the whole inventory, memoized per version."""
+    def encode(resources):
+        started = time.perf_counter()
+        features = encode_risk_features(resources, get_dependency_graph())
+        logger.info("Encoded risk features for %d resources in %.2fs",
+                    len(features), time.perf_counter() - started)
+        return features
+
+    return get_inventory_derived(("risk_features", get_risk_version()), encode)
+
+
+def get_risk_scores(strategy=DEFAULT_STRATEGY):
+    """``RiskScores`` for the whole inventory, memoized per version.
+
+    Raises ValueError for an unknown strategy.
+    """
+    features = get_risk_features()
+    return get_inventory_derived(("risk_scores", strategy, get_risk_version()),
+                                 lambda _: score_risk(features, strategy))
+
+
+def rank_resources(resource_type=None, region=None, tag_key=None, tag_value=None,
+                   strategy=DEFAULT_STRATEGY, limit=50, offset=0, cursor=None):
+    """Like ``discover_resources``, but ordered by descending risk score.
+
+    Each item carries its ``risk`` score and level. Cursors resume after a
+    ``(score, resource_id)`` key. Raises ValueError for a malformed cursor,
+    an unknown strategy or a non-positive ``limit``.
+    """
+    check_limit(limit)
+    after = None
+    if cursor:
+        after = decode_cursor(cursor)
+        if not (isinstance(after, list) and len(after) == 2
+                and isinstance(after[0], (int, float)) and isinstance(after[1], str)):
+            raise ValueError("Invalid cursor")
+        offset = 0
+
+    risk = get_risk_scores(strategy)
+    candidates = match_resource_ids(resource_type=resource_type, region=region,
+                                    tag_key=tag_key, tag_value=tag_value)
+    positions, total = risk.page(limit + 1, offset=offset, after=after,
+                                 candidates=candidates)
+    positions = positions.tolist()
+
+    next_cursor = None
+    if len(positions) > limit > 0:
+        positions = positions[:limit]
+        next_cursor = encode_cursor(risk.sort_key(positions[-1]))
+
+    items = []
+    for i in positions:
+        resource = get_resource(risk.ids[i])
+        if resource is not None:
+            items.append(dict(resource, risk=risk.entry(i)))
+
+    return {
+        "items": items,
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "next_cursor": next_cursor,
+        "sort": "risk",
+        "strategy": strategy,
+    }
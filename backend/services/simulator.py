@@ -0,0 +1,274 @@
+"""Monte Carlo dry runs of a migration's execution.
+
+Each resource's migration time is drawn from a log-normal distribution
+for its type (``median_minutes`` and ``sigma`` of the underlying
+normal). Scheduling follows the executor (services/executor.py): a
+resource starts once the dependency components it waits on have
+finished and a slot is free in every pool it counts against -- the
+global worker pool, its resource type's pool and its account's pool.
+
+A discrete-event run at median durations fixes the dispatch order, the
+way the executor's dispatcher would start resources. All iterations are
+then scheduled at once in that order: the loop is over resources, and
+every step is a NumPy operation over an ``[iteration, slot]`` array per
+pool, so a 10k-resource plan runs 1000 iterations in a few seconds.
+
+Besides the makespan distribution the result attributes queueing time
+(start minus dependency-ready time) to the pool that held each resource
+back, and counts how often each resource type finishes last; together
+they point at the caps worth raising.
+"""
+import heapq
+import time
+from collections import Counter, defaultdict, deque
+
+import numpy as np
+
+from models.migration import VALID_RESOURCE_TYPES
+from services.dependency_service import get_dependency_graph
+from services.executor import DEFAULT_MAX_WORKERS, resource_key
+
+DEFAULT_ITERATIONS = 1000
+# Iterations x resources one request may simulate: the per-run arrays are
+# that size (8 bytes a cell), so this keeps each of them around 16 MB.
+MAX_SIMULATION_CELLS = 2_000_000
+CONSTRAINTS = ("global", "type", "account")
+
+# Median migration time and log-normal spread per resource type.
+DEFAULT_DURATIONS = {
+    "ec2_instance": {"median_minutes": 30.0, "sigma": 0.5},
+    "rds_database": {"median_minutes": 90.0, "sigma": 0.6},
+    "s3_bucket": {"median_minutes": 45.0, "sigma": 0.8},
+    "lambda_function": {"median_minutes": 5.0, "sigma": 0.4},
+    "ecs_service": {"median_minutes": 20.0, "sigma": 0.5},
+    "elasticache_cluster": {"median_minutes": 40.0, "sigma": 0.5},
+    "load_balancer": {"median_minutes": 10.0, "sigma": 0.3},
+    "api_gateway": {"median_minutes": 10.0, "sigma": 0.4},
+}
+
+
+def _quantiles(values):
+    p50, p95 = np.percentile(values, [50, 95]) if len(values) else (0.0, 0.0)
+    return round(float(p50), 1), round(float(p95), 1)
+
+
+class _Plan:
+    """Dependency components of the resources and the edges between them."""
+
+    def __init__(self, n, graph):
+        if graph is not None and n:
+            labels, count = graph.components()
+            src, dst = labels[graph.src], labels[graph.dst]
+            cross = src != dst
+            keys = np.unique(src[cross] * count + dst[cross])
+            src, dst = keys // count, keys % count
+            waves = graph.waves()
+        else:
+            labels, count = np.arange(n), n
+            src = dst = np.zeros(0, dtype=np.int64)
+            waves = np.zeros(n, dtype=np.int64)
+        self.labels = labels
+        self.count = count
+        self.waves = waves
+        # Dependencies of each component, and dependents, as CSR.
+        self.dep_indptr = np.searchsorted(src, np.arange(count + 1))
+        self.deps = dst
+        by_dst = np.argsort(dst, kind="stable")
+        self.rev_indptr = np.searchsorted(dst[by_dst], np.arange(count + 1))
+        self.dependents = src[by_dst]
+
+
+def _dispatch_order(plan, keys, medians, fits, acquire, release):
+    """Start order of a discrete-event run of the executor's dispatch loop."""
+    waiting = np.diff(plan.dep_indptr).tolist()
+    members_left = np.bincount(plan.labels, minlength=plan.count).tolist()
+    labels = plan.labels.tolist()
+    ready, blocked = defaultdict(deque), defaultdict(list)
+    for r in np.argsort(plan.waves, kind="stable").tolist():
+        if waiting[labels[r]]:
+            blocked[labels[r]].append(r)
+        else:
+            ready[keys[r]].append(r)
+
+    order, events, now = [], [], 0.0
+    while True:
+        for key in list(ready):
+            queue = ready[key]
+            while queue and fits(key):
+                r = queue.popleft()
+                acquire(key)
+                order.append(r)
+                heapq.heappush(events, (now + medians[r], r))
+            if not queue:
+                del ready[key]
+        if not events:
+            return order
+        now, r = heapq.heappop(events)
+        release(keys[r])
+        c = labels[r]
+        members_left[c] -= 1
+        if members_left[c]:
+            continue
+        for dependent in plan.dependents[plan.rev_indptr[c]:plan.rev_indptr[c + 1]].tolist():
+            waiting[dependent] -= 1
+            if not waiting[dependent]:
+                for b in blocked.pop(dependent, ()):
+                    ready[keys[b]].append(b)
+
+
+def simulate(types, accounts=None, graph=None, durations=None, max_workers=DEFAULT_MAX_WORKERS,
+             account_limit=None, type_limits=None, iterations=DEFAULT_ITERATIONS, seed=None):
+    """Simulate ``iterations`` executions of resources with the given types.
+
+    ``types`` and ``accounts`` are per-resource lists; ``graph`` is an
+    optional ``DependencyGraph`` over the same resources (cycle members
+    wait for each other's dependencies, as in the executor).
+    ``durations`` overrides ``DEFAULT_DURATIONS`` per type. Returns a
+    JSON-ready result.
+    """
+    n, runs = len(types), iterations
+    accounts = accounts or ["default"] * n
+    account_limit = account_limit or None
+    type_limits = {t: c for t, c in (type_limits or {}).items() if c}
+    table = dict(DEFAULT_DURATIONS, **(durations or {}))
+    type_names = list(VALID_RESOURCE_TYPES)
+    type_names += sorted(set(types) - set(type_names))
+    type_codes = np.array([type_names.index(t) for t in types], dtype=np.int64)
+    medians = np.array([table.get(t, {}).get("median_minutes", 30.0) for t in type_names])
+    sigmas = np.array([table.get(t, {}).get("sigma", 0.5) for t in type_names])
+
+    plan = _Plan(n, graph)
+    running = defaultdict(int)
+
+    def fits(key):
+        account, rtype = key
+        return (running["*"] < max_workers
+                and (account_limit is None or running[account, None] < account_limit)
+                and running[None, rtype] < type_limits.get(rtype, n + 1))
+
+    def acquire(key, step=1):
+        running["*"] += step
+        running[key[0], None] += step
+        running[None, key[1]] += step
+
+    keys = list(zip(accounts, types))
+    order = _dispatch_order(plan, keys, medians[type_codes].tolist(), fits, acquire,
+                            lambda key: acquire(key, -1))
+
+    # Finish times are only kept for components something depends on.
+    row = np.full(plan.count, -1, dtype=np.int64)
+    needed = np.unique(plan.deps)
+    row[needed] = np.arange(len(needed))
+    finish = np.zeros((len(needed), runs))
+
+    # A pool never needs more slots than it has resources, whatever its cap.
+    members = Counter(accounts)
+    global_pool = np.zeros((runs, min(max_workers, n)))
+    type_pools = {type_names.index(t): np.zeros((runs, min(cap, types.count(t))))
+                  for t, cap in type_limits.items() if t in types}
+    account_pools = {}
+    if account_limit:
+        account_pools = {a: np.zeros((runs, min(account_limit, members[a]))) for a in members}
+
+    rng = np.random.default_rng(seed)
+    lanes = np.arange(runs)
+    no_wait = np.zeros(runs)
+    makespan = np.zeros(runs)
+    type_last = np.zeros((len(type_names), runs))
+    wait = np.zeros((len(type_names), len(CONSTRAINTS)))
+    work = np.zeros(len(type_names))
+
+    component_ready = {}
+    for r in order:
+        code, c = type_codes[r], plan.labels[r]
+        # Every dependency of the component has started (and so has a finish
+        # time) before its first member does, so compute this once.
+        ready = component_ready.get(c)
+        if ready is None:
+            deps = plan.deps[plan.dep_indptr[c]:plan.dep_indptr[c + 1]]
+            ready = finish[row[deps]].max(axis=0) if len(deps) else no_wait
+            component_ready[c] = ready
+
+        pools = (global_pool, type_pools.get(code), account_pools.get(accounts[r]))
+        slots, frees = [], []
+        for pool in pools:
+            if pool is None:
+                slots.append(None)
+                frees.append(no_wait)
+                continue
+            slot = pool.argmin(axis=1)
+            slots.append(slot)
+            frees.append(pool[lanes, slot])
+        frees = np.stack(frees)
+        start = np.maximum(ready, frees.max(axis=0))
+        queued = start - ready
+        if queued.any():
+            binding = frees.argmax(axis=0)
+            wait[code] += np.bincount(binding, weights=queued, minlength=len(CONSTRAINTS))
+
+        duration = medians[code] * np.exp(sigmas[code] * rng.standard_normal(runs))
+        work[code] += duration.sum()
+        end = start + duration
+        for pool, slot in zip(pools, slots):
+            if pool is not None:
+                pool[lanes, slot] = end
+        if row[c] >= 0:
+            np.maximum(finish[row[c]], end, out=finish[row[c]])
+        np.maximum(makespan, end, out=makespan)
+        np.maximum(type_last[code], end, out=type_last[code])
+
+    counts = np.bincount(type_codes, minlength=len(type_names))
+    last = type_last.argmax(axis=0) if n else np.zeros(0, dtype=np.int64)
+    finishes_last = np.bincount(last, minlength=len(type_names)) / max(runs, 1)
+    total_wait = wait.sum()
+
+    by_type = {}
+    for code, name in enumerate(type_names):
+        if not counts[code]:
+            continue
+        p50, p95 = _quantiles(type_last[code])
+        queued = wait[code].sum()
+        by_type[name] = {
+            "resources": int(counts[code]),
+            "mean_duration_minutes": round(float(work[code] / (counts[code] * runs)), 1),
+            "mean_wait_minutes": round(float(queued / (counts[code] * runs)), 1),
+            "finish_p50_minutes": p50,
+            "finish_p95_minutes": p95,
+            "finishes_last": round(float(finishes_last[code]), 3),
+            "wait_share": round(float(queued / total_wait), 3) if total_wait else 0.0,
+            "constraint": CONSTRAINTS[int(wait[code].argmax())] if queued else None,
+        }
+
+    bottlenecks = sorted(by_type, key=lambda t: (-by_type[t]["finishes_last"],
+                                                 -by_type[t]["wait_share"], t))
+    p50, p95 = _quantiles(makespan)
+    return {
+        "iterations": runs,
+        "resource_count": n,
+        "limits": {"max_workers": max_workers, "account_limit": account_limit,
+                   "type_limits": type_limits},
+        "makespan_minutes": {
+            "mean": round(float(makespan.mean()), 1) if runs else 0.0,
+            "p50": p50,
+            "p95": p95,
+            "max": round(float(makespan.max()), 1) if runs else 0.0,
+        },
+        "by_type": by_type,
+        "bottlenecks": [t for t in bottlenecks
+                        if by_type[t]["wait_share"] or by_type[t]["finishes_last"]],
+    }
+
+
+def simulate_migration(migration, dependencies=True, **options):
+    """Dry-run ``migration``'s resources; ``options`` as for ``simulate``."""
+    started = time.perf_counter()
+    resources = list({r["resource_id"]: r for r in migration.get("resources", [])}.values())
+    keys = [resource_key(r) for r in resources]
+    graph = None
+    if dependencies and resources:
+        graph = get_dependency_graph().subgraph([r["resource_id"] for r in resources])
+    result = simulate([t for _, t in keys], [a for a, _ in keys], graph=graph, **options)
+    result["migration_id"] = migration["id"]
+    result["dependencies"] = graph is not None and graph.edge_count > 0
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
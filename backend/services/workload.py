@@ -0,0 +1,156 @@
+"""Batch workload classification from utilization series.
+
+Every resource in a ``MetricsStore`` is classified from its hourly
+rollups over a window of days, in blocks of rows read straight from the
+memory-mapped chunks:
+
+* ``idle`` -- CPU peaks stay under ``IDLE_CPU_PCT`` and there is little
+  network traffic;
+* ``batch`` -- mostly idle hours, with heavy runs in between;
+* ``bursty`` -- large swings around the typical load;
+* ``steady`` -- everything else;
+* ``unknown`` -- fewer than ``MIN_HOURS`` hours of CPU data.
+
+Usage::
+
+    python -m services.workload /var/lib/cloudmigrate/metrics --days 30
+"""
+import argparse
+import time
+
+import numpy as np
+
+from services.metrics_store import MetricsStore, nan_mean, nan_quantile
+
+WORKLOAD_CLASSES = ("unknown", "idle", "batch", "bursty", "steady")
+FEATURES = ("hours", "cpu_mean", "cpu_p50", "cpu_peak_p95", "cpu_cv",
+            "idle_fraction", "network_p95")
+
+MIN_HOURS = 24
+IDLE_CPU_PCT = 5.0
+IDLE_NETWORK_BYTES = 5e6        # per 5-minute sample, in + out
+BATCH_IDLE_FRACTION = 0.5
+BATCH_PEAK_CPU_PCT = 30.0
+BURSTY_CV = 0.5
+BURSTY_PEAK_RATIO = 3.0
+
+DEFAULT_DAYS = 30
+DEFAULT_BLOCK_ROWS = 8192
+
+
+def workload_features(cpu_mean, cpu_max, network):
+    """Feature matrix ``[row, FEATURES]`` from hourly ``[row, hour]`` series."""
+    valid = ~np.isnan(cpu_mean)
+    hours = valid.sum(axis=1)
+    mean = nan_mean(cpu_mean, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        spread = np.sqrt(nan_mean((cpu_mean - mean[:, None]) ** 2, axis=1))
+        cv = spread / np.maximum(mean, 1e-9)
+        idle_fraction = (valid & (cpu_mean < IDLE_CPU_PCT)).sum(axis=1) / np.maximum(hours, 1)
+
+    features = np.empty((len(cpu_mean), len(FEATURES)), dtype=np.float64)
+    features[:, 0] = hours
+    features[:, 1] = mean
+    features[:, 2] = nan_quantile(cpu_mean, 0.50)
+    features[:, 3] = nan_quantile(cpu_max, 0.95)
+    features[:, 4] = cv
+    features[:, 5] = idle_fraction
+    features[:, 6] = nan_quantile(network, 0.95)
+    return features
+
+
+def classify_features(features):
+    """Class code (index into ``WORKLOAD_CLASSES``) per feature row."""
+    hours, _, p50, peak, cv, idle_fraction, network = features.T
+    quiet_network = np.isnan(network) | (network < IDLE_NETWORK_BYTES)
+    conditions = [
+        hours < MIN_HOURS,
+        (peak < IDLE_CPU_PCT) & quiet_network,
+        (idle_fraction >= BATCH_IDLE_FRACTION) & (peak >= BATCH_PEAK_CPU_PCT),
+        (cv >= BURSTY_CV) | (peak >= BURSTY_PEAK_RATIO * np.maximum(p50, 1.0)),
+    ]
+    return np.select(conditions, [0, 1, 2, 3], default=4).astype(np.int8)
+
+
+class WorkloadProfile:
+    """Workload class and features for every resource in a metric store."""
+
+    def __init__(self, ids, labels, features, days, generation):
+        self.ids = ids
+        self.labels = labels
+        self.features = features
+        self.days = days
+        self.generation = generation
+        self._positions = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def positions(self):
+        if self._positions is None:
+            self._positions = {rid: i for i, rid in enumerate(self.ids)}
+        return self._positions
+
+    def get(self, resource_id):
+        """Class and features of one resource, or None if it has no series."""
+        i = self.positions().get(resource_id)
+        if i is None:
+            return None
+        values = [None if np.isnan(v) else round(float(v), 3) for v in self.features[i]]
+        return {"resource_id": resource_id,
+                "workload_class": WORKLOAD_CLASSES[self.labels[i]],
+                "features": dict(zip(FEATURES, values))}
+
+    def counts(self):
+        counts = np.bincount(self.labels, minlength=len(WORKLOAD_CLASSES))
+        return dict(zip(WORKLOAD_CLASSES, counts.tolist()))
+
+    def summary(self):
+        return {
+            "resource_count": len(self.ids),
+            "days": len(self.days),
+            "start": self.days[0].isoformat() if self.days else None,
+            "end": self.days[-1].isoformat() if self.days else None,
+            "by_class": self.counts(),
+        }
+
+
+def classify_workloads(store, days=DEFAULT_DAYS, end=None, block_rows=DEFAULT_BLOCK_ROWS):
+    """Classify every resource in ``store`` over ``days`` days ending at ``end``.
+
+    Reads the hourly rollups block by block, so memory use is bounded by
+    ``block_rows`` rather than by the store size.
+    """
+    window = store.window(days, end)
+    n = len(store)
+    features = np.empty((n, len(FEATURES)), dtype=np.float64)
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        network = store.block("network_in", start, stop, window)
+        outbound = store.block("network_out", start, stop, window)
+        both = ~np.isnan(network) & ~np.isnan(outbound)
+        network = np.where(both, network + outbound, np.fmax(network, outbound))
+        features[start:stop] = workload_features(
+            store.block("cpu", start, stop, window),
+            store.block("cpu", start, stop, window, field=1),
+            network,
+        )
+    return WorkloadProfile(list(store.ids), classify_features(features), features,
+                           window, store.generation)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Classify workloads from a metric store")
+    parser.add_argument("store")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    profile = classify_workloads(MetricsStore(args.store), days=args.days)
+    summary = profile.summary()
+    print(f"Classified {summary['resource_count']} resources over {summary['days']} days "
+          f"in {time.perf_counter() - started:.1f}s: {summary['by_class']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.__main__ import main
+from benchmarks.generators import (
+    STATUS_WEIGHTS,
+    TYPE_WEIGHTS,
+    generate_migrations,
+    generate_resources,
+)
+from benchmarks.load import DEFAULTS, load_scenarios, summarize
+from benchmarks.suite import compare, run_suite
+from models.migration import (
+    VALID_RESOURCE_TYPES,
+    VALID_STATUSES,
+    MigrationCreateSchema,
+    ResourceSchema,
+)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_generators_are_seeded_and_valid():
+    assert set(TYPE_WEIGHTS) == set(VALID_RESOURCE_TYPES)
+    assert set(STATUS_WEIGHTS) == set(VALID_STATUSES)
+
+    resources = generate_resources(500, seed=3)
+    assert resources == generate_resources(500, seed=3)
+    assert resources != generate_resources(500, seed=4)
+    ids = [r["resource_id"] for r in resources]
+    assert ids == sorted(set(ids))
+    assert len({r["tags"]["team"] for r in resources}) > 2
+    assert len({r["tags"].get("cost-center") for r in resources}) > 5
+
+    migrations = list(generate_migrations(200, seed=3, resources=resources))
+    assert migrations == list(generate_migrations(200, seed=3, resources=resources))
+    assert len({m["id"] for m in migrations}) == 200
+    schema = MigrationCreateSchema()
+    for migration in migrations:
+        schema.load({key: migration[key] for key in ("name", "source_environment",
+                                                     "target_environment", "strategy")})
+        ResourceSchema(many=True).load(migration["resources"])
+
+
+def test_run_suite_times_every_case(tmp_path):
+    os.environ["MIGRATION_STATE_DIR"] = str(tmp_path)
+    results = run_suite(migration_sizes=[100], resource_sizes=[], backends=["sqlite"],
+                        repeat=1)
+
+    assert results["meta"]["backends"] == ["sqlite"]
+    cases = results["results"]
+    assert len(cases) == 8
+    assert "PATCH /api/v1/migrations/:id[sqlite,n=100]" in cases
+    assert all(timing["median_ms"] > 0 for timing in cases.values())
+    assert os.environ["MIGRATION_STATE_DIR"] == str(tmp_path)
+
+
+def test_run_cli_resource_cases(tmp_path):
+    # In a subprocess: swapping the inventory bumps its version for the
+    # rest of this process.
+    output = tmp_path / "results.json"
+    subprocess.run([sys.executable, "-m", "benchmarks", "run", "--migrations", "",
+                    "--resources", "200", "--repeat", "1", "--output", str(output)],
+                   cwd=BACKEND_DIR, check=True, capture_output=True)
+    cases = json.loads(output.read_text())["results"]
+    assert len(cases) == 8
+    assert "estimate_costs[n=200]" in cases
+    assert "GET /api/v1/resources/summary[n=200]" in cases
+
+
+def _results(**medians):
+    return {"meta": {}, "results": {case: {"median_ms": ms} for case, ms in medians.items()}}
+
+
+def test_compare_flags_regressions_past_threshold():
+    baseline = _results(fast=0.1, steady=10.0, slower=10.0, gone=5.0)
+    current = _results(fast=0.5, steady=11.0, slower=20.0, new=1.0)
+    assert compare(baseline, current, threshold=0.25) == [
+        {"case": "slower", "baseline_ms": 10.0, "current_ms": 20.0, "change": 1.0},
+    ]
+    assert compare(baseline, current, threshold=1.5) == []
+
+
+def test_compare_cli_exit_status(tmp_path, capsys):
+    baseline, current = tmp_path / "baseline.json", tmp_path / "current.json"
+    baseline.write_text(json.dumps(_results(case=10.0)))
+    current.write_text(json.dumps(_results(case=30.0)))
+    assert main(["compare", str(baseline), str(current)]) == 1
+    assert "REGRESSION case" in capsys.readouterr().out
+    assert main(["compare", str(baseline), str(baseline)]) == 0
+
+
+def test_load_scenarios_merge_over_defaults(tmp_path):
+    path = tmp_path / "scenarios.yaml"
+    path.write_text(
+        "defaults:\n"
+        "  server: {workers: 3}\n"
+        "  load: {clients: 2}\n"
+        "scenarios:\n"
+        "  - name: sqlite\n"
+        "    server: {threads: 4, env: {MIGRATION_STORE_BACKEND: sqlite}}\n"
+        "  - mix: {\"GET /migrations\": 1}\n"
+    )
+    first, second = load_scenarios(str(path))
+    assert first["name"] == "sqlite"
+    assert first["server"]["workers"] == 3 and first["server"]["threads"] == 4
+    assert first["server"]["env"] == {"MIGRATION_STORE_BACKEND": "sqlite"}
+    assert first["load"]["clients"] == 2
+    assert first["load"]["duration"] == DEFAULTS["load"]["duration"]
+    assert first["mix"] == DEFAULTS["mix"]
+    assert second["name"] == "scenario-2"
+    assert second["mix"] == {"GET /migrations": 1}
+
+    path.write_text("scenarios:\n  - mix: {\"GET /nowhere\": 1}\n")
+    with pytest.raises(ValueError, match="GET /nowhere"):
+        load_scenarios(str(path))
+
+
+def test_summarize_merges_clients_per_endpoint():
+    clients = [
+        {"samples": {"GET /a": [1.0, 3.0], "GET /b": [10.0]}, "errors": {"GET /a": 1},
+         "error_examples": {"GET /a": "500: boom"}},
+        {"samples": {"GET /a": [2.0, 4.0]}, "errors": {}, "error_examples": {}},
+    ]
+    total, endpoints = summarize(clients, duration=2.0)
+    assert endpoints["GET /a"] == {"requests": 4, "errors": 1, "rps": 2.0, "p50_ms": 3.0,
+                                   "p95_ms": 4.0, "p99_ms": 4.0, "max_ms": 4.0,
+                                   "error_example": "500: boom"}
+    assert endpoints["GET /b"]["requests"] == 1 and "error_example" not in endpoints["GET /b"]
+    assert total == {"requests": 5, "errors": 1, "rps": 2.5, "p50_ms": 3.0, "p95_ms": 10.0,
+                     "p99_ms": 10.0}
+
+
+def test_load_cli_against_gunicorn(tmp_path):
+    path, output = tmp_path / "scenarios.yaml", tmp_path / "load.json"
+    path.write_text(
+        "defaults:\n"
+        "  server: {workers: 1, threads: 2, worker_class: gthread}\n"
+        "  preload: {migrations: 20}\n"
+        "  load: {clients: 2, duration: 1, warmup: 0, owned: 3}\n"
+        "scenarios:\n"
+        "  - name: smoke\n"
+    )
+    subprocess.run([sys.executable, "-m", "benchmarks", "load", str(path), "--output",
+                    str(output)], cwd=BACKEND_DIR, check=True, capture_output=True, timeout=120)
+    report, = json.loads(output.read_text())["scenarios"]
+    assert report["total"]["requests"] > 0
+    assert report["total"]["errors"] == 0
+    assert report["integrity"] == {"lost_updates": 0, "lost_creates": 0,
+                                   "resurrected_deletes": 0, "stats_drift": 0}
+    assert "PATCH /migrations/:id" in report["endpoints"]
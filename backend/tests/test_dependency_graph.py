@@ -0,0 +1,74 @@
+import numpy as np
+
+from services.dependency_graph import DependencyGraph
+from services.dependency_service import security_group_edges
+
+
+def _graph(edges, n=6):
+    return DependencyGraph.from_edges([f"r{i}" for i in range(n)],
+                                      [(f"r{a}", f"r{b}") for a, b in edges])
+
+
+def test_waves_put_dependencies_first():
+    # r0 -> r1 -> r2, r0 -> r2, r3 isolated
+    g = _graph([(0, 1), (1, 2), (0, 2), (0, 2)], n=4)
+    assert g.edge_count == 3
+    assert g.waves().tolist() == [2, 1, 0, 0]
+    assert g.fan_out().tolist() == [2, 1, 0, 0]
+    assert g.fan_in().tolist() == [0, 1, 2, 0]
+    assert g.cycles() == []
+
+
+def test_cycles_share_a_wave():
+    # r1 <-> r2 form a cycle between r0 (depends on it) and r3 (its dependency)
+    g = _graph([(0, 1), (1, 2), (2, 1), (2, 3), (4, 4)], n=5)
+    cycles = g.cycles()
+    assert [sorted(c.tolist()) for c in cycles] == [[1, 2]]
+    waves = g.waves()
+    assert waves[3] == 0 and waves[1] == waves[2] == 1 and waves[0] == 2
+    assert waves[4] == 0  # self-loops are ignored
+
+    plan = g.plan()
+    assert plan["wave_count"] == 3
+    assert plan["waves"][1] == ["r1", "r2"]
+    assert plan["cycles"] == [["r1", "r2"]]
+    assert plan["nodes"][1]["in_cycle"] and not plan["nodes"][0]["in_cycle"]
+
+
+def test_matches_reference_on_random_graph():
+    rng = np.random.default_rng(7)
+    n = 300
+    src, dst = rng.integers(0, n, 900), rng.integers(0, n, 900)
+    g = DependencyGraph(range(n), src, dst)
+    labels, _ = g.components()
+    waves = g.waves()
+
+    reach = np.eye(n, dtype=bool)
+    reach[src, dst] = True
+    for k in range(n):
+        reach |= reach[:, [k]] & reach[[k], :]
+    same = reach & reach.T
+    assert (same == (labels[:, None] == labels[None, :])).all()
+    for a, b in zip(src, dst):
+        if labels[a] != labels[b]:
+            assert waves[a] > waves[b]
+
+
+def test_subgraph_keeps_internal_edges():
+    g = _graph([(0, 1), (1, 2), (3, 4)])
+    sub = g.subgraph(["r1", "r2", "r3", "unknown"])
+    assert sub.edge_count == 1
+    assert sub.waves().tolist() == [1, 0, 0, 0]
+
+
+def test_security_group_edges():
+    resources = [
+        {"resource_id": "web", "specs": {"security_groups": ["sg-web"]}},
+        {"resource_id": "db", "specs": {"security_groups": ["sg-db"]}},
+        {"resource_id": "cache", "specs": {"security_groups": ["sg-db"]}},
+    ]
+    groups = {"SecurityGroups": [
+        {"GroupId": "sg-db", "IpPermissions": [{"UserIdGroupPairs": [{"GroupId": "sg-web"}]}]},
+        {"GroupId": "sg-web", "IpPermissions": [{"IpRanges": [{"CidrIp": "0.0.0.0/0"}]}]},
+    ]}
+    assert sorted(security_group_edges(groups, resources)) == [("web", "cache"), ("web", "db")]
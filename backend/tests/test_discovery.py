@@ -0,0 +1,255 @@
+import threading
+import time
+
+import pytest
+
+from services.discovery import DiscoveryEngine, SCANNERS, TokenBucket
+from services.inventory import Inventory
+
+
+class ThrottledError(Exception):
+    def __init__(self):
+        super().__init__("Rate exceeded")
+        self.response = {"Error": {"Code": "Throttling"}}
+
+
+class FakeClient:
+    """Moto-style stand-in for a boto3 client: serves canned, paginated data."""
+
+    def __init__(self, aws, service, region, account):
+        self.aws = aws
+        self.service = service
+        self.region = region
+        self.account = account
+
+    def _call(self, method, token_key, items_key, items, page_size=2, **kwargs):
+        self.aws.enter()
+        try:
+            time.sleep(self.aws.latency)
+            if self.aws.throttle_next.get((self.service, self.region), 0):
+                self.aws.throttle_next[(self.service, self.region)] -= 1
+                raise ThrottledError()
+            start = int(kwargs.get(token_key) or 0)
+            page = {items_key: items[start:start + page_size]}
+            if start + page_size < len(items):
+                page[self.aws.response_tokens[method]] = str(start + page_size)
+            return page
+        finally:
+            self.aws.leave()
+
+    def describe_instances(self, **kwargs):
+        instances = [
+            {
+                "InstanceId": f"i-{self.account}-{self.region}-{n}",
+                "InstanceType": "m5.large",
+                "State": {"Name": "running"},
+                "Tags": [{"Key": "Name", "Value": f"web-{n}"},
+                         {"Key": "team", "Value": "platform"}],
+            }
+            for n in range(self.aws.instances_per_region)
+        ]
+        reservations = [{"Instances": [inst]} for inst in instances]
+        return self._call("describe_instances", "NextToken", "Reservations",
+                          reservations, **kwargs)
+
+    def list_buckets(self, **kwargs):
+        self.aws.s3_calls += 1
+        locations = self.aws.bucket_locations or {f"bucket-{self.account}": None}
+        buckets = [{"Name": name} for name in locations]
+        return self._call("list_buckets", "ContinuationToken", "Buckets", buckets, **kwargs)
+
+    def get_bucket_location(self, Bucket):
+        if self.aws.fail_s3_location:
+            raise RuntimeError("AccessDenied")
+        location = (self.aws.bucket_locations or {}).get(Bucket)
+        return {"LocationConstraint": location} if location else {}
+
+    def describe_db_instances(self, **kwargs):
+        if self.aws.fail_rds:
+            raise RuntimeError("AccessDenied")
+        return {"DBInstances": []}
+
+
+class FakeAWS:
+    response_tokens = {"describe_instances": "NextToken", "list_buckets": "ContinuationToken"}
+
+    def __init__(self, instances_per_region=3, latency=0.0):
+        self.instances_per_region = instances_per_region
+        self.latency = latency
+        self.throttle_next = {}
+        self.fail_rds = False
+        self.fail_s3_location = False
+        self.bucket_locations = None
+        self.s3_calls = 0
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def leave(self):
+        with self._lock:
+            self.active -= 1
+
+    def client(self, service, region, account):
+        return FakeClient(self, service, region, account)
+
+
+def _engine(aws, **kwargs):
+    kwargs.setdefault("resource_types", ["ec2_instance"])
+    kwargs.setdefault("regions", ["us-east-1", "eu-west-1"])
+    kwargs.setdefault("rate_limits", {service: 1000.0 for service, _, _ in SCANNERS.values()})
+    return DiscoveryEngine(aws.client, base_delay=0.001, **kwargs)
+
+
+class TestDiscoveryEngine:
+    def test_scans_every_region_and_account(self):
+        aws = FakeAWS(instances_per_region=5)
+        result = _engine(aws, accounts=["111", "222"]).run()
+
+        assert len(result.resources) == 2 * 2 * 5
+        assert len(result.tasks) == 4
+        assert not result.errors
+        first = result.resources[0]
+        assert set(first) >= {"resource_id", "resource_type", "name", "region", "tags", "specs"}
+        assert first["resource_type"] == "ec2_instance"
+        assert first["tags"]["team"] == "platform"
+        assert first["account_id"] in {"111", "222"}
+        # five instances at two per page -> three calls per task
+        assert all(t.calls == 3 and t.count == 5 for t in result.tasks)
+        assert all(t.seconds >= 0 for t in result.tasks)
+
+    def test_global_service_scanned_once_per_account(self):
+        aws = FakeAWS()
+        result = _engine(aws, resource_types=["s3_bucket"], accounts=["111", "222"]).run()
+        assert aws.s3_calls == 2
+        assert {r["name"] for r in result.resources} == {"bucket-111", "bucket-222"}
+
+    def test_buckets_carry_their_own_region(self):
+        aws = FakeAWS()
+        aws.bucket_locations = {"a": None, "b": "eu-west-1", "c": "EU", "d": "ap-south-1"}
+        result = _engine(aws, resource_types=["s3_bucket"], regions=["us-west-2"]).run()
+        assert aws.s3_calls == 2  # two buckets per page
+        assert {r["name"]: r["region"] for r in result.resources} == {
+            "a": "us-east-1", "b": "eu-west-1", "c": "eu-west-1", "d": "ap-south-1"}
+
+    def test_retries_throttled_page(self):
+        aws = FakeAWS()
+        aws.throttle_next[("ec2", "us-east-1")] = 2
+        result = _engine(aws).run()
+        task = next(t for t in result.tasks if t.region == "us-east-1")
+        assert task.retries == 2
+        assert task.error is None
+        assert len(result.resources) == 6
+
+    def test_failed_task_is_reported_not_raised(self):
+        aws = FakeAWS()
+        aws.fail_rds = True
+        result = _engine(aws, resource_types=["ec2_instance", "rds_database"]).run()
+        assert len(result.errors) == 2
+        assert "AccessDenied" in result.errors[0].error
+        assert len(result.resources) == 6
+
+    def test_worker_pool_is_bounded(self):
+        aws = FakeAWS(instances_per_region=1, latency=0.02)
+        regions = [f"r-{n}" for n in range(12)]
+        result = _engine(aws, regions=regions, max_workers=3).run()
+        assert len(result.resources) == 12
+        assert aws.peak <= 3
+
+    def test_stream_can_stop_early(self):
+        aws = FakeAWS(instances_per_region=50)
+        engine = _engine(aws, queue_size=2, max_workers=2)
+        stream = engine.stream()
+        assert next(stream)["resource_type"] == "ec2_instance"
+        stream.close()
+
+
+def test_rate_limits_apply_per_region_and_account():
+    engine = _engine(FakeAWS(), rate_limits={"apigateway": 5.0})
+    bucket = engine._bucket("apigateway", "us-east-1", "111")
+    assert bucket.rate == 5.0
+    assert engine._bucket("apigateway", "us-east-1", "111") is bucket
+    assert engine._bucket("apigateway", "eu-west-1", "111") is not bucket
+    assert engine._bucket("apigateway", "us-east-1", "222") is not bucket
+    assert engine._bucket("ec2", "us-east-1", "111") is not bucket
+
+
+def test_token_bucket_limits_rate():
+    now = [0.0]
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2.0, burst=1, clock=lambda: now[0], sleep=sleep)
+    for _ in range(5):
+        bucket.acquire()
+    assert now[0] == pytest.approx(2.0)
+
+
+def test_refresh_from_discovery_replaces_inventory(monkeypatch):
+    from services import resource_service
+
+    monkeypatch.setattr(resource_service, "_inventory", Inventory())
+    result, delta = resource_service.refresh_from_discovery(
+        _engine(FakeAWS(), accounts=["111"])
+    )
+    listing = resource_service.discover_resources(tag_key="team", tag_value="platform")
+    assert listing["total"] == len(result.resources) == len(delta.added) == 6
+
+
+def test_failed_global_scan_keeps_resources_in_every_region(monkeypatch):
+    from services import resource_service
+
+    monkeypatch.setattr(resource_service, "_inventory", Inventory())
+    aws = FakeAWS()
+    aws.bucket_locations = {"a": None, "b": "eu-west-1"}
+    engine = _engine(aws, resource_types=["s3_bucket"], accounts=["111"])
+    resource_service.refresh_from_discovery(engine)
+
+    aws.fail_s3_location = True
+    result, delta = resource_service.refresh_from_discovery(engine)
+    assert result.errors and not delta
+    assert len(resource_service._inventory) == 2
+
+
+def test_failed_scan_does_not_remove_resources(monkeypatch):
+    from services import resource_service
+
+    monkeypatch.setattr(resource_service, "_inventory", Inventory())
+    aws = FakeAWS()
+    engine = _engine(aws, accounts=["111"])
+    resource_service.refresh_from_discovery(engine)
+
+    aws.throttle_next[("ec2", "us-east-1")] = 100
+    _, delta = resource_service.refresh_from_discovery(engine)
+    assert not delta
+    assert len(resource_service._inventory) == 6
+
+
+def test_app_refreshes_inventory_when_discovery_enabled(monkeypatch):
+    from app import create_app
+    from config import TestingConfig
+    from services import discovery, resource_service
+
+    aws = FakeAWS()
+    monkeypatch.setattr(resource_service, "_inventory", Inventory())
+    monkeypatch.setattr(discovery, "Boto3ClientFactory", lambda role_name=None: aws.client)
+    monkeypatch.setattr(TestingConfig, "DISCOVERY_ENABLED", True)
+    monkeypatch.setattr(TestingConfig, "DISCOVERY_REGIONS", ["us-east-1"])
+    monkeypatch.setattr(TestingConfig, "DISCOVERY_ACCOUNTS", ["111"])
+    try:
+        client = create_app("testing").test_client()
+        deadline = time.monotonic() + 5
+        while not len(resource_service._inventory) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        listing = client.get("/api/v1/resources?resource_type=ec2_instance").get_json()
+        assert listing["total"] == 3
+        assert {r["account_id"] for r in listing["items"]} == {"111"}
+    finally:
+        resource_service.configure_discovery()
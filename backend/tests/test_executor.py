@@ -0,0 +1,276 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from app import create_app
+from models.migration import new_migration
+from services import executor
+from services.dependency_service import configure_dependency_sources
+from services.executor import (
+    ActionRegistry,
+    ExecutionEngine,
+    FakeAction,
+    JobQueue,
+    StepError,
+    parse_type_limits,
+)
+from services.migration_service import create_migration, get_migration
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path):
+    os.environ["MIGRATION_STATE_DIR"] = str(tmp_path)
+    yield tmp_path
+    configure_dependency_sources()
+
+
+def _resource(rid, rtype="ec2_instance", **extra):
+    return dict({"resource_id": rid, "resource_type": rtype, "name": rid,
+                 "region": "us-east-1", "tags": {}}, **extra)
+
+
+def _migration(resources):
+    record = new_migration("Exec", "dc1", "aws", "rehost", resources)
+    return create_migration(record)["id"]
+
+
+def _engine(state_dir, actions=None, **options):
+    options.setdefault("idle_timeout", 0)
+    return ExecutionEngine(JobQueue(str(state_dir)), actions=actions, **options)
+
+
+class Recorder:
+    """Fake action recording step order and peak concurrency per key."""
+
+    def __init__(self, latency=0.01, fail=()):
+        self.lock = threading.Lock()
+        self.calls = []
+        self.running = {}
+        self.peak = {}
+        self.latency = latency
+        self.fail = set(fail)
+
+    def _enter(self, keys):
+        with self.lock:
+            for key in keys:
+                self.running[key] = self.running.get(key, 0) + 1
+                self.peak[key] = max(self.peak.get(key, 0), self.running[key])
+
+    def _leave(self, keys):
+        with self.lock:
+            for key in keys:
+                self.running[key] -= 1
+
+    def __call__(self, ctx):
+        r = ctx.resource
+        keys = ("all", ("type", r["resource_type"]), ("account", r.get("account_id")))
+        self._enter(keys)
+        try:
+            time.sleep(self.latency)
+        finally:
+            self._leave(keys)
+        with self.lock:
+            self.calls.append((ctx.phase, r["resource_id"], ctx.attempt))
+        if (ctx.phase, r["resource_id"]) in self.fail:
+            raise StepError("boom")
+
+
+def _registry(action):
+    registry = ActionRegistry()
+    for phase in ("analyze", "migrate", "validate"):
+        registry.register(phase, action)
+    return registry
+
+
+def test_runs_phases_to_completion(state_dir):
+    mid = _migration([_resource(f"r{i}") for i in range(5)])
+    recorder = Recorder()
+    engine = _engine(state_dir, _registry(recorder))
+    assert engine.submit(mid)
+    assert engine.run_until_idle(timeout=10)
+
+    migration = get_migration(mid)
+    assert migration["status"] == "completed"
+    assert migration["started_at"] is not None
+    assert migration["progress"] == {"phase": "done", "completed_steps": 5, "total_steps": 5}
+    phases = [phase for phase, _, _ in recorder.calls]
+    assert phases == ["analyze"] * 5 + ["migrate"] * 5 + ["validate"] * 5
+
+    job = engine.queue.get(mid)
+    assert job["status"] == "completed"
+    assert job["steps"]["migrate"] == {"done": 5}
+
+
+def test_concurrency_caps(state_dir):
+    resources = (
+        [_resource(f"db{i}", "rds_database", account_id="a1") for i in range(6)]
+        + [_resource(f"vm{i}", account_id="a2") for i in range(10)]
+    )
+    mid = _migration(resources)
+    recorder = Recorder(latency=0.02)
+    engine = _engine(state_dir, _registry(recorder), max_workers=5, account_limit=3,
+                     type_limits={"rds_database": 2})
+    engine.submit(mid)
+    assert engine.run_until_idle(timeout=20)
+
+    assert get_migration(mid)["status"] == "completed"
+    assert recorder.peak["all"] <= 5
+    assert recorder.peak[("type", "rds_database")] <= 2
+    assert recorder.peak[("account", "a1")] <= 3
+    assert recorder.peak[("account", "a2")] <= 3
+    assert recorder.peak["all"] >= 3
+
+
+def test_dependencies_migrate_first(state_dir):
+    # The ALB depends on the web servers, which depend on the database;
+    # the two web servers depend on each other (a cycle moves together).
+    edges = state_dir / "edges.json"
+    edges.write_text(json.dumps([
+        ["alb-web-prod", "i-0a1b2c3d4e5f60001"],
+        ["i-0a1b2c3d4e5f60001", "db-cluster-prod-01"],
+        ["i-0a1b2c3d4e5f60002", "db-cluster-prod-01"],
+        ["i-0a1b2c3d4e5f60001", "i-0a1b2c3d4e5f60002"],
+        ["i-0a1b2c3d4e5f60002", "i-0a1b2c3d4e5f60001"],
+    ]))
+    configure_dependency_sources([str(edges)])
+    ids = ["alb-web-prod", "i-0a1b2c3d4e5f60001", "i-0a1b2c3d4e5f60002",
+           "db-cluster-prod-01"]
+    mid = _migration([_resource(rid) for rid in ids])
+    recorder = Recorder()
+    engine = _engine(state_dir, _registry(recorder), max_workers=4)
+    engine.submit(mid)
+    assert engine.run_until_idle(timeout=10)
+
+    order = [rid for phase, rid, _ in recorder.calls if phase == "migrate"]
+    assert order[0] == "db-cluster-prod-01"
+    assert set(order[1:3]) == {"i-0a1b2c3d4e5f60001", "i-0a1b2c3d4e5f60002"}
+    assert order[3] == "alb-web-prod"
+
+
+def test_retries_then_fails(state_dir):
+    mid = _migration([_resource("r0"), _resource("r1")])
+    recorder = Recorder(fail={("migrate", "r1")})
+    engine = _engine(state_dir, _registry(recorder), max_attempts=2)
+    engine.submit(mid)
+    assert engine.run_until_idle(timeout=10)
+
+    migration = get_migration(mid)
+    assert migration["status"] == "failed"
+    assert "migrate failed for r1: boom" in migration["error_log"][-1]["message"]
+    assert [a for p, rid, a in recorder.calls if rid == "r1" and p == "migrate"] == [1, 2]
+    assert not any(phase == "validate" for phase, _, _ in recorder.calls)
+    job = engine.queue.get(mid)
+    assert job["status"] == "failed"
+    assert job["steps"]["migrate"] == {"done": 1, "failed": 1}
+
+
+def test_fake_action_failures_are_retried(state_dir):
+    mid = _migration([_resource(f"r{i}") for i in range(20)])
+    actions = ActionRegistry(default=FakeAction(latency=(0.0, 0.002), failure_rate=0.2,
+                                                seed=7))
+    engine = _engine(state_dir, actions, max_attempts=10)
+    engine.submit(mid)
+    assert engine.run_until_idle(timeout=10)
+    assert get_migration(mid)["status"] == "completed"
+
+
+def test_resumes_after_restart(state_dir):
+    mid = _migration([_resource("r0"), _resource("r1")])
+    queue = JobQueue(str(state_dir))
+    queue.enqueue(mid)
+    # A previous engine claimed the job, finished some steps and died.
+    assert queue.claim("dead-engine", lease_seconds=-1) == [mid]
+    queue.record_steps(mid, [("analyze", "r0", "done", 1, None),
+                             ("analyze", "r1", "done", 1, None),
+                             ("migrate", "r0", "done", 1, None)])
+
+    recorder = Recorder()
+    engine = _engine(state_dir, _registry(recorder))
+    assert not engine.submit(mid)  # still running, as far as the queue knows
+    assert engine.run_until_idle(timeout=10)
+
+    assert get_migration(mid)["status"] == "completed"
+    assert recorder.calls[0][:2] == ("migrate", "r1")
+    assert len(recorder.calls) == 3
+
+
+def test_cancel(state_dir):
+    mid = _migration([_resource(f"r{i}") for i in range(4)])
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking(ctx):
+        started.set()
+        release.wait(5)
+
+    engine = _engine(state_dir, _registry(blocking), max_workers=1, lease_seconds=0.3)
+    engine.submit(mid)
+    assert started.wait(5)
+    assert engine.cancel(mid)
+    release.set()
+    assert engine.run_until_idle(timeout=10)
+
+    migration = get_migration(mid)
+    assert migration["status"] == "failed"
+    assert migration["error_log"][-1]["message"] == "Execution cancelled"
+    assert not engine.cancel(mid)
+
+
+def test_submit_during_idle_shutdown_starts_a_new_dispatcher(state_dir, monkeypatch):
+    first, late = _migration([_resource("a")]), _migration([_resource("b")])
+    engine = _engine(state_dir, _registry(Recorder(latency=0)))
+
+    class Pool(executor.ThreadPoolExecutor):
+        def shutdown(self, wait=True, **kwargs):
+            # The dispatcher has decided to exit but its thread is alive.
+            if engine.queue.get(late) is None:
+                assert engine.submit(late)
+            super().shutdown(wait=wait, **kwargs)
+    monkeypatch.setattr(executor, "ThreadPoolExecutor", Pool)
+
+    assert engine.submit(first)
+    deadline = time.monotonic() + 10
+    while get_migration(late)["status"] != "completed" and time.monotonic() < deadline:
+        engine._thread.join(0.05)
+    assert get_migration(first)["status"] == "completed"
+    assert get_migration(late)["status"] == "completed"
+
+
+def test_parse_type_limits():
+    assert parse_type_limits("rds_database=2, ec2_instance=8") == {
+        "rds_database": 2, "ec2_instance": 8}
+    assert parse_type_limits(["s3_bucket=1"]) == {"s3_bucket": 1}
+    assert parse_type_limits("") == {}
+
+
+@pytest.fixture
+def client():
+    app = create_app("testing")
+    with app.test_client() as client:
+        yield client
+
+
+def test_execute_routes(client):
+    mid = _migration([_resource("r0")])
+    resp = client.post(f"/api/v1/migrations/{mid}/execute")
+    assert resp.status_code == 202
+    assert resp.get_json()["migration_id"] == mid
+
+    deadline = time.time() + 10
+    while client.get(f"/api/v1/migrations/{mid}").get_json()["status"] != "completed":
+        assert time.time() < deadline
+        time.sleep(0.02)
+    execution = client.get(f"/api/v1/migrations/{mid}/execution").get_json()
+    assert execution["status"] == "completed"
+    assert execution["steps"]["validate"] == {"done": 1}
+
+    assert client.post(f"/api/v1/migrations/{mid}/execute").status_code == 409
+    assert client.post(f"/api/v1/migrations/{mid}/execution/cancel").status_code == 409
+
+
+def test_execute_routes_unknown_migration(client):
+    assert client.post("/api/v1/migrations/nope/execute").status_code == 404
+    assert client.get("/api/v1/migrations/nope/execution").status_code == 404
@@ -0,0 +1,144 @@
+import gzip
+import json
+
+import numpy as np
+
+from services.dependency_service import read_edge_file
+from services.flow_logs import (
+    EdgeAggregator,
+    IpIndex,
+    ingest_flow_logs,
+    iter_chunks,
+    main,
+    parse_chunk,
+)
+
+RESOURCES = [
+    {"resource_id": "web", "specs": {"private_ips": ["10.0.0.10"]}},
+    {"resource_id": "api", "specs": {"private_ips": ["10.0.1.20", "10.0.1.21"]}},
+    {"resource_id": "db", "specs": {"private_ip": "10.0.2.30"}},
+    {"resource_id": "bucket", "specs": {}},
+]
+
+HEADER = ("version account-id interface-id srcaddr dstaddr srcport dstport protocol "
+          "packets bytes start end action log-status")
+
+
+def _line(src, dst, sport, dport, nbytes, packets=1, action="ACCEPT"):
+    return (f"2 123456789012 eni-1 {src} {dst} {sport} {dport} 6 {packets} {nbytes} "
+            f"1700000000 1700000060 {action} OK")
+
+
+def _sample():
+    return [
+        HEADER,
+        _line("10.0.0.10", "10.0.1.20", 50000, 443, 100),
+        _line("10.0.1.20", "10.0.0.10", 443, 50000, 900),  # response: flipped
+        _line("10.0.1.21", "10.0.2.30", 41000, 5432, 50, packets=2),
+        _line("10.0.1.21", "10.0.2.30", 41001, 5432, 70, packets=3),
+        _line("10.0.0.10", "10.0.2.30", 50001, 5432, 10, action="REJECT"),
+        _line("10.0.0.10", "192.168.1.1", 50002, 443, 10),  # unknown host
+        _line("10.0.0.10", "10.0.0.10", 50003, 80, 10),  # same resource
+        "2 123456789012 eni-1 - - - - - - - 1700000000 1700000060 - NODATA",
+    ]
+
+
+def _write(path, lines, compress=False):
+    data = ("\n".join(lines) + "\n").encode()
+    if compress:
+        with gzip.open(path, "wb") as f:
+            f.write(data)
+    else:
+        path.write_bytes(data)
+    return str(path)
+
+
+def _as_dict(edges):
+    return {(e["source"], e["target"]): (e["bytes"], e["packets"], e["flows"]) for e in edges}
+
+
+EXPECTED = {
+    ("web", "api"): (1000, 2, 2),
+    ("api", "db"): (120, 5, 2),
+}
+
+
+def test_parse_chunk_maps_and_orients_flows():
+    index = IpIndex(RESOURCES)
+    assert index.ids == ["web", "api", "db"]
+    chunk = ("\n".join(_sample()) + "\n").encode()
+    src, dst, nbytes, packets, stats = parse_chunk(chunk, index)
+    pairs = [(index.ids[s], index.ids[d]) for s, d in zip(src.tolist(), dst.tolist())]
+    assert pairs == [("web", "api"), ("web", "api"), ("api", "db"), ("api", "db")]
+    assert nbytes.tolist() == [100, 900, 50, 70]
+    assert packets.tolist() == [1, 1, 2, 3]
+    assert stats == {"records": 9, "matched": 4, "malformed": 0}
+
+
+def test_parse_chunk_drops_malformed_lines():
+    index = IpIndex(RESOURCES)
+    lines = _sample() + ["garbage", "", _line("10.0.0.10", "10.0.1.20", 1, 2, 3) + " extra"]
+    lines.insert(2, _line("10.0.0.10", "10.0.1.20", 50000, 443, 5).replace(" ", "  "))
+    src, _, nbytes, _, stats = parse_chunk("\n".join(lines).encode(), index)
+    assert stats["malformed"] == 2
+    assert stats["matched"] == 5
+    assert int(nbytes.sum()) == 1125
+
+
+def test_ingest_plain_and_gzip_agree(tmp_path):
+    plain = _write(tmp_path / "a.log", _sample())
+    packed = _write(tmp_path / "b.log.gz", _sample(), compress=True)
+    edges, stats = ingest_flow_logs([plain], RESOURCES, workers=1)
+    assert _as_dict(edges) == EXPECTED
+    assert [e["source"] for e in edges] == ["web", "api"]  # heaviest first
+    assert stats["matched"] == 4 and stats["edges"] == 2
+
+    gz_edges, gz_stats = ingest_flow_logs([packed], RESOURCES, workers=1)
+    assert gz_edges == edges
+    assert gz_stats["records"] == stats["records"]
+
+
+def test_byte_range_split_matches_whole_file(tmp_path):
+    lines = [HEADER] + [
+        _line(f"10.0.{i % 3}.{(10, 20, 30)[i % 3]}", f"10.0.{(i + 1) % 3}.{(10, 20, 30)[(i + 1) % 3]}",
+              40000 + i, 443, i)
+        for i in range(3000)
+    ]
+    path = _write(tmp_path / "big.log", lines)
+    whole, stats = ingest_flow_logs([path], RESOURCES, workers=1)
+    split, split_stats = ingest_flow_logs([path], RESOURCES, workers=1,
+                                          split_size=4096, chunk_size=1000)
+    assert split == whole
+    assert split_stats["records"] == stats["records"] == 3001
+    assert split_stats["malformed"] == 0
+    assert sum(len(c) for c in iter_chunks(path, chunk_size=777)) == (tmp_path / "big.log").stat().st_size
+
+
+def test_process_pool_matches_inline(tmp_path):
+    paths = [_write(tmp_path / f"{n}.log", _sample()) for n in range(3)]
+    inline, _ = ingest_flow_logs(paths, RESOURCES, workers=1)
+    pooled, stats = ingest_flow_logs(paths, RESOURCES, workers=2)
+    assert pooled == inline
+    assert stats["matched"] == 12
+
+
+def test_aggregator_keeps_heaviest_edges():
+    agg = EdgeAggregator(max_edges=4)
+    keys = np.arange(10, dtype=np.int64)
+    agg.add(keys, keys * 10, np.ones(10, dtype=np.int64))
+    agg.add(keys[:2], np.array([5, 5]), np.ones(2, dtype=np.int64))
+    kept, nbytes, packets, flows = agg.columns()
+    assert kept.tolist() == [6, 7, 8, 9]
+    assert nbytes.tolist() == [60, 70, 80, 90]
+    assert agg.dropped > 0
+    assert len(agg) == 4
+
+
+def test_cli_writes_dependency_edge_csv(tmp_path, capsys):
+    log = _write(tmp_path / "a.log.gz", _sample(), compress=True)
+    inventory = tmp_path / "inventory.ndjson"
+    inventory.write_text("\n".join(json.dumps(r) for r in RESOURCES))
+    out = tmp_path / "edges.csv"
+    main([str(out), log, "--resources", str(inventory), "--workers", "1"])
+    assert sorted(read_edge_file(str(out))) == [("api", "db"), ("web", "api")]
+    assert "2 edges" in capsys.readouterr().out
@@ -0,0 +1,144 @@
+import threading
+
+import pytest
+
+from app import create_app
+from services.instrumentation import (
+    Registry,
+    configure_instrumentation,
+    instrumented,
+    registry,
+)
+from services.migration_store import JsonLogStore
+from services.migration_store_sqlite import SqliteStore
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("MIGRATION_STATE_DIR", str(tmp_path))
+    app = create_app("testing")
+    registry.reset()
+    with app.test_client() as client:
+        yield client
+    configure_instrumentation(True)
+
+
+def _series(name, **labels):
+    wanted = tuple(sorted(labels.items()))
+    return {key: value for key, value in registry.collect().get(name, {}).items()
+            if wanted <= tuple(sorted(key))}
+
+
+def test_registry_merges_thread_shards_and_renders_histograms():
+    reg = Registry()
+    reg.define("jobs_total", "counter", "Jobs.")
+    reg.define("job_seconds", "histogram", "Job time.", buckets=(0.1, 1.0))
+
+    def work():
+        for _ in range(1000):
+            reg.inc("jobs_total", (("kind", "a"),))
+        reg.observe("job_seconds", (), 0.05)
+        reg.observe("job_seconds", (), 0.5)
+        reg.observe("job_seconds", (), 5.0)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert reg.collect()["jobs_total"] == {(("kind", "a"),): 4000}
+    text = reg.render()
+    assert '# TYPE jobs_total counter\njobs_total{kind="a"} 4000\n' in text
+    assert 'job_seconds_bucket{le="0.1"} 4\n' in text
+    assert 'job_seconds_bucket{le="1.0"} 8\n' in text
+    assert 'job_seconds_bucket{le="+Inf"} 12\n' in text
+    assert "job_seconds_sum 22.2" in text
+    assert "job_seconds_count 12\n" in text
+
+
+def test_exited_threads_fold_into_one_retired_shard():
+    reg = Registry()
+    reg.define("jobs_total", "counter", "Jobs.")
+    reg.define("job_seconds", "histogram", "Job time.", buckets=(1.0,))
+
+    def work():
+        reg.inc("jobs_total")
+        reg.observe("job_seconds", (), 0.5)
+
+    for _ in range(50):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+
+    collected = reg.collect()
+    assert reg._shards == []
+    assert collected["jobs_total"] == {(): 50}
+    assert collected["job_seconds"] == {(): [50, 0, 25.0]}
+    reg.inc("jobs_total")  # this (live) thread's shard is kept
+    assert len(reg._shards) == 1
+    assert reg.collect()["jobs_total"] == {(): 51}
+
+
+def test_instrumented_counts_outcomes_unless_disabled():
+    registry.reset()
+
+    @instrumented("test.fails")
+    def fails():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        fails()
+    assert _series("service_calls_total", operation="test.fails") == {
+        (("operation", "test.fails"), ("outcome", "error")): 1}
+
+    configure_instrumentation(False)
+    try:
+        with pytest.raises(RuntimeError):
+            fails()
+    finally:
+        configure_instrumentation(True)
+    assert sum(_series("service_calls_total", operation="test.fails").values()) == 1
+
+
+@pytest.mark.parametrize("store_class, write_op", [(JsonLogStore, "jsonlog.append"),
+                                                   (SqliteStore, "sqlite.write")])
+def test_store_io_is_counted(tmp_path, store_class, write_op):
+    registry.reset()
+    store = store_class(str(tmp_path))
+    store.put({"id": "m1", "name": "x" * 100, "status": "pending", "strategy": "rehost",
+               "created_at": "2026-01-01T00:00:00"})
+    store.get("m1")
+    written = _series("service_bytes_written_total", operation=write_op)
+    assert list(written.values())[0] > 100
+    counts = registry.collect()["service_calls_total"]
+    assert counts[(("operation", write_op), ("outcome", "ok"))] == 1
+
+
+def test_metrics_endpoint_reports_routes_and_services(client):
+    client.get("/api/v1/resources")
+    client.get("/api/v1/resources/does-not-exist")
+    client.post("/api/v1/analytics/cost-estimate",
+                json={"resources": [{"resource_id": "i-1", "resource_type": "ec2_instance"}]})
+    client.get("/no/such/path")
+
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.content_type.startswith("text/plain; version=0.0.4")
+    text = resp.get_data(as_text=True)
+    assert ('http_requests_total{blueprint="resources",route="/api/v1/resources/<resource_id>",'
+            'method="GET",status="404"} 1') in text
+    assert 'route="unmatched",method="GET",status="404"} 1' in text
+    assert ('http_request_duration_seconds_count{blueprint="resources",'
+            'route="/api/v1/resources",method="GET"} 1') in text
+    assert 'service_calls_total{operation="discover_resources",outcome="ok"} 1' in text
+    assert 'service_calls_total{operation="estimate_costs",outcome="ok"} 1' in text
+    # only the scrape itself is still in flight
+    assert 'http_requests_in_flight{blueprint="resources",route="/api/v1/resources"} 0' in text
+    assert 'http_requests_in_flight{blueprint="metrics",route="/metrics"} 1' in text
+
+
+def test_instrumentation_can_be_disabled(client):
+    configure_instrumentation(False)
+    client.get("/api/v1/resources")
+    assert "http_requests_total" not in registry.collect()
@@ -0,0 +1,78 @@
+from services.inventory import Inventory, content_hash
+
+
+def _resource(rid, **specs):
+    return {
+        "resource_id": rid,
+        "resource_type": "ec2_instance",
+        "name": rid,
+        "region": "us-east-1",
+        "tags": {"team": "platform"},
+        "specs": specs,
+    }
+
+
+def _ids(resources):
+    return sorted(r["resource_id"] for r in resources)
+
+
+class TestInventory:
+    def test_content_hash_ignores_key_order(self):
+        a = _resource("a", size=1, state="running")
+        b = dict(reversed(list(a.items())))
+        assert content_hash(a) == content_hash(b)
+        assert content_hash(a) != content_hash(_resource("a", size=2, state="running"))
+
+    def test_refresh_applies_only_the_delta(self):
+        inv = Inventory([_resource("a"), _resource("b"), _resource("c")])
+        delta = inv.refresh([_resource("a"), _resource("b", size=5), _resource("d")])
+
+        assert (delta.added, delta.changed, delta.removed) == (["d"], ["b"], ["c"])
+        assert delta.version == inv.version == 2
+        assert inv.get("b")["specs"] == {"size": 5}
+        assert inv.get("c") is None
+        assert inv.query(limit=10)[1] == 3
+
+    def test_unchanged_refresh_keeps_version(self):
+        inv = Inventory([_resource("a")])
+        assert not inv.refresh([_resource("a")])
+        assert inv.version == 1
+
+    def test_keep_protects_unscanned_resources(self):
+        inv = Inventory([_resource("a"), _resource("b")])
+        delta = inv.refresh([_resource("a")], keep=lambda r: r["resource_id"] == "b")
+        assert not delta
+        assert inv.get("b") is not None
+
+    def test_changes_since_coalesces_versions(self):
+        inv = Inventory([_resource("a"), _resource("b")])
+        inv.refresh([_resource("a", size=1), _resource("b"), _resource("c")])  # v2
+        inv.refresh([_resource("a", size=1), _resource("c", size=2), _resource("d")])  # v3
+
+        diff = inv.changes_since(1)
+        assert diff["version"] == 3 and not diff["resync"]
+        assert _ids(diff["added"]) == ["c", "d"]
+        assert _ids(diff["changed"]) == ["a"]
+        assert diff["removed"] == ["b"]
+
+        diff = inv.changes_since(2)
+        assert _ids(diff["added"]) == ["d"]
+        assert _ids(diff["changed"]) == ["c"]
+
+        assert inv.changes_since(3)["added"] == []
+
+    def test_added_then_removed_is_omitted(self):
+        inv = Inventory([_resource("a")])
+        inv.refresh([_resource("a"), _resource("tmp")])
+        inv.refresh([_resource("a")])
+        diff = inv.changes_since(1)
+        assert diff["added"] == diff["removed"] == []
+
+    def test_truncated_journal_requests_resync(self):
+        inv = Inventory([], journal_size=2)
+        inv.refresh([_resource("a")])  # v2
+        inv.refresh([_resource("a"), _resource("b")])  # v3
+        inv.refresh([_resource("a"), _resource("b"), _resource("c")])  # v4
+        assert inv.changes_since(1)["resync"] is True
+        assert inv.changes_since(2)["resync"] is False
+        assert _ids(inv.changes_since(2)["added"]) == ["b", "c"]
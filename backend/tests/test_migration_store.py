@@ -0,0 +1,260 @@
+import json
+import os
+import threading
+
+import pytest
+
+from services.migration_stats import MigrationStats
+from services.migration_store import JsonLogStore
+from services.migration_store_sqlite import SqliteStore, import_json_state
+
+
+def _record(mid, status="pending", created_at="2025-01-01T00:00:00+00:00"):
+    return {
+        "id": mid,
+        "name": f"m-{mid}",
+        "status": status,
+        "strategy": "rehost",
+        "created_at": created_at,
+    }
+
+
+class TestJsonLogStore:
+    def test_put_get_delete(self, tmp_path):
+        store = JsonLogStore(str(tmp_path))
+        store.put(_record("a"))
+        assert store.get("a")["name"] == "m-a"
+        assert store.delete("a") is True
+        assert store.get("a") is None
+        assert store.delete("a") is False
+
+    def test_writes_append_to_log(self, tmp_path):
+        store = JsonLogStore(str(tmp_path))
+        store.put(_record("a"))
+        store.put(_record("b"))
+        with open(os.path.join(tmp_path, "migrations.log")) as f:
+            lines = [json.loads(line) for line in f]
+        assert [e["record"]["id"] for e in lines] == ["a", "b"]
+        assert not os.path.exists(os.path.join(tmp_path, "migrations.json"))
+
+    def test_second_instance_tails_writes(self, tmp_path):
+        writer = JsonLogStore(str(tmp_path))
+        reader = JsonLogStore(str(tmp_path))
+        writer.put(_record("a"))
+        assert reader.get("a") is not None
+
+        writer.update("a", lambda m: {**m, "status": "completed"})
+        assert reader.get("a")["status"] == "completed"
+
+        writer.delete("a")
+        assert reader.get("a") is None
+
+    def test_update_sees_other_writers(self, tmp_path):
+        one = JsonLogStore(str(tmp_path))
+        two = JsonLogStore(str(tmp_path))
+        one.put(_record("a"))
+        two.put(_record("b"))
+        one.update("a", lambda m: {**m, "status": "failed"})
+        assert {m["id"] for m in two.values()} == {"a", "b"}
+        assert two.get("a")["status"] == "failed"
+
+    def test_compaction_folds_log_into_snapshot(self, tmp_path):
+        store = JsonLogStore(str(tmp_path), compact_threshold=3)
+        other = JsonLogStore(str(tmp_path))
+        for mid in "abc":
+            store.put(_record(mid))
+
+        assert os.path.getsize(os.path.join(tmp_path, "migrations.log")) == 0
+        with open(os.path.join(tmp_path, "migrations.json")) as f:
+            snapshot = json.load(f)
+        assert set(snapshot["migrations"]) == {"a", "b", "c"}
+        assert snapshot["stats"]["total"] == 3
+
+        store.put(_record("d"))
+        assert len(other) == 4
+
+    def test_loads_legacy_state_file(self, tmp_path):
+        with open(os.path.join(tmp_path, "migrations.json"), "w") as f:
+            json.dump({"old": _record("old")}, f, indent=2)
+        store = JsonLogStore(str(tmp_path))
+        assert store.get("old")["name"] == "m-old"
+
+
+class TestSqliteStore:
+    def test_crud(self, tmp_path):
+        store = SqliteStore(str(tmp_path))
+        store.put(_record("a"))
+        assert store.get("a")["name"] == "m-a"
+
+        updated = store.update("a", lambda m: {**m, "status": "in_progress"})
+        assert updated["status"] == "in_progress"
+        assert store.get("a")["status"] == "in_progress"
+        assert store.update("missing", lambda m: m) is None
+
+        assert store.delete("a") is True
+        assert store.delete("a") is False
+        assert len(store) == 0
+
+    def test_list_page_filters_and_orders_in_sql(self, tmp_path):
+        store = SqliteStore(str(tmp_path))
+        for i in range(10):
+            status = "pending" if i % 2 else "completed"
+            store.put(_record(f"m{i}", status, f"2025-01-{i + 1:02d}T00:00:00+00:00"))
+
+        page, total = store.list_page(status="pending", limit=2, offset=1)
+        assert total == 5
+        assert [m["id"] for m in page] == ["m7", "m5"]
+
+        page, total = store.list_page(limit=3)
+        assert total == 10
+        assert [m["id"] for m in page] == ["m9", "m8", "m7"]
+
+    def test_list_page_total_reads_the_stats(self, tmp_path):
+        store = SqliteStore(str(tmp_path))
+        store.put(_record("a"))
+        store._conn().execute(
+            "UPDATE migration_stats SET value = 42 WHERE dimension = 'by_status'")
+        assert store.list_page(status="pending")[1] == 42
+        assert store.list_page(status="failed")[1] == 0
+        assert store.list_page()[1] == 1
+
+    def test_repair_recounts_under_the_write_lock(self, tmp_path, monkeypatch):
+        store = SqliteStore(str(tmp_path))
+        store.put(_record("a"))
+        store._conn().execute("UPDATE migration_stats SET value = 7 WHERE dimension = 'total'")
+        from_records = MigrationStats.from_records
+        writer = threading.Thread(target=lambda: store.put(_record("b")))
+
+        def recount(records):
+            # A write racing the repair must wait for it, not be wiped by it.
+            writer.start()
+            writer.join(0.2)
+            return from_records(records)
+        monkeypatch.setattr(MigrationStats, "from_records", staticmethod(recount))
+        store.verify_stats(repair=True)
+        writer.join()
+        monkeypatch.undo()
+        assert store.verify_stats() == {}
+        assert store.stats()["total"] == 2
+
+    def test_status_page_uses_index(self, tmp_path):
+        store = SqliteStore(str(tmp_path))
+        plan = store._conn().execute(
+            "EXPLAIN QUERY PLAN SELECT body FROM migrations WHERE status = ? "
+            "ORDER BY created_at DESC, id DESC LIMIT 10",
+            ("pending",),
+        ).fetchall()
+        detail = " ".join(row[-1] for row in plan)
+        assert "ix_migrations_status_created" in detail
+        assert "TEMP B-TREE" not in detail
+
+    def test_import_json_state(self, tmp_path):
+        with open(os.path.join(tmp_path, "migrations.json"), "w") as f:
+            json.dump({"old": _record("old")}, f)
+        JsonLogStore(str(tmp_path)).put(_record("new"))
+
+        assert import_json_state(str(tmp_path)) == 2
+        store = SqliteStore(str(tmp_path))
+        assert {m["id"] for m in store.values()} == {"old", "new"}
+
+    def test_import_json_state_into_empty_target(self, tmp_path):
+        JsonLogStore(str(tmp_path)).put(_record("a"))
+        target = SqliteStore(str(tmp_path / "elsewhere"))
+        assert len(target) == 0
+        assert import_json_state(str(tmp_path), target=target) == 1
+        assert [m["id"] for m in target.values()] == ["a"]
+
+
+@pytest.fixture(params=[JsonLogStore, SqliteStore])
+def store(request, tmp_path):
+    return request.param(str(tmp_path))
+
+
+class TestIncrementalStats:
+    def test_deltas_track_writes(self, store):
+        store.put({**_record("a"), "resources": [{}, {}]})
+        store.put(_record("b"))
+        store.update("a", lambda m: {**m, "status": "completed", "resources": [{}]})
+        store.delete("b")
+
+        assert store.stats() == {
+            "total": 1,
+            "by_status": {"completed": 1},
+            "by_strategy": {"rehost": 1},
+            "total_resources": 1,
+        }
+        assert store.verify_stats() == {}
+
+    def test_stats_survive_reopen(self, store, tmp_path):
+        store.put(_record("a"))
+        store.put(_record("b", status="failed"))
+        if isinstance(store, JsonLogStore):
+            store.compact()
+        reopened = type(store)(str(tmp_path))
+        assert reopened.stats()["by_status"] == {"pending": 1, "failed": 1}
+
+    def test_verify_detects_and_repairs_drift(self, store):
+        store.put(_record("a"))
+        if isinstance(store, JsonLogStore):
+            store._stats.total = 7
+        else:
+            store._conn().execute(
+                "UPDATE migration_stats SET value = 7 WHERE dimension = 'total'"
+            )
+
+        drift = store.verify_stats()
+        assert drift == {"total": {"expected": 1, "actual": 7}}
+        assert store.verify_stats(repair=True) == drift
+        assert store.verify_stats() == {}
+        assert store.stats()["total"] == 1
+
+    def test_generation_changes_on_every_write(self, store, tmp_path):
+        seen = {store.generation()}
+        store.put(_record("a"))
+        seen.add(store.generation())
+        store.update("a", lambda m: {**m, "status": "completed"})
+        seen.add(store.generation())
+        store.delete("a")
+        seen.add(store.generation())
+        assert len(seen) == 4
+        # other processes sharing the state agree on the token
+        assert type(store)(str(tmp_path)).generation() == store.generation()
+
+    def test_apply_batch_is_one_write(self, store, tmp_path):
+        store.put(_record("a"))
+        results = store.apply_batch([
+            ("put", _record("b")),
+            ("update", "b", lambda m: {**m, "status": "ready"}),
+            ("update", "missing", lambda m: m),
+            ("delete", "a"),
+            ("delete", "a"),
+        ])
+        assert results[0]["id"] == "b"
+        assert results[1]["status"] == "ready"
+        assert results[2:] == [None, True, False]
+        assert store.stats()["by_status"] == {"ready": 1}
+        if isinstance(store, JsonLogStore):
+            with open(store.log_path) as f:
+                assert len(f.readlines()) == 2
+
+        reopened = type(store)(str(tmp_path))
+        assert [m["id"] for m in reopened.values()] == ["b"]
+        assert reopened.verify_stats() == {}
+
+    def test_failed_batch_writes_nothing(self, store):
+        def ops():
+            yield ("put", _record("a"))
+            raise RuntimeError("client went away")
+
+        with pytest.raises(RuntimeError):
+            store.apply_batch(ops())
+        assert len(store) == 0
+
+    def test_iter_records_walks_every_batch(self, store):
+        for i in range(7):
+            store.put(_record(f"m{i}", status="ready" if i % 2 else "pending",
+                              created_at=f"2025-01-0{i + 1}T00:00:00+00:00"))
+        ids = [m["id"] for m in store.iter_records(batch_size=2)]
+        assert ids == [f"m{i}" for i in reversed(range(7))]
+        assert [m["id"] for m in store.iter_records(status="ready", batch_size=2)] == [
+            "m5", "m3", "m1"]
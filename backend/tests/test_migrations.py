@@ -1,9 +1,14 @@
+import gzip
 import json
 import os
 import shutil
+import threading
 import pytest
 
 from app import create_app
+from models.migration import new_migration
+from services import migration_service
+from services.migration_service import configure_store, get_change_feed
 
 
 @pytest.fixture(autouse=True)
@@ -15,11 +20,14 @@ def clean_state(tmp_path):
         shutil.rmtree(tmp_path, ignore_errors=True)
 
 
-@pytest.fixture
-def client():
+@pytest.fixture(params=["jsonlog", "sqlite"])
+def client(request):
+    """Run every API test against each storage backend."""
     app = create_app("testing")
+    configure_store(request.param)
     with app.test_client() as client:
         yield client
+    configure_store(app.config["MIGRATION_STORE_BACKEND"])
 
 
 def _create_migration(client, **overrides):
@@ -136,3 +144,276 @@ class TestMigrationsCRUD:
         assert resp.status_code == 200
         data = resp.get_json()
         assert data["total"] == 2
+
+    def test_stats_cached_until_write(self, client):
+        _create_migration(client, name="A")
+        first = client.get("/api/v1/migrations/stats")
+        assert first.headers["X-Cache"] == "MISS"
+        again = client.get("/api/v1/migrations/stats")
+        assert again.headers["X-Cache"] == "HIT"
+        assert again.headers["ETag"] == first.headers["ETag"]
+
+        not_modified = client.get("/api/v1/migrations/stats",
+                                  headers={"If-None-Match": first.headers["ETag"]})
+        assert not_modified.status_code == 304
+
+        _create_migration(client, name="B")
+        after_write = client.get("/api/v1/migrations/stats",
+                                 headers={"If-None-Match": first.headers["ETag"]})
+        assert after_write.status_code == 200
+        assert after_write.headers["X-Cache"] == "MISS"
+        assert after_write.get_json()["total"] == 2
+
+        counters = client.get("/api/v1/analytics/cache").get_json()
+        assert counters["hits"] == 2
+        assert counters["invalidations"] == 1
+
+    def test_bulk_create(self, client):
+        payload = [
+            {"name": f"M{i}", "source_environment": "dc1",
+             "target_environment": "aws", "strategy": "rehost"}
+            for i in range(3)
+        ]
+        payload.insert(1, {"name": "bad", "strategy": "teleport"})
+        resp = client.post("/api/v1/migrations/bulk", data=json.dumps(payload),
+                           content_type="application/json")
+        assert resp.status_code == 201
+        data = resp.get_json()
+        assert (data["created"], data["failed"]) == (3, 1)
+        assert data["results"][1]["result"] == "invalid"
+        assert "strategy" in data["results"][1]["errors"]
+        assert client.get("/api/v1/migrations").get_json()["total"] == 3
+
+    def test_bulk_create_ndjson(self, client):
+        lines = [json.dumps({"name": f"M{i}", "source_environment": "dc1",
+                             "target_environment": "aws", "strategy": "retain"})
+                 for i in range(4)]
+        lines.append("{not json")
+        resp = client.post("/api/v1/migrations/bulk", data="\n".join(lines) + "\n",
+                           content_type="application/x-ndjson")
+        assert resp.status_code == 201
+        data = resp.get_json()
+        assert (data["created"], data["failed"]) == (4, 1)
+        assert data["results"][4]["errors"] == {"_schema": ["Invalid JSON."]}
+        stats = client.get("/api/v1/migrations/stats").get_json()
+        assert stats["by_strategy"] == {"retain": 4}
+
+    def test_bulk_update_and_delete(self, client):
+        ids = [_create_migration(client, name=f"M{i}").get_json()["id"] for i in range(3)]
+        resp = client.patch("/api/v1/migrations/bulk", data=json.dumps([
+            {"id": ids[0], "status": "in_progress"},
+            {"id": ids[1], "status": "completed"},
+            {"id": "nope", "status": "ready"},
+            {"status": "ready"},
+        ]), content_type="application/json")
+        assert resp.status_code == 200
+        data = resp.get_json()
+        assert [r["result"] for r in data["results"]] == [
+            "updated", "updated", "not_found", "invalid"]
+        assert client.get(f"/api/v1/migrations/{ids[0]}").get_json()["started_at"]
+        assert client.get(f"/api/v1/migrations/{ids[1]}").get_json()["rollback_available"]
+
+        resp = client.delete("/api/v1/migrations/bulk", data=json.dumps([ids[0], ids[2], 7]),
+                             content_type="application/json")
+        data = resp.get_json()
+        assert resp.status_code == 200
+        assert (data["deleted"], data["failed"]) == (2, 1)
+        assert client.get("/api/v1/migrations").get_json()["total"] == 1
+
+    def test_bulk_commits_each_batch_before_reading_more(self, client, monkeypatch):
+        store, events = migration_service._store(), []
+        apply_batch = store.apply_batch
+
+        def spy(ops):
+            assert isinstance(ops, list)  # drawn from the body before locking
+            events.append(("commit", len(ops)))
+            return apply_batch(ops)
+        monkeypatch.setattr(store, "apply_batch", spy)
+
+        def body():
+            for i in range(5):
+                events.append(("read", i))
+                yield new_migration(f"M{i}", "dc1", "aws", "rehost")
+
+        assert migration_service.bulk_create_migrations(body(), batch_size=2) == 5
+        assert events == [("read", 0), ("read", 1), ("commit", 2), ("read", 2), ("read", 3),
+                          ("commit", 2), ("read", 4), ("commit", 1)]
+        assert client.get("/api/v1/migrations/stats").get_json()["total"] == 5
+
+    def test_bulk_rejects_non_list_body(self, client):
+        resp = client.post("/api/v1/migrations/bulk", data=json.dumps({"name": "x"}),
+                           content_type="application/json")
+        assert resp.status_code == 400
+
+    def test_export_streams_filtered_records(self, client):
+        for i in range(3):
+            _create_migration(client, name=f"M{i}")
+        mid = _create_migration(client, name="done").get_json()["id"]
+        client.patch(f"/api/v1/migrations/{mid}", data=json.dumps({"status": "completed"}),
+                     content_type="application/json")
+
+        resp = client.get("/api/v1/migrations/export")
+        assert resp.is_streamed
+        rows = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+        assert len(rows) == 4
+
+        resp = client.get("/api/v1/migrations/export?status=completed&format=csv&gzip=1")
+        assert resp.headers["Content-Encoding"] == "gzip"
+        lines = gzip.decompress(resp.get_data()).decode().splitlines()
+        assert lines[0].startswith("id,name,")
+        assert len(lines) == 2 and lines[1].startswith(mid)
+
+    def test_dependency_plan_for_migration(self, client, tmp_path):
+        from services.dependency_service import configure_dependency_sources
+
+        edges = tmp_path / "edges.csv"
+        edges.write_text("source,target,bytes\n"
+                         "i-0a1b2c3d4e5f60001,db-cluster-prod-01,100\n"
+                         "i-0a1b2c3d4e5f60001,cache-sessions-prod,10\n")
+        configure_dependency_sources([str(edges)])
+        try:
+            resources = [{"resource_id": rid, "resource_type": rtype, "name": rid}
+                         for rid, rtype in [("i-0a1b2c3d4e5f60001", "ec2_instance"),
+                                            ("db-cluster-prod-01", "rds_database")]]
+            mid = _create_migration(client, resources=resources).get_json()["id"]
+            resp = client.get(f"/api/v1/analytics/dependency-plan?migration_id={mid}")
+        finally:
+            configure_dependency_sources()
+        assert resp.status_code == 200
+        plan = resp.get_json()
+        assert plan["waves"] == [["db-cluster-prod-01"], ["i-0a1b2c3d4e5f60001"]]
+        assert plan["external_dependencies"] == [
+            {"resource_id": "i-0a1b2c3d4e5f60001", "depends_on": "cache-sessions-prod"}]
+
+        resp = client.get("/api/v1/analytics/dependency-plan?migration_id=missing")
+        assert resp.status_code == 404
+
+    def test_cursor_pagination(self, client):
+        for i in range(5):
+            _create_migration(client, name=f"M{i}")
+
+        seen = []
+        resp = client.get("/api/v1/migrations?limit=2")
+        while True:
+            data = resp.get_json()
+            assert data["total"] == 5
+            seen.extend(m["id"] for m in data["items"])
+            if data["next_cursor"] is None:
+                break
+            resp = client.get(f"/api/v1/migrations?limit=2&cursor={data['next_cursor']}")
+
+        expected = [m["id"] for m in client.get("/api/v1/migrations").get_json()["items"]]
+        assert seen == expected
+        assert len(seen) == 5
+
+    def test_cursor_stable_across_inserts(self, client):
+        for i in range(3):
+            _create_migration(client, name=f"M{i}")
+        first = client.get("/api/v1/migrations?limit=2").get_json()
+
+        _create_migration(client, name="newer")
+        second = client.get(
+            f"/api/v1/migrations?limit=2&cursor={first['next_cursor']}"
+        ).get_json()
+        assert len(second["items"]) == 1
+        assert second["items"][0]["id"] not in {m["id"] for m in first["items"]}
+
+    def test_invalid_cursor(self, client):
+        resp = client.get("/api/v1/migrations?cursor=not-a-cursor")
+        assert resp.status_code == 400
+
+    @pytest.mark.parametrize("limit", [0, -1])
+    def test_non_positive_limit(self, client, limit):
+        resp = client.get(f"/api/v1/migrations?limit={limit}")
+        assert resp.status_code == 400
+
+
+def _read_events(client, last_event_id=None, seconds=0.3):
+    """Collect ``(id, event, data)`` from a short-lived event stream."""
+    client.application.config["SSE_MAX_STREAM_SECONDS"] = seconds
+    headers = {"Last-Event-ID": last_event_id} if last_event_id else {}
+    resp = client.get("/api/v1/migrations/events", headers=headers)
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/event-stream"
+    events = []
+    for block in resp.get_data(as_text=True).split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines()
+                      if ": " in line and not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields["id"], fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def _feed_position():
+    feed = get_change_feed()
+    return feed.event_id(feed.position()[0])
+
+
+class TestMigrationEvents:
+    def test_replays_changes_after_last_event_id(self, client):
+        start = _feed_position()
+        mid = _create_migration(client).get_json()["id"]
+        client.patch(f"/api/v1/migrations/{mid}", data=json.dumps({"status": "ready"}),
+                     content_type="application/json")
+        client.delete(f"/api/v1/migrations/{mid}")
+
+        events = _read_events(client, start)
+        assert [(e, d["type"], d["id"]) for _, e, d in events] == [
+            ("migration", "created", mid),
+            ("migration", "updated", mid),
+            ("migration", "deleted", mid),
+        ]
+        assert events[1][2]["migration"]["status"] == "ready"
+        assert events[1][2]["stats"]["by_status"]["ready"] == 1
+        assert events[2][2]["stats"]["total"] == 0
+
+        # Resuming from the last id yields nothing new.
+        assert _read_events(client, events[-1][0]) == []
+
+    def test_bulk_writes_publish_per_item(self, client):
+        start = _feed_position()
+        client.post("/api/v1/migrations/bulk", data=json.dumps([
+            {"name": f"M{i}", "source_environment": "a", "target_environment": "b",
+             "strategy": "rehost"} for i in range(3)
+        ]), content_type="application/json")
+        events = _read_events(client, start)
+        assert [d["type"] for _, _, d in events] == ["created"] * 3
+        ids = [d["id"] for _, _, d in events]
+
+        client.delete("/api/v1/migrations/bulk", data=json.dumps(ids[:2]),
+                      content_type="application/json")
+        events = _read_events(client, events[-1][0])
+        assert [(d["type"], d["id"]) for _, _, d in events] == [
+            ("deleted", ids[0]), ("deleted", ids[1])]
+
+    def test_unknown_event_id_resyncs(self, client):
+        events = _read_events(client, "another-process-7")
+        assert [e for _, e, _ in events] == ["resync"]
+        assert events[0][2] == {"reason": "unknown_event_id"}
+
+    def test_evicted_events_resync(self, client):
+        feed = get_change_feed()
+        start = _feed_position()
+        capacity = feed.capacity
+        feed.resize(2)
+        try:
+            for i in range(4):
+                _create_migration(client, name=f"M{i}")
+            events = _read_events(client, start)
+        finally:
+            feed.resize(capacity)
+        assert [e for _, e, _ in events] == ["resync"]
+        assert events[0][2] == {"reason": "behind"}
+        assert events[0][0] == _feed_position()
+
+    def test_external_write_resyncs(self, client):
+        # A write from another worker changes the store but not this feed.
+        from services.migration_service import _store
+        start = _feed_position()
+        client.application.config["SSE_HEARTBEAT_SECONDS"] = 0.05
+        writer = threading.Timer(0.1, lambda: _store().put(new_migration(
+            "elsewhere", "a", "b", "rehost")))
+        writer.start()
+        events = _read_events(client, start, seconds=0.5)
+        writer.join()
+        assert [(e, d) for _, e, d in events] == [("resync", {"reason": "external"})]
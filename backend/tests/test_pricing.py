@@ -0,0 +1,117 @@
+import json
+
+import numpy as np
+import pytest
+
+from services.pricing import PriceTable, PricingCatalog, compile_offer_files, main
+
+FALLBACK = {"ec2_instance": 0.0416, "s3_bucket": 0.023, "elasticache_cluster": 0.068}
+
+
+def _json_offer(path):
+    def product(sku, family, **attrs):
+        return sku, {"sku": sku, "productFamily": family, "attributes": attrs}
+
+    def on_demand(price, unit="Hrs", begin="0"):
+        return {"T1": {"priceDimensions": {"R1": {
+            "unit": unit, "beginRange": begin, "pricePerUnit": {"USD": str(price)},
+        }}}}
+
+    products = dict([
+        product("EC2A", "Compute Instance", servicecode="AmazonEC2", regionCode="us-east-1",
+                instanceType="m5.large", operatingSystem="Linux", tenancy="Shared",
+                preInstalledSw="NA", capacitystatus="Used"),
+        product("EC2W", "Compute Instance", servicecode="AmazonEC2", regionCode="us-east-1",
+                instanceType="m5.large", operatingSystem="Windows", tenancy="Shared",
+                preInstalledSw="NA", capacitystatus="Used"),
+        product("EC2B", "Compute Instance", servicecode="AmazonEC2", regionCode="eu-west-1",
+                instanceType="m5.large", operatingSystem="Linux", tenancy="Shared",
+                preInstalledSw="NA", capacitystatus="Used"),
+        product("RDS1", "Database Instance", servicecode="AmazonRDS", regionCode="us-east-1",
+                instanceType="db.r6g.large", databaseEngine="PostgreSQL",
+                deploymentOption="Multi-AZ"),
+    ])
+    terms = {
+        "EC2A": on_demand(0.096),
+        "EC2W": on_demand(0.188),
+        "EC2B": on_demand(0.107),
+        "RDS1": on_demand(0.45),
+    }
+    path.write_text(json.dumps({"offerCode": "AmazonEC2", "products": products,
+                                "terms": {"OnDemand": terms}}))
+
+
+def _csv_offer(path):
+    header = ('"SKU","OfferTermCode","RateCode","TermType","PriceDescription","StartingRange",'
+              '"Unit","PricePerUnit","Currency","Product Family","serviceCode","Region Code",'
+              '"Instance Type","Cache Engine","Volume Type","usageType"')
+    rows = [
+        '"C1","T","R","OnDemand","","0","Hrs","0.206","USD","Cache Instance",'
+        '"AmazonElastiCache","us-east-1","cache.r6g.large","Redis","",""',
+        '"S1","T","R","OnDemand","","0","GB-Mo","0.023","USD","Storage",'
+        '"AmazonS3","us-east-1","","","Standard",""',
+        '"S1","T","R","OnDemand","","51200","GB-Mo","0.022","USD","Storage",'
+        '"AmazonS3","us-east-1","","","Standard",""',
+        '"S1","T","R","Reserved","","0","GB-Mo","0.001","USD","Storage",'
+        '"AmazonS3","us-east-1","","","Standard",""',
+    ]
+    path.write_text('"FormatVersion","v1.0"\n"Disclaimer","..."\n' + header + "\n"
+                    + "\n".join(rows) + "\n")
+
+
+@pytest.fixture
+def table_path(tmp_path):
+    _json_offer(tmp_path / "ec2.json")
+    _csv_offer(tmp_path / "cache.csv")
+    dest = str(tmp_path / "prices.bin")
+    count = compile_offer_files([str(tmp_path / "ec2.json"), str(tmp_path / "cache.csv")], dest)
+    assert count == 5
+    return dest
+
+
+def test_compiled_table_lookup(table_path):
+    table = PriceTable(table_path)
+    assert table.get("ec2", "us-east-1", "m5.large") == pytest.approx(0.096)
+    assert table.get("ec2", "eu-west-1", "m5.large") == pytest.approx(0.107)
+    assert table.get("rds", "us-east-1", "db.r6g.large", "postgres", "multi-az") == 0.45
+    assert table.get("elasticache", "us-east-1", "cache.r6g.large", "redis") == 0.206
+    # only the first tier of tiered pricing is kept
+    assert table.get("s3", "us-east-1", "standard") == 0.023
+    assert table.get("ec2", "us-east-1", "m5.xlarge") is None
+
+
+def test_catalog_prices_from_specs(table_path):
+    catalog = PricingCatalog(PriceTable(table_path), FALLBACK)
+    resources = [
+        {"resource_type": "ec2_instance", "region": "us-east-1",
+         "specs": {"instance_type": "m5.large"}},
+        {"resource_type": "ec2_instance", "region": "eu-west-1",
+         "specs": {"instance_type": "m5.large"}},
+        {"resource_type": "elasticache_cluster", "region": "us-east-1",
+         "specs": {"engine": "redis", "node_type": "cache.r6g.large", "num_nodes": 3}},
+        {"resource_type": "s3_bucket", "region": "us-east-1", "specs": {"size_gb": 730}},
+        # unknown SKU: flat fallback rate
+        {"resource_type": "ec2_instance", "region": "us-east-1",
+         "specs": {"instance_type": "x9.huge"}},
+        {"resource_type": "lambda_function", "region": "us-east-1", "specs": {}},
+    ]
+    rates = catalog.hourly_rates(resources)
+    np.testing.assert_allclose(rates, [0.096, 0.107, 3 * 0.206, 0.023, 0.0416, 0.0])
+    assert catalog.hourly_rate(resources[2]) == pytest.approx(0.618)
+
+
+def test_fallback_rates_honour_specs():
+    catalog = PricingCatalog(None, FALLBACK)
+    rates = catalog.hourly_rates([
+        {"resource_type": "elasticache_cluster", "specs": {"num_nodes": 2}},
+        {"resource_type": "s3_bucket", "specs": {"size_gb": 730}},
+    ])
+    np.testing.assert_allclose(rates, [0.136, 0.023])
+
+
+def test_compile_cli(tmp_path, capsys):
+    _csv_offer(tmp_path / "cache.csv")
+    dest = tmp_path / "prices.bin"
+    main(["compile", str(dest), str(tmp_path / "cache.csv")])
+    assert "Compiled 2 prices" in capsys.readouterr().out
+    assert len(PriceTable(str(dest))) == 2
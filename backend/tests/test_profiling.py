@@ -0,0 +1,109 @@
+import pstats
+import threading
+import time
+
+import pytest
+
+from app import create_app
+from config import TestingConfig
+from services.profiler import Profiler, StackSampler, get_profiler
+
+
+@pytest.fixture
+def profiling(tmp_path, monkeypatch):
+    monkeypatch.setattr(TestingConfig, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(TestingConfig, "PROFILING_DIR", str(tmp_path / "profiles"))
+    monkeypatch.setattr(TestingConfig, "PROFILING_INTERVAL_MS", 1)
+
+    def make(**config):
+        for key, value in config.items():
+            monkeypatch.setattr(TestingConfig, key, value)
+        return create_app("testing").test_client()
+    yield make
+    monkeypatch.undo()
+    create_app("testing")  # back to profiling off for later tests
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_stack_sampler_collapses_the_target_thread():
+    sampler = StackSampler(threading.get_ident(), interval=0.001).start()
+    _busy(0.1)
+    stacks = sampler.stop()
+    assert sum(stacks.values()) > 5
+    assert any(stack.split(";")[-1].startswith("_busy (test_profiling.py")
+               for stack in stacks)
+
+
+def test_profiler_prunes_to_max_profiles(tmp_path):
+    profiler = Profiler(str(tmp_path), max_profiles=2)
+    ids = [profiler.save(profiler.start(), path=f"/{i}") for i in range(3)]
+    assert [p["id"] for p in profiler.recent()] == ids[:0:-1]
+    assert profiler.path(ids[0]) is None
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        [f"{i}.json" for i in ids[1:]] + [f"{i}.collapsed" for i in ids[1:]])
+
+
+def test_off_by_default_registers_nothing():
+    app = create_app("testing")
+    assert get_profiler() is None
+    client = app.test_client()
+    resp = client.get("/api/v1/resources", headers={"X-Profile": "1"})
+    assert "X-Profile-Id" not in resp.headers
+    assert client.get("/admin/profiles").status_code == 404
+
+
+def test_header_selects_request_and_admin_lists_it(profiling):
+    client = profiling(PROFILING_TOKEN="s3cret")
+    auth = {"X-Profile": "s3cret"}
+    assert "X-Profile-Id" not in client.get("/api/v1/resources").headers
+    resp = client.get("/api/v1/resources?limit=5", headers=auth)
+    assert resp.status_code == 200
+    profile_id = resp.headers["X-Profile-Id"]
+
+    listing = client.get("/admin/profiles", headers=auth).get_json()
+    assert listing["mode"] == "sample"
+    profile, = listing["items"]
+    assert profile["id"] == profile_id
+    assert profile["route"] == "/api/v1/resources"
+    assert profile["path"] == "/api/v1/resources?limit=5"
+    assert profile["status"] == 200
+    assert profile["file"].endswith(".collapsed")
+
+    data = client.get(f"/admin/profiles/{profile_id}", headers=auth)
+    assert data.status_code == 200
+    assert data.mimetype == "text/plain"
+    assert client.get("/admin/profiles/nope", headers=auth).status_code == 404
+
+
+def test_token_and_sample_rate(profiling):
+    client = profiling(PROFILING_TOKEN="s3cret", PROFILING_SAMPLE_RATE=1.0)
+    assert "X-Profile-Id" in client.get("/healthz").headers
+    assert "X-Profile-Id" not in client.get("/healthz", headers={"X-Profile": "guess"}).headers
+    assert client.get("/admin/profiles").status_code == 403
+    items = client.get("/admin/profiles", headers={"X-Profile": "s3cret"}).get_json()["items"]
+    assert len(items) == 1
+
+
+def test_without_token_only_the_sample_rate_profiles(profiling):
+    client = profiling(PROFILING_MODE="cprofile")
+    resp = client.get("/api/v1/resources", headers={"X-Profile": "1"})
+    assert "X-Profile-Id" not in resp.headers
+    assert client.get("/admin/profiles", headers={"X-Profile": "1"}).status_code == 403
+
+    client = profiling(PROFILING_SAMPLE_RATE=1.0)
+    assert "X-Profile-Id" in client.get("/api/v1/resources").headers
+    assert client.get("/admin/profiles").status_code == 403
+
+
+def test_cprofile_mode_writes_pstats(profiling):
+    client = profiling(PROFILING_MODE="cprofile", PROFILING_TOKEN="s3cret")
+    resp = client.get("/api/v1/resources/summary", headers={"X-Profile": "s3cret"})
+    path = get_profiler().path(resp.headers["X-Profile-Id"])
+    assert path.endswith(".prof")
+    functions = {func[2] for func in pstats.Stats(path).stats}
+    assert "get_resource_summary" in functions
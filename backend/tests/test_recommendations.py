@@ -0,0 +1,68 @@
+import numpy as np
+
+from services.cost_matrix import CATEGORIES
+from services.recommendations import STRATEGIES, portfolio_assignment, recommend
+from services.workload import WORKLOAD_CLASSES
+
+FACTORS = {"rehost": 0.10, "replatform": 0.25, "refactor": 0.55,
+           "repurchase": 0.30, "retain": 0.0, "retire": 1.0}
+
+
+def _recommend(workloads, risk=None, **kwargs):
+    n = len(workloads)
+    if risk is None:
+        risk = np.tile([10.0, 20.0, 40.0, 25.0, 0.0, 5.0], (n, 1))
+    return recommend(
+        [f"r{i}" for i in range(n)],
+        np.full(n, 0.1),
+        np.full(n, CATEGORIES.index("compute")),
+        risk,
+        np.array([WORKLOAD_CLASSES.index(w) for w in workloads]),
+        FACTORS,
+        **kwargs,
+    )
+
+
+def test_retire_only_for_idle_workloads():
+    result = _recommend(["idle", "steady", "unknown"])
+    assert STRATEGIES[result.best[0]] == "retire"
+    assert "retire" not in {STRATEGIES[b] for b in result.best[1:]}
+    assert result.get("r1")["scores"]["retire"] is None
+    assert 1 / len(STRATEGIES) < result.confidence.min() <= result.confidence.max() <= 1
+
+
+def test_portfolio_assignment_respects_the_risk_budget():
+    savings = np.array([[10.0, 50.0, 0.0], [10.0, 12.0, 0.0]])
+    risk = np.array([[10.0, 60.0, 0.0], [10.0, 60.0, 0.0]])
+    assert portfolio_assignment(savings, risk, 100).tolist() == [1, 1]
+    # Only one resource can take the risky option; it goes where it saves most.
+    assert portfolio_assignment(savings, risk, 35).tolist() == [1, 0]
+    assert portfolio_assignment(savings, risk, 0).tolist() == [2, 2]
+
+
+def test_summary_and_rebudgeting():
+    result = _recommend(["steady", "bursty", "batch", "idle"])
+    summary = result.summary()
+    assert summary["resource_count"] == 4
+    assert sum(v["resource_count"] for v in summary["recommended"]["by_strategy"].values()) == 4
+    assert summary["portfolio"]["mean_risk_score"] <= summary["portfolio"]["risk_budget"]
+
+    strict = result.with_budget(0.0).summary()["portfolio"]
+    assert strict["by_strategy"]["retain"]["resource_count"] == 4
+    assert strict["monthly_savings_usd"] == 0.0
+
+
+def test_inventory_recommendations_follow_the_cached_inventory(monkeypatch):
+    from services import analytics_service, resource_service
+    from services.inventory import Inventory
+
+    resources = [{"resource_id": f"i-{n}", "resource_type": "ec2_instance", "name": f"i-{n}",
+                  "region": "us-east-1", "tags": {}, "specs": {}} for n in range(3)]
+    monkeypatch.setattr(resource_service, "_inventory", Inventory(resources))
+    first = analytics_service.get_recommendations()
+    assert list(first.ids) == ["i-0", "i-1", "i-2"]
+
+    resource_service.refresh_inventory(resources[:2])
+    second = analytics_service.get_recommendations()
+    assert list(second.ids) == ["i-0", "i-1"]
+    assert second.summary()["resource_count"] == 2
@@ -0,0 +1,68 @@
+from services.resource_index import ResourceIndex
+
+
+def _resource(rid, rtype="ec2_instance", region="us-east-1", **tags):
+    return {
+        "resource_id": rid,
+        "resource_type": rtype,
+        "name": rid,
+        "region": region,
+        "tags": tags,
+    }
+
+
+def _ids(page):
+    return [r["resource_id"] for r in page]
+
+
+class TestResourceIndex:
+    def setup_method(self):
+        self.index = ResourceIndex([
+            _resource("r3", team="data"),
+            _resource("r1", team="platform", env="prod"),
+            _resource("r2", "rds_database", "eu-west-1", team="data", env="prod"),
+            _resource("r4", "rds_database", env="dev"),
+        ])
+
+    def test_unfiltered_query_in_id_order(self):
+        page, total = self.index.query(limit=3)
+        assert total == 4
+        assert _ids(page) == ["r1", "r2", "r3"]
+
+    def test_intersects_filters(self):
+        page, total = self.index.query(resource_type="rds_database", tag_key="env")
+        assert total == 2
+        assert _ids(page) == ["r2", "r4"]
+
+        page, total = self.index.query(tag_key="env", tag_value="prod", region="us-east-1")
+        assert total == 1
+        assert _ids(page) == ["r1"]
+
+    def test_unknown_term_matches_nothing(self):
+        page, total = self.index.query(region="ap-south-1", tag_key="team")
+        assert (page, total) == ([], 0)
+
+    def test_offset_and_after(self):
+        page, total = self.index.query(tag_key="team", limit=1, offset=1)
+        assert total == 3
+        assert _ids(page) == ["r2"]
+
+        page, _ = self.index.query(tag_key="team", after="r2")
+        assert _ids(page) == ["r3"]
+        page, _ = self.index.query(after="r2", limit=10)
+        assert _ids(page) == ["r3", "r4"]
+
+    def test_incremental_add_replace_remove(self):
+        self.index.add(_resource("r0", "s3_bucket", team="data"))
+        assert self.index.count("tag", ("team", "data")) == 3
+        assert _ids(self.index.values())[0] == "r0"
+
+        self.index.add(_resource("r0", "s3_bucket", team="platform"))
+        assert self.index.count("tag", ("team", "data")) == 2
+        assert self.index.count("tag", ("team", "platform")) == 2
+        assert len(self.index) == 5
+
+        assert self.index.remove("r0") is True
+        assert self.index.remove("r0") is False
+        assert self.index.get("r0") is None
+        assert self.index.terms("resource_type") == {"ec2_instance": 2, "rds_database": 2}
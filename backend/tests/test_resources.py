@@ -1,3 +1,8 @@
+import csv
+import gzip
+import io
+import json
+
 import pytest
 from app import create_app
 
@@ -40,6 +45,50 @@ class TestResources:
         resp = client.get("/api/v1/resources/nope")
         assert resp.status_code == 404
 
+    def test_cursor_pagination(self, client):
+        first = client.get("/api/v1/resources?limit=5").get_json()
+        assert len(first["items"]) == 5
+        assert first["next_cursor"] is not None
+
+        second = client.get(
+            f"/api/v1/resources?limit=5&cursor={first['next_cursor']}"
+        ).get_json()
+        assert len(second["items"]) == 3
+        assert second["next_cursor"] is None
+        assert second["total"] == 8
+
+        ids = [r["resource_id"] for r in first["items"] + second["items"]]
+        assert ids == sorted(ids)
+        assert len(set(ids)) == 8
+
+    def test_cursor_with_filter(self, client):
+        first = client.get("/api/v1/resources?tag_key=team&limit=2").get_json()
+        second = client.get(
+            f"/api/v1/resources?tag_key=team&limit=10&cursor={first['next_cursor']}"
+        ).get_json()
+        assert first["total"] == second["total"] == 7
+        assert len(first["items"]) + len(second["items"]) == 7
+
+    def test_invalid_cursor(self, client):
+        resp = client.get("/api/v1/resources?cursor=%%%")
+        assert resp.status_code == 400
+
+    @pytest.mark.parametrize("limit", [0, -1])
+    def test_non_positive_limit(self, client, limit):
+        resp = client.get(f"/api/v1/resources?limit={limit}")
+        assert resp.status_code == 400
+
+    def test_changes_since_current_version_is_empty(self, client):
+        resp = client.get("/api/v1/resources/changes?since=1")
+        assert resp.status_code == 200
+        data = resp.get_json()
+        assert data["version"] >= 1
+        assert data["added"] == data["changed"] == data["removed"] == []
+
+    def test_changes_requires_since(self, client):
+        assert client.get("/api/v1/resources/changes").status_code == 400
+        assert client.get("/api/v1/resources/changes?since=abc").status_code == 400
+
     def test_resource_summary(self, client):
         resp = client.get("/api/v1/resources/summary")
         assert resp.status_code == 200
@@ -47,6 +96,59 @@ class TestResources:
         assert data["total"] == 8
         assert "by_category" in data
 
+    def test_resource_summary_includes_risk(self, client):
+        risk = client.get("/api/v1/resources/summary").get_json()["risk"]
+        assert sum(risk["by_level"].values()) == 8
+        assert risk["strategy"] == "replatform"
+        assert len(risk["highest"]) == 5
+
+    def test_sort_by_risk(self, client):
+        first = client.get("/api/v1/resources?sort=risk&limit=5").get_json()
+        assert first["total"] == 8
+        scores = [item["risk"]["score"] for item in first["items"]]
+        assert scores == sorted(scores, reverse=True)
+        assert first["items"][0]["resource_type"] == "rds_database"
+
+        second = client.get(
+            f"/api/v1/resources?sort=risk&limit=5&cursor={first['next_cursor']}"
+        ).get_json()
+        ids = [r["resource_id"] for r in first["items"] + second["items"]]
+        assert len(set(ids)) == 8
+        assert second["next_cursor"] is None
+
+    def test_sort_by_risk_with_filter(self, client):
+        data = client.get("/api/v1/resources?sort=risk&tag_key=team"
+                          "&strategy=rehost").get_json()
+        assert data["total"] == 7
+        assert data["strategy"] == "rehost"
+
+    def test_sort_rejects_unknown_values(self, client):
+        assert client.get("/api/v1/resources?sort=name").status_code == 400
+        assert client.get("/api/v1/resources?sort=risk&strategy=x").status_code == 400
+        assert client.get("/api/v1/resources?sort=risk&cursor=WzFd").status_code == 400
+        assert client.get("/api/v1/resources?sort=risk&limit=0").status_code == 400
+        assert client.get("/api/v1/resources?sort=risk&limit=-3").status_code == 400
+
+    def test_export_ndjson_with_filter(self, client):
+        resp = client.get("/api/v1/resources/export?resource_type=ec2_instance")
+        assert resp.status_code == 200
+        assert resp.mimetype == "application/x-ndjson"
+        rows = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+        assert len(rows) == 2
+        assert {r["resource_type"] for r in rows} == {"ec2_instance"}
+
+    def test_export_csv_gzip(self, client):
+        resp = client.get("/api/v1/resources/export?format=csv",
+                          headers={"Accept-Encoding": "gzip"})
+        assert resp.headers["Content-Encoding"] == "gzip"
+        text = gzip.decompress(resp.get_data()).decode()
+        rows = list(csv.DictReader(io.StringIO(text)))
+        assert len(rows) == 8
+        assert json.loads(rows[0]["tags"])
+
+    def test_export_rejects_unknown_format(self, client):
+        assert client.get("/api/v1/resources/export?format=xml").status_code == 400
+
 
 class TestAnalytics:
     def test_dashboard(self, client):
@@ -55,6 +157,7 @@ class TestAnalytics:
         data = resp.get_json()
         assert "migrations" in data
         assert "resources" in data
+        assert data["recommendations"]["resource_count"] == 8
 
     def test_cost_estimate_all(self, client):
         resp = client.get("/api/v1/analytics/cost-estimate/all?strategy=refactor")
@@ -79,3 +182,86 @@ class TestAnalytics:
         data = resp.get_json()
         assert data["resource_count"] == 2
         assert data["estimated_savings_pct"] == 10.0
+
+    def test_cost_matrix_all_strategies(self, client):
+        resp = client.get("/api/v1/analytics/cost-estimate/matrix?tag_key=team")
+        assert resp.status_code == 200
+        data = resp.get_json()
+        assert data["resource_count"] == 8
+        assert set(data["strategies"]) == {
+            "rehost", "replatform", "refactor", "repurchase", "retain", "retire",
+        }
+
+        single = client.get("/api/v1/analytics/cost-estimate/all?strategy=refactor").get_json()
+        refactor = data["strategies"]["refactor"]
+        assert data["current_monthly_estimate_usd"] == single["current_monthly_estimate_usd"]
+        assert refactor["projected_monthly_estimate_usd"] == single["projected_monthly_estimate_usd"]
+
+        compute = data["by_category"]["compute"]
+        assert compute["resource_count"] == 4
+        assert data["by_tag"]["groups"]["platform"]["resource_count"] == 5
+        assert data["by_tag"]["groups"]["(untagged)"]["resource_count"] == 1
+
+    def test_cost_matrix_custom_resources(self, client):
+        resp = client.post(
+            "/api/v1/analytics/cost-estimate/matrix",
+            json={"resources": [{"resource_type": "ec2_instance"}, {"resource_type": "bogus"}]},
+        )
+        data = resp.get_json()
+        assert data["resource_count"] == 2
+        assert data["current_monthly_estimate_usd"] == round(0.0416 * 730, 2)
+        assert data["by_category"]["other"]["resource_count"] == 1
+        assert data["strategies"]["retire"]["projected_monthly_estimate_usd"] == 0.0
+        assert "by_tag" not in data
+
+    def test_recommendations(self, client):
+        resp = client.get("/api/v1/analytics/recommendations?limit=3")
+        assert resp.status_code == 200
+        data = resp.get_json()
+        assert data["resource_count"] == 8
+        assert len(data["items"]) == 3
+        item = data["items"][0]
+        assert item["strategy"] in item["scores"]
+        assert 0 < item["confidence"] <= 1
+        assert item["workload_class"] == "unknown"
+        portfolio = data["portfolio"]
+        assert portfolio["mean_risk_score"] <= portfolio["risk_budget"]
+        assert portfolio["monthly_savings_usd"] >= data["recommended"]["monthly_savings_usd"]
+
+    def test_recommendations_for_one_resource_and_budget(self, client):
+        one = client.get("/api/v1/analytics/recommendations?resource_id=db-cluster-prod-01")
+        assert one.get_json()["resource_id"] == "db-cluster-prod-01"
+        missing = client.get("/api/v1/analytics/recommendations?resource_id=nope")
+        assert missing.status_code == 404
+        strict = client.get("/api/v1/analytics/recommendations?risk_budget=0").get_json()
+        assert strict["portfolio"]["monthly_savings_usd"] == 0.0
+
+    def test_dependency_plan_for_posted_resources(self, client):
+        resp = client.post("/api/v1/analytics/dependency-plan", json={
+            "resource_ids": ["alb-web-prod", "i-0a1b2c3d4e5f60001", "db-cluster-prod-01"],
+            "edges": [["alb-web-prod", "i-0a1b2c3d4e5f60001"],
+                      ["i-0a1b2c3d4e5f60001", "db-cluster-prod-01"]],
+        })
+        assert resp.status_code == 200
+        plan = resp.get_json()
+        assert plan["waves"] == [["db-cluster-prod-01"], ["i-0a1b2c3d4e5f60001"],
+                                 ["alb-web-prod"]]
+        assert plan["cycles"] == []
+
+    def test_dependency_plan_requires_target(self, client):
+        assert client.get("/api/v1/analytics/dependency-plan").status_code == 400
+        resp = client.post("/api/v1/analytics/dependency-plan",
+                           json={"resource_ids": [], "edges": "nope"})
+        assert resp.status_code == 400
+
+    @pytest.mark.parametrize("body", [
+        {"resource_ids": [["alb-web-prod"]]},
+        {"resource_ids": [1, None]},
+        {"resource_ids": [], "edges": [[1, {}]]},
+        {"resource_ids": [], "edges": [["a", "b", "c"]]},
+        ["alb-web-prod"],
+    ])
+    def test_dependency_plan_rejects_malformed_elements(self, client, body):
+        resp = client.post("/api/v1/analytics/dependency-plan", json=body)
+        assert resp.status_code == 400
+        assert "errors" in resp.get_json()
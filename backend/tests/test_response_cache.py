@@ -0,0 +1,48 @@
+from services.response_cache import ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hit_miss_and_version_invalidation():
+    cache = ResponseCache(maxsize=4, ttl=10)
+    assert cache.get("k", 1) is None
+    cache.set("k", 1, "v1")
+    assert cache.get("k", 1) == "v1"
+    assert cache.get("k", 2) is None
+    assert len(cache) == 0
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidations"]) == (1, 2, 1)
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = ResponseCache(maxsize=4, ttl=10, clock=clock)
+    cache.set("k", 1, "v")
+    clock.now = 9.9
+    assert cache.get("k", 1) == "v"
+    clock.now = 10
+    assert cache.get("k", 1) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_lru_eviction():
+    cache = ResponseCache(maxsize=2, ttl=10)
+    cache.set("a", 1, "a")
+    cache.set("b", 1, "b")
+    cache.get("a", 1)
+    cache.set("c", 1, "c")
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) == "a"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_zero_size_disables():
+    cache = ResponseCache(maxsize=0)
+    cache.set("k", 1, "v")
+    assert cache.get("k", 1) is None
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from services.dependency_graph import DependencyGraph
+from services.risk import LEVELS, encode_risk_features, score_risk
+
+
+def _resources():
+    return [
+        {"resource_id": "a-db", "resource_type": "rds_database",
+         "specs": {"size_gb": 2000}},
+        {"resource_id": "b-fn", "resource_type": "lambda_function", "specs": {}},
+        {"resource_id": "c-vm", "resource_type": "ec2_instance", "specs": {}},
+        {"resource_id": "d-odd", "resource_type": "mainframe", "specs": {"size_gb": "n/a"}},
+    ]
+
+
+def test_features_and_scores():
+    resources = _resources()
+    graph = DependencyGraph.from_edges([r["resource_id"] for r in resources],
+                                       [("b-fn", "a-db"), ("c-vm", "a-db")])
+    features = encode_risk_features(resources, graph)
+    assert features.matrix.shape == (4, 3)
+    assert (features.matrix >= 0).all() and (features.matrix <= 1).all()
+    assert features.matrix[1].tolist() == [features.matrix[1, 0], 0.0, 0.0]
+
+    risk = score_risk(features, "refactor")
+    assert risk.ids[risk.order[0]] == "a-db"
+    assert risk.get("a-db")["level"] in LEVELS[2:]
+    assert risk.get("b-fn")["level"] == "low"
+    assert risk.get("nope") is None
+
+    rehost = score_risk(features, "rehost")
+    assert (rehost.scores <= risk.scores).all()
+
+
+def test_degrees_align_with_a_differently_ordered_graph():
+    resources = _resources()
+    graph = DependencyGraph.from_edges(["x", "a-db", "b-fn"], [("b-fn", "a-db")])
+    aligned = encode_risk_features(resources, graph)
+    direct = encode_risk_features(resources, DependencyGraph.from_edges(
+        [r["resource_id"] for r in resources], [("b-fn", "a-db")]))
+    assert np.array_equal(aligned.matrix, direct.matrix)
+
+
+def test_keyset_pages_cover_everything_once():
+    resources = [{"resource_id": f"r{i:03d}", "resource_type": t,
+                  "specs": {"size_gb": i * 10}}
+                 for i, t in enumerate(["s3_bucket", "rds_database", "lambda_function"] * 20)]
+    risk = score_risk(encode_risk_features(resources))
+
+    seen, after = [], None
+    while True:
+        page, total = risk.page(7, after=after)
+        seen += page.tolist()
+        if len(page) < 7:
+            break
+        after = risk.sort_key(page[-1])
+    assert total == 60
+    assert seen == risk.order.tolist()
+
+    candidates = {r["resource_id"] for r in resources if r["resource_type"] == "s3_bucket"}
+    page, total = risk.page(100, candidates=candidates | {"ghost"})
+    assert total == 20
+    assert {risk.ids[i] for i in page} == candidates
+    assert np.all(np.diff(risk.scores[page]) <= 0)
+
+
+def test_summary_counts_every_resource():
+    summary = score_risk(encode_risk_features(_resources())).summary(top=2)
+    assert sum(summary["by_level"].values()) == 4
+    assert sum(summary["by_category"]["other"].values()) == 1
+    assert len(summary["highest"]) == 2
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        score_risk(encode_risk_features(_resources()), "teleport")
@@ -0,0 +1,156 @@
+import json
+import os
+
+import pytest
+
+from app import create_app
+from services.dependency_graph import DependencyGraph
+from services.dependency_service import configure_dependency_sources
+from services.simulator import simulate
+
+FIXED = {t: {"median_minutes": m, "sigma": 0.0}
+         for t, m in (("ec2_instance", 10.0), ("rds_database", 60.0), ("s3_bucket", 5.0))}
+
+
+def test_fixed_durations_match_the_schedule():
+    result = simulate(["ec2_instance"] * 8, durations=FIXED, max_workers=4, iterations=5)
+    assert result["makespan_minutes"] == {"mean": 20.0, "p50": 20.0, "p95": 20.0, "max": 20.0}
+    assert result["by_type"]["ec2_instance"]["mean_wait_minutes"] == 5.0
+    assert result["by_type"]["ec2_instance"]["constraint"] == "global"
+
+
+def test_type_cap_is_the_bottleneck():
+    types = ["rds_database"] * 4 + ["ec2_instance"] * 8
+    result = simulate(types, durations=FIXED, max_workers=8,
+                      type_limits={"rds_database": 1}, iterations=3)
+    assert result["makespan_minutes"]["p50"] == 240.0
+    assert result["bottlenecks"][0] == "rds_database"
+    rds = result["by_type"]["rds_database"]
+    assert rds["constraint"] == "type"
+    assert rds["finishes_last"] == 1.0
+    # EC2 work fills the free slots instead of queueing behind the databases.
+    assert result["by_type"]["ec2_instance"]["finish_p95_minutes"] <= 20.0
+
+
+def test_account_cap():
+    types = ["ec2_instance"] * 4
+    result = simulate(types, ["a", "a", "a", "b"], durations=FIXED, max_workers=10,
+                      account_limit=1, iterations=2)
+    assert result["makespan_minutes"]["p50"] == 30.0
+    assert result["by_type"]["ec2_instance"]["constraint"] == "account"
+
+
+def test_dependencies_serialise_the_plan():
+    # 0 depends on 1, which depends on 2; 3 and 4 form a cycle that moves together.
+    graph = DependencyGraph.from_edges(
+        ["r0", "r1", "r2", "r3", "r4"],
+        [("r0", "r1"), ("r1", "r2"), ("r3", "r4"), ("r4", "r3")],
+    )
+    result = simulate(["ec2_instance"] * 5, graph=graph, durations=FIXED,
+                      max_workers=10, iterations=2)
+    assert result["makespan_minutes"]["p50"] == 30.0
+
+
+def test_monte_carlo_spread_and_seed():
+    types = ["rds_database", "ec2_instance", "s3_bucket"] * 50
+    first = simulate(types, max_workers=4, iterations=500, seed=3)
+    again = simulate(types, max_workers=4, iterations=500, seed=3)
+    assert first == again
+    makespan = first["makespan_minutes"]
+    assert makespan["p50"] < makespan["p95"] <= makespan["max"]
+    assert sum(t["finishes_last"] for t in first["by_type"].values()) == pytest.approx(1.0)
+
+
+def test_empty_plan():
+    result = simulate([], iterations=10)
+    assert result["makespan_minutes"]["p95"] == 0.0
+    assert result["bottlenecks"] == []
+
+
+@pytest.fixture
+def client(tmp_path):
+    os.environ["MIGRATION_STATE_DIR"] = str(tmp_path)
+    app = create_app("testing")
+    with app.test_client() as client:
+        yield client
+    configure_dependency_sources()
+
+
+def _create(client, resources):
+    resp = client.post("/api/v1/migrations", data=json.dumps({
+        "name": "Wave 1", "source_environment": "dc1", "target_environment": "aws",
+        "strategy": "rehost", "resources": resources,
+    }), content_type="application/json")
+    return resp.get_json()["id"]
+
+
+def test_simulate_route(client, tmp_path):
+    edges = tmp_path / "edges.json"
+    edges.write_text(json.dumps([["alb-web-prod", "db-cluster-prod-01"]]))
+    configure_dependency_sources([str(edges)])
+    mid = _create(client, [
+        {"resource_id": "alb-web-prod", "resource_type": "load_balancer", "name": "alb"},
+        {"resource_id": "db-cluster-prod-01", "resource_type": "rds_database", "name": "db"},
+    ])
+    resp = client.post(f"/api/v1/migrations/{mid}/simulate", data=json.dumps({
+        "iterations": 50,
+        "seed": 1,
+        "durations": {"rds_database": {"median_minutes": 60, "sigma": 0},
+                      "load_balancer": {"median_minutes": 10, "sigma": 0}},
+    }), content_type="application/json")
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data["migration_id"] == mid
+    assert data["dependencies"] is True
+    assert data["makespan_minutes"]["p95"] == 70.0
+    assert data["limits"]["max_workers"] == 8
+
+    resp = client.post(f"/api/v1/migrations/{mid}/simulate",
+                       data=json.dumps({"dependencies": False, "iterations": 5,
+                                        "durations": {"rds_database": {"median_minutes": 60,
+                                                                       "sigma": 0}}}),
+                       content_type="application/json")
+    assert resp.get_json()["makespan_minutes"]["p50"] == 60.0
+
+
+def test_simulate_route_errors(client):
+    assert client.post("/api/v1/migrations/nope/simulate").status_code == 404
+    mid = _create(client, [])
+    resp = client.post(f"/api/v1/migrations/{mid}/simulate",
+                       data=json.dumps({"type_limits": {"mainframe": 2}}),
+                       content_type="application/json")
+    assert resp.status_code == 400
+    resp = client.post(f"/api/v1/migrations/{mid}/simulate",
+                       data=json.dumps({"iterations": 0}), content_type="application/json")
+    assert resp.status_code == 400
+    for body in ({"seed": -1}, {"account_limit": 100000000},
+                 {"type_limits": {"ec2_instance": 100000000}}):
+        resp = client.post(f"/api/v1/migrations/{mid}/simulate", data=json.dumps(body),
+                           content_type="application/json")
+        assert resp.status_code == 400
+
+
+def test_simulate_route_caps_iterations_times_resources(client, monkeypatch):
+    from routes import migrations as migration_routes
+
+    monkeypatch.setattr(migration_routes, "MAX_SIMULATION_CELLS", 100)
+    mid = _create(client, [{"resource_id": f"r{i}", "resource_type": "ec2_instance",
+                            "name": f"r{i}"} for i in range(10)])
+    simulate_path = f"/api/v1/migrations/{mid}/simulate"
+    ok = client.post(simulate_path, data=json.dumps({"iterations": 10}),
+                     content_type="application/json")
+    assert ok.status_code == 200
+    too_big = client.post(simulate_path, data=json.dumps({"iterations": 11}),
+                          content_type="application/json")
+    assert too_big.status_code == 400
+    assert "10 resources" in too_big.get_json()["error"]
+
+
+def test_pools_are_sized_by_their_members():
+    # Caps far above the resource count must not change the result.
+    types = ["ec2_instance", "rds_database", "ec2_instance"]
+    tight = simulate(types, ["a", "a", "b"], max_workers=3, account_limit=2,
+                     type_limits={"ec2_instance": 2}, iterations=200, seed=7)
+    loose = simulate(types, ["a", "a", "b"], max_workers=1024, account_limit=1024,
+                     type_limits={"ec2_instance": 1024}, iterations=200, seed=7)
+    assert tight["makespan_minutes"] == loose["makespan_minutes"]
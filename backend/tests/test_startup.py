@@ -0,0 +1,80 @@
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.startup import parse_importtime, run_startup
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy modules a lazily loaded app must not import before its first API request.
+DEFERRED = ("numpy", "marshmallow", "boto3", "routes.migrations", "routes.resources",
+            "routes.analytics", "services.migration_service", "services.executor",
+            "services.analytics_service")
+
+_PROBE = """
+import json, sys
+from app import create_app
+app = create_app("testing")
+loaded = {m: m in sys.modules for m in json.loads(sys.argv[1])}
+client = app.test_client()
+health = client.get("/healthz").status_code
+after_health = {m: m in sys.modules for m in loaded}
+listing = client.get("/api/v1/resources?limit=3")
+after_resources = {m: m in sys.modules for m in loaded}
+created = client.post("/api/v1/migrations", json={
+    "name": "lazy", "source_environment": "a", "target_environment": "b",
+    "strategy": "rehost"}).status_code
+print(json.dumps({"loaded": loaded, "after_health": after_health,
+                  "after_resources": after_resources, "health": health,
+                  "resources": listing.get_json(), "created": created,
+                  "metrics": client.get("/metrics").get_data(as_text=True)}))
+"""
+
+
+def _probe(tmp_path, lazy):
+    env = dict(os.environ, LAZY_LOADING="true" if lazy else "false",
+               MIGRATION_STATE_DIR=str(tmp_path))
+    proc = subprocess.run([sys.executable, "-c", _PROBE, json.dumps(DEFERRED)],
+                          cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+                          check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def test_lazy_app_defers_blueprints_and_heavy_imports(tmp_path):
+    lazy = _probe(tmp_path / "lazy", lazy=True)
+    assert not any(lazy["loaded"].values()), lazy["loaded"]
+    assert not any(lazy["after_health"].values())
+    assert lazy["health"] == 200
+    # plain resource listing needs neither numpy nor the other blueprints
+    assert lazy["after_resources"]["routes.resources"]
+    assert not lazy["after_resources"]["numpy"]
+    assert not lazy["after_resources"]["routes.migrations"]
+
+    eager = _probe(tmp_path / "eager", lazy=False)
+    assert all(eager["loaded"][m] for m in DEFERRED if m != "boto3")
+    assert lazy["resources"] == eager["resources"]
+    assert lazy["created"] == eager["created"] == 201
+    # sub-apps keep the root app's request metrics
+    route = 'route="/api/v1/migrations",method="POST",status="201"} 1'
+    assert route in lazy["metrics"] and route in eager["metrics"]
+
+
+def test_parse_importtime_stops_at_ready_marker():
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 |   numpy.core",
+        "import time:       250 |        350 | numpy",
+        "import time:        40 |         40 | app",
+        "-- app ready --",
+        "import time:       900 |        900 | marshmallow",
+    ])
+    assert parse_importtime(stderr) == {"numpy": 350, "app": 40}
+
+
+def test_run_startup_reports_both_modes():
+    report = run_startup(repeat=1, probes=("/healthz",))
+    eager, lazy = report["modes"]["eager"], report["modes"]["lazy"]
+    assert eager["statuses"] == lazy["statuses"] == {"/healthz": 200}
+    assert lazy["modules_ready"] < eager["modules_ready"]
+    assert "numpy" in eager["imports_ms"] and "numpy" not in lazy["imports_ms"]
@@ -0,0 +1,131 @@
+import gzip
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app import create_app
+from services.analytics_service import configure_metrics
+from services.metrics_store import MetricsStore, nan_quantile
+from services.workload import WORKLOAD_CLASSES, classify_workloads
+
+DAY0 = 1_790_000_000 // 86400 * 86400  # midnight UTC
+
+
+def _cpu(kind, hour):
+    if kind == "idle":
+        return 1.0
+    if kind == "batch":
+        return 90.0 if hour % 24 < 3 else 1.0
+    if kind == "bursty":
+        return 95.0 if hour % 7 == 0 else 20.0
+    return 40.0 + (hour % 2)
+
+
+def _write_dump(path, kinds, days=3):
+    lines = ["timestamp,resource_id,metric,value"]
+    for hour in range(days * 24):
+        for minute in (0, 30):
+            ts = DAY0 + hour * 3600 + minute * 60
+            for rid, kind in kinds.items():
+                lines.append(f"{ts},{rid},CPUUtilization,{_cpu(kind, hour)}")
+                lines.append(f"{ts},{rid},NetworkIn,{100 if kind == 'idle' else 1e8}")
+    lines.append(f"{DAY0},x,DiskReadOps,1")
+    lines.append(f"{DAY0},x,cpu,not-a-number")
+    data = "\n".join(lines) + "\n"
+    if str(path).endswith(".gz"):
+        path.write_bytes(gzip.compress(data.encode()))
+    else:
+        path.write_text(data)
+
+
+@pytest.fixture
+def store(tmp_path):
+    kinds = {"r-idle": "idle", "r-batch": "batch", "r-bursty": "bursty", "r-steady": "steady"}
+    _write_dump(tmp_path / "a.csv.gz", kinds)
+    _write_dump(tmp_path / "b.csv", {"r-new": "steady"}, days=1)
+    s = MetricsStore(str(tmp_path / "store"))
+    stats = s.ingest([str(tmp_path / "a.csv.gz"), str(tmp_path / "b.csv")], max_open_days=1)
+    assert stats["skipped"] == 4
+    assert stats["days"] == 3
+    assert stats["resources"] == 5
+    return s
+
+
+def test_rollups_and_series(store):
+    first = date(1970, 1, 1) + timedelta(days=DAY0 // 86400)
+    raw = store.chunk(first, "5m")
+    assert raw.shape == (5, 4, 288)
+    hourly = store.chunk(first, "1h")
+    row = store.rows["r-batch"]
+    assert hourly[row, 0, 0].tolist() == [90.0, 90.0]
+    assert hourly[row, 0, 5].tolist() == [1.0, 1.0]
+
+    # r-new only has data for the first day; later chunks predate its row
+    last = store.window(1)[0]
+    assert store.chunk(last, "1h").shape[0] == 4
+    assert np.isnan(store.block("cpu", 0, 5, [last])[4]).all()
+    times, values = store.series("r-steady", "cpu", days=3, resolution="1d")
+    assert len(values) == 3 and times[1] - times[0] == 86400
+    assert store.series("nope", "cpu") is None
+
+    reopened = MetricsStore(store.root)
+    assert reopened.generation == store.generation
+    assert reopened.ids == store.ids
+
+
+def test_reload_reads_the_manifest_only_when_it_changed(store, tmp_path, monkeypatch):
+    reader = MetricsStore(store.root)
+    opened, real_open = [], open
+
+    def spy(path, *args, **kwargs):
+        opened.append(str(path))
+        return real_open(path, *args, **kwargs)
+    monkeypatch.setattr("builtins.open", spy)
+    assert reader.reload() is False
+    assert opened == []
+
+    _write_dump(tmp_path / "c.csv", {"r-late": "steady"}, days=1)
+    store.ingest([str(tmp_path / "c.csv")])
+    opened.clear()
+    assert reader.reload() is True
+    assert reader.generation == store.generation and "r-late" in reader.rows
+    assert any(path.endswith("manifest.json") for path in opened)
+
+
+def test_classification(store):
+    profile = classify_workloads(store, days=3, block_rows=2)
+    classes = {rid: WORKLOAD_CLASSES[c] for rid, c in zip(profile.ids, profile.labels)}
+    assert classes == {"r-idle": "idle", "r-batch": "batch", "r-bursty": "bursty",
+                       "r-steady": "steady", "r-new": "steady"}
+    assert profile.counts()["unknown"] == 0
+    assert profile.get("r-batch")["features"]["idle_fraction"] == pytest.approx(21 / 24, 1e-3)
+
+    short = classify_workloads(store, days=30, end=store.window(1)[0].replace(day=1))
+    assert short.counts()["unknown"] == 5
+
+
+def test_nan_quantile_matches_numpy():
+    rng = np.random.default_rng(1)
+    values = rng.random((50, 40))
+    values[values < 0.2] = np.nan
+    values[3] = np.nan
+    expected = np.nanpercentile(values[4:], 95, axis=1)
+    assert np.allclose(nan_quantile(values, 0.95)[4:], expected)
+    assert np.isnan(nan_quantile(values, 0.95)[3])
+
+
+def test_workloads_endpoint(store):
+    app = create_app("testing")
+    configure_metrics(store.root)
+    try:
+        with app.test_client() as client:
+            data = client.get("/api/v1/analytics/workloads?days=3").get_json()
+            assert data["resource_count"] == 5
+            assert data["by_class"]["batch"] == 1
+            one = client.get("/api/v1/analytics/workloads?days=3&resource_id=r-idle")
+            assert one.get_json()["workload_class"] == "idle"
+            assert client.get("/api/v1/analytics/workloads?resource_id=zz").status_code == 404
+            assert client.get("/api/v1/analytics/workloads?days=0").status_code == 400
+    finally:
+        configure_metrics("")
@@ -1,5 +1,5 @@
-import React, { useEffect, useState, useCallback } from "react";
-import { fetchCostEstimate } from "../services/api";
+import React, { useEffect, useState } from "react";
+import { fetchCostMatrix } from "../services/api";
 
 const STRATEGIES = [
   { key: "rehost", label: "Rehost", desc: "Lift-and-shift" },
@@ -12,19 +12,23 @@ const STRATEGIES = [
 
 function CostEstimator() {
   const [strategy, setStrategy] = useState("replatform");
-  const [data, setData] = useState(null);
+  const [matrix, setMatrix] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
-  const load = useCallback((s) => {
-    setLoading(true);
-    fetchCostEstimate(s)
-      .then((res) => setData(res.data))
+  // One request prices every strategy; switching strategy is local.
+  useEffect(() => {
+    fetchCostMatrix()
+      .then((res) => setMatrix(res.data))
       .catch((err) => setError(err.message))
       .finally(() => setLoading(false));
   }, []);
 
-  useEffect(() => { load(strategy); }, [strategy, load]);
+  const data = matrix && {
+    ...matrix.strategies[strategy],
+    current_monthly_estimate_usd: matrix.current_monthly_estimate_usd,
+    resource_count: matrix.resource_count,
+  };
 
   return (
     <div>
@@ -1,5 +1,9 @@
-import React, { useEffect, useState } from "react";
-import { fetchDashboard, fetchCostEstimate } from "../services/api";
+import React, { useCallback, useEffect, useState } from "react";
+import {
+  fetchDashboard,
+  fetchCostEstimate,
+  subscribeMigrationEvents,
+} from "../services/api";
 
 function Dashboard() {
   const [data, setData] = useState(null);
@@ -7,7 +11,7 @@ function Dashboard() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
 
-  useEffect(() => {
+  const load = useCallback(() => {
     Promise.all([fetchDashboard(), fetchCostEstimate("replatform")])
       .then(([dashRes, costRes]) => {
         setData(dashRes.data);
@@ -17,10 +21,17 @@ function Dashboard() {
       .finally(() => setLoading(false));
   }, []);
 
+  useEffect(() => { load(); }, [load]);
+
+  // Every change event carries the new migration stats.
+  useEffect(() => subscribeMigrationEvents((change) => {
+    setData((current) => current && { ...current, migrations: change.stats });
+  }, load), [load]);
+
   if (loading) return <div className="loading">Loading dashboard...</div>;
   if (error) return <div className="error-msg">{error}</div>;
 
-  const { migrations, resources } = data;
+  const { migrations, resources, recommendations } = data;
 
   return (
     <div>
@@ -89,6 +100,31 @@ function Dashboard() {
           </div>
         </div>
       )}
+
+      {recommendations && (
+        <div className="section">
+          <h3 className="section-title">Recommended Strategies</h3>
+          <div className="card-grid">
+            <div className="card cost-card">
+              <div className="card-label">Portfolio Savings</div>
+              <div className="card-value">
+                ${recommendations.portfolio.monthly_savings_usd.toLocaleString()}/mo
+              </div>
+              <div className="card-sub">
+                mean risk {recommendations.portfolio.mean_risk_score}
+              </div>
+            </div>
+            {Object.entries(recommendations.recommended.by_strategy)
+              .filter(([, row]) => row.resource_count > 0)
+              .map(([strategy, row]) => (
+                <div className="card" key={strategy}>
+                  <div className="card-label">{strategy}</div>
+                  <div className="card-value">{row.resource_count}</div>
+                </div>
+              ))}
+          </div>
+        </div>
+      )}
     </div>
   );
 }
@@ -4,6 +4,7 @@ import {
   createMigration,
   updateMigration,
   deleteMigration,
+  subscribeMigrationEvents,
 } from "../services/api";
 
 const STRATEGIES = [
@@ -39,26 +40,33 @@ function MigrationList() {
 
   useEffect(() => { load(); }, [load]);
 
+  // Patch the list from the change stream instead of reloading it.
+  useEffect(() => subscribeMigrationEvents((change) => {
+    setMigrations((current) => {
+      const rest = current.filter((m) => m.id !== change.id);
+      if (change.type === "deleted") return rest;
+      if (change.type === "created") return [change.migration, ...rest];
+      return current.map((m) => (m.id === change.id ? change.migration : m));
+    });
+  }, load), [load]);
+
   const handleCreate = (e) => {
     e.preventDefault();
     createMigration(form)
       .then(() => {
         setForm(EMPTY_FORM);
         setShowForm(false);
-        load();
       })
       .catch((err) => setError(err.message));
   };
 
   const handleStatusChange = (id, status) => {
     updateMigration(id, { status })
-      .then(() => load())
       .catch((err) => setError(err.message));
   };
 
   const handleDelete = (id) => {
     deleteMigration(id)
-      .then(() => load())
       .catch((err) => setError(err.message));
   };
 
@@ -33,6 +33,18 @@ export function fetchMigrationStats() {
   return api.get("/migrations/stats");
 }
 
+// Subscribe to migration changes (Server-Sent Events). `onChange` gets
+// {type: "created" | "updated" | "deleted", id, migration, stats};
+// `onResync` is called when the client missed changes and must refetch.
+// The browser reconnects (resuming with Last-Event-ID) on its own.
+// Returns an unsubscribe function.
+export function subscribeMigrationEvents(onChange, onResync) {
+  const source = new EventSource(`${BASE_URL}/migrations/events`);
+  source.addEventListener("migration", (e) => onChange(JSON.parse(e.data)));
+  source.addEventListener("resync", () => onResync && onResync());
+  return () => source.close();
+}
+
 // ---- Resources ----
 
 export function fetchResources(params = {}) {
@@ -53,4 +65,12 @@ export function fetchCostEstimate(strategy = "replatform") {
   return api.get("/analytics/cost-estimate/all", { params: { strategy } });
 }
 
+export function fetchCostMatrix(params = {}) {
+  return api.get("/analytics/cost-estimate/matrix", { params });
+}
+
+export function fetchRecommendations(params = {}) {
+  return api.get("/analytics/recommendations", { params });
+}
+
 export default api;
@@ -8,6 +8,13 @@
 #   ./scripts/migrate.sh test      - Run all tests
 #   ./scripts/migrate.sh docker    - Build and run via Docker Compose
 #   ./scripts/migrate.sh clean     - Tear down containers and temp files
+#   ./scripts/migrate.sh import-sqlite [dir]
+#                                  - Import migrations.json into the SQLite store
+#   ./scripts/migrate.sh verify-stats [--repair]
+#                                  - Check the migration stats aggregate for drift
+#   ./scripts/migrate.sh bench [--save]
+#                                  - Compare hot-path timings against the baseline
+#                                    (--save records a new baseline instead)
 
 set -euo pipefail
 
@@ -77,14 +84,44 @@ cmd_clean() {
     log "Cleaned up."
 }
 
+cmd_import_sqlite() {
+    local state_dir="${1:-${MIGRATION_STATE_DIR:-/tmp/migrations}}"
+    log "Importing JSON migration state from $state_dir into SQLite..."
+    cd "$PROJECT_ROOT/backend"
+    python -m services.migration_store_sqlite import "$state_dir"
+    log "Set MIGRATION_STORE_BACKEND=sqlite to use it."
+}
+
+cmd_verify_stats() {
+    local command="verify"
+    if [[ "${1:-}" == "--repair" ]]; then
+        command="rebuild"
+    fi
+    cd "$PROJECT_ROOT/backend"
+    python -m services.migration_stats "$command"
+}
+
+cmd_bench() {
+    local baseline="benchmarks/baselines/reference.json"
+    cd "$PROJECT_ROOT/backend"
+    if [[ "${1:-}" == "--save" ]]; then
+        python -m benchmarks run --output "$baseline"
+    else
+        python -m benchmarks compare "$baseline"
+    fi
+}
+
 case "${1:-help}" in
     setup)  cmd_setup ;;
     dev)    cmd_dev ;;
     test)   cmd_test ;;
     docker) cmd_docker ;;
     clean)  cmd_clean ;;
+    import-sqlite) cmd_import_sqlite "${2:-}" ;;
+    verify-stats)  cmd_verify_stats "${2:-}" ;;
+    bench)  cmd_bench "${2:-}" ;;
     *)
-        echo "Usage: $0 {setup|dev|test|docker|clean}"
+        echo "Usage: $0 {setup|dev|test|docker|clean|import-sqlite|verify-stats|bench}"
         exit 1
         ;;
 esac